@@ -7,12 +7,15 @@ pds_ingress_client
 Client side script used to perform ingress request to the DUM service in AWS.
 """
 import argparse
+import base64
 import calendar
 import json
 import os
 import sched
 import sys
+import tempfile
 import time
+from collections import defaultdict
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
@@ -29,13 +32,22 @@ from pds.ingress.util.auth_util import AuthUtil
 from pds.ingress.util.backoff_util import backoff_handler
 from pds.ingress.util.backoff_util import simulate_batch_request_failure
 from pds.ingress.util.backoff_util import simulate_ingress_failure
+from pds.ingress.util.bloom_filter_util import BloomFilter
+from pds.ingress.util.bloom_filter_util import content_filter_item
+from pds.ingress.util.cache_util import compute_idempotency_key
+from pds.ingress.util.cache_util import IDEMPOTENCY_KEY_HEADER
 from pds.ingress.util.config_util import ConfigUtil
 from pds.ingress.util.hash_util import md5_for_path
+from pds.ingress.util.job_util import JOB_STATE_FAILED
+from pds.ingress.util.job_util import JOB_STATE_RUNNING
 from pds.ingress.util.log_util import Color
 from pds.ingress.util.log_util import get_log_level
 from pds.ingress.util.log_util import get_logger
 from pds.ingress.util.node_util import NodeUtil
 from pds.ingress.util.path_util import PathUtil
+from pds.ingress.util.preflight_util import is_unchanged_in_listing
+from pds.ingress.util.preflight_util import PREFLIGHT_NEW
+from pds.ingress.util.preflight_util import PREFLIGHT_UNCHANGED
 from pds.ingress.util.progress_util import close_batch_progress_bars
 from pds.ingress.util.progress_util import close_ingress_total_progress_bar
 from pds.ingress.util.progress_util import close_path_progress_bar
@@ -71,6 +83,21 @@ SUMMARY_TABLE = dict()
 MANIFEST = dict()
 """Stores the file ingress manifest within memory"""
 
+PREFLIGHT_STATES = dict()
+"""Maps the trimmed path of each file the service reported as new during pre-flight to its state"""
+
+PREFLIGHT_CHUNK_SIZE = 1000
+"""Number of files submitted with each pre-flight request"""
+
+CONTENT_FILTER = None
+"""Bloom filter of the content already ingested by the node, used to identify files which are definitely new"""
+
+ALLOW_COPY = False
+"""Whether the service may satisfy requests for content it already holds under another key with a server-side copy"""
+
+URL_RENEWAL_MARGIN = 300
+"""Seconds before the reported expiry of an upload URL at which it is renewed rather than used"""
+
 
 def _authenticate(cognito_config):
     """
@@ -129,7 +156,506 @@ def prepare_batches(batched_ingress_paths, prefix):
     return request_batches
 
 
-def perform_ingress(request_batches, node_id, force_overwrite, api_gateway_config):
+def complete_manifest(ingress_paths, prefix):
+    """
+    Adds an entry to the manifest for each of the provided files which does not
+    already have one, such as files skipped by the pre-flight or sync stages
+    before they were hashed. Existing entries, including those read from a
+    manifest file, are reused as-is.
+
+    Parameters
+    ----------
+    ingress_paths : list of str
+        The resolved paths of the files which should be described by the manifest.
+    prefix : dict
+        Path prefix value to trim from each ingress path to derive the path
+        structure to be used in S3. May be optionally mapped to a replacement value
+        for the old prefix.
+
+    """
+    logger = get_logger("complete_manifest")
+
+    missing_paths = [
+        ingress_path for ingress_path in ingress_paths if PathUtil.trim_ingress_path(ingress_path, prefix) not in MANIFEST
+    ]
+
+    if not missing_paths:
+        return
+
+    logger.info("Hashing %d skipped file(s) absent from the manifest", len(missing_paths))
+
+    # Preparing the files for ingress records their entries within the manifest
+    prepare_batches(list(batched(missing_paths, PREFLIGHT_CHUNK_SIZE)), prefix)
+
+
+def preflight_ingress_paths(ingress_paths, prefix, node_id, api_gateway_config):
+    """
+    Performs the pre-flight stage of an ingress request, where the size and
+    last modified time of each file is checked against what already exists in
+    S3, so files which are unchanged can be skipped without first computing
+    their MD5 checksums.
+
+    Parameters
+    ----------
+    ingress_paths : list of str
+        The resolved paths of all files to be ingested.
+    prefix : dict
+        Path prefix value to trim from each ingress path to derive the path
+        structure to be used in S3. May be optionally mapped to a replacement value
+        for the old prefix.
+    node_id : str
+        The PDS Node Identifier to associate with the pre-flight request.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance
+        used to request ingress.
+
+    Returns
+    -------
+    remaining_paths : list of str
+        The ingress paths which still need to be hashed and requested for
+        ingress, in their original order. All paths are returned if the service
+        does not support pre-flight requests.
+
+    """
+    logger = get_logger("preflight_ingress_paths")
+
+    logger.info("Performing pre-flight check of %d file(s)...", len(ingress_paths))
+    start_time = time.time()
+
+    chunks = list(batched(ingress_paths, PREFLIGHT_CHUNK_SIZE))
+
+    if not chunks:
+        return []
+
+    # The first chunk determines whether the service supports pre-flight requests at all
+    first_chunk_paths = _preflight_chunk(chunks[0], prefix, node_id, api_gateway_config)
+
+    if first_chunk_paths is None:
+        logger.warning("Pre-flight requests are not supported by the service, all files will be hashed")
+        return list(ingress_paths)
+
+    remaining_chunks = [first_chunk_paths]
+
+    remaining_chunks.extend(
+        PARALLEL(
+            delayed(_preflight_chunk)(chunk, prefix, node_id, api_gateway_config, fallback=True) for chunk in chunks[1:]
+        )
+    )
+
+    remaining_paths = [path for chunk in remaining_chunks for path in chunk]
+
+    logger.info(
+        "Pre-flight check completed in %.2f seconds, %d unchanged file(s) skipped",
+        time.time() - start_time,
+        len(ingress_paths) - len(remaining_paths),
+    )
+
+    return remaining_paths
+
+
+def _preflight_chunk(ingress_path_chunk, prefix, node_id, api_gateway_config, fallback=False):
+    """
+    Performs the pre-flight request for a single chunk of ingress paths.
+    Unchanged files are recorded as skipped within the summary table, while
+    files the service reports as new are recorded within PREFLIGHT_STATES, so
+    their subsequent ingress requests need not be checked against S3 again.
+
+    Parameters
+    ----------
+    ingress_path_chunk : list of str
+        The ingress paths to check.
+    prefix : dict
+        Path prefix value to trim from each ingress path.
+    node_id : str
+        The PDS Node Identifier to associate with the pre-flight request.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance.
+    fallback : bool, optional
+        If True, all paths are returned should the service not support
+        pre-flight requests, otherwise None is returned.
+
+    Returns
+    -------
+    remaining_paths : list of str or None
+        The paths within the chunk which were not found to be unchanged.
+
+    """
+    global SUMMARY_TABLE  # noqa: F824
+
+    # Files with checksums from a pre-existing manifest gain nothing from pre-flight
+    preflight_paths = {
+        ingress_path: PathUtil.trim_ingress_path(ingress_path, prefix)
+        for ingress_path in ingress_path_chunk
+        if PathUtil.trim_ingress_path(ingress_path, prefix) not in MANIFEST
+    }
+
+    if not preflight_paths:
+        return list(ingress_path_chunk)
+
+    preflight_batch = [
+        {
+            "trimmed_path": trimmed_path,
+            "size": os.stat(ingress_path).st_size,
+            "last_modified": int(os.path.getmtime(ingress_path)),
+        }
+        for ingress_path, trimmed_path in preflight_paths.items()
+    ]
+
+    states = request_preflight(preflight_batch, node_id, api_gateway_config)
+
+    if states is None:
+        return list(ingress_path_chunk) if fallback else None
+
+    path_states = dict(zip(preflight_paths, states))
+
+    unchanged_paths = [path for path, state in path_states.items() if state == PREFLIGHT_UNCHANGED]
+
+    if unchanged_paths:
+        update_summary_table(SUMMARY_TABLE, "skipped", unchanged_paths)
+
+    for ingress_path, state in path_states.items():
+        if state == PREFLIGHT_NEW:
+            PREFLIGHT_STATES[preflight_paths[ingress_path]] = state
+
+    return [path for path in ingress_path_chunk if path_states.get(path) != PREFLIGHT_UNCHANGED]
+
+
+@backoff.on_exception(
+    backoff.expo, requests.exceptions.RequestException, max_time=120, on_backoff=backoff_handler, logger=None
+)
+def request_preflight(preflight_batch, node_id, api_gateway_config, request_timeout=600):
+    """
+    Submits a pre-flight request for a batch of files to the PDS Ingress App API.
+
+    Parameters
+    ----------
+    preflight_batch : list of dict
+        List containing the trimmed path, size and last modified time of each file.
+    node_id : str
+        PDS node identifier.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+    request_timeout : int, optional
+        Request timeout in seconds.
+
+    Returns
+    -------
+    states : list of str or None
+        The pre-flight state of each file, in request order, or None if the
+        service does not support pre-flight requests.
+
+    """
+    api_gateway_url, params, headers = _ingress_request_parameters(node_id, False, api_gateway_config)
+
+    response = requests.post(
+        api_gateway_url,
+        params=params,
+        data=json.dumps({"action": "preflight", "files": preflight_batch}),
+        headers=headers,
+        timeout=request_timeout,
+    )
+
+    if response.status_code == HTTPStatus.OK:
+        return response.json()["states"]
+
+    # Services predating pre-flight requests treat them as malformed asynchronous job requests
+    if response.status_code in (HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_IMPLEMENTED):
+        return None
+
+    # Throttled or temporarily unavailable, raise so the request is retried
+    if response.status_code in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+        response.raise_for_status()
+
+    _exit_on_request_failure(response)
+
+
+def sync_ingress_paths(ingress_paths, prefix, node_id, api_gateway_config):
+    """
+    Determines which files have changed by comparing them locally against a
+    listing of the objects already ingested under the same trimmed path roots,
+    in the manner of rsync. Only files which are new or changed are returned
+    for hashing and ingress.
+
+    Parameters
+    ----------
+    ingress_paths : list of str
+        The resolved paths of all files to be ingested.
+    prefix : dict
+        Path prefix value to trim from each ingress path to derive the path
+        structure to be used in S3.
+    node_id : str
+        The PDS Node Identifier to list ingested objects for.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance.
+
+    Returns
+    -------
+    remaining_paths : list of str or None
+        The ingress paths which still need to be hashed and requested for
+        ingress, in their original order, or None if the service does not
+        support listing requests.
+
+    """
+    global SUMMARY_TABLE  # noqa: F824
+
+    logger = get_logger("sync_ingress_paths")
+
+    trimmed_paths = {ingress_path: PathUtil.trim_ingress_path(ingress_path, prefix) for ingress_path in ingress_paths}
+
+    # List each top-level directory (or file) of the trimmed paths
+    prefix_roots = sorted(
+        {
+            trimmed_path.split("/", 1)[0] + "/" if "/" in trimmed_path else trimmed_path
+            for trimmed_path in trimmed_paths.values()
+        }
+    )
+
+    start_time = time.time()
+
+    listing = fetch_remote_listing(prefix_roots, node_id, api_gateway_config)
+
+    if listing is None:
+        logger.warning("Listing requests are not supported by the service, sync will not be performed")
+        return None
+
+    logger.info("Fetched listing of %d object(s) in %.2f seconds", len(listing), time.time() - start_time)
+
+    remaining_paths = []
+    unchanged_paths = []
+
+    for ingress_path, trimmed_path in trimmed_paths.items():
+        listing_entries = listing.get(trimmed_path)
+
+        if not listing_entries:
+            # Lets the service skip checking S3 for the file again
+            PREFLIGHT_STATES[trimmed_path] = PREFLIGHT_NEW
+            remaining_paths.append(ingress_path)
+            continue
+
+        manifest_entry = MANIFEST.get(trimmed_path, {})
+
+        if is_unchanged_in_listing(
+            os.stat(ingress_path).st_size,
+            int(os.path.getmtime(ingress_path)),
+            manifest_entry.get("md5"),
+            listing_entries,
+        ):
+            unchanged_paths.append(ingress_path)
+        else:
+            remaining_paths.append(ingress_path)
+
+    if unchanged_paths:
+        update_summary_table(SUMMARY_TABLE, "skipped", unchanged_paths)
+
+    logger.info(
+        "Sync found %d unchanged file(s), %d file(s) to ingest", len(unchanged_paths), len(remaining_paths)
+    )
+
+    return remaining_paths
+
+
+def fetch_remote_listing(prefix_roots, node_id, api_gateway_config):
+    """
+    Fetches the full listing of the objects ingested by a node under each of
+    the provided trimmed path roots.
+
+    Parameters
+    ----------
+    prefix_roots : list of str
+        The trimmed path roots to list.
+    node_id : str
+        The PDS Node Identifier to list ingested objects for.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance.
+
+    Returns
+    -------
+    listing : dict or None
+        Mapping of each listed trimmed path to the (size, md5, last_modified)
+        of each object found for it, or None if the service does not support
+        listing requests.
+
+    """
+    listing = defaultdict(list)
+
+    for prefix_root in prefix_roots:
+        page_token = None
+
+        while True:
+            page = request_listing_page(prefix_root, page_token, node_id, api_gateway_config)
+
+            if page is None:
+                return None
+
+            for trimmed_path, size, md5_digest, last_modified in page["entries"]:
+                listing[trimmed_path].append((size, md5_digest, last_modified))
+
+            page_token = page.get("next_page_token")
+
+            if not page_token:
+                break
+
+    return listing
+
+
+@backoff.on_exception(
+    backoff.expo, requests.exceptions.RequestException, max_time=120, on_backoff=backoff_handler, logger=None
+)
+def request_listing_page(prefix_root, page_token, node_id, api_gateway_config, request_timeout=600):
+    """
+    Requests a single page of the listing of objects ingested by a node under
+    a trimmed path root from the PDS Ingress App API.
+
+    Parameters
+    ----------
+    prefix_root : str
+        The trimmed path root to list.
+    page_token : str or None
+        The token returned with the previous page, or None for the first page.
+    node_id : str
+        PDS node identifier.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+    request_timeout : int, optional
+        Request timeout in seconds.
+
+    Returns
+    -------
+    page : dict or None
+        The listing page, or None if the service does not support listing requests.
+
+    """
+    api_gateway_url, params, headers = _ingress_request_parameters(node_id, False, api_gateway_config)
+
+    # Listings are large and highly compressible
+    headers["Accept"] = "application/gzip, application/json"
+
+    action_request = {"action": "list", "prefix": prefix_root}
+
+    if page_token:
+        action_request["page_token"] = page_token
+
+    response = requests.post(
+        api_gateway_url, params=params, data=json.dumps(action_request), headers=headers, timeout=request_timeout
+    )
+
+    if response.status_code == HTTPStatus.OK:
+        page = response.json()
+
+        # Pages too large to return directly are staged in S3 by the service
+        if "offloaded_response" in page:
+            page = download_offloaded_response(page["offloaded_response"])
+
+        return page
+
+    # Services predating listing requests treat them as malformed asynchronous job requests
+    if response.status_code in (HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_IMPLEMENTED):
+        return None
+
+    # Throttled or temporarily unavailable, raise so the request is retried
+    if response.status_code in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+        response.raise_for_status()
+
+    _exit_on_request_failure(response)
+
+
+def fetch_content_filter(node_id, api_gateway_config):
+    """
+    Downloads the content filter published by the service for a node, which
+    summarizes the path, MD5 and size of every file the node has ingested.
+
+    Parameters
+    ----------
+    node_id : str
+        The PDS Node Identifier to fetch the content filter for.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance.
+
+    Returns
+    -------
+    content_filter : BloomFilter or None
+        The content filter, or None if the service has not published one for
+        the node, or does not support content filters.
+
+    """
+    logger = get_logger("fetch_content_filter")
+
+    filter_details = request_content_filter(node_id, api_gateway_config)
+
+    if filter_details is None:
+        logger.warning("No content filter is available from the service, all files will be checked by the service")
+        return None
+
+    response = requests.get(filter_details["url"], timeout=600)
+    response.raise_for_status()
+
+    try:
+        content_filter = BloomFilter.from_bytes(response.content)
+    except ValueError as err:
+        logger.warning("Unable to use content filter, reason: %s", str(err))
+        return None
+
+    logger.info(
+        "Fetched content filter of %d file(s) (%.1f KiB, built %s, false-positive rate %.2g)",
+        content_filter.num_items,
+        len(response.content) / 1024,
+        datetime.fromtimestamp(filter_details["built_at"], tz=timezone.utc).isoformat(),
+        filter_details["false_positive_rate"],
+    )
+
+    return content_filter
+
+
+@backoff.on_exception(
+    backoff.expo, requests.exceptions.RequestException, max_time=120, on_backoff=backoff_handler, logger=None
+)
+def request_content_filter(node_id, api_gateway_config, request_timeout=60):
+    """
+    Requests the details of the content filter published for a node from the
+    PDS Ingress App API.
+
+    Parameters
+    ----------
+    node_id : str
+        PDS node identifier.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+    request_timeout : int, optional
+        Request timeout in seconds.
+
+    Returns
+    -------
+    filter_details : dict or None
+        The presigned "url" of the filter, along with its "size", "num_items",
+        "false_positive_rate" and "built_at" time, or None if no filter is
+        available.
+
+    """
+    api_gateway_url, params, headers = _ingress_request_parameters(node_id, False, api_gateway_config)
+
+    response = requests.post(
+        api_gateway_url, params=params, data=json.dumps({"action": "filter"}), headers=headers, timeout=request_timeout
+    )
+
+    if response.status_code == HTTPStatus.OK:
+        return response.json()
+
+    # Services predating content filters treat the request as a malformed
+    # asynchronous job request, while others may not have published one yet
+    if response.status_code in (HTTPStatus.BAD_REQUEST, HTTPStatus.NOT_FOUND, HTTPStatus.NOT_IMPLEMENTED):
+        return None
+
+    # Throttled or temporarily unavailable, raise so the request is retried
+    if response.status_code in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+        response.raise_for_status()
+
+    _exit_on_request_failure(response)
+
+
+def perform_ingress(request_batches, node_id, force_overwrite, api_gateway_config, upload_mode="put"):
     """
     Performs an ingress request and transfer to S3 using credentials obtained
     from Cognito.
@@ -147,23 +673,328 @@ def perform_ingress(request_batches, node_id, force_overwrite, api_gateway_confi
     api_gateway_config : dict
         Dictionary containing configuration details for the API Gateway instance
         used to request ingress.
+    upload_mode : str, optional
+        Either "put" to upload each file with its own presigned URL, or "post"
+        to upload small files against presigned POST policies shared by each
+        batch. Defaults to "put".
+
+    """
+    logger = get_logger("perform_ingress")
+
+    try:
+        with get_ingress_total_progress_bar(total=len(request_batches)) as pbar:
+            PARALLEL(
+                (
+                    delayed(_process_batch)(
+                        batch_index, request_batch, node_id, force_overwrite, api_gateway_config, pbar, upload_mode
+                    )
+                    for batch_index, request_batch in enumerate(request_batches)
+                ),
+            )
+    except KeyboardInterrupt:
+        logger.warning("Keyboard interrupt received, halting ingress...")
+        return  # return so we can still output a report file
+
+
+def perform_async_ingress(request_batches, node_id, force_overwrite, api_gateway_config, poll_interval=5, stall_timeout=900):
+    """
+    Performs ingress of all prepared requests as a single asynchronous job.
+    Rather than submitting each batch of requests in turn, the full manifest
+    is uploaded to S3 for processing by the service, and the results are
+    streamed back and uploaded as each chunk of the manifest is processed.
+
+    Any file which does not receive a result, such as when the job fails or
+    stalls, is marked as failed so it is picked up by the (synchronous)
+    reattempt pass. Files whose upload URLs expire before they can be used
+    are requested again as synchronous batches to obtain fresh URLs.
+
+    Parameters
+    ----------
+    request_batches : list of iterables
+        The prepared requests for each file to ingest.
+    node_id : str
+        The PDS Node Identifier to associate with the ingress request.
+    force_overwrite : bool
+        Determines whether pre-existing versions of files on S3 should be
+        overwritten or not.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance
+        used to request ingress.
+    poll_interval : int, optional
+        Seconds to wait between job status requests when no new results are
+        available. Defaults to 5 seconds.
+    stall_timeout : int, optional
+        Seconds to wait for new results before giving up on the job. Defaults
+        to 900 seconds.
+
+    Returns
+    -------
+    handled : bool
+        False if the service does not support asynchronous requests, in which
+        case the caller should fall back to perform_ingress, True otherwise.
+
+    """
+    global SUMMARY_TABLE  # noqa: F824
+
+    logger = get_logger("perform_async_ingress")
+
+    job = request_async_job_action({"action": "create_job"}, node_id, force_overwrite, api_gateway_config)
+
+    if job is None:
+        return False
+
+    job_id = job["job_id"]
+
+    logger.info("Created asynchronous ingress job %s", job_id)
+
+    # Upload only the entries for the files in this request, since a manifest
+    # read from disk may describe files that are not part of this request
+    requests_by_path = {}
+
+    with tempfile.TemporaryDirectory() as manifest_dir:
+        manifest_path = os.path.join(manifest_dir, "manifest.json")
+
+        manifest = {}
+
+        for request_batch in request_batches:
+            for ingress_request in request_batch:
+                requests_by_path[ingress_request["ingress_path"]] = ingress_request
+                manifest[ingress_request["trimmed_path"]] = {
+                    "ingress_path": ingress_request["ingress_path"],
+                    "md5": ingress_request["md5"],
+                    "size": ingress_request["size"],
+                    "last_modified": datetime.fromtimestamp(
+                        ingress_request["last_modified"], tz=timezone.utc
+                    ).isoformat(),
+                }
+
+        write_manifest_file(manifest, manifest_path)
+
+        with open(manifest_path, "rb") as infile:
+            response = requests.put(job["manifest_url"], data=infile)
+            response.raise_for_status()
+
+    request_async_job_action({"action": "start_job", "job_id": job_id}, node_id, force_overwrite, api_gateway_config)
+
+    # Expired requests are renewed in batches no larger than those prepared
+    # for synchronous requests
+    renewal_batch_size = max(len(request_batch) for request_batch in request_batches)
+
+    consumed_chunks = set()
+    processed_paths = set()
+    next_chunk = 0
+    last_progress = time.time()
+
+    try:
+        with get_ingress_total_progress_bar(total=0) as pbar:
+            while True:
+                status = request_async_job_action(
+                    {"action": "job_status", "job_id": job_id, "after": next_chunk - 1 if next_chunk else None},
+                    node_id,
+                    force_overwrite,
+                    api_gateway_config,
+                )
+
+                if status["state"] == JOB_STATE_FAILED:
+                    logger.error("Asynchronous ingress job %s failed, reason: %s", job_id, status.get("message"))
+                    break
+
+                if status["state"] == JOB_STATE_RUNNING and pbar.total != status["total_chunks"]:
+                    pbar.total = status["total_chunks"]
+                    pbar.refresh()
+
+                new_parts = [part for part in status.get("parts", []) if part["chunk"] not in consumed_chunks]
+
+                for part_paths in PARALLEL(
+                    delayed(_process_async_part)(
+                        part, pbar, requests_by_path, renewal_batch_size, node_id, force_overwrite, api_gateway_config
+                    )
+                    for part in new_parts
+                ):
+                    processed_paths.update(part_paths)
+
+                consumed_chunks.update(part["chunk"] for part in new_parts)
+
+                while next_chunk in consumed_chunks:
+                    next_chunk += 1
+
+                if status["state"] == JOB_STATE_RUNNING and len(consumed_chunks) >= status["total_chunks"]:
+                    logger.info("Asynchronous ingress job %s complete", job_id)
+                    break
+
+                if new_parts:
+                    last_progress = time.time()
+                elif time.time() - last_progress > stall_timeout:
+                    logger.error("No results received for job %s in %d seconds, giving up", job_id, stall_timeout)
+                    break
+                else:
+                    time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        logger.warning("Keyboard interrupt received, halting ingress...")
+
+    unprocessed_paths = set(requests_by_path) - processed_paths
+
+    if unprocessed_paths:
+        logger.warning("%d file(s) received no result from job %s", len(unprocessed_paths), job_id)
+        update_summary_table(SUMMARY_TABLE, "failed", list(unprocessed_paths))
+
+    return True
+
+
+def _process_async_part(
+    part, total_pbar, requests_by_path, renewal_batch_size, node_id, force_overwrite, api_gateway_config
+):
+    """
+    Downloads a single results part of an asynchronous job, then uploads each
+    file described within it. Files whose upload URLs have expired, or are
+    about to, are requested again to obtain fresh URLs. This helper function
+    is intended for use with a Joblib parallelized loop.
+
+    Parameters
+    ----------
+    part : dict
+        The chunk index and presigned download URL of the results part.
+    total_pbar : tqdm.tqdm_asyncio
+        Total Ingress progress bar to update once the part has been fully
+        processed.
+    requests_by_path : dict
+        Maps the ingress path of each file in the job to its original request.
+    renewal_batch_size : int
+        Maximum number of expired requests to resubmit within a single batch.
+    node_id : str
+        The PDS Node Identifier to associate with the ingress request.
+    force_overwrite : bool
+        Determines whether pre-existing versions of files on S3 should be
+        overwritten or not.
+    api_gateway_config : dict
+        Dictionary containing configuration details for the API Gateway instance
+        used to request ingress.
+
+    Returns
+    -------
+    ingress_paths : list of str
+        The ingress paths of all files described within the results part.
+
+    """
+    global SUMMARY_TABLE  # noqa: F824
+
+    logger = get_logger("_process_async_part", console=False)
+
+    batch_index = part["chunk"]
+
+    try:
+        response_batch = download_async_results_part(part["url"])
+    except Exception as err:
+        logger.error("Batch %d : Failed to download job results, reason: %s", batch_index, str(err))
+        total_pbar.update()
+        return []
+
+    batch_pbar = get_available_batch_progress_bar(total=len(response_batch), desc=f"Uploading Batch {batch_index + 1}")
+
+    ingress_paths = [ingress_response.get("ingress_path") for ingress_response in response_batch]
+
+    try:
+        expired_responses = _upload_response_batch(response_batch, batch_index, batch_pbar)
+
+        if expired_responses:
+            logger.info("Batch %d : Renewing %d expired upload URL(s)", batch_index, len(expired_responses))
+
+        # Responses to synchronous requests carry no expiry, so each expired
+        # file is renewed at most once
+        for expired_batch in batched(expired_responses, renewal_batch_size):
+            expired_paths = [ingress_response["ingress_path"] for ingress_response in expired_batch]
+
+            try:
+                renewed_batch = request_batch_with_item_retries(
+                    [requests_by_path[ingress_path] for ingress_path in expired_paths],
+                    batch_index,
+                    node_id,
+                    force_overwrite,
+                    api_gateway_config,
+                )
+            except Exception as err:
+                logger.error("Batch %d : Failed to renew expired upload URLs, reason: %s", batch_index, str(err))
+                update_summary_table(SUMMARY_TABLE, "failed", expired_paths)
+                continue
+
+            _upload_response_batch(renewed_batch, batch_index, batch_pbar)
+    finally:
+        total_pbar.update()
+        release_batch_progress_bar(batch_pbar)
+
+    return ingress_paths
+
+
+@backoff.on_exception(backoff.expo, Exception, max_time=120, on_backoff=backoff_handler, logger=None)
+def download_async_results_part(results_url):
+    """
+    Streams a results part of an asynchronous job, in JSON Lines format, from
+    the provided presigned URL.
+
+    Parameters
+    ----------
+    results_url : str
+        Presigned URL of the results part.
+
+    Returns
+    -------
+    response_batch : list of dict
+        The response for each file described within the part.
+
+    """
+    response = requests.get(results_url, stream=True, timeout=600)
+    response.raise_for_status()
+
+    return [json.loads(line) for line in response.iter_lines() if line]
+
+
+@backoff.on_exception(
+    backoff.expo, requests.exceptions.RequestException, max_time=120, on_backoff=backoff_handler, logger=None
+)
+def request_async_job_action(action_request, node_id, force_overwrite, api_gateway_config, request_timeout=60):
+    """
+    Submits a request to create, start or check the status of an asynchronous
+    ingress job to the PDS Ingress App API.
+
+    Parameters
+    ----------
+    action_request : dict
+        The request body, containing the action to perform and its arguments.
+    node_id : str
+        PDS node identifier.
+    force_overwrite : bool
+        Determines whether pre-existing versions of files on S3 should be
+        overwritten or not.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+    request_timeout : int, optional
+        Request timeout in seconds.
+
+    Returns
+    -------
+    response : dict or None
+        The parsed response body, or None if the service does not support
+        asynchronous requests.
+
+    """
+    api_gateway_url, params, headers = _ingress_request_parameters(node_id, force_overwrite, api_gateway_config)
+
+    response = requests.post(
+        api_gateway_url, params=params, data=json.dumps(action_request), headers=headers, timeout=request_timeout
+    )
 
-    """
-    logger = get_logger("perform_ingress")
+    if response.status_code in (HTTPStatus.OK, HTTPStatus.ACCEPTED):
+        return response.json()
 
-    try:
-        with get_ingress_total_progress_bar(total=len(request_batches)) as pbar:
-            PARALLEL(
-                (
-                    delayed(_process_batch)(
-                        batch_index, request_batch, node_id, force_overwrite, api_gateway_config, pbar
-                    )
-                    for batch_index, request_batch in enumerate(request_batches)
-                ),
-            )
-    except KeyboardInterrupt:
-        logger.warning("Keyboard interrupt received, halting ingress...")
-        return  # return so we can still output a report file
+    if response.status_code == HTTPStatus.NOT_IMPLEMENTED:
+        return None
+
+    # Throttled or temporarily unavailable, raise so the request is retried
+    if response.status_code in (HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.SERVICE_UNAVAILABLE):
+        response.raise_for_status()
+
+    _exit_on_request_failure(response)
 
 
 def check_authorization(node_id, api_gateway_config):
@@ -194,7 +1025,9 @@ def check_authorization(node_id, api_gateway_config):
     request_batch_for_ingress.__wrapped__([], 0, node_id, False, api_gateway_config, request_timeout=15)
 
 
-def _process_batch(batch_index, request_batch, node_id, force_overwrite, api_gateway_config, total_pbar):
+def _process_batch(
+    batch_index, request_batch, node_id, force_overwrite, api_gateway_config, total_pbar, upload_mode="put"
+):
     """
     Performs the steps to process a single batch of ingress requests.
     This helper function is intended for use with a Joblib parallelized loop.
@@ -218,6 +1051,9 @@ def _process_batch(batch_index, request_batch, node_id, force_overwrite, api_gat
     total_pbar : tqdm.tqdm_asyncio
         Total Ingress progress bar to update once the current batch has been
         fully processed.
+    upload_mode : str, optional
+        Upload mode to request from the service, either "put" or "post".
+        Defaults to "put".
 
     """
     global SUMMARY_TABLE  # noqa: F824
@@ -229,31 +1065,14 @@ def _process_batch(batch_index, request_batch, node_id, force_overwrite, api_gat
     batch_pbar = get_available_batch_progress_bar(total=len(request_batch), desc=f"Requesting Batch {batch_index + 1}")
 
     try:
-        response_batch = request_batch_for_ingress(
-            request_batch, batch_index, node_id, force_overwrite, api_gateway_config
+        response_batch = request_batch_with_item_retries(
+            request_batch, batch_index, node_id, force_overwrite, api_gateway_config, upload_mode=upload_mode
         )
 
         batch_pbar.desc = f"Uploading Batch {batch_index + 1}"
         batch_pbar.refresh()
 
-        for ingress_response in response_batch:
-            try:
-                # If a single response contains multiple s3 URLs, then this is a multipart upload request
-                if "s3_urls" in ingress_response:
-                    ingress_multipart_file_to_s3(ingress_response, batch_index, batch_pbar)
-                else:
-                    ingress_file_to_s3(ingress_response, batch_index, batch_pbar)
-
-                batch_pbar.update()
-            except Exception as err:
-                # If here, the HTTP request error was unrecoverable by a backoff/retry
-                trimmed_path = ingress_response.get("trimmed_path")
-                ingress_path = ingress_response.get("ingress_path")
-                update_summary_table(SUMMARY_TABLE, "failed", ingress_path)
-
-                logger.error("Batch %d : Ingress failed for %s, Reason: %s", batch_index, trimmed_path, str(err))
-
-                continue  # Move to next file in the batch
+        _upload_response_batch(response_batch, batch_index, batch_pbar)
     except Exception as err:
         # Hit an unrecoverable error while processing the batch
         logger.error("Ingress failed, reason: %s", str(err))
@@ -263,6 +1082,77 @@ def _process_batch(batch_index, request_batch, node_id, force_overwrite, api_gat
         release_batch_progress_bar(batch_pbar)
 
 
+def _upload_response_batch(response_batch, batch_index, batch_pbar):
+    """
+    Uploads each file within a batch of responses from the Ingress Lambda App,
+    recording any failures within the summary table.
+
+    Parameters
+    ----------
+    response_batch : list of dict
+        The responses returned by the Ingress Lambda App for each file.
+    batch_index : int
+        Index of the batch the responses belong to.
+    batch_pbar : tqdm.tqdm_asyncio
+        Batch progress bar associated to the batch.
+
+    Returns
+    -------
+    expired_responses : list of dict
+        The responses whose upload URLs expired, or were about to, before the
+        upload could begin. These files are neither uploaded nor recorded
+        within the summary table.
+
+    """
+    global SUMMARY_TABLE  # noqa: F824
+
+    logger = get_logger("_upload_response_batch", console=False)
+
+    expired_responses = []
+
+    for ingress_response in response_batch:
+        # Results of asynchronous jobs report when their upload URLs expire,
+        # which may have passed while earlier files were uploading
+        if ingress_response.get("expires_at", float("inf")) - URL_RENEWAL_MARGIN <= time.time():
+            expired_responses.append(ingress_response)
+            continue
+
+        # Files the service could not process, even after retries, are
+        # marked as failed so they are picked up by the reattempt pass
+        if "error_code" in ingress_response:
+            update_summary_table(SUMMARY_TABLE, "failed", ingress_response.get("ingress_path"))
+
+            logger.error(
+                "Batch %d : Ingress request failed for %s, Reason: %s",
+                batch_index,
+                ingress_response.get("trimmed_path"),
+                ingress_response.get("message"),
+            )
+
+            batch_pbar.update()
+            continue
+
+        try:
+            # If a single response contains multiple s3 URLs, then this is a multipart upload request
+            if "s3_urls" in ingress_response:
+                ingress_multipart_file_to_s3(ingress_response, batch_index, batch_pbar)
+            else:
+                ingress_file_to_s3(ingress_response, batch_index, batch_pbar)
+
+            batch_pbar.update()
+        except Exception as err:
+            # If here, the HTTP request error was unrecoverable by a backoff/retry
+            trimmed_path = ingress_response.get("trimmed_path")
+            ingress_path = ingress_response.get("ingress_path")
+            update_summary_table(SUMMARY_TABLE, "failed", ingress_path)
+
+            logger.error("Batch %d : Ingress failed for %s, Reason: %s", batch_index, trimmed_path, str(err))
+
+            continue  # Move to next file in the batch
+
+    return expired_responses
+
+
 def _schedule_token_refresh(refresh_token, token_expiration, offset=60):
     """
     Schedules a refresh of the Cognito authentication token using the provided
@@ -390,15 +1280,22 @@ def _prepare_batch_for_ingress(ingress_path_batch, prefix, batch_index, batch_pb
                 "last_modified": datetime.fromtimestamp(last_modified_time, tz=timezone.utc).isoformat(),
             }
 
-        request_batch.append(
-            {
-                "ingress_path": ingress_path,
-                "trimmed_path": trimmed_path,
-                "md5": md5_digest,
-                "size": file_size,
-                "last_modified": last_modified_time,
-            }
-        )
+        ingress_request = {
+            "ingress_path": ingress_path,
+            "trimmed_path": trimmed_path,
+            "md5": md5_digest,
+            "size": file_size,
+            "last_modified": last_modified_time,
+        }
+
+        # Lets the service skip checking S3 for files it has already found to be new,
+        # or which are definitely absent from the content filter
+        if trimmed_path in PREFLIGHT_STATES:
+            ingress_request["preflight"] = PREFLIGHT_STATES[trimmed_path]
+        elif CONTENT_FILTER is not None and content_filter_item(trimmed_path, md5_digest, file_size) not in CONTENT_FILTER:
+            ingress_request["preflight"] = PREFLIGHT_NEW
+
+        request_batch.append(ingress_request)
 
     batch_pbar.update()
     elapsed_time = time.time() - start_time
@@ -407,16 +1304,19 @@ def _prepare_batch_for_ingress(ingress_path_batch, prefix, batch_index, batch_pb
     return request_batch
 
 
-@backoff.on_exception(backoff.expo, Exception, max_time=120, on_backoff=backoff_handler, logger=None)
-def request_batch_for_ingress(request_batch, batch_index, node_id, force_overwrite, api_gateway_config, request_timeout=600):
+def request_batch_with_item_retries(
+    request_batch, batch_index, node_id, force_overwrite, api_gateway_config, max_time=120, upload_mode="put"
+):
     """
-    Submits a batch of ingress requests to the PDS Ingress App API.
+    Submits a batch of ingress requests, then resubmits only those requests
+    the service reported as having failed for a transient (retryable) reason,
+    such as S3 throttling. Requests which are still failing once the retry
+    window has elapsed are returned with their failure result intact.
 
     Parameters
     ----------
     request_batch : list of dict
         List of dictionaries containing an entry for each file to request ingest for.
-        Each entry contains information about the file to be ingested.
     batch_index : int
         Index of the current batch within the full list of batched paths.
     node_id : str
@@ -427,22 +1327,86 @@ def request_batch_for_ingress(request_batch, batch_index, node_id, force_overwri
     api_gateway_config : dict
         Dictionary or dictionary-like containing key/value pairs used to
         configure the API Gateway endpoint url.
-    request_timeout : int, optional
-        Request timeout in seconds.
+    max_time : int, optional
+        Maximum time in seconds to spend retrying failed requests. Defaults
+        to 120 seconds.
+    upload_mode : str, optional
+        Upload mode to request from the service, either "put" or "post".
+        Defaults to "put".
 
     Returns
     -------
     response_batch : list of dict
-        The list of responses from the Ingress Lambda service.
+        The list of responses from the Ingress Lambda service, one per request.
 
     """
-    global BEARER_TOKEN  # noqa: F824
+    logger = get_logger("request_batch_with_item_retries", console=False)
 
-    logger = get_logger("request_batch_for_ingress", console=False)
+    response_batch = []
+    pending_requests = request_batch
 
-    logger.info("Batch %d : Requesting ingress", batch_index)
+    wait_gen = backoff.expo()
+    next(wait_gen)  # Advance past the initial priming yield of the generator
     start_time = time.time()
 
+    while True:
+        responses = request_batch_for_ingress(
+            pending_requests, batch_index, node_id, force_overwrite, api_gateway_config, upload_mode=upload_mode
+        )
+
+        retryable_responses = [response for response in responses if response.get("retryable")]
+        response_batch.extend(response for response in responses if not response.get("retryable"))
+
+        if not retryable_responses:
+            break
+
+        if time.time() - start_time >= max_time:
+            logger.warning(
+                "Batch %d : Giving up on %d request(s) after %d seconds", batch_index, len(retryable_responses), max_time
+            )
+            response_batch.extend(retryable_responses)
+            break
+
+        pending_requests = [pending_requests[response["index"]] for response in retryable_responses]
+
+        wait = backoff.full_jitter(next(wait_gen))
+
+        logger.info(
+            "Batch %d : Retrying %d failed request(s) in %.1f seconds", batch_index, len(pending_requests), wait
+        )
+        time.sleep(wait)
+
+    return response_batch
+
+
+def _ingress_request_parameters(node_id, force_overwrite, api_gateway_config):
+    """
+    Returns the URL, query parameters and headers common to all requests made
+    to the request endpoint of the PDS Ingress App API.
+
+    Parameters
+    ----------
+    node_id : str
+        PDS node identifier.
+    force_overwrite : bool
+        Determines whether pre-existing versions of files on S3 should be
+        overwritten or not.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+
+    Returns
+    -------
+    api_gateway_url : str
+        URL of the request endpoint.
+    params : dict
+        Query string parameters for the request.
+    headers : dict
+        Headers for the request.
+
+    """
+    global BEARER_TOKEN  # noqa: F824
+
     # Extract the API Gateway configuration params
     api_gateway_template = api_gateway_config["url_template"]
     api_gateway_id = api_gateway_config["id"]
@@ -464,6 +1428,74 @@ def request_batch_for_ingress(request_batch, batch_index, node_id, force_overwri
         "x-amz-docs-region": api_gateway_region,
     }
 
+    # Allows the service to satisfy requests for content it already holds
+    # under another key with a server-side copy
+    if ALLOW_COPY:
+        headers["AllowCopy"] = "1"
+
+    return api_gateway_url, params, headers
+
+
+@backoff.on_exception(backoff.expo, Exception, max_time=120, on_backoff=backoff_handler, logger=None)
+def request_batch_for_ingress(
+    request_batch, batch_index, node_id, force_overwrite, api_gateway_config, request_timeout=600, upload_mode="put"
+):
+    """
+    Submits a batch of ingress requests to the PDS Ingress App API.
+
+    Parameters
+    ----------
+    request_batch : list of dict
+        List of dictionaries containing an entry for each file to request ingest for.
+        Each entry contains information about the file to be ingested.
+    batch_index : int
+        Index of the current batch within the full list of batched paths.
+    node_id : str
+        PDS node identifier.
+    force_overwrite : bool
+        Determines whether pre-existing versions of files on S3 should be
+        overwritten or not.
+    api_gateway_config : dict
+        Dictionary or dictionary-like containing key/value pairs used to
+        configure the API Gateway endpoint url.
+    request_timeout : int, optional
+        Request timeout in seconds.
+    upload_mode : str, optional
+        Upload mode to request from the service, either "put" or "post".
+        Defaults to "put".
+
+    Returns
+    -------
+    response_batch : list of dict
+        The list of responses from the Ingress Lambda service.
+
+    """
+    logger = get_logger("request_batch_for_ingress", console=False)
+
+    logger.info("Batch %d : Requesting ingress", batch_index)
+    start_time = time.time()
+
+    api_gateway_url, params, headers = _ingress_request_parameters(node_id, force_overwrite, api_gateway_config)
+
+    headers["UploadMode"] = upload_mode
+
+    # Request compressed responses, omitting the fields echoed from each
+    # request, which are restored from the request batch by index
+    headers["Accept"] = "application/gzip, application/json"
+    headers["ResponseSchema"] = "slim"
+
+    # Allows the service to answer a replay of this request (such as after
+    # a gateway timeout) from its cache of recent responses. The copy option
+    # is only included when set, matching how the service derives the key.
+    headers[IDEMPOTENCY_KEY_HEADER] = compute_idempotency_key(
+        node_id,
+        request_batch,
+        force_overwrite=force_overwrite,
+        upload_mode=upload_mode,
+        response_schema="slim",
+        **({"allow_copy": True} if ALLOW_COPY else {}),
+    )
+
     # Simulate a random failure for the batch request if configured to do so
     with simulate_batch_request_failure(api_gateway_url.split("?")[0]):
         response = requests.post(
@@ -473,19 +1505,36 @@ def request_batch_for_ingress(request_batch, batch_index, node_id, force_overwri
     elapsed_time = time.time() - start_time
 
     #
-    # SUCCESS PATH — 200 OK
-    # The ingress request completed successfully and the Lambda returned
-    # a valid response batch. Parse and return it to the caller.
+    # SUCCESS PATH — 200 OK or 207 Multi-Status
+    # The ingress request completed and the Lambda returned a valid response
+    # batch. A 207 indicates one or more individual files failed, in which
+    # case the per-file results describe which may be retried.
     #
-    if response.status_code == HTTPStatus.OK:
+    if response.status_code in (HTTPStatus.OK, HTTPStatus.MULTI_STATUS):
         response_batch = response.json()
 
+        # Responses too large to return directly are staged in S3 by the service
+        if isinstance(response_batch, dict) and "offloaded_response" in response_batch:
+            response_batch = download_offloaded_response(response_batch["offloaded_response"])
+
+        # Responses to POST-mode requests reference presigned POST policies
+        # shared across the batch, resolve those references for each file
+        if isinstance(response_batch, dict) and "policies" in response_batch:
+            policies = response_batch["policies"]
+            response_batch = response_batch["results"]
+
+            for ingress_response in response_batch:
+                if "policy" in ingress_response:
+                    ingress_response["post_policy"] = policies[ingress_response["policy"]]
+
+        response_batch = [restore_slim_response(ingress_response, request_batch) for ingress_response in response_batch]
+
         logger.info("Batch %d : Ingress request completed in %.2f seconds", batch_index, elapsed_time)
 
         return response_batch
 
     #
-    # FAILURE PATH — ANY NON-200 RESPONSE
+    # FAILURE PATH — ANY OTHER RESPONSE
     # At this point the request did not succeed. This indicates either:
     #   • The user does not have permission (403), OR
     #   • The ingestion service experienced an internal failure (500), OR
@@ -493,14 +1542,86 @@ def request_batch_for_ingress(request_batch, batch_index, node_id, force_overwri
     #
     # All of these conditions require the client to stop immediately.
     #
+    _exit_on_request_failure(response)
+
+
+def restore_slim_response(ingress_response, request_batch):
+    """
+    Restores the fields the service omits from slim responses, using the
+    request the response corresponds to.
+
+    Parameters
+    ----------
+    ingress_response : dict
+        A single response returned by the Ingress Lambda App.
+    request_batch : list of dict
+        The batch of requests the response was returned for.
+
+    Returns
+    -------
+    ingress_response : dict
+        The response, with the fields of its request restored.
+
+    """
+    request_index = ingress_response.get("index")
+
+    if request_index is None or "ingress_path" in ingress_response:
+        return ingress_response
+
+    ingress_request = request_batch[request_index]
 
+    restored_response = {
+        "ingress_path": ingress_request["ingress_path"],
+        "trimmed_path": ingress_request["trimmed_path"],
+        "md5": ingress_request["md5"],
+        "base64_md5": base64.b64encode(bytes.fromhex(ingress_request["md5"])).decode(),
+    }
+    restored_response.update(ingress_response)
+
+    return restored_response
+
+
+@backoff.on_exception(backoff.expo, Exception, max_time=120, on_backoff=backoff_handler, logger=None)
+def download_offloaded_response(response_url):
+    """
+    Downloads a response the service staged in S3 because it was too large to
+    return directly.
+
+    Parameters
+    ----------
+    response_url : str
+        Presigned URL of the offloaded response.
+
+    Returns
+    -------
+    response_body : list or dict
+        The parsed body of the offloaded response.
+
+    """
+    response = requests.get(response_url, timeout=600)
+    response.raise_for_status()
+
+    return response.json()
+
+
+def _exit_on_request_failure(response):
+    """
+    Reports a failed request to the DUM service to the user, then exits, since
+    failures of this kind cannot be resolved by retrying.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The unsuccessful response returned by the DUM service.
+
+    """
     # Ensure progress bars are closed before printing the error message
     close_ingress_total_progress_bar()
     close_batch_progress_bars()
 
     # Use console-only logger so the user clearly sees the error message
     logger = get_logger(
-        "request_batch_for_ingress",
+        "_exit_on_request_failure",
         cloudwatch=False,
         console=True,
         file=True,
@@ -587,7 +1708,9 @@ def ingress_file_to_s3(ingress_response, batch_index, batch_pbar):
     ingress_path = ingress_response.get("ingress_path")
 
     if response_result == HTTPStatus.OK:
-        s3_ingress_url = ingress_response.get("s3_url")
+        post_policy = ingress_response.get("post_policy")
+
+        s3_ingress_url = post_policy["url"] if post_policy else ingress_response.get("s3_url")
 
         logger.info("Batch %d : Ingesting %s to %s", batch_index, trimmed_path, s3_ingress_url.split("?")[0])
 
@@ -617,13 +1740,31 @@ def ingress_file_to_s3(ingress_response, batch_index, batch_pbar):
                 # Wrap file I/O with our upload bar to automatically track file upload progress
                 wrapped_file = CallbackIOWrapper(upload_pbar.update, infile, "read")
 
-                # Only send the file data if the file is non-empty
-                response = requests.put(s3_ingress_url, data=wrapped_file if file_length > 0 else b"", headers=headers)
+                if post_policy:
+                    # Upload as a form submission, combining the fields common to
+                    # the policy with the fields (key, MD5, metadata) for this file
+                    form_fields = {**post_policy["fields"], **ingress_response["fields"]}
+
+                    response = requests.post(
+                        s3_ingress_url, data=form_fields, files={"file": (os.path.basename(ingress_path), wrapped_file)}
+                    )
+                else:
+                    # Only send the file data if the file is non-empty
+                    response = requests.put(
+                        s3_ingress_url, data=wrapped_file if file_length > 0 else b"", headers=headers
+                    )
+
                 response.raise_for_status()
 
         logger.info("Batch %d : %s Ingest complete", batch_index, trimmed_path)
         update_summary_table(SUMMARY_TABLE, "uploaded", ingress_path)
         upload_pbar.reset()
+    elif response_result == HTTPStatus.CREATED:
+        # The service copied existing content within S3, so there is nothing to upload
+        logger.info(
+            "Batch %d : %s copied server-side from %s", batch_index, trimmed_path, ingress_response.get("copy_source")
+        )
+        update_summary_table(SUMMARY_TABLE, "skipped", ingress_path)
     elif response_result == HTTPStatus.NO_CONTENT:
         Color.blue(
             f"Batch {batch_index} : Skipping ingress for {trimmed_path}, " f"reason {ingress_response.get('message')}"
@@ -825,6 +1966,62 @@ def setup_argparser():
         "file is skipped. Use this flag to override this behavior and forcefully "
         "overwrite any existing versions of files within the PDS Cloud.",
     )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Fetch a listing of the files already ingested under the same "
+        "top-level directories, and compare each local file against it by size "
+        "and modification time (or checksum, when known from a manifest), in the "
+        "manner of rsync. Only new or changed files are then requested for "
+        "ingress. Recommended for incremental deliveries to large existing "
+        "collections. Ignored with --force-overwrite.",
+    )
+    parser.add_argument(
+        "--no-preflight",
+        action="store_true",
+        help="By default, the size and modification time of each file is first "
+        "checked against the PDS Cloud, and files found to be unchanged are "
+        "skipped without computing their MD5 checksums. Use this flag to "
+        "disable the pre-flight check, so every file is hashed and verified "
+        "by checksum. The check is always skipped with --force-overwrite.",
+    )
+    parser.add_argument(
+        "--content-filter",
+        action="store_true",
+        help="Download the content filter published by the DUM service, which "
+        "summarizes every file already ingested for the node. Files absent from "
+        "the filter are known to be new, so the service skips checking the PDS "
+        "Cloud for them. Files which may be present are still checked by the "
+        "service as usual. Ignored with --force-overwrite.",
+    )
+    parser.add_argument(
+        "--allow-copy",
+        action="store_true",
+        help="Allow the DUM service to satisfy requests for files whose content "
+        "was already ingested under another path (such as after a bundle is "
+        "reorganized) by copying the existing object within the PDS Cloud, "
+        "rather than uploading the file again. Only smaller files are copied, "
+        "larger files are always uploaded. Ignored with --force-overwrite.",
+    )
+    parser.add_argument(
+        "--post-policy",
+        action="store_true",
+        help="Request that the DUM service issue a single presigned POST policy "
+        "per batch for small files, rather than a separate presigned URL for "
+        "each file. This reduces service-side processing and response sizes "
+        "for batches containing many small files. Large files are always "
+        "uploaded with individual presigned URLs.",
+    )
+    parser.add_argument(
+        "--async-request",
+        action="store_true",
+        help="Submit the full set of files as a single asynchronous job, rather "
+        "than as a series of batch requests. The manifest of all files is "
+        "uploaded to the DUM service, which processes it in parallel and "
+        "returns results as they become available. Recommended for very large "
+        "deliveries. Falls back to batch requests if the service does not "
+        "support asynchronous jobs. Cannot be combined with --post-policy.",
+    )
     parser.add_argument(
         "--include",
         "-i",
@@ -954,7 +2151,7 @@ def main(args):
         and dry-run is not enabled.
 
     """
-    global BEARER_TOKEN, MANIFEST, SUMMARY_TABLE
+    global ALLOW_COPY, BEARER_TOKEN, CONTENT_FILTER, MANIFEST, SUMMARY_TABLE
 
     # Note: this should always get called first to ensure the Config singleton is
     #       fully initialized before used in any calls to get_logger
@@ -971,6 +2168,8 @@ def main(args):
     if args.force_overwrite:
         logger.info(Color.red_bold("Force-overwrite enabled: existing files will be overwritten."))
 
+    ALLOW_COPY = args.allow_copy and not args.force_overwrite
+
     # Derive the full list of ingress paths based on the set of paths requested
     # by the user
     logger.info("Determining paths for ingress...")
@@ -1017,19 +2216,14 @@ def main(args):
     update_summary_table(SUMMARY_TABLE, "unprocessed", resolved_ingress_paths)
 
     node_id = args.node
+    upload_mode = "post" if args.post_policy else "put"
+
+    if args.async_request and args.post_policy:
+        raise ValueError("--async-request and --post-policy cannot be combined")
 
     # Set the joblib pool size based on the number of "threads" requested
     PARALLEL.n_jobs = args.num_threads
 
-    # Break the set of ingress paths into batches based on configured size
-    batch_size = int(config["OTHER"].get("batch_size", fallback=1))
-    SUMMARY_TABLE["batch_size"] = batch_size
-
-    batched_ingress_paths = list(batched(resolved_ingress_paths, batch_size))
-    logger.info("Using batch size of %d", batch_size)
-    logger.info("Request (%d files) split into %d batches", len(resolved_ingress_paths), len(batched_ingress_paths))
-    SUMMARY_TABLE["num_batches"] = len(batched_ingress_paths)
-
     # Validate gzip extension for weblog uploads
     if args.weblogs:
         non_gzipped = [p for p in resolved_ingress_paths if not PathUtil.validate_gzip_extension(p)]
@@ -1048,8 +2242,6 @@ def main(args):
         logger.info("Reading existing manifest file %s", args.manifest_path)
         MANIFEST = read_manifest_file(args.manifest_path)
 
-    logger.info("Preparing batches for ingress...")
-
     # Set up the prefix mapping
     if args.weblogs:
         if not args.prefix:
@@ -1066,12 +2258,12 @@ def main(args):
         # Replace prefix with empty string to remove it from the S3 path
         prefix = {"old": args.prefix, "new": ""}
 
-    request_batchs = prepare_batches(batched_ingress_paths, prefix)
-
-    if args.manifest_path:
-        logger.info("Writing manifest file to %s", os.path.abspath(args.manifest_path))
-        write_manifest_file(MANIFEST, os.path.abspath(args.manifest_path))
+    # Files skipped by the pre-flight check must still be described by any
+    # manifest written
+    requested_ingress_paths = resolved_ingress_paths
 
+    # Authenticate prior to preparing batches, so the pre-flight check can
+    # be performed before any files are hashed
     if not args.dry_run:
         cognito_config = config["COGNITO"]
 
@@ -1098,9 +2290,60 @@ def main(args):
         )
         refresh_thread.start()
 
+        # Skip unchanged files based on their size and modification time alone,
+        # so only files which may have changed are hashed. Force-overwrite
+        # requests always hash and upload every file.
+        if not args.force_overwrite:
+            synced_ingress_paths = None
+
+            if args.sync:
+                synced_ingress_paths = sync_ingress_paths(
+                    resolved_ingress_paths, prefix, node_id, config["API_GATEWAY"]
+                )
+
+            if synced_ingress_paths is not None:
+                resolved_ingress_paths = synced_ingress_paths
+            elif not args.no_preflight:
+                resolved_ingress_paths = preflight_ingress_paths(
+                    resolved_ingress_paths, prefix, node_id, config["API_GATEWAY"]
+                )
+
+            if args.content_filter:
+                CONTENT_FILTER = fetch_content_filter(node_id, config["API_GATEWAY"])
+
+    # Break the set of ingress paths into batches based on configured size
+    batch_size = int(config["OTHER"].get("batch_size", fallback=1))
+    SUMMARY_TABLE["batch_size"] = batch_size
+
+    batched_ingress_paths = list(batched(resolved_ingress_paths, batch_size))
+    logger.info("Using batch size of %d", batch_size)
+    logger.info("Request (%d files) split into %d batches", len(resolved_ingress_paths), len(batched_ingress_paths))
+    SUMMARY_TABLE["num_batches"] = len(batched_ingress_paths)
+
+    logger.info("Preparing batches for ingress...")
+
+    request_batchs = prepare_batches(batched_ingress_paths, prefix)
+
+    if args.manifest_path:
+        if len(requested_ingress_paths) > len(resolved_ingress_paths):
+            complete_manifest(requested_ingress_paths, prefix)
+
+        logger.info("Writing manifest file to %s", os.path.abspath(args.manifest_path))
+        write_manifest_file(MANIFEST, os.path.abspath(args.manifest_path))
+
+    if not args.dry_run:
         try:
             init_batch_progress_bars(min(args.num_threads, len(request_batchs)))
-            perform_ingress(request_batchs, node_id, args.force_overwrite, config["API_GATEWAY"])
+
+            if not request_batchs:
+                logger.info("All files were found to be unchanged, nothing to ingest")
+            elif not args.async_request or not perform_async_ingress(
+                request_batchs, node_id, args.force_overwrite, config["API_GATEWAY"]
+            ):
+                if args.async_request:
+                    logger.warning("Asynchronous requests are not supported by the service, using batch requests")
+
+                perform_ingress(request_batchs, node_id, args.force_overwrite, config["API_GATEWAY"], upload_mode)
         finally:
             close_batch_progress_bars()
 
@@ -1116,7 +2359,9 @@ def main(args):
                 failed_request_batchs = prepare_batches(batched_failed_ingresses, prefix)
 
                 init_batch_progress_bars(min(args.num_threads, len(failed_request_batchs)))
-                perform_ingress(failed_request_batchs, node_id, args.force_overwrite, config["API_GATEWAY"])
+                perform_ingress(
+                    failed_request_batchs, node_id, args.force_overwrite, config["API_GATEWAY"], upload_mode
+                )
         finally:
             close_batch_progress_bars()
 
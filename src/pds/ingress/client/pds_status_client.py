@@ -9,6 +9,10 @@ Client side script used to interact with the DUM Ingress Status service in AWS.
 import argparse
 import json
 import os
+import sys
+import tempfile
+import time
+import zlib
 from http import HTTPStatus
 
 import requests
@@ -16,11 +20,19 @@ from pds.ingress import __version__
 from pds.ingress.util.auth_util import AuthUtil
 from pds.ingress.util.config_util import ConfigUtil
 from pds.ingress.util.hash_util import md5_for_path
+from pds.ingress.util.job_util import JOB_STATE_COMPLETE
+from pds.ingress.util.job_util import JOB_STATE_FAILED
 from pds.ingress.util.log_util import get_log_level
 from pds.ingress.util.log_util import get_logger
+from pds.ingress.util.manifest_util import COMPRESSION_SUFFIXES
+from pds.ingress.util.manifest_util import compress_manifest
 from pds.ingress.util.node_util import NodeUtil
 
 
+class StatusJobsNotEnabledError(RuntimeError):
+    """Raised when the DUM service deployment does not record status jobs, so their results cannot be retrieved"""
+
+
 def setup_argparser():
     """
     Helper function to perform setup of the ArgumentParser for Status client
@@ -47,8 +59,9 @@ def setup_argparser():
     parser.add_argument(
         "-e",
         "--email",
-        required=True,
-        help="Return email address to send status report to.",
+        default="",
+        help="Return email address to send status report to. "
+        "May be omitted when waiting for the results via --wait.",
     )
     parser.add_argument(
         "-n",
@@ -70,6 +83,42 @@ def setup_argparser():
         "provided, the logging level set in the INI config "
         "is used instead.",
     )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        default="gzip",
+        choices=["gzip", "zstd", "none"],
+        help="Compression applied to the manifest before it is uploaded. zstd requires "
+        "the zstandard package to be installed. Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Poll the status service until the status report is complete, "
+        "rather than relying on the emailed report. The exit code is 0 only "
+        "if every file in the manifest has been uploaded.",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="When used with --wait, path to write the status of each file to, "
+        'in JSON Lines format. Use "-" to write to standard output.',
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=5,
+        help="Seconds between polls of the status service when using --wait. "
+        "Defaults to %(default)s.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=3600,
+        help="Maximum number of seconds to wait for the status report when using --wait. "
+        "Defaults to %(default)s.",
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -87,6 +136,199 @@ def setup_argparser():
     return parser
 
 
+def request_status_result(job_id, page, node_id, api_gateway_url, headers, request_timeout=60):
+    """
+    Requests the state of a status job from the DUM service, along with
+    URLs to its results pages once complete.
+
+    Parameters
+    ----------
+    job_id : str
+        ID of the status job, as returned by the status endpoint.
+    page : int
+        Index of the first results page to return URLs for.
+    node_id : str
+        PDS node identifier of the requestor.
+    api_gateway_url : str
+        URL of the request endpoint of the DUM service.
+    headers : dict
+        Headers to submit with the request, including authorization.
+    request_timeout : int, optional
+        Timeout in seconds of the request.
+
+    Returns
+    -------
+    status : dict
+        The parsed response, containing the "state" of the job, and for
+        complete jobs, the "pages" of results and the "next_page" index.
+
+    Raises
+    ------
+    StatusJobsNotEnabledError
+        If the DUM service deployment does not record status jobs.
+
+    """
+    params = {"node": node_id, "node_name": NodeUtil.node_id_to_long_name[node_id]}
+
+    response = requests.post(
+        api_gateway_url,
+        params=params,
+        data=json.dumps({"action": "status_result", "job_id": job_id, "page": page}),
+        headers=headers,
+        timeout=request_timeout,
+    )
+
+    if response.status_code == HTTPStatus.NOT_IMPLEMENTED:
+        raise StatusJobsNotEnabledError("Status jobs are not enabled on this deployment")
+
+    response.raise_for_status()
+
+    return response.json()
+
+
+def wait_for_status_job(job_id, node_id, api_gateway_url, headers, poll_interval=5, timeout=3600):
+    """
+    Polls the DUM service until the provided status job is complete.
+
+    Returns
+    -------
+    status : dict
+        The final status of the job.
+
+    Raises
+    ------
+    RuntimeError
+        If the job fails, or is not complete within the timeout.
+
+    """
+    logger = get_logger("wait_for_status_job", cloudwatch=False, file=False)
+
+    deadline = time.monotonic() + timeout
+
+    while True:
+        status = request_status_result(job_id, 0, node_id, api_gateway_url, headers)
+
+        if status["state"] == JOB_STATE_COMPLETE:
+            return status
+
+        if status["state"] == JOB_STATE_FAILED:
+            raise RuntimeError(f"Status job {job_id} failed: {status.get('message', 'unknown reason')}")
+
+        if time.monotonic() + poll_interval > deadline:
+            raise RuntimeError(f"Timed out after {timeout} seconds waiting for status job {job_id}")
+
+        logger.debug("Status job %s is %s, polling again in %s seconds", job_id, status["state"], poll_interval)
+
+        time.sleep(poll_interval)
+
+
+def stream_status_results(status, node_id, api_gateway_url, headers, outfile, request_timeout=600):
+    """
+    Streams the results pages of a complete status job to the provided
+    binary file object, decompressing each page as it is downloaded. Pages
+    beyond those listed with the provided status are requested as needed.
+
+    Returns
+    -------
+    num_pages : int
+        Number of pages written.
+
+    """
+    num_pages = 0
+
+    while True:
+        for page in status["pages"]:
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+            with requests.get(page["url"], stream=True, timeout=request_timeout) as response:
+                response.raise_for_status()
+
+                for chunk in response.iter_content(chunk_size=1024**2):
+                    outfile.write(decompressor.decompress(chunk))
+
+            outfile.write(decompressor.flush())
+            num_pages += 1
+
+        if status.get("next_page") is None:
+            return num_pages
+
+        status = request_status_result(status["job_id"], status["next_page"], node_id, api_gateway_url, headers)
+
+
+def prepare_manifest_upload(manifest_path, compression, working_dir):
+    """
+    Prepares a manifest for upload, compressing it into the provided working
+    directory (if requested) while computing the MD5 of the uploaded bytes.
+
+    Parameters
+    ----------
+    manifest_path : str
+        Path to the manifest file.
+    compression : str
+        The compression to apply, "gzip", "zstd" or "none".
+    working_dir : str
+        Directory to write the compressed manifest to.
+
+    Returns
+    -------
+    upload_path : str
+        Path to the file to upload.
+    md5 : hashlib._Hash
+        The MD5 hash object of the file to upload.
+
+    """
+    if compression == "none":
+        return manifest_path, md5_for_path(manifest_path)
+
+    upload_path = os.path.join(working_dir, os.path.basename(manifest_path) + COMPRESSION_SUFFIXES[compression])
+
+    with open(upload_path, "wb") as outfile:
+        md5 = compress_manifest(manifest_path, outfile, compression)
+
+    return upload_path, md5
+
+
+def parse_manifest_ingress_response(response):
+    """
+    Returns the result for the manifest from the response to a request to
+    upload it. The service responds 207 (Multi-Status) when a file within a
+    request fails, in which case the failure is described by the file's result.
+
+    Parameters
+    ----------
+    response : requests.Response
+        Response to the manifest upload request.
+
+    Returns
+    -------
+    ingress_response : dict
+        The result for the manifest, including where to upload it.
+
+    Raises
+    ------
+    requests.HTTPError
+        If the request itself failed.
+    RuntimeError
+        If the service failed to process the request for the manifest.
+
+    """
+    if response.status_code not in (HTTPStatus.OK, HTTPStatus.MULTI_STATUS):
+        response.raise_for_status()
+        raise RuntimeError(f"Unexpected response to manifest upload request: HTTP {response.status_code}")
+
+    ingress_response = response.json()[0]  # Should only ever be one item in the response
+
+    result = int(ingress_response.get("result", HTTPStatus.OK))
+
+    if not 200 <= result < 300:
+        reason = ingress_response.get("message") or ingress_response.get("error_code") or "unknown reason"
+        hint = ", please try again later" if ingress_response.get("retryable") else ""
+
+        raise RuntimeError(f"Manifest upload request failed with result {result} ({reason}){hint}")
+
+    return ingress_response
+
+
 def main(args):
     """
     Main entry point for the pds-status-client script.
@@ -96,6 +338,13 @@ def main(args):
     args : argparse.Namespace
         The parsed command-line arguments.
 
+    Returns
+    -------
+    exit_code : int
+        0 on success. When waiting for results, 1 if any file in the manifest
+        has not been uploaded, if the status job fails or times out, or if the
+        results cannot be waited for.
+
     """
     # Note: this should always get called first to ensure the Config singleton is
     #       fully initialized before used in any calls to get_logger
@@ -108,6 +357,9 @@ def main(args):
     if not os.path.exists(args.manifest_path):
         raise ValueError(f'Manifest path "{args.manifest_path}" does not exist')
 
+    if not args.email and not args.wait:
+        raise ValueError("A return email address must be provided unless waiting for results with --wait")
+
     cognito_config = config["COGNITO"]
 
     if not cognito_config["username"] and cognito_config["password"]:
@@ -123,54 +375,58 @@ def main(args):
     api_gateway_region = api_gateway_config["region"]
     api_gateway_stage = api_gateway_config["stage"]
 
-    # Submit the request to stage the manifest file to S3
-    request = [
-        {
-            "ingress_path": args.manifest_path,
-            "trimmed_path": os.path.join("manifests", os.path.basename(args.manifest_path)),
-            "md5": md5_for_path(args.manifest_path).hexdigest(),
-            "size": os.stat(args.manifest_path).st_size,
-            "last_modified": os.path.getmtime(args.manifest_path),
+    with tempfile.TemporaryDirectory() as working_dir:
+        upload_path, upload_md5 = prepare_manifest_upload(args.manifest_path, args.compression, working_dir)
+
+        # Submit the request to stage the manifest file to S3. The modification
+        # time of the manifest itself is used, so an identical manifest which
+        # was already uploaded is not uploaded again
+        request = [
+            {
+                "ingress_path": upload_path,
+                "trimmed_path": os.path.join("manifests", os.path.basename(upload_path)),
+                "md5": upload_md5.hexdigest(),
+                "size": os.stat(upload_path).st_size,
+                "last_modified": os.path.getmtime(args.manifest_path),
+            }
+        ]
+
+        api_gateway_resource = "request"
+
+        api_gateway_url = api_gateway_template.format(
+            id=api_gateway_id, region=api_gateway_region, stage=api_gateway_stage, resource=api_gateway_resource
+        )
+
+        params = {"node": args.node, "node_name": NodeUtil.node_id_to_long_name[args.node]}
+        headers = {
+            "Authorization": bearer_token,
+            "UserGroup": NodeUtil.node_id_to_group_name(args.node),
+            "ForceOverwrite": "0",
+            "ClientVersion": __version__,
+            "content-type": "application/json",
+            "x-amz-docs-region": api_gateway_region,
         }
-    ]
-
-    api_gateway_resource = "request"
-
-    api_gateway_url = api_gateway_template.format(
-        id=api_gateway_id, region=api_gateway_region, stage=api_gateway_stage, resource=api_gateway_resource
-    )
-
-    params = {"node": args.node, "node_name": NodeUtil.node_id_to_long_name[args.node]}
-    headers = {
-        "Authorization": bearer_token,
-        "UserGroup": NodeUtil.node_id_to_group_name(args.node),
-        "ForceOverwrite": "1",  # Likely we'll repeat requests using same manifest file names, so always overwrite
-        "ClientVersion": __version__,
-        "content-type": "application/json",
-        "x-amz-docs-region": api_gateway_region,
-    }
 
-    logger.info("Submitting S3 upload request for Manifest file...")
-    response = requests.post(api_gateway_url, params=params, data=json.dumps(request), headers=headers, timeout=600)
+        logger.info("Submitting S3 upload request for Manifest file...")
+        response = requests.post(api_gateway_url, params=params, data=json.dumps(request), headers=headers, timeout=600)
 
-    if response.status_code == HTTPStatus.OK:
-        ingress_response = response.json()[0]  # Should only ever be one item in the response
-    else:
-        response.raise_for_status()
+        ingress_response = parse_manifest_ingress_response(response)
 
-    bucket = ingress_response.get("bucket")
-    key = ingress_response.get("key")
-    s3_ingress_url = ingress_response.get("s3_url")
+        bucket = ingress_response.get("bucket")
+        key = ingress_response.get("key")
+        s3_ingress_url = ingress_response.get("s3_url")
 
-    if any(value is None for value in [bucket, key, s3_ingress_url]):
-        raise RuntimeError("Invalid response from S3 ingress request, missing bucket, key, or s3_url")
+        if ingress_response.get("result") == HTTPStatus.NO_CONTENT and bucket and key:
+            logger.info("Identical Manifest file already uploaded to S3, skipping upload")
+        elif any(value is None for value in [bucket, key, s3_ingress_url]):
+            raise RuntimeError("Invalid response from S3 ingress request, missing bucket, key, or s3_url")
+        else:
+            headers = {"Content-MD5": ingress_response.get("base64_md5")}
 
-    headers = {"Content-MD5": ingress_response.get("base64_md5")}
-
-    logger.info("Uploading Manifest file to S3...")
-    with open(os.path.abspath(args.manifest_path), "r") as infile:
-        response = requests.put(s3_ingress_url, data=infile, headers=headers)
-        response.raise_for_status()
+            logger.info("Uploading Manifest file (%d bytes) to S3...", request[0]["size"])
+            with open(upload_path, "rb") as infile:
+                response = requests.put(s3_ingress_url, data=infile, headers=headers)
+                response.raise_for_status()
 
     # Submit the request to the status service, informing it of the S3 location of the manifest file
     api_gateway_resource = "status"
@@ -193,17 +449,64 @@ def main(args):
     logger.info("Submitting request to Status Service...")
     response = requests.post(api_gateway_url, data=json.dumps(payload), headers=headers, timeout=600)
 
-    if response.status_code == HTTPStatus.OK:
-        logger.info("Status request successfully submitted, report will be emailed to %s", args.email)
-    else:
+    if response.status_code != HTTPStatus.OK:
         response.raise_for_status()
 
+    try:
+        job_id = response.json().get("job_id")
+    except (ValueError, AttributeError):
+        job_id = None
+
+    logger.info("Status request successfully submitted with job ID %s", job_id)
+
+    if args.email:
+        logger.info("Report will be emailed to %s", args.email)
+
+    if not args.wait:
+        return 0
+
+    if not job_id:
+        raise RuntimeError("Status service did not return a job ID, waiting for results is not supported")
+
+    api_gateway_url = api_gateway_template.format(
+        id=api_gateway_id, region=api_gateway_region, stage=api_gateway_stage, resource="request"
+    )
+
+    logger.info("Waiting for status job %s to complete...", job_id)
+
+    try:
+        status = wait_for_status_job(job_id, args.node, api_gateway_url, headers, args.poll_interval, args.timeout)
+    except StatusJobsNotEnabledError as err:
+        logger.error("%s, so results cannot be waited for. Rerun with --email instead of --wait to receive a report", err)
+        return 1
+    except RuntimeError as err:
+        logger.error("%s", err)
+        return 1
+
+    logger.info(
+        "Status of %d file(s): %s",
+        status["num_files"],
+        ", ".join(f"{ingress_status}: {count}" for ingress_status, count in status["status"].items()),
+    )
+
+    if args.output == "-":
+        stream_status_results(status, args.node, api_gateway_url, headers, sys.stdout.buffer)
+        sys.stdout.flush()
+    elif args.output:
+        with open(args.output, "wb") as outfile:
+            stream_status_results(status, args.node, api_gateway_url, headers, outfile)
+
+        logger.info("Wrote status of each file to %s", args.output)
+
+    # Allow pipelines to gate on every file having been uploaded
+    return 0 if set(status["status"]) <= {"Uploaded"} else 1
+
 
 def console_main():
     """No argument entrypoint for use with setuptools"""
     parser = setup_argparser()
     args = parser.parse_args()
-    main(args)
+    sys.exit(main(args))
 
 
 if __name__ == "__main__":
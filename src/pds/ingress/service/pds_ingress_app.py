@@ -8,9 +8,12 @@ to their destinations in S3.
 """
 import base64
 import concurrent.futures
+import gzip
 import json
 import logging
 import os
+import time
+import uuid
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
@@ -23,21 +26,86 @@ from botocore.exceptions import ClientError
 
 # When deployed to AWS, these imports need to absolute
 try:
+    from util.bloom_filter_util import BloomFilter
+    from util.bloom_filter_util import content_filter_item
+    from util.cache_util import compute_idempotency_key
+    from util.cache_util import IDEMPOTENCY_KEY_HEADER
+    from util.cache_util import ResponseCache
     from util.config_util import bucket_for_path
+    from util.config_util import buckets_for_node
     from util.config_util import initialize_bucket_map
     from util.config_util import ConfigUtil
+    from util.content_index_util import content_index_key
+    from util.content_index_util import decode_content_index_entry
+    from util.job_util import chunk_index_for_result
+    from util.job_util import chunk_object_name
+    from util.job_util import is_valid_job_id
+    from util.job_util import JOB_STATE_COMPLETE
+    from util.job_util import iter_lines_with_offsets
+    from util.job_util import job_object_key
+    from util.job_util import JOB_STATE_FAILED
+    from util.job_util import JOB_STATE_PENDING
+    from util.job_util import JOB_STATE_RUNNING
+    from util.job_util import JOB_STATE_SPLITTING
+    from util.job_util import manifest_entry_to_request
+    from util.job_util import parse_manifest_line
+    from util.job_util import result_object_name
+    from util.job_util import status_page_name
     from util.log_util import LOG_LEVELS
+    from util.log_util import redact_presigned_url
+    from util.log_util import should_log_sample
     from util.log_util import SingleLogFilter
+    from util.metrics_util import MetricsRecorder
+    from util.preflight_util import preflight_state
+    from util.preflight_util import PREFLIGHT_NEEDS_HASH
+    from util.preflight_util import PREFLIGHT_NEW
+    from util.preflight_util import PREFLIGHT_UNCHANGED
+    from util.sigv4_util import encode_object_key
+    from util.sigv4_util import SigV4Presigner
 # When running the unit tests, these imports need to be relative
 except ModuleNotFoundError:
+    from .util.bloom_filter_util import BloomFilter
+    from .util.bloom_filter_util import content_filter_item
+    from .util.cache_util import compute_idempotency_key
+    from .util.cache_util import IDEMPOTENCY_KEY_HEADER
+    from .util.cache_util import ResponseCache
     from .util.config_util import bucket_for_path
+    from .util.config_util import buckets_for_node
     from .util.config_util import initialize_bucket_map
     from .util.config_util import ConfigUtil
+    from .util.content_index_util import content_index_key
+    from .util.content_index_util import decode_content_index_entry
+    from .util.job_util import chunk_index_for_result
+    from .util.job_util import chunk_object_name
+    from .util.job_util import is_valid_job_id
+    from .util.job_util import JOB_STATE_COMPLETE
+    from .util.job_util import iter_lines_with_offsets
+    from .util.job_util import job_object_key
+    from .util.job_util import JOB_STATE_FAILED
+    from .util.job_util import JOB_STATE_PENDING
+    from .util.job_util import JOB_STATE_RUNNING
+    from .util.job_util import JOB_STATE_SPLITTING
+    from .util.job_util import manifest_entry_to_request
+    from .util.job_util import parse_manifest_line
+    from .util.job_util import result_object_name
+    from .util.job_util import status_page_name
     from .util.log_util import LOG_LEVELS
+    from .util.log_util import redact_presigned_url
+    from .util.log_util import should_log_sample
     from .util.log_util import SingleLogFilter
+    from .util.metrics_util import MetricsRecorder
+    from .util.preflight_util import preflight_state
+    from .util.preflight_util import PREFLIGHT_NEEDS_HASH
+    from .util.preflight_util import PREFLIGHT_NEW
+    from .util.preflight_util import PREFLIGHT_UNCHANGED
+    from .util.sigv4_util import encode_object_key
+    from .util.sigv4_util import SigV4Presigner
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+"""Fraction of files per-file INFO messages are logged for, all files are logged when LOG_LEVEL is DEBUG"""
+
 logger = logging.getLogger()
 logger.setLevel(LOG_LEVELS.get(LOG_LEVEL.lower(), logging.INFO))
 logger.addFilter(SingleLogFilter())
@@ -56,6 +124,135 @@ else:
 MAX_UPLOAD_SIZE = 5000000000  # 5 GB single file upload limit for S3
 CHUNK_SIZE = 50000000  # 50 MB chunk size for multipart uploads
 
+RETRYABLE_ERROR_CODES = (
+    "InternalError",
+    "RequestTimeout",
+    "RequestTimeTooSkewed",
+    "ServiceUnavailable",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "500",
+    "503",
+)
+"""S3 error codes indicating a transient failure the client may retry for an individual file"""
+
+POST_POLICY_MAX_SIZE = int(os.getenv("POST_POLICY_MAX_SIZE", "104857600"))
+"""Largest file (in bytes) which may be uploaded against a presigned POST policy, larger files receive a PUT URL"""
+
+POST_POLICY_FILE_FIELDS = ("Content-MD5", "x-amz-meta-md5", "x-amz-meta-last_modified", "x-amz-meta-mtime")
+"""Form fields whose values are provided per-file by the client when uploading against a POST policy"""
+
+MAX_RESPONSE_CACHE_TTL = 1800
+"""Upper limit on response cache TTL, so replayed presigned URLs always have ample time left before expiring"""
+
+RESPONSE_CACHE = ResponseCache(
+    ttl=min(int(os.getenv("RESPONSE_CACHE_TTL", "300")), MAX_RESPONSE_CACHE_TTL),
+    s3_client=s3_client,
+    bucket=os.getenv("RESPONSE_CACHE_BUCKET"),
+    prefix=os.getenv("RESPONSE_CACHE_PREFIX", "response-cache"),
+)
+"""Cache of recent batch responses, used to answer requests replayed by the client without repeating S3 work"""
+
+ASYNC_JOB_BUCKET = os.getenv("ASYNC_JOB_BUCKET")
+"""Bucket used to stage manifests and results for asynchronous jobs, asynchronous requests are disabled if unset"""
+
+ASYNC_JOB_PREFIX = os.getenv("ASYNC_JOB_PREFIX", "async-jobs")
+"""Key prefix for all asynchronous job objects, expired jobs should be removed with an S3 lifecycle rule"""
+
+ASYNC_CHUNK_SIZE = int(os.getenv("ASYNC_CHUNK_SIZE", "1000"))
+"""Number of manifest entries processed by each asynchronous chunk worker"""
+
+ASYNC_URL_EXPIRATION = 3600
+"""Expiration time in seconds of presigned URLs used to upload manifests and download job results"""
+
+ASYNC_UPLOAD_URL_EXPIRATION = 3000
+"""Lifetime in seconds of the shortest upload URL presigned for a chunk, reported so clients can renew expired URLs"""
+
+ASYNC_STATUS_MAX_PARTS = 1000
+"""Maximum number of result parts returned by a single job status request"""
+
+ASYNC_SPLIT_TIME_BUFFER_MS = 15000
+"""Remaining execution time at which the manifest split stage hands off to a fresh invocation"""
+
+lambda_client = None
+"""Lambda client used to invoke asynchronous job workers, created on first use"""
+
+COMPRESS_RESPONSES = os.getenv("COMPRESS_RESPONSES", "false").lower() == "true"
+"""Whether responses may be gzip compressed, requires application/gzip to be a binary media type of the API"""
+
+RESPONSE_OFFLOAD_BUCKET = os.getenv("RESPONSE_OFFLOAD_BUCKET")
+"""Bucket used to return responses too large for the Lambda payload limit, large responses fail if unset"""
+
+RESPONSE_OFFLOAD_PREFIX = os.getenv("RESPONSE_OFFLOAD_PREFIX", "offloaded-responses")
+"""Key prefix for offloaded responses, which should be removed with an S3 lifecycle rule"""
+
+RESPONSE_OFFLOAD_THRESHOLD = int(os.getenv("RESPONSE_OFFLOAD_THRESHOLD", str(5 * 1024**2)))
+"""Encoded response size (in bytes) above which a response is offloaded to S3, Lambda payloads are limited to 6 MB"""
+
+SLIM_RESULT_FIELDS = ("ingress_path", "trimmed_path", "md5", "base64_md5", "bucket", "key")
+"""Fields echoed from each request which are omitted from results when the client requests the slim schema"""
+
+FAST_PRESIGN = os.getenv("FAST_PRESIGN", "false").lower() == "true"
+"""Whether upload URLs are signed in-process with SigV4, rather than through botocore's request signer"""
+
+fast_presigner = None
+"""SigV4 presigner used when FAST_PRESIGN is enabled, created on first use"""
+
+BUCKET_BASE_URLS = {}
+"""Cache of the endpoint URL resolved by botocore for each bucket presigned by the fast presigner"""
+
+CONTENT_INDEX_BUCKET = os.getenv("CONTENT_INDEX_BUCKET")
+"""Bucket holding the content index used to satisfy requests with server-side copies, copies are disabled if unset"""
+
+CONTENT_INDEX_PREFIX = os.getenv("CONTENT_INDEX_PREFIX", "content-index")
+"""Key prefix for all content index entries"""
+
+COPY_MAX_SIZE = min(int(os.getenv("COPY_MAX_SIZE", str(256 * 1024**2))), MAX_UPLOAD_SIZE - 1)
+"""Largest object (in bytes) copied server-side, larger objects are re-uploaded so copies finish within the API timeout"""
+
+PREFLIGHT_MAX_FILES = int(os.getenv("PREFLIGHT_MAX_FILES", "10000"))
+"""Maximum number of files accepted by a single pre-flight request"""
+
+LISTING_PAGE_SIZE = int(os.getenv("LISTING_PAGE_SIZE", "10000"))
+"""Number of entries at which a page of a listing is returned, pages may exceed it by up to one S3 list page"""
+
+CONTENT_FILTER_BUCKET = os.getenv("CONTENT_FILTER_BUCKET")
+"""Bucket the content filter of each node is published to, content filters are disabled if unset"""
+
+CONTENT_FILTER_PREFIX = os.getenv("CONTENT_FILTER_PREFIX", "content-filters")
+"""Key prefix for all published content filters"""
+
+CONTENT_FILTER_FALSE_POSITIVE_RATE = float(os.getenv("CONTENT_FILTER_FALSE_POSITIVE_RATE", "0.01"))
+"""Target false-positive rate of each content filter, lower rates cost roughly 0.6 bytes per file per factor of 10"""
+
+CONTENT_FILTER_URL_EXPIRATION = 900
+"""Expiration time in seconds of the presigned URLs used by clients to download a content filter"""
+
+STATUS_JOB_BUCKET = os.getenv("STATUS_JOB_BUCKET")
+"""Bucket the status service writes the state and results of status jobs to, polling of status jobs is disabled if unset"""
+
+STATUS_JOB_PREFIX = os.getenv("STATUS_JOB_PREFIX", "status-jobs")
+"""Key prefix for all status job objects, must match the prefix used by the status service"""
+
+STATUS_RESULT_MAX_PAGES = 100
+"""Maximum number of result page URLs returned by a single status result request"""
+
+METRICS = MetricsRecorder(
+    namespace=os.getenv("METRICS_NAMESPACE", "PDS/DataUploadManager"),
+    service_name="pds-ingress-service",
+    enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+)
+"""Recorder for per-stage timings and counters, emitted once per invocation in CloudWatch Embedded Metric Format"""
+
+
+class BucketAccessError(RuntimeError):
+    """
+    Raised when the service cannot access a bucket configured within the bucket
+    map. This indicates a backend configuration issue which cannot be resolved
+    by retrying the request, so the entire batch is failed.
+    """
+
 
 def get_dum_version():
     """
@@ -142,8 +339,12 @@ def check_bucket_access(bucket_name, bucket_type):
     """
     try:
         # Bucket exists and is accessible
-        s3_client.head_bucket(Bucket=bucket_name)
-        logger.info("%s bucket '%s' is accessible", bucket_type, bucket_name)
+        with METRICS.timer("HeadBucket"):
+            s3_client.head_bucket(Bucket=bucket_name)
+
+        if should_log_sample(logger, LOG_SAMPLE_RATE):
+            logger.info("%s bucket '%s' is accessible", bucket_type, bucket_name)
+
         return True
 
     except botocore.exceptions.ClientError as e:
@@ -207,7 +408,11 @@ def file_exists_in_bucket(bucket_name, object_key, md5_digest, base64_md5_digest
         head_params = {"Bucket": bucket_name, "Key": object_key}
         if EXPECTED_BUCKET_OWNER:
             head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
-        object_head = s3_client.head_object(**head_params)
+
+        METRICS.increment("HeadObjects")
+
+        with METRICS.timer("HeadObject"):
+            object_head = s3_client.head_object(**head_params)
     except botocore.exceptions.ClientError as e:
         if e.response["Error"]["Code"] == "404":
             return False
@@ -236,19 +441,25 @@ def file_exists_in_bucket(bucket_name, object_key, md5_digest, base64_md5_digest
     request_length = int(file_size)
     request_last_modified = datetime.fromtimestamp(last_modified, tz=timezone.utc)
 
-    logger.debug("bucket_name=%s", bucket_name)
-    logger.debug("object_key=%s", object_key)
-    logger.debug("object_length=%d", object_length)
-    logger.debug("object_last_modified=%s", object_last_modified)
-    logger.debug("object_md5=%s", object_md5)
-    logger.debug("request_length=%d", request_length)
-    logger.debug("request_last_modified=%s", request_last_modified)
-    logger.debug("request_md5=%s", request_md5)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Comparing s3://%s/%s: object (length=%d, last_modified=%s, md5=%s), "
+            "request (length=%d, last_modified=%s, md5=%s)",
+            bucket_name,
+            object_key,
+            object_length,
+            object_last_modified,
+            object_md5,
+            request_length,
+            request_last_modified,
+            request_md5,
+        )
 
     if object_length != request_length:
         return False
     if not object_md5:
-        logger.info("No usable MD5 for %s/%s (multipart or missing), treating as existing", bucket_name, object_key)
+        if should_log_sample(logger, LOG_SAMPLE_RATE):
+            logger.info("No usable MD5 for %s/%s (multipart or missing), treating as existing", bucket_name, object_key)
         return True
 
     return (
@@ -314,7 +525,7 @@ def should_upload_file(
         logger.debug("File %s found in archive bucket %s", object_key, archive_bucket)
 
     if file_exists_in_staging or file_exists_in_archive:
-        logger.info(
+        logger.debug(
             "File %s already exists in staging (%s) or archive (%s)",
             object_key,
             staging_bucket,
@@ -325,6 +536,72 @@ def should_upload_file(
     return True
 
 
+def get_fast_presigner():
+    """
+    Returns the in-process SigV4 presigner, or None if fast presigning is
+    disabled or no credentials are available to sign with.
+    """
+    global fast_presigner
+
+    if FAST_PRESIGN and fast_presigner is None:
+        credentials = boto3.Session().get_credentials()
+
+        if credentials is None:
+            logger.warning("No credentials available for fast presigning, falling back to botocore")
+            return None
+
+        fast_presigner = SigV4Presigner(credentials, s3_client.meta.region_name, "s3")
+
+    return fast_presigner if FAST_PRESIGN else None
+
+
+def get_bucket_base_url(bucket_name):
+    """
+    Returns the base URL objects in the provided bucket are addressed by. The
+    endpoint (virtual or path style, custom endpoint URLs) is resolved once by
+    botocore and cached for subsequent requests.
+    """
+    if bucket_name not in BUCKET_BASE_URLS:
+        url = s3_client.generate_presigned_url(ClientMethod="head_bucket", Params={"Bucket": bucket_name})
+        BUCKET_BASE_URLS[bucket_name] = url.split("?", 1)[0].rstrip("/")
+
+    return BUCKET_BASE_URLS[bucket_name]
+
+
+def fast_presign_url(presigner, http_method, bucket_name, object_key, query_params=(), headers=None, expires_in=3600):
+    """
+    Presigns a request for an S3 object with the in-process SigV4 presigner.
+
+    Parameters
+    ----------
+    presigner : SigV4Presigner
+        The presigner to sign with.
+    http_method : str
+        HTTP method the URL will be used with.
+    bucket_name : str
+        Name of the bucket containing the object.
+    object_key : str
+        Key of the object the request applies to.
+    query_params : iterable of tuple, optional
+        Operation query parameters, as (key, value) pairs. As with botocore's
+        SigV2 presigning, x-amz-* request parameters are passed in the query
+        string rather than as headers, so clients need not send them.
+    headers : dict, optional
+        Headers which the client must send with the request.
+    expires_in : int, optional
+        Expiration time of the generated URL in seconds. Defaults to 3600.
+
+    Returns
+    -------
+    url : str
+        The presigned URL.
+
+    """
+    url = f"{get_bucket_base_url(bucket_name)}/{encode_object_key(object_key)}"
+
+    return presigner.presign(http_method, url, query_params, headers, expires_in)
+
+
 def generate_presigned_upload_url(
     bucket_info,
     object_key,
@@ -396,12 +673,35 @@ def generate_presigned_upload_url(
     if EXPECTED_BUCKET_OWNER:
         method_parameters["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
 
+    presigner = get_fast_presigner()
+
+    METRICS.increment("Presigns")
+
     try:
-        url = s3_client.generate_presigned_url(
-            ClientMethod=client_method, Params=method_parameters, ExpiresIn=expires_in
-        )
+        with METRICS.timer("Presign"):
+            if presigner:
+                headers = {"Content-Length": file_size}
+                query_params = [(f"x-amz-meta-{key}", value) for key, value in method_parameters["Metadata"].items()]
 
-        logger.info("Generated presigned URL: %s", url)
+                if "ContentMD5" in method_parameters:
+                    headers["Content-MD5"] = base64_md5_digest
+
+                if "StorageClass" in method_parameters:
+                    query_params.append(("x-amz-storage-class", method_parameters["StorageClass"]))
+
+                if EXPECTED_BUCKET_OWNER:
+                    query_params.append(("x-amz-expected-bucket-owner", EXPECTED_BUCKET_OWNER))
+
+                url = fast_presign_url(
+                    presigner, "PUT", bucket_info["name"], object_key, query_params, headers, expires_in
+                )
+            else:
+                url = s3_client.generate_presigned_url(
+                    ClientMethod=client_method, Params=method_parameters, ExpiresIn=expires_in
+                )
+
+        if should_log_sample(logger, LOG_SAMPLE_RATE):
+            logger.info("Generated presigned URL: %s", redact_presigned_url(url))
     except ClientError:
         logger.exception("Failed to generate a presigned URL for %s", join(bucket_info["name"], object_key))
         raise
@@ -409,6 +709,157 @@ def generate_presigned_upload_url(
     return url
 
 
+def get_post_upload_fields(object_key, md5_digest, base64_md5_digest, last_modified):
+    """
+    Returns the per-file form fields a client must submit alongside a file
+    uploaded against a presigned POST policy.
+
+    Parameters
+    ----------
+    object_key : str
+        Object key location within the S3 bucket to be uploaded to.
+    md5_digest : str
+        MD5 hash digest corresponding to the file to be uploaded.
+    base64_md5_digest : str
+        Base64 encoded version of the MD5 hash digest. S3 verifies the uploaded
+        content against this value.
+    last_modified : float
+        Last modified time of the incoming version of the file as a Unix Epoch.
+
+    Returns
+    -------
+    fields : dict
+        The form fields specific to the file to be uploaded.
+
+    """
+    return {
+        "key": object_key,
+        "Content-MD5": base64_md5_digest,
+        "x-amz-meta-md5": md5_digest,
+        "x-amz-meta-last_modified": datetime.fromtimestamp(last_modified, tz=timezone.utc).isoformat(),
+        # Included for rclone compatibility
+        "x-amz-meta-mtime": str(last_modified),
+    }
+
+
+def generate_presigned_post_policy(
+    bucket_info, object_keys, max_file_size, client_version, service_version, expires_in=3000
+):
+    """
+    Generates a single presigned POST policy which may be used to upload any
+    number of files to the provided bucket, so long as each object key shares
+    the common prefix of the provided keys. Each upload must supply its own
+    Content-MD5 and metadata fields, so S3 still verifies the integrity of every
+    uploaded file.
+
+    Parameters
+    ----------
+    bucket_info : dict
+        Dictionary containing information about the destination bucket.
+    object_keys : list of str
+        The object keys of all files to be uploaded against the policy.
+    max_file_size : int
+        Size in bytes of the largest file to be uploaded against the policy.
+    client_version : str
+        Version of the DUM client used to initiate the ingress reqeust.
+    service_version : str
+        Version of the DUM lambda service used to process this ingress request.
+    expires_in : int, optional
+        Expiration time of the generated policy in seconds. Defaults to 3000
+        seconds.
+
+    Returns
+    -------
+    policy : dict
+        Dictionary containing the "url" to submit uploads to, and the "fields"
+        common to all uploads made against the policy.
+
+    """
+    key_prefix = os.path.commonprefix(object_keys)
+
+    fields = {
+        "x-amz-meta-dum_client_version": str(client_version),
+        "x-amz-meta-dum_service_version": str(service_version),
+    }
+
+    if bucket_info.get("storage_class"):
+        fields["x-amz-storage-class"] = bucket_info["storage_class"]
+
+    # Fields provided up-front must also be included with the conditions
+    conditions = [{name: value} for name, value in fields.items()]
+    conditions.append(["content-length-range", 1, max_file_size])
+    conditions.extend(["starts-with", f"${field}", ""] for field in POST_POLICY_FILE_FIELDS)
+
+    METRICS.increment("Presigns")
+
+    try:
+        with METRICS.timer("PostPolicy"):
+            policy = s3_client.generate_presigned_post(
+                Bucket=bucket_info["name"],
+                Key=key_prefix + "${filename}",  # Scopes the policy to keys starting with the prefix
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expires_in,
+            )
+    except ClientError:
+        logger.exception("Failed to generate a presigned POST policy for %s", join(bucket_info["name"], key_prefix))
+        raise
+
+    logger.info("Generated presigned POST policy for %d file(s) under %s", len(object_keys), key_prefix)
+
+    return policy
+
+
+def attach_post_policies(results, client_version, service_version):
+    """
+    Generates the presigned POST policies needed to service all results which
+    were designated for upload via POST policy, and references each result to
+    the policy it should be uploaded against.
+
+    Parameters
+    ----------
+    results : list of dict
+        The results of processing each ingress request in a batch.
+    client_version : str
+        Version of the DUM client used to initiate the ingress reqeust.
+    service_version : str
+        Version of the DUM lambda service used to process this ingress request.
+
+    Returns
+    -------
+    response_body : dict
+        Dictionary containing the list of generated "policies", and the
+        list of "results" for the batch.
+
+    """
+    policy_groups = {}
+
+    for result in results:
+        bucket_info = result.pop("_bucket_info", None)
+
+        if bucket_info is not None:
+            group_key = (bucket_info["name"], bucket_info.get("storage_class"))
+            policy_groups.setdefault(group_key, (bucket_info, []))[1].append(result)
+
+    policies = []
+
+    for bucket_info, group_results in policy_groups.values():
+        policies.append(
+            generate_presigned_post_policy(
+                bucket_info,
+                [result["key"] for result in group_results],
+                max(result["size"] for result in group_results),
+                client_version,
+                service_version,
+            )
+        )
+
+        for result in group_results:
+            result["policy"] = len(policies) - 1
+
+    return {"policies": policies, "results": results}
+
+
 def process_multipart_upload(
     bucket_info,
     object_key,
@@ -479,7 +930,10 @@ def process_multipart_upload(
     if EXPECTED_BUCKET_OWNER:
         mpu_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
 
-    response = s3_client.create_multipart_upload(**mpu_params)
+    METRICS.increment("MultipartInitiations")
+
+    with METRICS.timer("MultipartInitiate"):
+        response = s3_client.create_multipart_upload(**mpu_params)
 
     # This upload ID will be required for all subsequent requests related to
     # this multipart upload
@@ -487,13 +941,31 @@ def process_multipart_upload(
 
     num_parts = int(ceil(file_size / CHUNK_SIZE))
 
-    logger.info(f"Generating pre-signed URLs for {num_parts} file parts, {upload_id=}")
+    logger.info("Generating pre-signed URLs for %d file parts, upload_id=%s", num_parts, upload_id)
 
     signed_urls = []
 
+    presigner = get_fast_presigner()
+
+    # Part URLs are timed as a whole, rather than per part
+    presign_start_time = time.perf_counter()
+
     try:
         # Generate the pre-signed URLs for each part of the upload
         for part_num in range(1, num_parts + 1):  # part numbers use 1-based index
+            if presigner:
+                query_params = [("uploadId", upload_id), ("partNumber", part_num)]
+
+                if EXPECTED_BUCKET_OWNER:
+                    query_params.append(("x-amz-expected-bucket-owner", EXPECTED_BUCKET_OWNER))
+
+                signed_urls.append(
+                    fast_presign_url(
+                        presigner, "PUT", bucket_info["name"], object_key, query_params, expires_in=expires_in
+                    )
+                )
+                continue
+
             method_parameters = {
                 "Bucket": bucket_info["name"],
                 "Key": object_key,
@@ -526,13 +998,18 @@ def process_multipart_upload(
             ClientMethod="complete_multipart_upload", Params=method_parameters, ExpiresIn=expires_in, HttpMethod="POST"
         )
 
-        logger.info("Generated multipart upload complete presigned URL: %s", complete_upload_url)
+        if should_log_sample(logger, LOG_SAMPLE_RATE):
+            logger.info("Generated multipart upload complete presigned URL: %s", redact_presigned_url(complete_upload_url))
 
         abort_upload_url = s3_client.generate_presigned_url(
             ClientMethod="abort_multipart_upload", Params=method_parameters, ExpiresIn=expires_in, HttpMethod="POST"
         )
 
-        logger.info("Generated multipart upload abort presigned URL: %s", abort_upload_url)
+        if should_log_sample(logger, LOG_SAMPLE_RATE):
+            logger.info("Generated multipart upload abort presigned URL: %s", redact_presigned_url(abort_upload_url))
+
+        METRICS.increment("Presigns", num_parts + 2)
+        METRICS.add_timing("MultipartPresign", (time.perf_counter() - presign_start_time) * 1000)
     except Exception:
         logger.exception("Aborting multipart upload for upload_id=%s due to error", upload_id)
         s3_client.abort_multipart_upload(Bucket=bucket_info["name"], Key=object_key, UploadId=upload_id)
@@ -541,6 +1018,160 @@ def process_multipart_upload(
     return signed_urls, complete_upload_url, abort_upload_url, num_parts
 
 
+def find_content_match(request_node, md5_digest, base64_md5_digest, file_size, destination_bucket, object_key):
+    """
+    Searches the content index for an existing object with the same content
+    as the requested file, stored under a different key.
+
+    The index only provides a hint, so the object it points to is verified to
+    still exist with the requested size and MD5 before it is returned. Only
+    objects small enough to copy with a single CopyObject request, well
+    within the API Gateway timeout, are considered.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier of the requestor.
+    md5_digest : str
+        MD5 hash digest (hex) of the requested file.
+    base64_md5_digest : str
+        Base64 encoded MD5 of the same file.
+    file_size : int
+        Size of the requested file in bytes.
+    destination_bucket : str
+        Bucket the requested file is to be ingested to.
+    object_key : str
+        Key the requested file is to be ingested to.
+
+    Returns
+    -------
+    source : tuple of (str, str, str) or None
+        Bucket, key and ETag of the existing object to copy from, or None if
+        no usable match exists.
+
+    """
+    if not CONTENT_INDEX_BUCKET or int(file_size) == 0 or int(file_size) > COPY_MAX_SIZE:
+        return None
+
+    try:
+        index_entry = s3_client.get_object(
+            Bucket=CONTENT_INDEX_BUCKET, Key=content_index_key(CONTENT_INDEX_PREFIX, request_node, md5_digest, file_size)
+        )
+        source = decode_content_index_entry(index_entry["Body"].read())
+    except ClientError as err:
+        if err.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            logger.warning("Failed to query content index for %s, reason: %s", object_key, str(err))
+
+        return None
+
+    if not source or source == (destination_bucket, object_key):
+        return None
+
+    source_bucket, source_key = source
+
+    head_params = {"Bucket": source_bucket, "Key": source_key}
+
+    if EXPECTED_BUCKET_OWNER:
+        head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    METRICS.increment("HeadObjects")
+
+    try:
+        with METRICS.timer("HeadObject"):
+            source_head = s3_client.head_object(**head_params)
+    except ClientError as err:
+        if err.response["Error"]["Code"] != "404":
+            logger.warning("Failed to verify content index entry for %s, reason: %s", object_key, str(err))
+
+        return None
+
+    meta = source_head.get("Metadata", {})
+    etag = source_head["ETag"].strip('"')
+
+    content_matches = (
+        meta.get("md5") == md5_digest
+        or meta.get("md5chksum") == base64_md5_digest
+        or ("md5" not in meta and "md5chksum" not in meta and etag == md5_digest)
+    )
+
+    if int(source_head["ContentLength"]) != int(file_size) or not content_matches:
+        logger.debug("Stale content index entry for %s, s3://%s/%s has changed", object_key, source_bucket, source_key)
+        return None
+
+    return source_bucket, source_key, source_head["ETag"]
+
+
+def copy_existing_content(
+    source,
+    bucket_info,
+    object_key,
+    file_size,
+    md5_digest,
+    base64_md5_digest,
+    last_modified,
+    client_version,
+    service_version,
+):
+    """
+    Copies an existing object with the same content as the requested file to
+    the requested location, entirely within S3. The copy only succeeds if the
+    source is unchanged since its content was verified by find_content_match.
+
+    Parameters
+    ----------
+    source : tuple of (str, str, str)
+        Bucket, key and ETag of the object to copy from.
+    bucket_info : dict
+        Dictionary containing information about the destination bucket.
+    object_key : str
+        Object key location within the S3 bucket to copy to.
+    file_size : int
+        Size of the file in bytes.
+    md5_digest : str
+        MD5 hash digest (hex) of the file.
+    base64_md5_digest : str
+        Base64 encoded MD5 of the same file.
+    last_modified : float
+        Last modified time of the incoming version of the file as a Unix Epoch.
+    client_version : str
+        Version of the DUM client used to initiate the ingress reqeust.
+    service_version : str
+        Version of the DUM lambda service used to process this ingress request.
+
+    """
+    source_bucket, source_key, source_etag = source
+
+    # Metadata is assigned exactly as it would be for an upload of the file
+    metadata = {
+        "md5": md5_digest,
+        "last_modified": datetime.fromtimestamp(last_modified, tz=timezone.utc).isoformat(),
+        "dum_client_version": client_version,
+        "dum_service_version": service_version,
+        "mtime": str(last_modified),
+    }
+
+    copy_params = {
+        "Bucket": bucket_info["name"],
+        "Key": object_key,
+        "CopySource": {"Bucket": source_bucket, "Key": source_key},
+        "CopySourceIfMatch": source_etag,
+        "Metadata": metadata,
+        "MetadataDirective": "REPLACE",
+    }
+
+    if bucket_info.get("storage_class"):
+        copy_params["StorageClass"] = bucket_info["storage_class"]
+
+    if EXPECTED_BUCKET_OWNER:
+        copy_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+        copy_params["ExpectedSourceBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    METRICS.increment("Copies")
+
+    with METRICS.timer("Copy"):
+        s3_client.copy_object(**copy_params)
+
+
 def process_ingress_request(ingress_request, request_index, node_bucket_map, request_event):
     """
     Processes a single ingress request and derives the appropriate S3 upload
@@ -574,15 +1205,20 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
     client_version = request_headers.get("ClientVersion", None)
     service_version = get_dum_version()
     force_overwrite = bool(int(request_headers.get("ForceOverwrite", False)))
-
-    # Convert MD5 from hex to base64 (AWS format)
-    base64_md5_digest = base64.b64encode(bytes.fromhex(md5_digest)).decode()
+    upload_mode = request_headers.get("UploadMode", "put").lower()
+    # Files the pre-flight stage found no existing object for need not be checked again
+    preflight_new = ingress_request.get("preflight") == PREFLIGHT_NEW
+    allow_copy = bool(int(request_headers.get("AllowCopy", False)))
 
     if not all(field is not None for field in (ingress_path, trimmed_path, md5_digest, file_size, last_modified)):
         logger.error("One or more missing fields in request index %d", request_index)
-        raise RuntimeError
+        raise ValueError(f"One or more missing fields in request index {request_index}")
 
-    logger.info("Processing request for %s (index %d)", trimmed_path, request_index)
+    # Convert MD5 from hex to base64 (AWS format)
+    base64_md5_digest = base64.b64encode(bytes.fromhex(md5_digest)).decode()
+
+    if should_log_sample(logger, LOG_SAMPLE_RATE):
+        logger.info("Processing request for %s (index %d)", trimmed_path, request_index)
 
     # Get bucket info for staging and archive
     staging_bucket_info = bucket_for_path(node_bucket_map, trimmed_path, logger, bucket_type="staging")
@@ -597,7 +1233,7 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
     # configuration issue (IAM policy, cross-account permissions, or bucket policy).
     #
     # Important:
-    #   - Fail fast by raising an exception so that the Lambda returns
+    #   - Fail fast by raising a BucketAccessError so that the Lambda returns
     #     a top-level HTTP 500. This prevents the DUM client from hanging while
     #     waiting for presigned URLs that will never be generated.
     #
@@ -614,7 +1250,7 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
         )
 
         # Send a generic error to the client (no bucket name)
-        raise RuntimeError(
+        raise BucketAccessError(
             "Internal server error: the ingestion service cannot access required resources. "
             "Please contact PDS Engineering."
         )
@@ -627,14 +1263,14 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
             archive_bucket,
         )
 
-        raise RuntimeError(
+        raise BucketAccessError(
             "Internal server error: the ingestion service cannot access required resources. "
             "Please contact PDS Engineering."
         )
 
     object_key = join(request_node.lower(), trimmed_path)
 
-    if should_upload_file(
+    if preflight_new or should_upload_file(
             destination_bucket,
             archive_bucket,
             object_key,
@@ -644,6 +1280,45 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
             float(last_modified),
             force_overwrite,
     ):
+        # Content already ingested under another key (such as a reorganized
+        # bundle) is copied within S3, rather than uploaded again
+        source = None
+
+        if allow_copy and not force_overwrite:
+            source = find_content_match(
+                request_node, md5_digest, base64_md5_digest, int(file_size), destination_bucket, object_key
+            )
+
+        if source:
+            try:
+                copy_existing_content(
+                    source,
+                    staging_bucket_info,
+                    object_key,
+                    int(file_size),
+                    md5_digest,
+                    base64_md5_digest,
+                    float(last_modified),
+                    client_version,
+                    service_version,
+                )
+
+                if should_log_sample(logger, LOG_SAMPLE_RATE):
+                    logger.info("Copied %s from existing content at %s", object_key, join(*source[:2]))
+
+                return {
+                    "result": HTTPStatus.CREATED,
+                    "action": "copy",
+                    "trimmed_path": trimmed_path,
+                    "ingress_path": ingress_path,
+                    "bucket": destination_bucket,
+                    "key": object_key,
+                    "copy_source": join(*source[:2]),
+                    "message": "File copied from existing content",
+                }
+            except ClientError as err:
+                logger.warning("Server-side copy failed for %s, requesting upload, reason: %s", object_key, str(err))
+
         # Multipart upload path
         if file_size >= MAX_UPLOAD_SIZE:
             logger.info("%s exceeds maximum upload size, initiating multi-part upload", object_key)
@@ -673,6 +1348,23 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
                 "message": "Multipart upload request initiated",
             }
 
+        # Single-part upload against a presigned POST policy. The policy itself
+        # is generated once for the entire batch by the handler.
+        if upload_mode == "post" and 0 < int(file_size) <= POST_POLICY_MAX_SIZE:
+            return {
+                "result": HTTPStatus.OK,
+                "trimmed_path": trimmed_path,
+                "ingress_path": ingress_path,
+                "md5": md5_digest,
+                "base64_md5": base64_md5_digest,
+                "bucket": destination_bucket,
+                "key": object_key,
+                "size": int(file_size),
+                "fields": get_post_upload_fields(object_key, md5_digest, base64_md5_digest, float(last_modified)),
+                "message": "Request success",
+                "_bucket_info": staging_bucket_info,
+            }
+
         # Single-part upload
         s3_url = generate_presigned_upload_url(
             staging_bucket_info,
@@ -700,12 +1392,15 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
     #
     # File already exists in staging or archive — upload not needed
     #
-    logger.info(
-        "File %s already exists in bucket %s or archive %s and should not be overwritten",
-        object_key,
-        destination_bucket,
-        archive_bucket,
-    )
+    METRICS.increment("Skips")
+
+    if should_log_sample(logger, LOG_SAMPLE_RATE):
+        logger.info(
+            "File %s already exists in bucket %s or archive %s and should not be overwritten",
+            object_key,
+            destination_bucket,
+            archive_bucket,
+        )
 
     return {
         "result": HTTPStatus.NO_CONTENT,
@@ -718,51 +1413,264 @@ def process_ingress_request(ingress_request, request_index, node_bucket_map, req
     }
 
 
-def lambda_handler(event, context):
+def ingress_error_result(ingress_request, request_index, error):
     """
-    Entrypoint for this Lambda function. Derives the appropriate S3 upload URI
-    location based on the contents of the ingress request.
+    Builds the per-file result returned to the client when processing of a
+    single ingress request fails for a reason that does not affect the rest
+    of the batch.
 
     Parameters
     ----------
-    event : dict
-        Dictionary containing details of the event that triggered the Lambda.
-    context : dict
-        Dictionary containing details of the AWS context in which the Lambda was
-        invoked. Currently unused by this function.
+    ingress_request : dict
+        Dictionary containing details of the ingress request that failed.
+    request_index : int
+        Index of the request within the batch of requests being processed.
+    error : Exception
+        The exception raised while processing the request.
+
+    Returns
+    -------
+    result : dict
+        JSON-compliant dictionary describing the failure, including whether
+        the client may retry the request.
+
+    """
+    if isinstance(error, ClientError):
+        error_code = str(error.response.get("Error", {}).get("Code", "Unknown"))
+        retryable = error_code in RETRYABLE_ERROR_CODES
+        result = HTTPStatus.SERVICE_UNAVAILABLE if retryable else HTTPStatus.INTERNAL_SERVER_ERROR
+    elif isinstance(error, (botocore.exceptions.ConnectionError, botocore.exceptions.HTTPClientError)):
+        error_code = type(error).__name__
+        retryable = True
+        result = HTTPStatus.SERVICE_UNAVAILABLE
+    elif isinstance(error, (ValueError, TypeError)):
+        error_code = "InvalidRequest"
+        retryable = False
+        result = HTTPStatus.BAD_REQUEST
+    else:
+        error_code = type(error).__name__
+        retryable = False
+        result = HTTPStatus.INTERNAL_SERVER_ERROR
+
+    return {
+        "result": result,
+        "index": request_index,
+        "trimmed_path": ingress_request.get("trimmed_path"),
+        "ingress_path": ingress_request.get("ingress_path"),
+        "error_code": error_code,
+        "retryable": retryable,
+        "message": f"Request failed: {error_code}",
+    }
+
+
+def internal_error_response():
+    """
+    Returns the response sent to the client when the batch as a whole could
+    not be processed. The details of the failure are only logged, never
+    returned to the client.
+    """
+    return {
+        "statusCode": HTTPStatus.INTERNAL_SERVER_ERROR.value,
+        "body": json.dumps(
+            {
+                "error": (
+                    "Internal server error: the ingestion service encountered a failure "
+                    "while processing this request. Please contact PDS Engineering."
+                )
+            }
+        ),
+    }
+
+
+def get_idempotency_key(request_headers, request_node, request_batch):
+    """
+    Returns the idempotency key provided with a batch request, if the key
+    matches the contents of the request.
+
+    Parameters
+    ----------
+    request_headers : dict
+        Headers of the HTTP request which triggered the Lambda invocation.
+    request_node : str
+        PDS node identifier of the requestor.
+    request_batch : list of dict
+        The batch of ingress requests parsed from the request body.
 
     Returns
     -------
+    idempotency_key : str or None
+        The validated idempotency key, or None if no (valid) key was provided.
+
+    """
+    idempotency_key = request_headers.get(IDEMPOTENCY_KEY_HEADER)
+
+    if not idempotency_key or not RESPONSE_CACHE.enabled:
+        return None
+
+    force_overwrite = bool(int(request_headers.get("ForceOverwrite", False)))
+    upload_mode = request_headers.get("UploadMode", "put").lower()
+    response_schema = request_headers.get("ResponseSchema", "full").lower()
+
+    # Copies change the response, but the option is omitted for clients
+    # which do not accept them, so their keys remain unchanged
+    copy_options = {"allow_copy": True} if bool(int(request_headers.get("AllowCopy", False))) else {}
+
+    # Never trust the key as-is, otherwise a client could be served a response
+    # cached for a different request
+    if idempotency_key != compute_idempotency_key(
+        request_node,
+        request_batch,
+        force_overwrite=force_overwrite,
+        upload_mode=upload_mode,
+        response_schema=response_schema,
+        **copy_options,
+    ):
+        logger.warning("Provided idempotency key does not match request contents, response will not be cached")
+        return None
+
+    return idempotency_key
+
+
+def get_cached_response(idempotency_key):
+    """
+    Returns the cached response for the provided idempotency key, if one exists.
+    Failures to read the cache are logged but otherwise ignored.
+    """
+    try:
+        return RESPONSE_CACHE.get(idempotency_key)
+    except Exception as err:
+        logger.warning("Failed to read response cache for %s, reason: %s", idempotency_key, str(err))
+        return None
+
+
+def cache_response(idempotency_key, response):
+    """
+    Caches the provided response under the provided idempotency key. Failures
+    to write to the cache are logged but otherwise ignored.
+    """
+    try:
+        RESPONSE_CACHE.put(idempotency_key, response)
+    except Exception as err:
+        logger.warning("Failed to write response cache for %s, reason: %s", idempotency_key, str(err))
+
+
+def slim_result(result):
+    """
+    Returns a copy of the provided result without the fields echoed from the
+    original request, which the client can restore using the result index.
+    """
+    slimmed = {
+        field: value for field, value in result.items() if field not in SLIM_RESULT_FIELDS and value is not None
+    }
+
+    # Successful results need no explanation
+    if slimmed["result"] == HTTPStatus.OK:
+        slimmed.pop("message", None)
+
+    return slimmed
+
+
+def accepts_gzip(request_headers):
+    """Returns True if the client which made a request accepts gzip compressed responses"""
+    accept = next((value for name, value in request_headers.items() if name.lower() == "accept"), None) or ""
+
+    return "application/gzip" in accept.lower()
+
+
+def encode_response(response, request_headers):
+    """
+    Encodes a batch response for return to the client. The response body is
+    gzip compressed if the client accepts it, and responses too large to be
+    returned from Lambda are offloaded to S3, with a presigned URL to the full
+    response returned in their place.
+
+    Parameters
+    ----------
     response : dict
-        JSON-compliant dictionary containing the results of the request.
+        The API Gateway proxy response to encode.
+    request_headers : dict
+        Headers of the HTTP request which triggered the Lambda invocation.
+
+    Returns
+    -------
+    encoded_response : dict
+        The encoded API Gateway proxy response.
 
     """
-    # Read the version number assigned to this function
-    service_version = get_dum_version()
+    compress = COMPRESS_RESPONSES and accepts_gzip(request_headers)
 
-    # Read the bucket map configured for the service
-    bucket_map = initialize_bucket_map(logger)
+    body = response["body"].encode("utf-8")
 
-    # Parse request details from event object
-    body = json.loads(event["body"])
-    headers = event["headers"]
+    if compress:
+        body = gzip.compress(body)
 
-    request_node = event["queryStringParameters"].get("node")
+    # Compressed bodies are returned base64 encoded
+    encoded_size = 4 * ceil(len(body) / 3) if compress else len(body)
 
-    if not request_node:
-        logger.error("No request node ID provided in queryStringParameters")
-        raise RuntimeError
+    if encoded_size > RESPONSE_OFFLOAD_THRESHOLD:
+        if RESPONSE_OFFLOAD_BUCKET:
+            object_key = f"{RESPONSE_OFFLOAD_PREFIX.strip('/')}/{uuid.uuid4().hex}.json"
 
-    client_version = headers.get("ClientVersion", None)
+            put_params = {
+                "Bucket": RESPONSE_OFFLOAD_BUCKET,
+                "Key": object_key,
+                "Body": body,
+                "ContentType": "application/json",
+            }
 
-    check_client_version(client_version, service_version)
+            if compress:
+                put_params["ContentEncoding"] = "gzip"
 
-    node_bucket_map = bucket_map["NODES"].get(request_node.upper())
+            s3_client.put_object(**put_params)
 
-    if not node_bucket_map:
-        logger.exception("No bucket map entries configured for node ID %s", request_node)
-        raise RuntimeError
+            logger.info("Offloaded %d byte response to %s", encoded_size, object_key)
+
+            offload_url = s3_client.generate_presigned_url(
+                ClientMethod="get_object",
+                Params={"Bucket": RESPONSE_OFFLOAD_BUCKET, "Key": object_key},
+                ExpiresIn=ASYNC_URL_EXPIRATION,
+            )
+
+            return {"statusCode": response["statusCode"], "body": json.dumps({"offloaded_response": offload_url})}
+
+        logger.warning("Response of %d bytes may exceed the Lambda payload limit", encoded_size)
+
+    if compress:
+        return {
+            "statusCode": response["statusCode"],
+            "headers": {"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            "body": base64.b64encode(body).decode("ascii"),
+            "isBase64Encoded": True,
+        }
 
+    return response
+
+
+def process_ingress_batch(request_batch, node_bucket_map, request_event):
+    """
+    Processes each request within a batch of ingress requests in parallel.
+
+    Parameters
+    ----------
+    request_batch : list of dict
+        The batch of ingress requests to process.
+    node_bucket_map : dict
+        Bucket map configuration for the requestor node.
+    request_event : dict
+        Event providing the headers and query string parameters of the request.
+
+    Returns
+    -------
+    results : list of dict
+        The result of each request within the batch. Requests which failed
+        for reasons isolated to a single file are reported by error results.
+
+    Raises
+    ------
+    BucketAccessError
+        If a bucket configured for the node could not be accessed.
+
+    """
     results = []
 
     num_cores = max(os.cpu_count(), 1)
@@ -772,41 +1680,1112 @@ def lambda_handler(event, context):
     with concurrent.futures.ThreadPoolExecutor(max_workers=num_cores) as executor:
         # Iterate over all batched requests
         futures = {
-            executor.submit(process_ingress_request, ingress_request, request_index, node_bucket_map, event)
-            for request_index, ingress_request in enumerate(body)
+            executor.submit(process_ingress_request, ingress_request, request_index, node_bucket_map, request_event): (
+                request_index,
+                ingress_request,
+            )
+            for request_index, ingress_request in enumerate(request_batch)
         }
 
         for future in concurrent.futures.as_completed(futures):
+            request_index, ingress_request = futures[future]
+
             try:
-                results.append(future.result())
-            except Exception:
-                logger.exception("Ingress request failed inside worker thread")
+                result = future.result()
+                result["index"] = request_index
+                results.append(result)
+            except BucketAccessError:
+                # Cancel any requests which have not started yet, they would all
+                # fail for the same reason
+                for pending_future in futures:
+                    pending_future.cancel()
 
-                # FAIL FAST: return 500 to the client
-                return {
-                    "statusCode": HTTPStatus.INTERNAL_SERVER_ERROR.value,
-                    "body": json.dumps(
-                        {
-                            "error": (
-                                "Internal server error: the ingestion service encountered a failure "
-                                "while processing this request. Please contact PDS Engineering."
-                            )
-                        }
-                    ),
-                }
+                raise
+            except Exception as err:
+                # Failures isolated to a single file are reported back per-item,
+                # so the client can retry only what failed
+                logger.exception("Ingress request index %d failed inside worker thread", request_index)
+                METRICS.increment("FileErrors")
+                results.append(ingress_error_result(ingress_request, request_index, err))
 
-    # Determine top-level HTTP status for the entire batch.
-    # If ANY request fails (403, 404, other), return that status code so the DUM
-    # client immediately understands the request failed and will not hang.
-    #
-    batch_status = HTTPStatus.OK.value
+    return results
 
-    for result in results:
-        if result["result"] not in (HTTPStatus.OK.value, HTTPStatus.NO_CONTENT.value):
-            batch_status = int(result["result"])
+
+def log_batch_summary(request_node, results, context):
+    """
+    Logs a single line summarizing the outcome of each file within a batch,
+    in lieu of logging every file individually.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier of the requestor.
+    results : list of dict
+        The per-file results of the batch.
+    context : object
+        Lambda context of the invocation, used to identify the request.
+
+    """
+    num_uploads = sum(1 for result in results if result["result"] == HTTPStatus.OK)
+    num_copies = sum(1 for result in results if result["result"] == HTTPStatus.CREATED)
+    num_skipped = sum(1 for result in results if result["result"] == HTTPStatus.NO_CONTENT)
+
+    logger.info(
+        "Batch summary for node %s (request %s): %d file(s), %d to upload, %d copied, %d already present, %d failed",
+        request_node,
+        getattr(context, "aws_request_id", "unknown"),
+        len(results),
+        num_uploads,
+        num_copies,
+        num_skipped,
+        len(results) - num_uploads - num_copies - num_skipped,
+    )
+
+
+def json_response(status, body):
+    """Returns an API Gateway proxy response with the provided status and JSON body"""
+    return {"statusCode": HTTPStatus(status).value, "body": json.dumps(body)}
+
+
+def get_lambda_client():
+    """Returns the Lambda client used to invoke asynchronous job workers, creating it if necessary"""
+    global lambda_client
+
+    if lambda_client is None:
+        if os.getenv("ENDPOINT_URL", None):
+            lambda_client = boto3.client("lambda", endpoint_url=os.environ["ENDPOINT_URL"])
+        else:
+            lambda_client = boto3.client("lambda")
+
+    return lambda_client
+
+
+def invoke_async_job(job):
+    """
+    Asynchronously invokes this Lambda function to process a stage of an
+    asynchronous job.
+
+    Parameters
+    ----------
+    job : dict
+        Description of the job stage to process.
+
+    """
+    get_lambda_client().invoke(
+        FunctionName=os.environ["AWS_LAMBDA_FUNCTION_NAME"],
+        InvocationType="Event",
+        Payload=json.dumps({"async_job": job}).encode("utf-8"),
+    )
+
+
+def read_job_object(node_id, job_id, name):
+    """Reads and parses the JSON object with the provided name from the storage of an asynchronous job"""
+    response = s3_client.get_object(Bucket=ASYNC_JOB_BUCKET, Key=job_object_key(ASYNC_JOB_PREFIX, node_id, job_id, name))
+
+    return json.loads(response["Body"].read())
+
+
+def write_job_object(node_id, job_id, name, body, content_type="application/json"):
+    """Writes an object with the provided name (and str or bytes body) to the storage of an asynchronous job"""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+
+    s3_client.put_object(
+        Bucket=ASYNC_JOB_BUCKET,
+        Key=job_object_key(ASYNC_JOB_PREFIX, node_id, job_id, name),
+        Body=body,
+        ContentType=content_type,
+    )
+
+
+def write_job_status(node_id, job_id, state, **details):
+    """Records the current state of an asynchronous job, along with any additional details"""
+    write_job_object(node_id, job_id, "status.json", json.dumps(dict(details, job_id=job_id, state=state)))
+
+
+def presign_job_object(node_id, job_id, name, client_method="get_object"):
+    """Returns a presigned URL for the object with the provided name within the storage of an asynchronous job"""
+    return s3_client.generate_presigned_url(
+        ClientMethod=client_method,
+        Params={"Bucket": ASYNC_JOB_BUCKET, "Key": job_object_key(ASYNC_JOB_PREFIX, node_id, job_id, name)},
+        ExpiresIn=ASYNC_URL_EXPIRATION,
+    )
+
+
+def preflight_file(preflight_request, node_bucket_map, request_node):
+    """
+    Determines whether a file may be skipped based only on its size and last
+    modified time, by comparing them against any existing objects at the
+    file's destination key within the staging and archive buckets.
+
+    Parameters
+    ----------
+    preflight_request : dict
+        Dictionary containing the "trimmed_path", "size" and "last_modified"
+        of the file.
+    node_bucket_map : dict
+        Bucket map configuration for the requestor node.
+    request_node : str
+        PDS node identifier of the requestor.
+
+    Returns
+    -------
+    state : str
+        The pre-flight state of the file.
+
+    """
+    trimmed_path = preflight_request["trimmed_path"]
+    file_size = int(preflight_request["size"])
+    last_modified = float(preflight_request["last_modified"])
+
+    object_key = join(request_node.lower(), trimmed_path)
+    object_heads = []
+
+    for bucket_type in ("staging", "archive"):
+        head_params = {
+            "Bucket": bucket_for_path(node_bucket_map, trimmed_path, logger, bucket_type=bucket_type)["name"],
+            "Key": object_key,
+        }
+
+        if EXPECTED_BUCKET_OWNER:
+            head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+        METRICS.increment("HeadObjects")
+
+        try:
+            with METRICS.timer("HeadObject"):
+                object_heads.append(s3_client.head_object(**head_params))
+        except ClientError as err:
+            if err.response["Error"]["Code"] != "404":
+                raise
+
+            continue
+
+        # No need to check the archive once the staged copy is known to be current
+        if preflight_state(file_size, last_modified, object_heads) == PREFLIGHT_UNCHANGED:
             break
 
-    return {
-        "statusCode": batch_status,
-        "body": json.dumps(results),
-    }
+    return preflight_state(file_size, last_modified, object_heads)
+
+
+def handle_preflight_action(action_request, request_node, node_bucket_map):
+    """
+    Services a pre-flight request, where the client submits the size and last
+    modified time of each file it intends to ingest, prior to computing any
+    MD5 checksums. Each file is assigned one of the following states:
+
+    * unchanged: an object with the same size and modification time exists,
+      so the client may skip the file without hashing it.
+    * needs_hash: an object of the same size exists, so the client must hash
+      the file and submit it with a regular ingress request.
+    * new: no object of the same size exists, so the file will be uploaded,
+      and the subsequent ingress request need not check S3 for it again.
+
+    Files which could not be checked are conservatively reported as needing
+    a hash, so they are fully verified by the subsequent ingress request.
+
+    Parameters
+    ----------
+    action_request : dict
+        The parsed request body, containing the list of "files" to check.
+    request_node : str
+        PDS node identifier of the requestor.
+    node_bucket_map : dict
+        Bucket map configuration for the requestor node.
+
+    Returns
+    -------
+    response : dict
+        The API Gateway proxy response for the request, containing the state
+        of each file, in request order.
+
+    """
+    preflight_requests = action_request.get("files")
+
+    if not isinstance(preflight_requests, list) or len(preflight_requests) > PREFLIGHT_MAX_FILES:
+        return json_response(
+            HTTPStatus.BAD_REQUEST, {"error": f"files must be a list of at most {PREFLIGHT_MAX_FILES} entries"}
+        )
+
+    states = [PREFLIGHT_NEEDS_HASH] * len(preflight_requests)
+
+    num_cores = max(os.cpu_count(), 1)
+
+    with METRICS.timer("Preflight"), concurrent.futures.ThreadPoolExecutor(max_workers=num_cores) as executor:
+        futures = {
+            executor.submit(preflight_file, preflight_request, node_bucket_map, request_node): request_index
+            for request_index, preflight_request in enumerate(preflight_requests)
+        }
+
+        for future in concurrent.futures.as_completed(futures):
+            request_index = futures[future]
+
+            try:
+                states[request_index] = future.result()
+            except Exception as err:
+                logger.warning("Pre-flight check failed for request index %d, reason: %s", request_index, str(err))
+
+    num_unchanged = states.count(PREFLIGHT_UNCHANGED)
+
+    METRICS.increment("PreflightFiles", len(states))
+    METRICS.increment("PreflightUnchanged", num_unchanged)
+
+    logger.info(
+        "Pre-flight summary for node %s: %d file(s), %d unchanged, %d need hashing, %d new",
+        request_node,
+        len(states),
+        num_unchanged,
+        states.count(PREFLIGHT_NEEDS_HASH),
+        states.count(PREFLIGHT_NEW),
+    )
+
+    return json_response(HTTPStatus.OK, {"states": states})
+
+
+def encode_listing_token(bucket_index, continuation_token):
+    """Returns the opaque page token resuming a listing at the provided bucket and S3 continuation token"""
+    token = json.dumps({"bucket": bucket_index, "token": continuation_token}, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(token.encode("utf-8")).decode("ascii")
+
+
+def decode_listing_token(page_token):
+    """Returns the bucket index and S3 continuation token encoded by a page token, raising ValueError if malformed"""
+    try:
+        token = json.loads(base64.urlsafe_b64decode(page_token.encode("ascii")))
+
+        return int(token["bucket"]), token["token"]
+    except (AttributeError, TypeError, KeyError, ValueError) as err:
+        raise ValueError("Malformed page token") from err
+
+
+def handle_list_action(action_request, request_node, node_bucket_map, request_headers):
+    """
+    Services a request for a page of the listing of objects a node has
+    ingested under a trimmed path root, across all buckets configured for the
+    node. Clients use the listing to determine locally which files have
+    changed, in lieu of requesting ingress for every file.
+
+    Each entry of the listing is a compact list of the trimmed path, size,
+    MD5 and last modified time (as a Unix Epoch) of an object. The MD5 is
+    derived from the object ETag, and is null for objects uploaded in parts,
+    whose ETag is not an MD5 of their content.
+
+    Parameters
+    ----------
+    action_request : dict
+        The parsed request body, containing the trimmed path "prefix" to list,
+        and the "page_token" returned with the previous page, if any.
+    request_node : str
+        PDS node identifier of the requestor.
+    node_bucket_map : dict
+        Bucket map configuration for the requestor node.
+    request_headers : dict
+        Headers of the HTTP request which triggered the Lambda invocation.
+
+    Returns
+    -------
+    response : dict
+        The API Gateway proxy response for the request, containing the listing
+        "entries" and the "next_page_token", which is null once the listing is
+        complete.
+
+    """
+    prefix = action_request.get("prefix", "")
+
+    if not isinstance(prefix, str) or ".." in prefix.split("/"):
+        return json_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid listing prefix"})
+
+    bucket_names = buckets_for_node(node_bucket_map)
+    bucket_index, continuation_token = 0, None
+
+    if action_request.get("page_token"):
+        try:
+            bucket_index, continuation_token = decode_listing_token(action_request["page_token"])
+        except ValueError as err:
+            return json_response(HTTPStatus.BAD_REQUEST, {"error": str(err)})
+
+    # Keys are listed relative to the node, so the trimmed path can be recovered
+    node_prefix = f"{request_node.lower()}/"
+    entries = []
+
+    with METRICS.timer("Listing"):
+        while bucket_index < len(bucket_names) and len(entries) < LISTING_PAGE_SIZE:
+            list_params = {"Bucket": bucket_names[bucket_index], "Prefix": node_prefix + prefix.lstrip("/")}
+
+            if continuation_token:
+                list_params["ContinuationToken"] = continuation_token
+
+            if EXPECTED_BUCKET_OWNER:
+                list_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+            METRICS.increment("ListPages")
+
+            try:
+                page = s3_client.list_objects_v2(**list_params)
+            except ClientError as err:
+                # Buckets shared between nodes (such as for web logs) may not be listable
+                if err.response["Error"]["Code"] not in ("AccessDenied", "NoSuchBucket"):
+                    raise
+
+                logger.warning("Unable to list bucket %s, reason: %s", bucket_names[bucket_index], str(err))
+                page = {}
+
+            for obj in page.get("Contents", []):
+                etag = obj["ETag"].strip('"')
+
+                entries.append(
+                    [
+                        obj["Key"][len(node_prefix) :],
+                        obj["Size"],
+                        etag if "-" not in etag else None,
+                        int(obj["LastModified"].timestamp()),
+                    ]
+                )
+
+            if page.get("IsTruncated"):
+                continuation_token = page["NextContinuationToken"]
+            else:
+                bucket_index, continuation_token = bucket_index + 1, None
+
+    next_page_token = None
+
+    if bucket_index < len(bucket_names):
+        next_page_token = encode_listing_token(bucket_index, continuation_token)
+
+    return encode_response(
+        json_response(HTTPStatus.OK, {"entries": entries, "next_page_token": next_page_token}), request_headers
+    )
+
+
+def content_filter_key(node_id):
+    """Returns the S3 key the content filter of the provided node is published to"""
+    return f"{CONTENT_FILTER_PREFIX.strip('/')}/{node_id.lower()}.bloom"
+
+
+def iter_node_content(request_node, node_bucket_map):
+    """
+    Yields the trimmed path, MD5 hex digest and size of every object a node
+    has ingested, across all buckets configured for the node. The MD5 of
+    objects uploaded in parts is read from their metadata, objects without a
+    usable MD5 are omitted.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier to list the content of.
+    node_bucket_map : dict
+        Bucket map configuration for the node.
+
+    Yields
+    ------
+    content : tuple of (str, str, int)
+        The trimmed path, MD5 and size of an object.
+
+    """
+    node_prefix = f"{request_node.lower()}/"
+
+    for bucket_name in buckets_for_node(node_bucket_map):
+        list_params = {"Bucket": bucket_name, "Prefix": node_prefix}
+
+        if EXPECTED_BUCKET_OWNER:
+            list_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+        while True:
+            try:
+                page = s3_client.list_objects_v2(**list_params)
+            except ClientError as err:
+                # Buckets shared between nodes (such as for web logs) may not be listable
+                if err.response["Error"]["Code"] not in ("AccessDenied", "NoSuchBucket"):
+                    raise
+
+                logger.warning("Unable to list bucket %s, reason: %s", bucket_name, str(err))
+                break
+
+            for obj in page.get("Contents", []):
+                md5_digest = obj["ETag"].strip('"')
+
+                if "-" in md5_digest:
+                    head_params = {"Bucket": bucket_name, "Key": obj["Key"]}
+
+                    if EXPECTED_BUCKET_OWNER:
+                        head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+                    metadata = s3_client.head_object(**head_params).get("Metadata", {})
+
+                    if "md5" in metadata:
+                        md5_digest = metadata["md5"]
+                    elif "md5chksum" in metadata:
+                        md5_digest = base64.b64decode(metadata["md5chksum"]).hex()
+                    else:
+                        logger.debug("No MD5 available for s3://%s/%s, omitting from filter", bucket_name, obj["Key"])
+                        continue
+
+                yield obj["Key"][len(node_prefix) :], md5_digest, obj["Size"]
+
+            if not page.get("IsTruncated"):
+                break
+
+            list_params["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def build_content_filter(request_node, node_bucket_map, false_positive_rate=None):
+    """
+    Builds the content filter of a node from the objects currently in its
+    buckets, and publishes it to the content filter bucket.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier to build the filter for.
+    node_bucket_map : dict
+        Bucket map configuration for the node.
+    false_positive_rate : float, optional
+        Target false-positive rate of the filter. Defaults to
+        CONTENT_FILTER_FALSE_POSITIVE_RATE.
+
+    Returns
+    -------
+    summary : dict
+        Details of the published filter.
+
+    """
+    false_positive_rate = false_positive_rate or CONTENT_FILTER_FALSE_POSITIVE_RATE
+
+    # The filter can only be sized once the number of items is known
+    items = [
+        content_filter_item(trimmed_path, md5_digest, size)
+        for trimmed_path, md5_digest, size in iter_node_content(request_node, node_bucket_map)
+    ]
+
+    content_filter = BloomFilter.for_capacity(len(items), false_positive_rate)
+
+    for item in items:
+        content_filter.add(item)
+
+    filter_bytes = content_filter.to_bytes()
+    built_at = int(time.time())
+
+    put_params = {
+        "Bucket": CONTENT_FILTER_BUCKET,
+        "Key": content_filter_key(request_node),
+        "Body": filter_bytes,
+        "ContentType": "application/octet-stream",
+        "Metadata": {
+            "num_items": str(content_filter.num_items),
+            "false_positive_rate": f"{content_filter.estimated_false_positive_rate():.6g}",
+            "built_at": str(built_at),
+        },
+    }
+
+    if EXPECTED_BUCKET_OWNER:
+        put_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    s3_client.put_object(**put_params)
+
+    summary = {
+        "node": request_node.lower(),
+        "num_items": content_filter.num_items,
+        "size": len(filter_bytes),
+        "false_positive_rate": content_filter.estimated_false_positive_rate(),
+        "built_at": built_at,
+    }
+
+    logger.info("Published content filter for node %s: %s", request_node, json.dumps(summary))
+
+    return summary
+
+
+def build_content_filters(filter_request, bucket_map):
+    """
+    Services a scheduled invocation rebuilding the content filters of the
+    requested nodes, or of every node within the bucket map if none are named.
+
+    Parameters
+    ----------
+    filter_request : dict
+        The "content_filter" portion of the invocation event, optionally
+        containing the "nodes" to build filters for and the target
+        "false_positive_rate".
+    bucket_map : dict
+        Bucket map configuration of the service.
+
+    Returns
+    -------
+    summaries : list of dict
+        Details of each published filter.
+
+    """
+    if not CONTENT_FILTER_BUCKET:
+        raise RuntimeError("CONTENT_FILTER_BUCKET must be set to build content filters")
+
+    node_ids = filter_request.get("nodes") or sorted(bucket_map["NODES"].keys())
+    summaries = []
+
+    for node_id in node_ids:
+        node_bucket_map = bucket_map["NODES"].get(node_id.upper())
+
+        if not node_bucket_map:
+            logger.warning("No bucket map entries configured for node ID %s, skipping content filter", node_id)
+            continue
+
+        with METRICS.timer("ContentFilterBuild"):
+            summaries.append(
+                build_content_filter(node_id, node_bucket_map, filter_request.get("false_positive_rate"))
+            )
+
+    return summaries
+
+
+def handle_filter_action(request_node):
+    """
+    Services a request for the published content filter of the requestor
+    node, returning a presigned URL from which it may be downloaded, along
+    with details of the filter.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier of the requestor.
+
+    Returns
+    -------
+    response : dict
+        The API Gateway proxy response for the request.
+
+    """
+    if not CONTENT_FILTER_BUCKET:
+        return json_response(HTTPStatus.NOT_IMPLEMENTED, {"error": "Content filters are not enabled"})
+
+    object_params = {"Bucket": CONTENT_FILTER_BUCKET, "Key": content_filter_key(request_node)}
+
+    head_params = dict(object_params)
+
+    if EXPECTED_BUCKET_OWNER:
+        head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    try:
+        object_head = s3_client.head_object(**head_params)
+    except ClientError as err:
+        if err.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            raise
+
+        return json_response(HTTPStatus.NOT_FOUND, {"error": f"No content filter published for node {request_node}"})
+
+    metadata = object_head.get("Metadata", {})
+
+    return json_response(
+        HTTPStatus.OK,
+        {
+            "url": s3_client.generate_presigned_url(
+                ClientMethod="get_object", Params=object_params, ExpiresIn=CONTENT_FILTER_URL_EXPIRATION
+            ),
+            "size": int(object_head["ContentLength"]),
+            "num_items": int(metadata.get("num_items", 0)),
+            "false_positive_rate": float(metadata.get("false_positive_rate", 0.0)),
+            "built_at": int(metadata.get("built_at", 0)),
+        },
+    )
+
+
+def handle_status_result_action(action_request, request_node):
+    """
+    Services a request for the state of a job submitted to the status
+    service, and once complete, for presigned URLs to the pages of its
+    results. Each page is a gzip compressed JSON Lines file, containing an
+    object with the "trimmed_path" and "status" of each file in the manifest.
+
+    Parameters
+    ----------
+    action_request : dict
+        The parsed request body, containing the "job_id" returned by the
+        status endpoint, and optionally the index of the first results "page"
+        to return URLs for.
+    request_node : str
+        PDS node identifier of the requestor.
+
+    Returns
+    -------
+    response : dict
+        The API Gateway proxy response for the request. Jobs which have not
+        been picked up by the status service yet are reported as pending,
+        since the job ID is assigned before the job is queued.
+
+    """
+    if not STATUS_JOB_BUCKET:
+        return json_response(HTTPStatus.NOT_IMPLEMENTED, {"error": "Status job polling is not enabled"})
+
+    job_id = action_request.get("job_id")
+
+    if not is_valid_job_id(job_id):
+        return json_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid or missing job_id"})
+
+    first_page = action_request.get("page", 0)
+
+    if not isinstance(first_page, int) or first_page < 0:
+        return json_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid value for page"})
+
+    get_params = {"Bucket": STATUS_JOB_BUCKET, "Key": job_object_key(STATUS_JOB_PREFIX, request_node, job_id, "status.json")}
+
+    if EXPECTED_BUCKET_OWNER:
+        get_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    try:
+        status = json.loads(s3_client.get_object(**get_params)["Body"].read())
+    except s3_client.exceptions.NoSuchKey:
+        return json_response(HTTPStatus.OK, {"job_id": job_id, "state": JOB_STATE_PENDING})
+
+    if status["state"] == JOB_STATE_COMPLETE:
+        last_page = min(first_page + STATUS_RESULT_MAX_PAGES, status["num_pages"])
+
+        status["pages"] = [
+            {
+                "page": page_index,
+                "url": s3_client.generate_presigned_url(
+                    ClientMethod="get_object",
+                    Params={
+                        "Bucket": STATUS_JOB_BUCKET,
+                        "Key": job_object_key(STATUS_JOB_PREFIX, request_node, job_id, status_page_name(page_index)),
+                    },
+                    ExpiresIn=ASYNC_URL_EXPIRATION,
+                ),
+            }
+            for page_index in range(first_page, last_page)
+        ]
+        status["next_page"] = last_page if last_page < status["num_pages"] else None
+
+    return json_response(HTTPStatus.OK, status)
+
+
+def handle_async_action(action_request, request_node, request_headers):
+    """
+    Services a request to create, start or check the status of an asynchronous
+    ingress job.
+
+    Asynchronous jobs allow a client to submit an entire ingress manifest at
+    once, rather than as many synchronous batch requests. The client first
+    creates a job and uploads its manifest to the presigned URL returned, then
+    starts the job. The service splits the manifest into chunks which are
+    processed in parallel by separate invocations of this function, each
+    writing a results part in JSON Lines format. The client polls the job
+    status for presigned URLs to any completed results parts, and streams each
+    part as it becomes available.
+
+    Parameters
+    ----------
+    action_request : dict
+        The parsed request body, containing the "action" to perform, and the
+        "job_id" for actions other than "create_job". Status requests may also
+        provide an "after" chunk index, below which the client has consumed
+        all results parts.
+    request_node : str
+        PDS node identifier of the requestor.
+    request_headers : dict
+        Headers of the HTTP request which triggered the Lambda invocation.
+
+    Returns
+    -------
+    response : dict
+        The API Gateway proxy response for the request.
+
+    """
+    if not ASYNC_JOB_BUCKET:
+        return json_response(HTTPStatus.NOT_IMPLEMENTED, {"error": "Asynchronous requests are not enabled"})
+
+    action = action_request.get("action")
+
+    if action == "create_job":
+        job_id = uuid.uuid4().hex
+
+        write_job_status(request_node, job_id, JOB_STATE_PENDING)
+
+        logger.info("Created asynchronous job %s for node %s", job_id, request_node)
+
+        return json_response(
+            HTTPStatus.OK,
+            {
+                "job_id": job_id,
+                "state": JOB_STATE_PENDING,
+                "manifest_url": presign_job_object(request_node, job_id, "manifest.json", "put_object"),
+            },
+        )
+
+    job_id = action_request.get("job_id")
+
+    if not is_valid_job_id(job_id):
+        return json_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid or missing job_id"})
+
+    try:
+        status = read_job_object(request_node, job_id, "status.json")
+    except s3_client.exceptions.NoSuchKey:
+        return json_response(HTTPStatus.NOT_FOUND, {"error": f"No job found with ID {job_id}"})
+
+    if action == "start_job":
+        # Starting an already started job is a no-op, so replayed requests are harmless
+        if status["state"] == JOB_STATE_PENDING:
+            write_job_status(request_node, job_id, JOB_STATE_SPLITTING)
+
+            invoke_async_job(
+                {
+                    "stage": "split",
+                    "job_id": job_id,
+                    "node": request_node,
+                    "force_overwrite": bool(int(request_headers.get("ForceOverwrite", False))),
+                    "allow_copy": bool(int(request_headers.get("AllowCopy", False))),
+                    "client_version": request_headers.get("ClientVersion", None),
+                }
+            )
+
+            logger.info("Started asynchronous job %s for node %s", job_id, request_node)
+
+            status["state"] = JOB_STATE_SPLITTING
+
+        return json_response(HTTPStatus.ACCEPTED, status)
+
+    if action == "job_status":
+        list_params = {
+            "Bucket": ASYNC_JOB_BUCKET,
+            "Prefix": job_object_key(ASYNC_JOB_PREFIX, request_node, job_id, "results/"),
+            "MaxKeys": ASYNC_STATUS_MAX_PARTS,
+        }
+
+        after = action_request.get("after")
+
+        if after is not None:
+            if not isinstance(after, int) or after < 0:
+                return json_response(HTTPStatus.BAD_REQUEST, {"error": "Invalid value for after"})
+
+            list_params["StartAfter"] = job_object_key(ASYNC_JOB_PREFIX, request_node, job_id, result_object_name(after))
+
+        listing = s3_client.list_objects_v2(**list_params)
+
+        status["parts"] = [
+            {
+                "chunk": chunk_index_for_result(result["Key"]),
+                "url": presign_job_object(
+                    request_node, job_id, result_object_name(chunk_index_for_result(result["Key"]))
+                ),
+            }
+            for result in listing.get("Contents", [])
+        ]
+        status["truncated"] = listing.get("IsTruncated", False)
+
+        return json_response(HTTPStatus.OK, status)
+
+    return json_response(HTTPStatus.BAD_REQUEST, {"error": f"Unsupported action {action}"})
+
+
+def get_remaining_time_ms(context):
+    """Returns the execution time remaining for the current invocation, or None if unknown"""
+    get_remaining_time = getattr(context, "get_remaining_time_in_millis", None)
+
+    return get_remaining_time() if get_remaining_time else None
+
+
+def process_async_job(job, context):
+    """
+    Processes a single stage of an asynchronous job.
+
+    Parameters
+    ----------
+    job : dict
+        Description of the job stage, as provided to invoke_async_job.
+    context : object
+        The Lambda context of the current invocation.
+
+    """
+    stage = job.get("stage")
+
+    if stage == "split":
+        split_async_job(job, context)
+    elif stage == "chunk":
+        process_async_chunk(job)
+    else:
+        logger.error("Unsupported asynchronous job stage %s", stage)
+
+
+def split_async_job(job, context):
+    """
+    Splits the manifest uploaded for an asynchronous job into chunks, invoking
+    a separate worker to process each chunk as soon as it is staged.
+
+    The manifest is streamed rather than loaded in full. If this invocation
+    nears its timeout before the entire manifest is split, the remainder of the
+    split is handed off to a fresh invocation, resuming from the byte offset
+    following the last chunk staged.
+
+    Parameters
+    ----------
+    job : dict
+        Description of the job, including the offset and chunk index to resume
+        from when continuing a previous split.
+    context : object
+        The Lambda context of the current invocation.
+
+    """
+    node_id = job["node"]
+    job_id = job["job_id"]
+    offset = job.get("offset", 0)
+    chunk_index = job.get("next_chunk", 0)
+    total_files = job.get("total_files", 0)
+
+    logger.info("Splitting manifest for job %s from offset %d", job_id, offset)
+
+    get_params = {"Bucket": ASYNC_JOB_BUCKET, "Key": job_object_key(ASYNC_JOB_PREFIX, node_id, job_id, "manifest.json")}
+
+    if offset:
+        get_params["Range"] = f"bytes={offset}-"
+
+    try:
+        manifest_body = s3_client.get_object(**get_params)["Body"]
+        manifest_stream = iter(lambda: manifest_body.read(1024**2), b"")
+
+        chunk = []
+
+        for line, end_offset in iter_lines_with_offsets(manifest_stream, offset):
+            manifest_entry = parse_manifest_line(line)
+
+            if manifest_entry:
+                chunk.append(manifest_entry_to_request(*manifest_entry))
+
+            if len(chunk) < ASYNC_CHUNK_SIZE:
+                continue
+
+            stage_async_chunk(job, chunk_index, chunk)
+            chunk_index += 1
+            total_files += len(chunk)
+            chunk = []
+
+            remaining_time = get_remaining_time_ms(context)
+
+            if remaining_time is not None and remaining_time < ASYNC_SPLIT_TIME_BUFFER_MS:
+                logger.info("Handing off split of job %s at offset %d", job_id, end_offset)
+                invoke_async_job(dict(job, offset=end_offset, next_chunk=chunk_index, total_files=total_files))
+                return
+
+        if chunk:
+            stage_async_chunk(job, chunk_index, chunk)
+            chunk_index += 1
+            total_files += len(chunk)
+    except Exception as err:
+        logger.exception("Failed to split manifest for job %s", job_id)
+        write_job_status(node_id, job_id, JOB_STATE_FAILED, message=f"Failed to read manifest: {str(err)}")
+        return
+
+    write_job_status(node_id, job_id, JOB_STATE_RUNNING, total_chunks=chunk_index, total_files=total_files)
+
+    logger.info("Split job %s into %d chunk(s) covering %d file(s)", job_id, chunk_index, total_files)
+
+
+def stage_async_chunk(job, chunk_index, chunk):
+    """Writes the requests for a single chunk of an asynchronous job to S3, then invokes a worker to process it"""
+    write_job_object(job["node"], job["job_id"], chunk_object_name(chunk_index), json.dumps(chunk))
+
+    invoke_async_job(dict(job, stage="chunk", chunk=chunk_index))
+
+
+def process_async_chunk(job):
+    """
+    Processes a single chunk of an asynchronous job, writing the result of
+    each request to a results part in JSON Lines format.
+
+    Parameters
+    ----------
+    job : dict
+        Description of the job, including the index of the chunk to process.
+
+    """
+    node_id = job["node"]
+    job_id = job["job_id"]
+    chunk_index = job["chunk"]
+
+    logger.info("Processing chunk %d of job %s", chunk_index, job_id)
+
+    request_batch = read_job_object(node_id, job_id, chunk_object_name(chunk_index))
+
+    # Requests within the chunk are processed exactly as a synchronous batch
+    # submitted with the same options would be
+    request_event = {
+        "headers": {
+            "ClientVersion": job.get("client_version"),
+            "ForceOverwrite": str(int(job.get("force_overwrite", False))),
+            "AllowCopy": str(int(job.get("allow_copy", False))),
+        },
+        "queryStringParameters": {"node": node_id},
+    }
+
+    # Upload URLs are signed as the chunk is processed, which may be well before
+    # the client gets to them, so report when they expire so the client can
+    # request fresh URLs for any it could not use in time
+    expires_at = int(time.time()) + ASYNC_UPLOAD_URL_EXPIRATION
+
+    try:
+        node_bucket_map = initialize_bucket_map(logger)["NODES"][node_id.upper()]
+        results = process_ingress_batch(request_batch, node_bucket_map, request_event)
+
+        for result in results:
+            if "s3_url" in result or "s3_urls" in result:
+                result["expires_at"] = expires_at
+    except Exception as err:
+        # Report the failure against each file in the chunk, so the client can
+        # still account for (and later reattempt) every file
+        logger.exception("Failed to process chunk %d of job %s", chunk_index, job_id)
+        results = [
+            ingress_error_result(ingress_request, request_index, err)
+            for request_index, ingress_request in enumerate(request_batch)
+        ]
+
+    write_job_object(
+        node_id,
+        job_id,
+        result_object_name(chunk_index),
+        "".join(json.dumps(result) + "\n" for result in results),
+        content_type="application/x-ndjson",
+    )
+
+
+@METRICS.instrument_handler
+def lambda_handler(event, context):
+    """
+    Entrypoint for this Lambda function. Derives the appropriate S3 upload URI
+    location based on the contents of the ingress request.
+
+    Parameters
+    ----------
+    event : dict
+        Dictionary containing details of the event that triggered the Lambda.
+    context : dict
+        Dictionary containing details of the AWS context in which the Lambda was
+        invoked. Currently unused by this function.
+
+    Returns
+    -------
+    response : dict
+        JSON-compliant dictionary containing the results of the request.
+
+    """
+    # Invocations made by the service itself to process asynchronous jobs
+    if "async_job" in event:
+        return process_async_job(event["async_job"], context)
+
+    # Read the version number assigned to this function
+    service_version = get_dum_version()
+
+    # Read the bucket map configured for the service
+    with METRICS.timer("BucketMapLoad"):
+        bucket_map = initialize_bucket_map(logger)
+
+    # Scheduled invocations which rebuild the published content filters
+    if "content_filter" in event:
+        return build_content_filters(event["content_filter"], bucket_map)
+
+    # Parse request details from event object
+    body = json.loads(event["body"])
+    headers = event["headers"]
+
+    request_node = event["queryStringParameters"].get("node")
+
+    METRICS.set_property("Node", request_node)
+
+    if not request_node:
+        logger.error("No request node ID provided in queryStringParameters")
+        raise RuntimeError
+
+    client_version = headers.get("ClientVersion", None)
+
+    check_client_version(client_version, service_version)
+
+    node_bucket_map = bucket_map["NODES"].get(request_node.upper())
+
+    if not node_bucket_map:
+        logger.exception("No bucket map entries configured for node ID %s", request_node)
+        raise RuntimeError
+
+    # Requests made with an object body (rather than a batch) perform a
+    # pre-flight check, list existing objects, fetch the content filter, poll
+    # status jobs, or manage asynchronous jobs
+    if isinstance(body, dict):
+        if body.get("action") == "preflight":
+            return handle_preflight_action(body, request_node, node_bucket_map)
+
+        if body.get("action") == "list":
+            return handle_list_action(body, request_node, node_bucket_map, headers)
+
+        if body.get("action") == "filter":
+            return handle_filter_action(request_node)
+
+        if body.get("action") == "status_result":
+            return handle_status_result_action(body, request_node)
+
+        return handle_async_action(body, request_node, headers)
+
+    # If the client provided an idempotency key, check if this request is a
+    # replay of one we've recently serviced
+    idempotency_key = get_idempotency_key(headers, request_node, body)
+
+    if idempotency_key:
+        cached_response = get_cached_response(idempotency_key)
+
+        if cached_response is not None:
+            logger.info("Returning cached response for replayed request %s", idempotency_key)
+            METRICS.increment("CacheHits")
+            return encode_response(cached_response, headers)
+
+    METRICS.increment("Files", len(body))
+
+    try:
+        with METRICS.timer("Batch"):
+            results = process_ingress_batch(body, node_bucket_map, event)
+    except BucketAccessError:
+        logger.exception("Ingress request failed due to a service configuration error")
+
+        # FAIL FAST: return 500 to the client
+        return internal_error_response()
+
+    log_batch_summary(request_node, results, context)
+
+    # Determine top-level HTTP status for the entire batch.
+    # If any individual request failed, return 207 (Multi-Status) so the DUM
+    # client knows to inspect each result for the files it needs to retry.
+    #
+    batch_status = HTTPStatus.OK.value
+
+    for result in results:
+        if result["result"] not in (HTTPStatus.OK.value, HTTPStatus.CREATED.value, HTTPStatus.NO_CONTENT.value):
+            batch_status = HTTPStatus.MULTI_STATUS.value
+            break
+
+    # When uploading via POST policy, the policies shared by the files in
+    # the batch are returned alongside the per-file results
+    if headers.get("UploadMode", "put").lower() == "post":
+        try:
+            response_body = attach_post_policies(results, client_version, service_version)
+        except Exception:
+            logger.exception("Failed to generate presigned POST policies for batch")
+
+            return internal_error_response()
+    else:
+        response_body = results
+
+    # Clients requesting the slim schema restore the fields echoed from their
+    # requests by index
+    if headers.get("ResponseSchema", "full").lower() == "slim":
+        slim_results = [slim_result(result) for result in results]
+
+        if isinstance(response_body, dict):
+            response_body["results"] = slim_results
+        else:
+            response_body = slim_results
+
+    response = {
+        "statusCode": batch_status,
+        "body": json.dumps(response_body),
+    }
+
+    # Only fully successful batches are cached. A replay of a batch with failed
+    # files (notably retryable ones) must be processed again, or the client's
+    # retries would be answered with the same failures until the cache expires
+    if idempotency_key and batch_status == HTTPStatus.OK.value:
+        cache_response(idempotency_key, response)
+
+    return encode_response(response, headers)
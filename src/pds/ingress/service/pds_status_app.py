@@ -8,14 +8,15 @@ manifest. For each file included in a provided manifest, this function will
 derive the Ingress status of said file in S3 and return a report to the user.
 """
 import concurrent.futures
+import gzip
+import hashlib
 import json
 import logging
 import os
-import smtplib
-import tempfile
-from email.mime.text import MIMEText
+import time
+from itertools import chain
+from itertools import islice
 from os.path import join
-from pathlib import Path
 from urllib.parse import urlparse
 
 import boto3
@@ -26,15 +27,43 @@ try:
     from util.config_util import bucket_for_path
     from util.config_util import initialize_bucket_map
     from util.config_util import ConfigUtil
+    from util.job_util import chunk_object_name
+    from util.job_util import is_valid_job_id
+    from util.job_util import JOB_STATE_COMPLETE
+    from util.job_util import JOB_STATE_FAILED
+    from util.job_util import JOB_STATE_RUNNING
+    from util.job_util import job_object_key
+    from util.job_util import result_object_name
+    from util.job_util import status_page_name
     from util.log_util import LOG_LEVELS
     from util.log_util import SingleLogFilter
+    from util.manifest_util import is_jsonl_manifest
+    from util.manifest_util import iter_decompressed
+    from util.manifest_util import iter_manifest_entries
+    from util.manifest_util import iter_stream
+    from util.manifest_util import manifest_compression
+    from util.metrics_util import MetricsRecorder
 # When running the unit tests, these imports need to be relative
 except ModuleNotFoundError:
     from .util.config_util import bucket_for_path
     from .util.config_util import initialize_bucket_map
     from .util.config_util import ConfigUtil
+    from .util.job_util import chunk_object_name
+    from .util.job_util import is_valid_job_id
+    from .util.job_util import JOB_STATE_COMPLETE
+    from .util.job_util import JOB_STATE_FAILED
+    from .util.job_util import JOB_STATE_RUNNING
+    from .util.job_util import job_object_key
+    from .util.job_util import result_object_name
+    from .util.job_util import status_page_name
     from .util.log_util import LOG_LEVELS
     from .util.log_util import SingleLogFilter
+    from .util.manifest_util import is_jsonl_manifest
+    from .util.manifest_util import iter_decompressed
+    from .util.manifest_util import iter_manifest_entries
+    from .util.manifest_util import iter_stream
+    from .util.manifest_util import manifest_compression
+    from .util.metrics_util import MetricsRecorder
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
@@ -50,19 +79,81 @@ logger.info("Loading function PDS Ingress Status Service")
 if os.getenv("ENDPOINT_URL", None):
     logger.info("Using endpoint URL from envvar: %s", os.environ["ENDPOINT_URL"])
     s3_client = boto3.client("s3", endpoint_url=os.environ["ENDPOINT_URL"])
-    ssm_client = boto3.client("ssm", endpoint_url=os.environ["ENDPOINT_URL"])
 else:
     s3_client = boto3.client("s3")
-    ssm_client = boto3.client("ssm")
+
+ssm_client = None
+"""SSM client used to fetch the SMTP configuration, created on first use to keep it off the cold start path"""
+
+sqs_client = None
+"""SQS client used to fan out the chunks of large manifests, created on first use"""
+
+SMTP_CONFIG_CACHE = {}
+"""Cache of the SMTP configuration fetched from SSM, mapping the SSM key path to its expiry time and values"""
+
+SMTP_CONFIG_TTL = int(os.getenv("SMTP_CONFIG_TTL", "900"))
+"""Time in seconds the SMTP configuration is reused across warm invocations before being fetched from SSM again"""
+
+smtp_session = None
+"""SMTP session shared by all emails sent within an invocation, opened on first use and closed once it completes"""
 
 EXPECTED_ATTRIBUTE_KEYS = ("email", "node")
 """The keys expected within the messageAttributes section of an SQS record."""
 
+STATUS_LISTING_THRESHOLD = int(os.getenv("STATUS_LISTING_THRESHOLD", "1000"))
+"""Number of manifest entries at or above which statuses are derived from bucket listings, rather than a HEAD per file"""
+
+STATUS_CHUNK_SIZE = int(os.getenv("STATUS_CHUNK_SIZE", "50000"))
+"""Number of manifest entries statused by each invocation, larger manifests are split into chunks"""
+
+STATUS_JOB_BUCKET = os.getenv("STATUS_JOB_BUCKET")
+"""Bucket used to stage manifest chunks, partial results and full reports, reports are emailed in full if unset"""
+
+STATUS_JOB_PREFIX = os.getenv("STATUS_JOB_PREFIX", "status-jobs")
+"""Key prefix for all status job objects, which should be removed with an S3 lifecycle rule"""
+
+STATUS_QUEUE_URL = os.getenv("STATUS_QUEUE_URL")
+"""URL of the status queue, which chunk messages are sent to, chunks are processed serially if unset"""
+
+STATUS_RESULT_PAGE_SIZE = int(os.getenv("STATUS_RESULT_PAGE_SIZE", "100000"))
+"""Number of results within each compressed page of results written for a status job, for retrieval by clients"""
+
+SQS_MAX_BATCH_SIZE = 10
+"""Maximum number of messages SQS accepts within a single SendMessageBatch request"""
+
+STATUS_REPORT_URL_EXPIRATION = int(os.getenv("STATUS_REPORT_URL_EXPIRATION", "604800"))
+"""
+Expiration time in seconds of the presigned URL to the full report included with each email. URLs signed
+with the temporary credentials of the function stop working once those credentials expire, regardless.
+"""
+
+STATUS_SUMMARY_MAX_ENTRIES = int(os.getenv("STATUS_SUMMARY_MAX_ENTRIES", "1000"))
+"""Maximum number of files which were not uploaded listed within a report email, the full report lists all files"""
+
+STATUS_MAX_RECEIVE_COUNT = int(os.getenv("STATUS_MAX_RECEIVE_COUNT", "5"))
+"""Number of times a record is received before its status job is marked failed, and the record is no longer retried"""
+
+METRICS = MetricsRecorder(
+    namespace=os.getenv("METRICS_NAMESPACE", "PDS/DataUploadManager"),
+    service_name="pds-status-service",
+    enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+)
+"""Recorder for per-stage timings and counters, emitted once per invocation in CloudWatch Embedded Metric Format"""
+
+
+class ManifestError(RuntimeError):
+    """
+    Raised when the manifest of a status request cannot be parsed or
+    downloaded. Redelivering the record will not resolve the error, so the
+    status job is failed immediately.
+    """
+
 
 def parse_manifest(record):
     """
     Parses the manifest and associated attributes from each record returned
-    from polling the status queue.
+    from polling the status queue. The manifest is streamed from S3, so its
+    entries are only read as they are consumed.
 
     Parameters
     ----------
@@ -74,7 +165,8 @@ def parse_manifest(record):
     -------
     manifest : tuple
         3-tuple containing the requesting node ID, return email address,
-        and parsed manifest object for each provided record.
+        and an iterator over the (trimmed path, entry) of each file within
+        the manifest.
 
     """
     body = record["body"]
@@ -83,12 +175,12 @@ def parse_manifest(record):
         # The client informs us where the manifest is stored in S3
         manifest_s3_uri = json.loads(body)
     except Exception as err:
-        raise RuntimeError(f"Failed to parse manifiest from message body, reason: {str(err)}")
+        raise ManifestError(f"Failed to parse manifiest from message body, reason: {str(err)}")
 
     message_attributes = record["messageAttributes"]
 
     if not all(expected_key in message_attributes for expected_key in EXPECTED_ATTRIBUTE_KEYS):
-        raise RuntimeError(f"One or more missing keys from messageAttributes: {str(message_attributes.keys())}")
+        raise ManifestError(f"One or more missing keys from messageAttributes: {str(message_attributes.keys())}")
 
     return_email = json.loads(message_attributes["email"]["stringValue"])
     request_node = json.loads(message_attributes["node"]["stringValue"])
@@ -96,24 +188,572 @@ def parse_manifest(record):
     parsed_s3_url = urlparse(manifest_s3_uri)
     s3_bucket = parsed_s3_url.netloc
     s3_key = parsed_s3_url.path[1:]  # Trim leading '/'
-    local_manifest_path = join(tempfile.gettempdir(), Path(s3_key).name)
+
+    get_params = {"Bucket": s3_bucket, "Key": s3_key}
+
+    if EXPECTED_BUCKET_OWNER:
+        get_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
 
     try:
-        # Verify bucket ownership first using head_object
-        if EXPECTED_BUCKET_OWNER:
-            s3_client.head_object(Bucket=s3_bucket, Key=s3_key, ExpectedBucketOwner=EXPECTED_BUCKET_OWNER)
-        s3_client.download_file(s3_bucket, s3_key, local_manifest_path)
-        logger.info(f"Downloaded {manifest_s3_uri} locally to {local_manifest_path}")
+        manifest_body = s3_client.get_object(**get_params)["Body"]
+        logger.info(f"Streaming manifest {manifest_s3_uri}")
     except Exception as err:
-        raise RuntimeError(f"Error downloading file, reason: {str(err)}")
+        raise ManifestError(f"Error downloading file, reason: {str(err)}")
+
+    # Manifests may be uploaded compressed, and are decompressed as they are streamed
+    manifest_chunks = iter_decompressed(iter_stream(manifest_body), manifest_compression(s3_key))
 
-    # Read the manifest file contents
-    with open(local_manifest_path) as infile:
-        manifest = json.load(infile)
+    manifest = iter_manifest_entries(manifest_chunks, jsonl=is_jsonl_manifest(s3_key))
 
     return request_node, return_email, manifest
 
 
+def parse_status_chunk(record):
+    """Returns the chunk details of a record sent by a fanned out status job, or None for a manifest request record"""
+    try:
+        body = json.loads(record["body"])
+    except ValueError:
+        return None
+
+    return body.get("status_chunk") if isinstance(body, dict) else None
+
+
+def iter_manifest_chunks(manifest, chunk_size):
+    """Yields successive dictionaries of up to chunk_size entries from the provided manifest entry iterator"""
+    while True:
+        chunk = dict(islice(manifest, chunk_size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def status_job_key(node_id, job_id, name):
+    """Returns the S3 key of the object with the provided name within the storage of a status job"""
+    return job_object_key(STATUS_JOB_PREFIX, node_id, job_id, name)
+
+
+def read_status_job_object(node_id, job_id, name):
+    """Reads and returns the body of the object with the provided name within the storage of a status job"""
+    get_params = {"Bucket": STATUS_JOB_BUCKET, "Key": status_job_key(node_id, job_id, name)}
+
+    if EXPECTED_BUCKET_OWNER:
+        get_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    return s3_client.get_object(**get_params)["Body"].read()
+
+
+def write_status_job_object(node_id, job_id, name, body, **kwargs):
+    """Writes an object with the provided name and body within the storage of a status job"""
+    put_params = dict(kwargs, Bucket=STATUS_JOB_BUCKET, Key=status_job_key(node_id, job_id, name), Body=body)
+
+    if EXPECTED_BUCKET_OWNER:
+        put_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    return s3_client.put_object(**put_params)
+
+
+def status_job_id(record):
+    """
+    Returns the ID of the status job for a manifest record. The ID assigned
+    by the status endpoint (and returned to the client) is used when present,
+    otherwise the ID is derived from the SQS message ID. Either way, the ID is
+    stable across redeliveries of the record.
+
+    """
+    job_id = record.get("messageAttributes", {}).get("job_id", {}).get("stringValue", "").strip('"')
+
+    if is_valid_job_id(job_id):
+        return job_id
+
+    return hashlib.md5(record["messageId"].encode("utf-8")).hexdigest()
+
+
+def write_status_job_state(node_id, job_id, state, **details):
+    """Records the current state of a status job, along with any additional details, for polling by clients"""
+    if STATUS_JOB_BUCKET:
+        write_status_job_object(
+            node_id,
+            job_id,
+            "status.json",
+            json.dumps(dict(details, job_id=job_id, state=state)),
+            ContentType="application/json",
+        )
+
+
+def is_final_attempt(record):
+    """Returns True if the provided record has been received as many times as it will be retried"""
+    return int(record.get("attributes", {}).get("ApproximateReceiveCount", 1)) >= STATUS_MAX_RECEIVE_COUNT
+
+
+def fail_status_job(record, status_chunk, reason):
+    """
+    Records the status job of a record which will not be retried as failed,
+    so clients polling the job are not left waiting until they time out.
+
+    Parameters
+    ----------
+    record : dict
+        The status queue record which failed.
+    status_chunk : dict or None
+        The chunk details parsed from the record, or None for a manifest record.
+    reason : str
+        Description of the failure, returned to clients polling the job.
+
+    """
+    if status_chunk:
+        request_node = status_chunk.get("node")
+        job_id = status_chunk.get("job_id")
+    else:
+        try:
+            request_node = json.loads(record["messageAttributes"]["node"]["stringValue"])
+        except (KeyError, TypeError, ValueError):
+            request_node = None
+
+        job_id = status_job_id(record)
+
+    if not request_node or not is_valid_job_id(job_id):
+        logger.warning("Unable to determine the status job of the failed record, its state will not be updated")
+        return
+
+    write_status_job_state(request_node, job_id, JOB_STATE_FAILED, message=reason)
+
+    logger.error("Status job %s failed, reason: %s", job_id, reason)
+
+
+def get_sqs_client():
+    """Returns the SQS client used to fan out the chunks of large manifests, creating it if necessary"""
+    global sqs_client
+
+    if sqs_client is None:
+        if os.getenv("ENDPOINT_URL", None):
+            sqs_client = boto3.client("sqs", endpoint_url=os.environ["ENDPOINT_URL"])
+        else:
+            sqs_client = boto3.client("sqs")
+
+    return sqs_client
+
+
+def fan_out_manifest(record, request_node, return_email, manifest_chunks):
+    """
+    Splits a large manifest into chunks staged in S3, and sends a message to
+    the status queue for each, so the chunks are statused by parallel
+    invocations of this function.
+
+    The job ID is derived from the SQS message ID, so if the manifest record
+    is redelivered following a failure, the same job is staged again rather
+    than a duplicate one.
+
+    Parameters
+    ----------
+    record : dict
+        The status queue record which requested the manifest status.
+    request_node : str
+        PDS node identifier associated to the manifest.
+    return_email : str
+        Email address the merged report is sent to.
+    manifest_chunks : iterable of dict
+        The chunks of the manifest.
+
+    Returns
+    -------
+    job_id : str
+        Identifier of the status job.
+    num_chunks : int
+        Number of chunks the manifest was split into.
+
+    """
+    job_id = status_job_id(record)
+    num_chunks = 0
+    num_files = 0
+
+    for chunk_index, chunk in enumerate(manifest_chunks):
+        write_status_job_object(request_node, job_id, chunk_object_name(chunk_index), json.dumps(chunk))
+
+        num_chunks += 1
+        num_files += len(chunk)
+
+    write_status_job_object(
+        request_node,
+        job_id,
+        "job.json",
+        json.dumps({"node": request_node, "email": return_email, "num_chunks": num_chunks, "num_files": num_files}),
+    )
+
+    messages = [
+        {
+            "Id": str(chunk_index),
+            "MessageBody": json.dumps(
+                {"status_chunk": {"node": request_node, "job_id": job_id, "chunk_index": chunk_index}}
+            ),
+        }
+        for chunk_index in range(num_chunks)
+    ]
+
+    for index in range(0, len(messages), SQS_MAX_BATCH_SIZE):
+        response = get_sqs_client().send_message_batch(
+            QueueUrl=STATUS_QUEUE_URL, Entries=messages[index : index + SQS_MAX_BATCH_SIZE]
+        )
+
+        if response.get("Failed"):
+            raise RuntimeError(f"Failed to send {len(response['Failed'])} chunk message(s) for status job {job_id}")
+
+    write_status_job_state(request_node, job_id, JOB_STATE_RUNNING, num_chunks=num_chunks, num_files=num_files)
+
+    logger.info("Split manifest of %d file(s) into %d chunk(s) for status job %s", num_files, num_chunks, job_id)
+
+    return job_id, num_chunks
+
+
+def process_manifest_record(record, bucket_map):
+    """
+    Services a manifest status request record from the status queue. Small
+    manifests are statused directly, while larger ones are split into chunks,
+    which are fanned out to parallel invocations when a job bucket and queue
+    are configured, or statused serially otherwise.
+
+    Parameters
+    ----------
+    record : dict
+        The status queue record.
+    bucket_map : dict
+        The parsed bucket map configuration.
+
+    """
+    with METRICS.timer("ManifestLoad"):
+        request_node, return_email, manifest = parse_manifest(record)
+
+    job_id = status_job_id(record)
+
+    manifest_chunks = iter_manifest_chunks(manifest, STATUS_CHUNK_SIZE)
+
+    # Look ahead by one chunk to determine if the manifest needs to be split
+    first_chunks = list(islice(manifest_chunks, 2))
+    manifest_chunks = chain(first_chunks, manifest_chunks)
+
+    if len(first_chunks) > 1 and STATUS_JOB_BUCKET and STATUS_QUEUE_URL:
+        with METRICS.timer("ManifestFanOut"):
+            fan_out_manifest(record, request_node, return_email, manifest_chunks)
+
+        return
+
+    write_status_job_state(request_node, job_id, JOB_STATE_RUNNING)
+
+    results = {}
+
+    for chunk in manifest_chunks:
+        METRICS.increment("Files", len(chunk))
+
+        with METRICS.timer("ManifestStatus"):
+            results.update(process_manifest(request_node, chunk, bucket_map))
+
+    logger.debug("Results: %s", results)
+
+    publish_status_report(request_node, job_id, results, return_email)
+
+
+def claim_status_merge(node_id, job_id):
+    """
+    Attempts to claim the merge of a status job's partial results using a
+    conditional write, so only one of the invocations which may observe all
+    chunks to be complete merges them and sends the report.
+
+    Returns
+    -------
+    bool
+        True if the merge was claimed by this invocation.
+
+    """
+    try:
+        write_status_job_object(node_id, job_id, "merge.lock", b"", IfNoneMatch="*")
+    except ClientError as err:
+        if err.response["Error"]["Code"] in ("PreconditionFailed", "ConditionalRequestConflict", "412", "409"):
+            return False
+
+        raise
+
+    return True
+
+
+def release_status_merge(node_id, job_id):
+    """Releases a claimed merge, so it may be reattempted when the chunk is redelivered"""
+    delete_params = {"Bucket": STATUS_JOB_BUCKET, "Key": status_job_key(node_id, job_id, "merge.lock")}
+
+    if EXPECTED_BUCKET_OWNER:
+        delete_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    s3_client.delete_object(**delete_params)
+
+
+def count_status_results(node_id, job_id):
+    """Returns the number of chunks of a status job whose partial results have been written"""
+    list_params = {"Bucket": STATUS_JOB_BUCKET, "Prefix": status_job_key(node_id, job_id, "results/")}
+
+    if EXPECTED_BUCKET_OWNER:
+        list_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    num_results = 0
+
+    while True:
+        page = s3_client.list_objects_v2(**list_params)
+        num_results += page.get("KeyCount", len(page.get("Contents", [])))
+
+        if not page.get("IsTruncated"):
+            return num_results
+
+        list_params["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def merge_status_results(node_id, job_id, num_chunks):
+    """Merges the partial results written for each chunk of a status job into a single result dictionary"""
+    results = {}
+
+    for chunk_index in range(num_chunks):
+        for line in read_status_job_object(node_id, job_id, result_object_name(chunk_index)).splitlines():
+            trimmed_path, ingress_status = json.loads(line)
+            results[trimmed_path] = ingress_status
+
+    return results
+
+
+def process_status_chunk(status_chunk, bucket_map):
+    """
+    Statuses a single chunk of a fanned out status job, writing its partial
+    results to S3. The invocation which completes the final chunk merges the
+    partial results of every chunk, and publishes the report.
+
+    Partial results are written to a key unique to the chunk, so a chunk
+    redelivered after a failure simply overwrites its previous results.
+
+    Parameters
+    ----------
+    status_chunk : dict
+        The chunk details from the status queue record, containing the "node",
+        "job_id" and "chunk_index".
+    bucket_map : dict
+        The parsed bucket map configuration.
+
+    """
+    request_node = status_chunk["node"]
+    job_id = status_chunk["job_id"]
+    chunk_index = int(status_chunk["chunk_index"])
+
+    if not is_valid_job_id(job_id):
+        raise RuntimeError(f"Invalid status job ID {job_id}")
+
+    job = json.loads(read_status_job_object(request_node, job_id, "job.json"))
+    chunk = json.loads(read_status_job_object(request_node, job_id, chunk_object_name(chunk_index)))
+
+    METRICS.increment("Files", len(chunk))
+
+    with METRICS.timer("ManifestStatus"):
+        results = process_manifest(request_node, chunk, bucket_map)
+
+    write_status_job_object(
+        request_node,
+        job_id,
+        result_object_name(chunk_index),
+        "\n".join(json.dumps([trimmed_path, ingress_status]) for trimmed_path, ingress_status in results.items()),
+    )
+
+    logger.info("Statused chunk %d of %d for status job %s", chunk_index + 1, job["num_chunks"], job_id)
+
+    if count_status_results(request_node, job_id) < job["num_chunks"]:
+        return
+
+    if not claim_status_merge(request_node, job_id):
+        logger.info("Results of status job %s are being merged by another invocation", job_id)
+        return
+
+    try:
+        with METRICS.timer("ResultMerge"):
+            results = merge_status_results(request_node, job_id, job["num_chunks"])
+
+        publish_status_report(request_node, job_id, results, job["email"])
+    except Exception:
+        release_status_merge(request_node, job_id)
+        raise
+
+
+def summarize_results(results, max_entries=None):
+    """
+    Summarizes the results of a status request, for inclusion within an email.
+
+    Parameters
+    ----------
+    results : dict
+        Mapping of each path within the manifest to its ingress status.
+    max_entries : int, optional
+        Maximum number of files which were not uploaded to list. Defaults to
+        STATUS_SUMMARY_MAX_ENTRIES.
+
+    Returns
+    -------
+    summary : dict
+        The number of files with each "status", and the sorted (path, status)
+        of up to max_entries files whose status is not "Uploaded", along with
+        the number of such files "omitted" from the summary.
+
+    """
+    max_entries = STATUS_SUMMARY_MAX_ENTRIES if max_entries is None else max_entries
+
+    counts = {}
+    not_uploaded = []
+
+    for trimmed_path, ingress_status in results.items():
+        counts[ingress_status] = counts.get(ingress_status, 0) + 1
+
+        if ingress_status != "Uploaded":
+            not_uploaded.append((trimmed_path, ingress_status))
+
+    not_uploaded.sort()
+
+    return {
+        "total": len(results),
+        "status": dict(sorted(counts.items())),
+        "not_uploaded": not_uploaded[:max_entries],
+        "omitted": max(len(not_uploaded) - max_entries, 0),
+    }
+
+
+def format_report_email(summary, report_url=None):
+    """Formats the body of a report email from a results summary, and the presigned URL to the full report"""
+    lines = [f"Ingress status of {summary['total']} file(s):", ""]
+    lines.extend(f"    {ingress_status}: {count}" for ingress_status, count in summary["status"].items())
+
+    if report_url:
+        lines.extend(
+            [
+                "",
+                f"The full report (gzip compressed JSON) may be downloaded within "
+                f"{STATUS_REPORT_URL_EXPIRATION // 3600} hour(s) from:",
+                report_url,
+            ]
+        )
+
+    if summary["not_uploaded"]:
+        lines.extend(["", "Files which have not been uploaded:", ""])
+        lines.extend(f"    {trimmed_path}: {ingress_status}" for trimmed_path, ingress_status in summary["not_uploaded"])
+
+        if summary["omitted"]:
+            lines.append(f"    ... and {summary['omitted']} more, listed within the full report")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_status_report(request_node, job_id, results):
+    """
+    Writes the full report of a status request to S3, gzip compressed.
+
+    Returns
+    -------
+    report_url : str
+        A presigned URL from which the report may be downloaded.
+
+    """
+    report_name = "report.json.gz"
+    report_body = gzip.compress(json.dumps(results, indent=4).encode("utf-8"), mtime=0)
+
+    write_status_job_object(
+        request_node,
+        job_id,
+        report_name,
+        report_body,
+        ContentType="application/gzip",
+        ContentDisposition=f'attachment; filename="dum-status-{job_id}.json.gz"',
+    )
+
+    return s3_client.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": STATUS_JOB_BUCKET, "Key": status_job_key(request_node, job_id, report_name)},
+        ExpiresIn=STATUS_REPORT_URL_EXPIRATION,
+    )
+
+
+def write_status_result_pages(request_node, job_id, results, page_size=None):
+    """
+    Writes the results of a status job as pages of gzip compressed JSON
+    Lines, sorted by path, so clients may retrieve (and stream) the results
+    of large manifests page by page. Each line is an object containing the
+    "trimmed_path" and "status" of a file.
+
+    Returns
+    -------
+    num_pages : int
+        The number of pages written.
+
+    """
+    page_size = page_size or STATUS_RESULT_PAGE_SIZE
+    ordered_results = sorted(results.items())
+
+    num_pages = 0
+
+    for num_pages, page_start in enumerate(range(0, len(ordered_results), page_size), start=1):
+        lines = "".join(
+            json.dumps({"trimmed_path": trimmed_path, "status": ingress_status}) + "\n"
+            for trimmed_path, ingress_status in ordered_results[page_start : page_start + page_size]
+        )
+
+        write_status_job_object(
+            request_node,
+            job_id,
+            status_page_name(num_pages - 1),
+            gzip.compress(lines.encode("utf-8"), mtime=0),
+            ContentType="application/gzip",
+        )
+
+    return num_pages
+
+
+def publish_status_report(request_node, job_id, results, return_email):
+    """
+    Publishes the report of a status request. When a job bucket is
+    configured, the results are written to S3 as pages retrievable by clients
+    polling the job, along with a full report which is linked from an email
+    carrying a summary of the results. Otherwise, the full report is included
+    with the email instead.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier associated to the manifest.
+    job_id : str
+        Identifier of the status request, used to name the full report.
+    results : dict
+        Mapping of each path within the manifest to its ingress status.
+    return_email : str
+        Email address to send the report to, no email is sent if empty.
+
+    """
+    if STATUS_JOB_BUCKET:
+        summary = summarize_results(results)
+
+        with METRICS.timer("ReportWrite"):
+            num_pages = write_status_result_pages(request_node, job_id, results)
+            report_url = write_status_report(request_node, job_id, results)
+
+        # Recorded last, so polling clients only observe a complete job once all pages are readable
+        write_status_job_state(
+            request_node,
+            job_id,
+            JOB_STATE_COMPLETE,
+            num_files=summary["total"],
+            status=summary["status"],
+            num_pages=num_pages,
+        )
+
+        message_body = format_report_email(summary, report_url)
+    else:
+        message_body = json.dumps(results, indent=4)
+
+    if not return_email:
+        return
+
+    with METRICS.timer("SendEmail"):
+        send_email(message_body, return_email)
+
+
 def process_path(trimmed_path, file_info, request_node, node_bucket_map):
     """
     Processes a single path from the manifest to derive its ingress status.
@@ -172,21 +812,30 @@ def process_manifest(request_node, manifest, bucket_map):
         ingress status of said path.
 
     """
-    results = {}
-
     node_bucket_map = bucket_map["NODES"].get(request_node.upper())
 
     if not node_bucket_map:
         raise RuntimeError(f"No bucket map entries configured for node ID {request_node}")
 
+    # Large manifests are statused from listings of the prefixes they cover,
+    # only files whose status cannot be derived from a listing are checked
+    # individually
+    if len(manifest) >= STATUS_LISTING_THRESHOLD:
+        with METRICS.timer("ListingStatus"):
+            results, head_paths = status_from_listings(request_node, manifest, node_bucket_map)
+
+        logger.info("Derived %d status(es) from listings, %d require HEAD requests", len(results), len(head_paths))
+    else:
+        results, head_paths = {}, list(manifest.keys())
+
     num_cores = max(os.cpu_count(), 1)
 
     logger.info(f"Available CPU cores: {num_cores}")
 
     with concurrent.futures.ThreadPoolExecutor(max_workers=num_cores) as executor:
         futures = [
-            executor.submit(process_path, trimmed_path, file_info, request_node, node_bucket_map)
-            for trimmed_path, file_info in manifest.items()
+            executor.submit(process_path, trimmed_path, manifest[trimmed_path], request_node, node_bucket_map)
+            for trimmed_path in head_paths
         ]
 
         for future in concurrent.futures.as_completed(futures):
@@ -197,6 +846,168 @@ def process_manifest(request_node, manifest, bucket_map):
     return results
 
 
+def covering_prefixes(trimmed_paths):
+    """
+    Derives the smallest set of directory prefixes which together cover all
+    of the provided paths, without listing directories containing none of them.
+
+    Parameters
+    ----------
+    trimmed_paths : iterable of str
+        The paths to cover, relative to the node's bucket.
+
+    Returns
+    -------
+    prefixes : list of str
+        The covering directory prefixes (each with a trailing slash, or the
+        empty string for paths at the root), in sorted order.
+
+    """
+    directories = sorted({path.rsplit("/", 1)[0] + "/" if "/" in path else "" for path in trimmed_paths})
+    prefixes = []
+
+    # Sorting places each directory immediately after any ancestor directory
+    # already in the set, so only the last prefix needs to be checked
+    for directory in directories:
+        if prefixes and directory.startswith(prefixes[-1]):
+            continue
+
+        prefixes.append(directory)
+
+    return prefixes
+
+
+def iter_listed_objects(bucket_name, key_prefixes):
+    """
+    Yields the listing entry of every object under the provided key prefixes
+    of a bucket, in key order.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the bucket to list.
+    key_prefixes : list of str
+        Sorted, non-overlapping key prefixes to list.
+
+    Yields
+    ------
+    listed_object : dict
+        The ListObjectsV2 entry of an object, including its Key, Size and ETag.
+
+    """
+    for key_prefix in key_prefixes:
+        list_params = {"Bucket": bucket_name, "Prefix": key_prefix}
+
+        if EXPECTED_BUCKET_OWNER:
+            list_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+        while True:
+            METRICS.increment("ListPages")
+
+            page = s3_client.list_objects_v2(**list_params)
+
+            yield from page.get("Contents", [])
+
+            if not page.get("IsTruncated"):
+                break
+
+            list_params["ContinuationToken"] = page["NextContinuationToken"]
+
+
+def status_from_listing(listed_object, file_info):
+    """
+    Derives the ingress status of a file from the listing entry of the object
+    at its location, if possible.
+
+    A listing entry carries no object metadata, so it can only establish that
+    a file was modified, when its size differs from the object's. Otherwise,
+    the MD5 and last modified time recorded within the object's metadata must
+    be compared by get_ingress_status, so objects written outside of DUM are
+    reported consistently whichever way they are statused.
+
+    Parameters
+    ----------
+    listed_object : dict
+        The ListObjectsV2 entry of the object.
+    file_info : dict
+        Dictionary containing file metadata derived from the provided manifest.
+
+    Returns
+    -------
+    ingress_status : str or None
+        The derived ingress status, or None if a HEAD request is required.
+
+    """
+    if int(listed_object["Size"]) != int(file_info["size"]):
+        return "Modified"
+
+    return None
+
+
+def status_from_listings(request_node, manifest, node_bucket_map):
+    """
+    Derives the ingress status of each path within a manifest from listings
+    of the prefixes covered by the manifest, using a sorted merge-join of the
+    manifest paths against the listed keys of each destination bucket.
+
+    Parameters
+    ----------
+    request_node : str
+        PDS node identifier associated to the provided manifest.
+    manifest : dict
+        Parsed manifest containing a number of paths to status with associated
+        information (md5, size and last modified time).
+    node_bucket_map : dict
+        The node-specific portion of the bucket map.
+
+    Returns
+    -------
+    results : dict
+        Mapping of each path whose status could be derived to its status.
+    head_paths : list of str
+        The paths whose status must be derived from a HEAD request.
+
+    """
+    results = {}
+    head_paths = []
+
+    paths_by_bucket = {}
+
+    for trimmed_path in manifest:
+        bucket_name = bucket_for_path(node_bucket_map, trimmed_path, logger)["name"]
+        paths_by_bucket.setdefault(bucket_name, []).append(trimmed_path)
+
+    node_prefix = f"{request_node.lower()}/"
+
+    for bucket_name, trimmed_paths in paths_by_bucket.items():
+        # The covering prefixes do not overlap, so listing them in order yields
+        # keys in the same order as the sorted paths
+        trimmed_paths.sort()
+
+        key_prefixes = [node_prefix + prefix for prefix in covering_prefixes(trimmed_paths)]
+        listed_objects = iter_listed_objects(bucket_name, key_prefixes)
+        listed_object = next(listed_objects, None)
+
+        for trimmed_path in trimmed_paths:
+            object_key = node_prefix + trimmed_path
+
+            while listed_object is not None and listed_object["Key"] < object_key:
+                listed_object = next(listed_objects, None)
+
+            if listed_object is None or listed_object["Key"] != object_key:
+                results[trimmed_path] = "Missing"
+                continue
+
+            ingress_status = status_from_listing(listed_object, manifest[trimmed_path])
+
+            if ingress_status is None:
+                head_paths.append(trimmed_path)
+            else:
+                results[trimmed_path] = ingress_status
+
+    return results, head_paths
+
+
 def get_ingress_status(destination_bucket, object_key, file_info):
     """
     Derives an ingress status for the file referenced by the provided
@@ -229,7 +1040,11 @@ def get_ingress_status(destination_bucket, object_key, file_info):
         head_params = {"Bucket": destination_bucket, "Key": object_key}
         if EXPECTED_BUCKET_OWNER:
             head_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
-        object_head = s3_client.head_object(**head_params)
+
+        METRICS.increment("HeadObjects")
+
+        with METRICS.timer("HeadObject"):
+            object_head = s3_client.head_object(**head_params)
     except ClientError as e:
         if e.response["Error"]["Code"] == "404":
             # File does not exist in S3
@@ -240,8 +1055,9 @@ def get_ingress_status(destination_bucket, object_key, file_info):
             raise
 
     object_length = int(object_head["ContentLength"])
-    object_last_modified = object_head["Metadata"]["last_modified"]
-    object_md5 = object_head["Metadata"]["md5"]
+    # Objects written outside of DUM may lack the metadata, and are reported as modified
+    object_last_modified = object_head.get("Metadata", {}).get("last_modified")
+    object_md5 = object_head.get("Metadata", {}).get("md5")
 
     request_length = file_info["size"]
     request_last_modified = file_info["last_modified"]
@@ -257,12 +1073,113 @@ def get_ingress_status(destination_bucket, object_key, file_info):
     return ingress_status
 
 
+def get_ssm_client():
+    """Returns the SSM client used to fetch the SMTP configuration, creating it if necessary"""
+    global ssm_client
+
+    if ssm_client is None:
+        if os.getenv("ENDPOINT_URL", None):
+            ssm_client = boto3.client("ssm", endpoint_url=os.environ["ENDPOINT_URL"])
+        else:
+            ssm_client = boto3.client("ssm")
+
+    return ssm_client
+
+
+def get_smtp_config():
+    """
+    Returns the SMTP endpoint configuration from the SSM Parameter store,
+    reusing the configuration fetched by a recent (warm) invocation.
+
+    Raises
+    ------
+    RuntimeError
+        If the expected SMTP endpoint parameters are not successfully pulled
+        from the SSM Parameter store.
+
+    """
+    smtp_config_ssm_key_path = os.environ["SMTP_CONFIG_SSM_KEY_PATH"]
+
+    cached = SMTP_CONFIG_CACHE.get(smtp_config_ssm_key_path)
+
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    smtp_config = {}
+    request_params = {"Path": smtp_config_ssm_key_path, "Recursive": True}
+
+    # Map SSM parameter values to unique portion of the SSM key name
+    while True:
+        response = get_ssm_client().get_parameters_by_path(**request_params)
+
+        for ssm_parameter in response["Parameters"]:
+            smtp_config[ssm_parameter["Name"].split("/")[-1]] = ssm_parameter["Value"]
+
+        if not response.get("NextToken"):
+            break
+
+        request_params["NextToken"] = response["NextToken"]
+
+    expected_fields = ("username", "password", "server", "sender")
+
+    if not all(field in smtp_config for field in expected_fields):
+        raise RuntimeError(
+            f"Unexpected SMTP configuration from SSM, expected {expected_fields}, got {list(smtp_config.keys())}"
+        )
+
+    SMTP_CONFIG_CACHE[smtp_config_ssm_key_path] = (time.monotonic() + SMTP_CONFIG_TTL, smtp_config)
+
+    return smtp_config
+
+
+def get_smtp_session(smtp_config):
+    """Returns the SMTP session of the current invocation, connecting and logging in on first use"""
+    global smtp_session
+
+    # Only needed once a report is ready to send, so deferred until then
+    import smtplib
+
+    if smtp_session is None:
+        endpoint_host, endpoint_port = smtp_config["server"].split(":")
+
+        session = smtplib.SMTP(endpoint_host, int(endpoint_port))
+
+        try:
+            session.starttls()
+            session.login(smtp_config["username"], smtp_config["password"])
+        except Exception:
+            session.close()
+            raise
+
+        smtp_session = session
+
+    return smtp_session
+
+
+def close_smtp_session():
+    """Closes the SMTP session of the current invocation, if one was opened"""
+    global smtp_session
+
+    # Only needed once a report is ready to send, so deferred until then
+    import smtplib
+
+    if smtp_session is not None:
+        try:
+            smtp_session.quit()
+        except smtplib.SMTPException:
+            smtp_session.close()
+        finally:
+            smtp_session = None
+
+
 def send_email(message_body, return_email):
     """
     Sends the provided message body to the provided return email address.
 
     Email is sent via AWS SMTP endpoint, which requires credentials pulled by
-    this function from the AWS SSM Parameter store.
+    this function from the AWS SSM Parameter store. The credentials are cached
+    across invocations, and a single session is used for all emails sent
+    within an invocation.
 
     Parameters
     ----------
@@ -278,22 +1195,11 @@ def send_email(message_body, return_email):
         from the SSM Parameter store.
 
     """
-    smtp_config = {}
-
-    # Pull the required SMTP endpoint parameters from SSM
-    smtp_config_ssm_key_path = os.environ["SMTP_CONFIG_SSM_KEY_PATH"]
-    response = ssm_client.get_parameters_by_path(Path=smtp_config_ssm_key_path, Recursive=True)
+    # Only needed once a report is ready to send, so deferred until then
+    import smtplib
+    from email.mime.text import MIMEText
 
-    # Map SSM parameter values to unique portion of the SSM key name
-    for ssm_parameter in response["Parameters"]:
-        smtp_config[ssm_parameter["Name"].split("/")[-1]] = ssm_parameter["Value"]
-
-    expected_fields = ("username", "password", "server", "sender")
-
-    if not all(field in smtp_config for field in expected_fields):
-        raise RuntimeError(
-            f"Unexpected SMTP configuration from SSM, expected {expected_fields}, got {list(smtp_config.keys())}"
-        )
+    smtp_config = get_smtp_config()
 
     # Create the email payload
     message = MIMEText(message_body)
@@ -301,15 +1207,15 @@ def send_email(message_body, return_email):
     message["From"] = smtp_config["sender"]
     message["To"] = return_email
 
-    # Send the email via SMTP endpoint
-    endpoint_host, endpoint_port = smtp_config["server"].split(":")
-
-    with smtplib.SMTP(endpoint_host, int(endpoint_port)) as endpoint:
-        endpoint.starttls()
-        endpoint.login(smtp_config["username"], smtp_config["password"])
-        endpoint.sendmail(smtp_config["sender"], return_email, message.as_string())
+    try:
+        get_smtp_session(smtp_config).sendmail(smtp_config["sender"], return_email, message.as_string())
+    except smtplib.SMTPServerDisconnected:
+        # The endpoint may close idle sessions, so reconnect once
+        close_smtp_session()
+        get_smtp_session(smtp_config).sendmail(smtp_config["sender"], return_email, message.as_string())
 
 
+@METRICS.instrument_handler
 def lambda_handler(event, context):
     """
     Entrypoint for this Lambda function. Processes the latest messages from
@@ -318,7 +1224,9 @@ def lambda_handler(event, context):
     Notes
     -----
     This handler utilizes the Batched Item Failures mechanism between Lambda
-    and SQS to ensure that only failed records are reprocessed.
+    and SQS to ensure that only failed records are reprocessed. Records which
+    cannot succeed on redelivery, or have exhausted STATUS_MAX_RECEIVE_COUNT
+    attempts, instead mark their status job as failed, and are not retried.
 
     Parameters
     ----------
@@ -335,24 +1243,40 @@ def lambda_handler(event, context):
 
     """
     # Read the bucket map configured for the service
-    bucket_map = initialize_bucket_map(logger)
+    with METRICS.timer("BucketMapLoad"):
+        bucket_map = initialize_bucket_map(logger)
 
     batch_item_failures = []
     sqs_batch_response = {"statusCode": 200}
 
-    # Get the manifest contents from the SQS event
-    for idx, record in enumerate(event["Records"]):
-        try:
-            request_node, return_email, manifest = parse_manifest(record)
-
-            results = process_manifest(request_node, manifest, bucket_map)
-            logger.debug("Results: %s", results)
-
-            message_body = json.dumps(results, indent=4)
-            send_email(message_body, return_email)
-        except Exception as err:
-            logger.exception(f"Failed to parse manifest from record index {idx}, reason: {str(err)}")
-            batch_item_failures.append({"itemIdentifier": record["messageId"]})
+    # Get the manifest contents (or chunk of a fanned out manifest) from the SQS event
+    try:
+        for idx, record in enumerate(event["Records"]):
+            status_chunk = None
+
+            try:
+                status_chunk = parse_status_chunk(record)
+
+                if status_chunk:
+                    process_status_chunk(status_chunk, bucket_map)
+                else:
+                    process_manifest_record(record, bucket_map)
+            except Exception as err:
+                logger.exception(f"Failed to parse manifest from record index {idx}, reason: {str(err)}")
+                METRICS.increment("RecordFailures")
+
+                # Errors with the manifest itself will recur on every redelivery, so
+                # the job is failed right away, rather than once retries run out
+                if isinstance(err, ManifestError) or is_final_attempt(record):
+                    try:
+                        fail_status_job(record, status_chunk, str(err))
+                    except Exception:
+                        logger.exception(f"Failed to record failure of status job for record index {idx}")
+                        batch_item_failures.append({"itemIdentifier": record["messageId"]})
+                else:
+                    batch_item_failures.append({"itemIdentifier": record["messageId"]})
+    finally:
+        close_smtp_session()
 
     # Inform SQS about any partial failures so we don't reprocess the full
     # set of records over again.
@@ -6,14 +6,44 @@ sync_s3_metadata.py
 
 Lambda function which updates existing objects in S3 with metdata typically
 added by either the DUM ingress client or the rclone utility.
+
+By default every object under a prefix is listed and inspected. Alternatively,
+the objects to inspect may be drawn from an inventory of the bucket (such as
+an S3 Inventory report in CSV format), or from a precomputed list of candidate
+keys, so that only objects known (or suspected) to need repair are inspected.
+
+The ETag of an object uploaded in parts is not its MD5, so it cannot stand in
+for the md5 metadata of such objects. An optional repair mode computes their
+true MD5 by reading their content instead.
+
+Listings of large buckets may be split into key ranges (shards), such as one
+per top-level prefix, which are listed and processed concurrently, either
+within a single invocation or by an invocation per shard.
 """
 import argparse
+import base64
 import calendar
 import concurrent.futures
+import csv
+import gzip
+import hashlib
+import io
+import json
 import logging
 import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import Counter
 from datetime import datetime
 from datetime import timezone
+from itertools import islice
+from math import ceil
+from urllib.parse import unquote_plus
+from urllib.parse import urlencode
+from urllib.parse import urlparse
 
 import boto3
 
@@ -36,6 +66,86 @@ logger.setLevel(LOG_LEVELS.get(LOG_LEVEL.lower(), logging.INFO))
 # Get expected bucket owner from environment variable for security
 EXPECTED_BUCKET_OWNER = os.getenv("EXPECTED_BUCKET_OWNER")
 
+# Content index maintained for the ingress service, which uses it to satisfy
+# requests for content already ingested under another key with a server-side
+# copy. The index is only maintained when a bucket is configured.
+CONTENT_INDEX_BUCKET = os.getenv("CONTENT_INDEX_BUCKET")
+CONTENT_INDEX_PREFIX = os.getenv("CONTENT_INDEX_PREFIX", "content-index")
+
+MD5_HEX_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# ETags of objects uploaded in parts are the MD5 of the part MD5s, suffixed with the number of parts
+MULTIPART_ETAG_PATTERN = re.compile(r"^[0-9a-f]{32}-[0-9]+$")
+
+# Metadata fields every object is expected to carry once synced
+REQUIRED_METADATA_FIELDS = ("md5", "mtime", "last_modified")
+
+# Number of keys read from an inventory or candidate list at a time
+KEY_PAGE_SIZE = 1000
+
+# Default location (local path or s3:// URI) of the checkpoint used to resume sweeps, checkpoints are disabled if unset
+CHECKPOINT_LOCATION = os.getenv("CHECKPOINT_LOCATION")
+
+# Maximum number of invocations a self-continuing sweep may chain, guarding against runaway chains
+MAX_INVOCATIONS = int(os.getenv("MAX_INVOCATIONS", "1000"))
+
+# Number of entries held in the work queue per worker thread, bounding how far reading runs ahead of processing
+QUEUE_DEPTH_PER_WORKER = 4
+
+# Maximum number of entries read ahead of the last object completed in order, bounding the bookkeeping held in memory
+MAX_PENDING_ENTRIES = int(os.getenv("MAX_PENDING_ENTRIES", "10000"))
+
+# Seconds threads wait on a queue before checking whether the sweep is stopping
+QUEUE_POLL_SECONDS = 0.1
+
+# Seconds the coordinating thread waits for an outcome before re-checking the remaining execution time
+RESULT_POLL_SECONDS = 1.0
+
+# Size (in bytes) of each ranged read used to compute the MD5 of an object uploaded in parts
+HASH_RANGE_SIZE = int(os.getenv("HASH_RANGE_SIZE", str(16 * 1024**2)))
+
+# Number of ranged reads in flight for each object hashed, bounding the memory used to HASH_CONCURRENCY ranges
+HASH_CONCURRENCY = int(os.getenv("HASH_CONCURRENCY", "8"))
+
+# Number of shards of a sharded sweep processed at once within a single invocation
+SHARD_CONCURRENCY = int(os.getenv("SHARD_CONCURRENCY", "4"))
+
+# Largest object S3 accepts for a single CopyObject request, the metadata of larger objects is rewritten in parts
+MAX_COPY_OBJECT_SIZE = 5 * 1024**3
+
+# Part size (in bytes) used to rewrite the metadata of objects too large for a single CopyObject request
+COPY_PART_SIZE = int(os.getenv("COPY_PART_SIZE", str(1024**3)))
+
+# Number of parts copied concurrently when rewriting the metadata of a large object
+COPY_CONCURRENCY = int(os.getenv("COPY_CONCURRENCY", "8"))
+
+# Fields of a head_object() response a multipart upload must be given to recreate the object they describe
+PRESERVED_HEAD_FIELDS = (
+    "ContentType",
+    "ContentEncoding",
+    "ContentDisposition",
+    "ContentLanguage",
+    "CacheControl",
+    "Expires",
+    "StorageClass",
+    "WebsiteRedirectLocation",
+    "ServerSideEncryption",
+    "SSEKMSKeyId",
+    "BucketKeyEnabled",
+)
+
+# Error codes S3 reports when an object (or its bucket) has no Object Lock retention or legal hold to read
+NO_OBJECT_LOCK_ERROR_CODES = ("InvalidRequest", "NoSuchObjectLockConfiguration", "ObjectLockConfigurationNotFoundError")
+
+# Throughput (in bytes per second) assumed when estimating how long copying an object onto itself takes
+COPY_BYTES_PER_SECOND = int(os.getenv("COPY_BYTES_PER_SECOND", str(128 * 1024**2)))
+
+# Throughput (in bytes per second) assumed when estimating how long computing the MD5 of an object takes
+HASH_BYTES_PER_SECOND = int(os.getenv("HASH_BYTES_PER_SECOND", str(64 * 1024**2)))
+
+# Seconds of execution time kept to return once a stopping sweep no longer waits on objects still being processed
+RETURN_RESERVE_SECONDS = 1.0
+
 
 def update_last_modified_metadata(key, head_metadata):
     """
@@ -103,7 +213,7 @@ def update_md5_metadata(key, head_metadata):
 
     try:
         # Use the Etag as the MD5 checksum, stripping any surrounding quotes
-        # Note this is only valid for non-multipart uploads
+        # Note this is only valid for non-multipart uploads, see update_true_md5_metadata()
         etag = head_metadata["ETag"].strip('"')
         updated_metadata["md5"] = etag
         logger.info("Updating object %s with updated_metadata['md5']=%s", key, str(updated_metadata["md5"]))
@@ -113,7 +223,568 @@ def update_md5_metadata(key, head_metadata):
     return updated_metadata
 
 
-def process_s3_object(bucket_name, key):
+def is_multipart_etag(etag):
+    """Returns True if the provided ETag is that of an object uploaded in parts, and so is not the object's MD5"""
+    return bool(MULTIPART_ETAG_PATTERN.match(str(etag).strip('"').lower()))
+
+
+def compute_object_md5(bucket_name, key, object_size, etag=None):
+    """
+    Computes the MD5 of an object by streaming its content with ranged reads.
+    Ranges are read concurrently, but hashed strictly in order, with at most
+    HASH_CONCURRENCY ranges held in memory at once.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the S3 bucket.
+    key : str
+        S3 object key.
+    object_size : int
+        Size of the object in bytes.
+    etag : str, optional
+        ETag of the object. When provided, every read is conditioned on it, so
+        an object replaced while it is read fails rather than being mis-hashed.
+
+    Returns
+    -------
+    md5 : hashlib._Hash
+        The MD5 hash object of the object's content.
+
+    """
+    md5 = hashlib.md5()
+    num_ranges = int(ceil(object_size / HASH_RANGE_SIZE))
+
+    def read_range(range_num):
+        start = range_num * HASH_RANGE_SIZE
+        end = min(start + HASH_RANGE_SIZE, object_size) - 1
+
+        get_params = {"Bucket": bucket_name, "Key": key, "Range": f"bytes={start}-{end}"}
+
+        if etag:
+            get_params["IfMatch"] = etag
+
+        if EXPECTED_BUCKET_OWNER:
+            get_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+        return s3.get_object(**get_params)["Body"].read()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=HASH_CONCURRENCY) as executor:
+        # Reads are submitted only as earlier ranges are hashed, keeping a fixed number in flight
+        pending = {
+            range_num: executor.submit(read_range, range_num) for range_num in range(min(HASH_CONCURRENCY, num_ranges))
+        }
+
+        try:
+            for range_num in range(num_ranges):
+                md5.update(pending.pop(range_num).result())
+
+                if range_num + HASH_CONCURRENCY < num_ranges:
+                    next_range = range_num + HASH_CONCURRENCY
+                    pending[next_range] = executor.submit(read_range, next_range)
+        finally:
+            for future in pending.values():
+                future.cancel()
+
+    return md5
+
+
+def update_true_md5_metadata(bucket_name, key, object_size, head_metadata):
+    """
+    Updates an S3 object's metadata dictionary to include the 'md5' and
+    'md5chksum' fields, computed from the content of the object. Used for
+    objects uploaded in parts, whose ETag is not an MD5.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the S3 bucket.
+    key : str
+        S3 object key.
+    object_size : int
+        Size of the object in bytes.
+    head_metadata : dict
+        Dictionary of metadata for the S3 object as returned by head_object().
+
+    Returns
+    -------
+    updated_metadata : dict
+        Updated custom metadata dictionary including 'md5' and 'md5chksum' fields.
+
+    """
+    updated_metadata = head_metadata.get("Metadata", {}).copy()
+
+    md5 = compute_object_md5(bucket_name, key, object_size, head_metadata.get("ETag"))
+
+    # The same fields the DUM client assigns to the objects it uploads in parts
+    updated_metadata["md5"] = md5.hexdigest()
+    updated_metadata["md5chksum"] = base64.b64encode(md5.digest()).decode()
+    logger.info("Updating object %s with computed updated_metadata['md5']=%s", key, updated_metadata["md5"])
+
+    return updated_metadata
+
+
+def estimate_rewrite_seconds(object_size, compute_md5=False):
+    """Estimates the seconds needed to rewrite the metadata of an object, optionally after computing its MD5"""
+    seconds = object_size / COPY_BYTES_PER_SECOND
+
+    if compute_md5:
+        seconds += object_size / HASH_BYTES_PER_SECOND
+
+    return seconds
+
+
+def has_true_md5(metadata):
+    """Returns True if the provided object metadata records an MD5 hex digest, rather than a multipart ETag"""
+    return bool(MD5_HEX_PATTERN.match(str(metadata.get("md5", "")).lower()))
+
+
+def update_content_index(bucket_name, key, head_metadata):
+    """
+    Records the location of an S3 object within the content index, keyed by
+    the node which ingested it (the first component of its key), its MD5 and
+    its size. Keys are laid out identically to those of content_index_util.py,
+    which cannot be imported here as this function is deployed standalone.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the S3 bucket containing the object.
+    key : str
+        S3 object key.
+    head_metadata : dict
+        Dictionary of metadata for the S3 object as returned by head_object(),
+        including any metadata updates made by this function.
+
+    """
+    md5_digest = head_metadata.get("Metadata", {}).get("md5", "").lower()
+
+    # Objects without a true MD5 (such as those whose md5 was derived from a
+    # multipart ETag) cannot be matched against incoming files
+    if "/" not in key or not MD5_HEX_PATTERN.match(md5_digest) or not head_metadata.get("ContentLength"):
+        return
+
+    node_id = key.split("/", 1)[0].lower()
+    index_key = "/".join(
+        (CONTENT_INDEX_PREFIX.strip("/"), node_id, md5_digest, str(int(head_metadata["ContentLength"])))
+    )
+
+    # The index only serves as a hint, so a failure here does not fail the object
+    try:
+        s3.put_object(
+            Bucket=CONTENT_INDEX_BUCKET,
+            Key=index_key,
+            Body=json.dumps({"bucket": bucket_name, "key": key}).encode("utf-8"),
+            ContentType="application/json",
+        )
+    except Exception as err:
+        logger.warning("Failed to update content index for object %s, reason: %s", key, str(err))
+
+
+def open_location(location):
+    """
+    Opens a local file, or an object referenced by an s3:// URI, for reading
+    as text. Content with a ".gz" suffix is decompressed as it is read.
+
+    Parameters
+    ----------
+    location : str
+        Local path or s3://bucket/key URI.
+
+    Returns
+    -------
+    stream : io.TextIOBase
+        Text stream over the content.
+
+    """
+    if location.startswith("s3://"):
+        parsed_location = urlparse(location)
+        get_params = {"Bucket": parsed_location.netloc, "Key": parsed_location.path.lstrip("/")}
+        if EXPECTED_BUCKET_OWNER:
+            get_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+        stream = s3.get_object(**get_params)["Body"]
+    else:
+        stream = open(location, "rb")
+
+    if location.endswith(".gz"):
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+
+    return io.TextIOWrapper(stream, encoding="utf-8", newline="")
+
+
+def iter_candidate_entries(location, prefix=None, start_cursor=0):
+    """
+    Yields an entry for each key of a candidate list, which lists one object
+    key per line. Each entry is a tuple of the key, the cursor from which
+    reading resumes once the key is processed, whether it needs inspection,
+    and the size of the object, which is not known from a candidate list.
+
+    """
+    with open_location(location) as candidate_list:
+        keys = (line.strip() for line in candidate_list)
+        keys = (key for key in keys if key and (not prefix or key.startswith(prefix)))
+
+        for index, key in enumerate(keys):
+            if index >= start_cursor:
+                yield key, index + 1, True, None
+
+
+def iter_inventory_files(location):
+    """
+    Yields the location and column names of each data file of an inventory.
+
+    Two inventory layouts are supported: the manifest.json of an S3 Inventory
+    report in CSV format, whose data files are headerless (and gzipped) with
+    the columns named by its fileSchema, or a single CSV file (optionally
+    gzipped), whose first row names its columns.
+
+    """
+    if not location.endswith("manifest.json"):
+        yield location, None
+        return
+
+    with open_location(location) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest.get("fileFormat", "CSV").upper() != "CSV":
+        raise ValueError(f"Unsupported inventory format {manifest['fileFormat']}, only CSV inventories are supported")
+
+    columns = [column.strip() for column in manifest["fileSchema"].split(",")]
+    destination_bucket = manifest["destinationBucket"].split(":")[-1]
+
+    for data_file in manifest["files"]:
+        yield f"s3://{destination_bucket}/{data_file['key']}", columns
+
+
+def iter_inventory_rows(location):
+    """
+    Yields each row of an inventory as a dictionary keyed by column name.
+
+    Object keys are URL-decoded for S3 Inventory reports, which URL-encode them.
+    Rows of a user-provided CSV inventory are returned as-is.
+
+    """
+    for data_location, columns in iter_inventory_files(location):
+        with open_location(data_location) as data_file:
+            for row in csv.DictReader(data_file, fieldnames=columns):
+                if columns:
+                    row["Key"] = unquote_plus(row["Key"])
+
+                yield row
+
+
+def inventory_row_metadata(row):
+    """
+    Returns the user metadata recorded for an object within an inventory row,
+    or None if the inventory does not record user metadata. Metadata may be
+    provided as a JSON object within a "UserMetadata" column, or as a column
+    per metadata field.
+
+    """
+    if row.get("UserMetadata"):
+        try:
+            metadata = json.loads(row["UserMetadata"])
+            return {key.lower().removeprefix("x-amz-meta-"): value for key, value in metadata.items()}
+        except (ValueError, AttributeError):
+            return None
+
+    if any(field in row for field in REQUIRED_METADATA_FIELDS):
+        return {field: row[field] for field in REQUIRED_METADATA_FIELDS if row.get(field)}
+
+    return None
+
+
+def iter_inventory_entries(
+    location, bucket_name, prefix=None, start_cursor=0, repair_multipart_md5=False, index_complete_objects=False
+):
+    """
+    Yields an entry for each object of the bucket within an inventory, noting
+    whether the object needs inspection.
+
+    Objects whose inventory row shows every required metadata field need no
+    inspection. When the inventory does not record user metadata, every
+    object needs inspection, which still spares a listing of the bucket.
+
+    Parameters
+    ----------
+    location : str
+        Local path or s3:// URI of the inventory.
+    bucket_name : str
+        Name of the S3 bucket, rows for other buckets are ignored.
+    prefix : str, optional
+        Only rows for keys beginning with this prefix are considered.
+    start_cursor : int, optional
+        Index of the inventory row to resume reading from.
+    repair_multipart_md5 : bool, optional
+        If True, objects whose md5 is not an MD5 hex digest (such as a
+        multipart ETag recorded by an earlier sync) also need inspection.
+    index_complete_objects : bool, optional
+        If True, objects carrying every required metadata field also need
+        inspection, so their content index entries are maintained.
+
+    Yields
+    ------
+    key : str
+        The object key.
+    cursor : int
+        Cursor from which reading resumes once the object is processed.
+    needs_inspection : bool
+        Whether the object may need its metadata repaired.
+    size : int or None
+        Size of the object in bytes, if recorded by the inventory.
+
+    """
+    logger.info("Reading inventory %s for bucket %s", location, bucket_name)
+
+    for index, row in enumerate(iter_inventory_rows(location)):
+        key = row.get("Key")
+
+        if index < start_cursor or not key:
+            continue
+
+        if row.get("Bucket", bucket_name) != bucket_name or (prefix and not key.startswith(prefix)):
+            continue
+
+        metadata = inventory_row_metadata(row)
+        size = int(row["Size"]) if row.get("Size") else None
+
+        if metadata is None or not all(metadata.get(field) for field in REQUIRED_METADATA_FIELDS):
+            yield key, index + 1, True, size
+            continue
+
+        if repair_multipart_md5 and not has_true_md5(metadata):
+            yield key, index + 1, True, size
+            continue
+
+        yield key, index + 1, index_complete_objects, size
+
+
+def iter_listing_entries(bucket_name, prefix=None, start_cursor=None, shard=None):
+    """
+    Yields an entry for each object listed within the bucket, resuming after
+    the key given by start_cursor. When a shard is provided, only keys within
+    its key range are listed.
+    """
+    pagination_params = {"Bucket": bucket_name}
+    shard = shard or {}
+
+    if prefix:
+        pagination_params["Prefix"] = prefix
+
+    # A resumed shard's cursor always follows the start of the shard
+    start_after = start_cursor or shard.get("start_after")
+
+    if start_after:
+        pagination_params["StartAfter"] = start_after
+
+    if EXPECTED_BUCKET_OWNER:
+        pagination_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    end_at = shard.get("end_at")
+
+    for page in paginator.paginate(**pagination_params):
+        for obj in page.get("Contents", []):
+            # Keys are listed in order, so the first key past the shard ends it
+            if end_at is not None and obj["Key"] > end_at:
+                return
+
+            yield obj["Key"], obj["Key"], True, obj.get("Size")
+
+
+def iter_key_pages(entries, page_size=KEY_PAGE_SIZE):
+    """Yields successive lists of up to page_size entries from the provided iterable"""
+    entries = iter(entries)
+
+    while True:
+        page = list(islice(entries, page_size))
+
+        if not page:
+            return
+
+        yield page
+
+
+def read_checkpoint(location):
+    """Reads a checkpoint from a local path or s3:// URI, returning None if no checkpoint exists there yet"""
+    try:
+        with open_location(location) as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+    except s3.exceptions.NoSuchKey:
+        return None
+
+
+def write_checkpoint(location, checkpoint):
+    """Writes a checkpoint to a local path or s3:// URI, replacing any previous checkpoint"""
+    body = json.dumps(checkpoint, indent=4)
+
+    if location.startswith("s3://"):
+        parsed_location = urlparse(location)
+        put_params = {
+            "Bucket": parsed_location.netloc,
+            "Key": parsed_location.path.lstrip("/"),
+            "Body": body.encode("utf-8"),
+            "ContentType": "application/json",
+        }
+        if EXPECTED_BUCKET_OWNER:
+            put_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+        s3.put_object(**put_params)
+    else:
+        # Write to a temporary file first, so an interrupted write never leaves a truncated checkpoint
+        temp_location = f"{location}.tmp"
+
+        with open(temp_location, "w") as outfile:
+            outfile.write(body)
+
+        os.replace(temp_location, location)
+
+
+def checkpoint_source(bucket_name, prefix, inventory, candidate_list, shard=None):
+    """Returns the description of a sweep recorded with its checkpoints, which a resumed sweep must match"""
+    source = {"bucket_name": bucket_name, "prefix": prefix, "inventory": inventory, "candidate_list": candidate_list}
+
+    if shard:
+        source["shard"] = shard
+
+    return source
+
+
+def invoke_continuation(event):
+    """Asynchronously invokes this function to continue a sweep, with the provided event"""
+    lambda_client = boto3.client("lambda")
+
+    lambda_client.invoke(
+        FunctionName=os.environ["AWS_LAMBDA_FUNCTION_NAME"],
+        InvocationType="Event",
+        Payload=json.dumps(event).encode("utf-8"),
+    )
+
+
+def read_object_lock(bucket_name, key, owner_params):
+    """Returns the Object Lock retention and legal hold of an object as create_multipart_upload() parameters"""
+    lock_params = {}
+
+    try:
+        retention = s3.get_object_retention(Bucket=bucket_name, Key=key, **owner_params)["Retention"]
+        lock_params["ObjectLockMode"] = retention["Mode"]
+        lock_params["ObjectLockRetainUntilDate"] = retention["RetainUntilDate"]
+    except s3.exceptions.ClientError as err:
+        if err.response["Error"]["Code"] not in NO_OBJECT_LOCK_ERROR_CODES:
+            raise
+
+    try:
+        legal_hold = s3.get_object_legal_hold(Bucket=bucket_name, Key=key, **owner_params)["LegalHold"]
+        lock_params["ObjectLockLegalHoldStatus"] = legal_hold["Status"]
+    except s3.exceptions.ClientError as err:
+        if err.response["Error"]["Code"] not in NO_OBJECT_LOCK_ERROR_CODES:
+            raise
+
+    return lock_params
+
+
+def copy_object_in_parts(bucket_name, key, object_size, head_metadata):
+    """
+    Rewrites the metadata of an object too large for a single CopyObject
+    request, by copying the object onto itself in parts with UploadPartCopy.
+    Parts are copied concurrently, and the multipart upload is aborted if any
+    part fails, leaving the original object untouched.
+
+    Unlike CopyObject, a multipart upload carries over nothing of the source
+    object, so its system metadata, encryption settings, tags, and Object
+    Lock retention and legal hold are read and assigned to the upload.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the S3 bucket.
+    key : str
+        S3 object key.
+    object_size : int
+        Size of the object in bytes.
+    head_metadata : dict
+        The head_object() response for the object, with its "Metadata"
+        replaced by the updated metadata to assign.
+
+    """
+    copy_source = {"Bucket": bucket_name, "Key": key}
+    bucket_owner_params = {}
+    owner_params = {}
+
+    if EXPECTED_BUCKET_OWNER:
+        bucket_owner_params = {"ExpectedBucketOwner": EXPECTED_BUCKET_OWNER}
+        owner_params = {"ExpectedBucketOwner": EXPECTED_BUCKET_OWNER, "ExpectedSourceBucketOwner": EXPECTED_BUCKET_OWNER}
+
+    mpu_params = {"Bucket": bucket_name, "Key": key, "Metadata": head_metadata["Metadata"], **bucket_owner_params}
+
+    for field in PRESERVED_HEAD_FIELDS:
+        if head_metadata.get(field):
+            mpu_params[field] = head_metadata[field]
+
+    tag_set = s3.get_object_tagging(Bucket=bucket_name, Key=key, **bucket_owner_params)["TagSet"]
+
+    if tag_set:
+        mpu_params["Tagging"] = urlencode([(tag["Key"], tag["Value"]) for tag in tag_set])
+
+    mpu_params.update(read_object_lock(bucket_name, key, bucket_owner_params))
+
+    upload_id = s3.create_multipart_upload(**mpu_params)["UploadId"]
+
+    # S3 limits multipart uploads to 10,000 parts
+    part_size = max(COPY_PART_SIZE, int(ceil(object_size / 10000)))
+
+    def copy_part(part_num):
+        start = (part_num - 1) * part_size
+        end = min(start + part_size, object_size) - 1
+
+        copy_params = {
+            "Bucket": bucket_name,
+            "Key": key,
+            "CopySource": copy_source,
+            "CopySourceRange": f"bytes={start}-{end}",
+            "PartNumber": part_num,
+            "UploadId": upload_id,
+            **owner_params,
+        }
+
+        # Guards against the object being replaced while its parts are copied
+        if head_metadata.get("ETag"):
+            copy_params["CopySourceIfMatch"] = head_metadata["ETag"]
+
+        response = s3.upload_part_copy(**copy_params)
+
+        return {"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_num}
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=COPY_CONCURRENCY) as executor:
+            parts = list(executor.map(copy_part, range(1, int(ceil(object_size / part_size)) + 1)))
+
+        complete_params = {
+            "Bucket": bucket_name,
+            "Key": key,
+            "UploadId": upload_id,
+            "MultipartUpload": {"Parts": parts},
+        }
+
+        if EXPECTED_BUCKET_OWNER:
+            complete_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+        s3.complete_multipart_upload(**complete_params)
+    except Exception:
+        logger.exception("Aborting multipart metadata rewrite of %s for upload_id=%s due to error", key, upload_id)
+
+        # A failed abort is only logged, so the error which caused it is the one raised
+        try:
+            s3.abort_multipart_upload(Bucket=bucket_name, Key=key, UploadId=upload_id, **bucket_owner_params)
+        except Exception:
+            logger.exception("Failed to abort multipart metadata rewrite of %s for upload_id=%s", key, upload_id)
+
+        raise
+
+
+def process_s3_object(
+    bucket_name, key, object_size=None, repair_multipart_md5=False, deadline=None, budget_seconds=None
+):
     """
     Processes a single S3 object to see if it requires metadata updates.
 
@@ -123,13 +794,29 @@ def process_s3_object(bucket_name, key):
         Name of the S3 bucket.
     key : str
         S3 object key.
+    object_size : int, optional
+        Size of the object in bytes, as reported by the listing or inventory
+        the key was read from. Falls back to the size reported by head_object().
+    repair_multipart_md5 : bool, optional
+        If True, objects uploaded in parts which lack a true MD5 have their
+        MD5 computed from their content, rather than left without one (or
+        with their ETag recorded in its place).
+    deadline : float, optional
+        time.monotonic() value by which the object must be processed. Objects
+        whose rewrite is estimated to take longer than the time remaining are
+        deferred rather than started. If None, no time checks are performed.
+    budget_seconds : float, optional
+        Seconds available to process objects within a whole invocation.
+        Objects whose rewrite is estimated to take longer could never be
+        processed within an invocation, and fail rather than being deferred.
 
     Returns
     -------
     key : str
         The S3 object key.
     status : str
-        Status of the operation: 'updated', 'skipped', or 'failed'.
+        Status of the operation: 'updated', 'skipped', 'failed', or 'deferred'
+        when too little time remains to process the object.
 
     """
     try:
@@ -144,11 +831,42 @@ def process_s3_object(bucket_name, key):
             head_metadata["Metadata"] = update_last_modified_metadata(key, head_metadata)
             update_made = True
 
-        if "md5" not in metadata_dict:
+        if object_size is None:
+            object_size = head_metadata.get("ContentLength", 0)
+
+        compute_md5 = (
+            repair_multipart_md5
+            and is_multipart_etag(head_metadata.get("ETag", ""))
+            and not has_true_md5(metadata_dict)
+        )
+
+        if deadline is not None and (update_made or compute_md5 or "md5" not in metadata_dict):
+            estimate = estimate_rewrite_seconds(int(object_size), compute_md5)
+
+            if budget_seconds is not None and estimate > budget_seconds:
+                logger.error(
+                    "Object %s (%d bytes) cannot be rewritten within an invocation (estimated %.0f seconds)",
+                    key,
+                    int(object_size),
+                    estimate,
+                )
+                return key, "failed"
+
+            if estimate > deadline - time.monotonic():
+                logger.info("Deferring object %s, its rewrite would outlast the remaining execution time", key)
+                return key, "deferred"
+
+        if compute_md5:
+            head_metadata["Metadata"] = update_true_md5_metadata(bucket_name, key, int(object_size), head_metadata)
+            update_made = True
+        elif "md5" not in metadata_dict:
             head_metadata["Metadata"] = update_md5_metadata(key, head_metadata)
             update_made = True
 
-        if update_made:
+        if update_made and int(object_size) > MAX_COPY_OBJECT_SIZE:
+            logger.info("Rewriting metadata of large object %s (%d bytes) in parts", key, int(object_size))
+            copy_object_in_parts(bucket_name, key, int(object_size), head_metadata)
+        elif update_made:
             copy_params = {
                 "Bucket": bucket_name,
                 "Key": key,
@@ -156,9 +874,17 @@ def process_s3_object(bucket_name, key):
                 "Metadata": head_metadata["Metadata"],
                 "MetadataDirective": "REPLACE",
             }
+            # Guards against replacing an object overwritten since it was inspected with its stale metadata
+            if head_metadata.get("ETag"):
+                copy_params["CopySourceIfMatch"] = head_metadata["ETag"]
             if EXPECTED_BUCKET_OWNER:
                 copy_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
             s3.copy_object(**copy_params)
+
+        if CONTENT_INDEX_BUCKET and not (bucket_name == CONTENT_INDEX_BUCKET and key.startswith(CONTENT_INDEX_PREFIX)):
+            update_content_index(bucket_name, key, head_metadata)
+
+        if update_made:
             return key, "updated"
         else:
             logger.debug("Skipping object %s, no updates required", key)
@@ -168,73 +894,130 @@ def process_s3_object(bucket_name, key):
         return key, "failed"
 
 
-def _process_batch(bucket_name, keys_batch, num_workers, context, timeout_buffer_ms):
-    """
-    Process a batch of S3 object keys.
+def _put_unless_stopped(work_queue, item, stop):
+    """Puts an item on a bounded queue, waiting for space unless the sweep is stopped. Returns False if stopped"""
+    while not stop.is_set():
+        try:
+            work_queue.put(item, timeout=QUEUE_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
 
-    Parameters
-    ----------
-    bucket_name : str
-        Name of the S3 bucket.
-    keys_batch : list
-        List of S3 object keys to process.
-    num_workers : int
-        Number of worker threads to use.
-    context : object
-        Lambda context for timeout checking.
-    timeout_buffer_ms : int
-        Buffer time in milliseconds before timeout.
+    return False
 
-    Returns
-    -------
-    updated : list
-        List of keys that were updated.
-    skipped : list
-        List of keys that were skipped.
-    failed : list
-        List of keys that failed.
 
+def _produce_entries(entries, work_queue, results, window, stop, producer_state):
     """
-    # Use sets internally to guarantee uniqueness, then convert back to lists for callers
-    updated = set()
-    skipped = set()
-    failed = set()
+    Reads entries in order, numbering each, and feeds those needing inspection
+    to the work queue. Entries needing no inspection are passed straight to
+    the results. Runs on its own thread, so the next page of entries is read
+    while the workers process the current one.
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=num_workers) as executor:
-        # Submit all tasks for this batch
-        future_to_key = {executor.submit(process_s3_object, bucket_name, key): key for key in keys_batch}
+    Parameters
+    ----------
+    entries : iterable of tuple
+        The (key, cursor, needs_inspection, size) of each object to consider.
+    work_queue : queue.Queue
+        Bounded queue of (sequence, key, cursor, size) entries to inspect.
+    results : queue.Queue
+        Queue of (sequence, key, cursor, status, inspected) outcomes.
+    window : threading.Semaphore
+        Limits the number of entries read ahead of the last committed entry.
+    stop : threading.Event
+        Set once the sweep is stopping.
+    producer_state : dict
+        Updated with the number of entries "dispatched" and of "inspections"
+        queued, whether the entries were "exhausted", and any "error" raised
+        reading them.
 
-        for future in concurrent.futures.as_completed(future_to_key):
-            # Check Lambda remaining time
-            if context and context.get_remaining_time_in_millis() < timeout_buffer_ms:
-                logger.warning("Approaching Lambda timeout, cancelling remaining tasks in batch.")
-                for f in future_to_key:
-                    f.cancel()
-                break
+    """
+    try:
+        for sequence, (key, cursor, needs_inspection, size) in enumerate(entries):
+            while not window.acquire(timeout=QUEUE_POLL_SECONDS):
+                if stop.is_set():
+                    return
 
-            key = future_to_key[future]
-            try:
-                result_key, status = future.result()
-                if status == "updated":
-                    updated.add(result_key)
-                elif status == "skipped":
-                    skipped.add(result_key)
-                else:
-                    failed.add(result_key)
-            except Exception as err:
-                logger.error("Exception processing key %s: %s", key, str(err))
-                failed.add(key)
+            if needs_inspection:
+                if not _put_unless_stopped(work_queue, (sequence, key, cursor, size), stop):
+                    return
 
-    # Convert back to lists to preserve the public API
-    return list(updated), list(skipped), list(failed)
+                producer_state["inspections"] += 1
+            else:
+                results.put((sequence, key, cursor, "skipped", False))
 
+            producer_state["dispatched"] += 1
 
-def update_s3_objects_metadata(context, bucket_name, prefix=None, timeout_buffer_ms=5000, batch_size=1000):
+        producer_state["exhausted"] = True
+    except Exception as err:
+        logger.error("Failed to read the objects to inspect, reason: %s", str(err))
+        producer_state["error"] = err
+    finally:
+        producer_state["done"].set()
+
+        # Wakes the coordinating thread, so the end of the entries is noticed promptly
+        results.put(None)
+
+
+def _process_entries(
+    bucket_name, work_queue, results, stop, producer_done, repair_multipart_md5=False, deadline=None, budget_seconds=None
+):
+    """Worker loop, processing queued entries until the queue is exhausted or the sweep is stopping"""
+    while not stop.is_set():
+        try:
+            sequence, key, cursor, size = work_queue.get(timeout=QUEUE_POLL_SECONDS)
+        except queue.Empty:
+            # Every entry is queued before the producer is marked done, so an empty queue is then final
+            if producer_done.is_set() and work_queue.empty():
+                return
+
+            continue
+
+        try:
+            _, status = process_s3_object(bucket_name, key, size, repair_multipart_md5, deadline, budget_seconds)
+        except Exception as err:
+            logger.error("Exception processing key %s: %s", key, str(err))
+            status = "failed"
+
+        results.put((sequence, key, cursor, status, True))
+
+
+def update_s3_objects_metadata(
+    context,
+    bucket_name,
+    prefix=None,
+    timeout_buffer_ms=5000,
+    batch_size=1000,
+    inventory=None,
+    candidate_list=None,
+    start_cursor=None,
+    on_progress=None,
+    num_workers=None,
+    outcome_log=None,
+    repair_multipart_md5=False,
+    shard=None,
+    index_complete_objects=False,
+    on_stop=None,
+):
     """
     Recursively iterates over all objects in an S3 bucket and updates their
     metadata to include fields added during rclone uploads, if not already present.
 
-    Processes objects in batches to avoid memory exhaustion.
+    Objects are read on a dedicated thread into a bounded queue, drained by a
+    persistent pool of worker threads, so the pool stays busy while further
+    objects are listed. Rather than listing the bucket, the objects to inspect
+    may be drawn from an inventory or a candidate list, in which case objects
+    the inventory shows to carry the required metadata are skipped without
+    being inspected.
+
+    Outcomes are tallied rather than collected, so memory use does not grow
+    with the size of the sweep. The outcome of each object may instead be
+    streamed to a JSON Lines log.
+
+    A sweep approaching the Lambda timeout stops dispatching objects, and
+    reports its progress before waiting on the objects still being processed,
+    for no longer than the remaining execution time allows. Objects whose
+    rewrite would outlast the remaining time are deferred to a resumed sweep
+    rather than started.
 
     Parameters
     ----------
@@ -248,117 +1031,733 @@ def update_s3_objects_metadata(context, bucket_name, prefix=None, timeout_buffer
         S3 key path to start traversal from.
     timeout_buffer_ms : int, optional
         Buffer time in milliseconds to stop processing before Lambda timeout.
+        Also bounds the time spent starting the rewrite of any one object.
     batch_size : int, optional
-        Number of objects to process in each batch. Defaults to 1000.
+        Number of objects completed between each progress report. Defaults to 1000.
+    inventory : str, optional
+        Local path or s3:// URI of an inventory of the bucket, either the
+        manifest.json of an S3 Inventory report in CSV format, or a CSV file
+        whose header names its columns ("Key" is required, while "Bucket",
+        "Size", "UserMetadata" or per-field metadata columns are optional).
+    candidate_list : str, optional
+        Local path or s3:// URI of a list of the keys to inspect, one per line.
+        Takes precedence over the inventory.
+    start_cursor : str or int, optional
+        Cursor to resume a previous sweep from, as reported via on_progress.
+        For listings this is the last key processed, otherwise the number of
+        inventory rows (or candidate keys) already processed.
+    on_progress : callable, optional
+        Called as progress is made and once the sweep stops, with the cursor
+        to resume from, whether the sweep is complete, and the counts of
+        objects updated, skipped and failed up to that cursor. Objects are
+        completed out of order, so the cursor only advances past an object
+        once every object before it is complete. Used to persist checkpoints.
+        Objects completing after a sweep stops short of completion are not
+        reported, and are revisited by a resumed sweep.
+    num_workers : int, optional
+        Number of worker threads. Defaults to the number of available CPU cores.
+    outcome_log : str, optional
+        Path of a JSON Lines file to append the key and status of each
+        completed object to.
+    repair_multipart_md5 : bool, optional
+        If True, objects uploaded in parts, whose ETag is not an MD5, have
+        their true MD5 computed by reading their content, and recorded as
+        their md5 and md5chksum metadata. Objects whose md5 was previously
+        set from a multipart ETag are repaired in the same way.
+    shard : dict, optional
+        Key range of the bucket to sweep, as returned by key_range_shards().
+        Only supported when listing the bucket.
+    index_complete_objects : bool, optional
+        If True, and a content index bucket is configured, objects an
+        inventory shows to carry the required metadata are still inspected
+        by the workers, so their content index entries are maintained. Every
+        listed object is always inspected.
+    on_stop : callable, optional
+        Called without arguments when the sweep stops short of completion,
+        once its progress has last been reported but before waiting on the
+        objects still being processed. Used to continue the sweep in a new
+        invocation without waiting on this one.
 
     Returns
     -------
-    updated : list
-        List of S3 object keys that were updated.
-    skipped : list
-        List of S3 object keys that were skipped because they already had the
-        required metadata.
-    failed : list
-        List of S3 object keys that failed to be updated due to errors.
-    unprocessed : list
-        List of S3 object keys that were not processed due to Lambda timeout.
+    summary : dict
+        Counts of the S3 objects "updated", "skipped" because they already
+        had the required metadata, "failed" due to errors, and "unprocessed"
+        due to Lambda timeout (including any deferred objects).
+
+    Raises
+    ------
+    ValueError
+        If a shard is provided along with an inventory or candidate list.
+    Exception
+        Any error raised reading the objects to inspect.
 
     """
     logger.info("Starting S3 metadata update service")
 
-    pagination_params = {"Bucket": bucket_name}
+    if shard and (inventory or candidate_list):
+        raise ValueError("Sharded sweeps are only supported when listing the bucket")
+
+    if candidate_list:
+        logger.info("Reading candidate keys from %s", candidate_list)
+        entries = iter_candidate_entries(candidate_list, prefix, start_cursor or 0)
+    elif inventory:
+        entries = iter_inventory_entries(
+            inventory,
+            bucket_name,
+            prefix,
+            start_cursor or 0,
+            repair_multipart_md5,
+            index_complete_objects=index_complete_objects and bool(CONTENT_INDEX_BUCKET),
+        )
+    else:
+        entries = iter_listing_entries(bucket_name, prefix, start_cursor, shard)
 
-    if prefix:
-        pagination_params["Prefix"] = prefix
+    if start_cursor:
+        logger.info("Resuming from cursor %s", start_cursor)
+
+    num_workers = num_workers or max(os.cpu_count(), 1)
+    logger.info("Processing with %d worker threads", num_workers)
 
-    updated = []
-    skipped = []
-    failed = []
-    unprocessed = []
+    deadline = budget_seconds = None
 
-    num_cores = max(os.cpu_count(), 1)
-    logger.info("Available CPU cores: %d", num_cores)
-    logger.info("Processing in batches of %d objects to avoid memory issues", batch_size)
+    if context:
+        budget_seconds = (context.get_remaining_time_in_millis() - timeout_buffer_ms) / 1000
+        deadline = time.monotonic() + budget_seconds
 
-    # Process objects in batches as they're discovered
-    current_batch = []
-    total_processed = 0
-    should_stop = False
+    work_queue = queue.Queue(maxsize=num_workers * QUEUE_DEPTH_PER_WORKER)
+    results = queue.Queue()
+    window = threading.Semaphore(MAX_PENDING_ENTRIES)
+    stop = threading.Event()
+    producer_state = {"dispatched": 0, "inspections": 0, "exhausted": False, "error": None, "done": threading.Event()}
+
+    producer = threading.Thread(
+        target=_produce_entries,
+        args=(entries, work_queue, results, window, stop, producer_state),
+        name="sync-producer",
+        daemon=True,
+    )
+    workers = [
+        threading.Thread(
+            target=_process_entries,
+            args=(
+                bucket_name,
+                work_queue,
+                results,
+                stop,
+                producer_state["done"],
+                repair_multipart_md5,
+                deadline,
+                budget_seconds,
+            ),
+            name=f"sync-worker-{index}",
+            daemon=True,
+        )
+        for index in range(num_workers)
+    ]
+
+    # Outcomes of this invocation, and of the objects up to the cursor, which
+    # are those a resumed sweep never revisits
+    counts = Counter()
+    committed = Counter()
+    inspected = 0
+    deferred = 0
+
+    # Outcomes completed ahead of an earlier, still pending, object, by sequence number
+    completed = {}
+    next_sequence = 0
+    cursor = start_cursor
+    since_progress = 0
+
+    outcome_file = open(outcome_log, "a") if outcome_log else None
+
+    def record(message):
+        nonlocal inspected, deferred, next_sequence, cursor, since_progress
+
+        sequence, key, entry_cursor, status, was_inspected = message
+
+        # Deferred objects are never completed, so the cursor cannot advance past them
+        if status == "deferred":
+            deferred += 1
+            return
+
+        counts[status] += 1
+        inspected += was_inspected
+
+        if outcome_file:
+            outcome_file.write(json.dumps({"key": key, "status": status}) + "\n")
+
+        completed[sequence] = (entry_cursor, status)
+
+        # Advance the cursor past every object now complete in sequence
+        while next_sequence in completed:
+            cursor, committed_status = completed.pop(next_sequence)
+            committed[committed_status] += 1
+            next_sequence += 1
+            since_progress += 1
+            window.release()
 
     logger.info("Indexing and processing objects in bucket %s with prefix %s", bucket_name, prefix or "")
 
-    for page in paginator.paginate(**pagination_params):
-        if should_stop:
-            # Add remaining keys from current page to unprocessed
-            for obj in page.get("Contents", []):
-                if obj["Key"] not in current_batch:
-                    unprocessed.append(obj["Key"])
-            break
+    def drain_results():
+        while True:
+            try:
+                message = results.get_nowait()
+            except queue.Empty:
+                return
 
-        for obj in page.get("Contents", []):
-            key = obj["Key"]
-            current_batch.append(key)
+            if message is not None:
+                record(message)
+
+    producer.start()
+
+    for worker in workers:
+        worker.start()
+
+    stopped = False
+
+    try:
+        while True:
+            try:
+                message = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                message = None
+
+            if message is not None:
+                record(message)
+
+            if producer_state["error"]:
+                raise producer_state["error"]
+
+            if producer_state["exhausted"] and next_sequence == producer_state["dispatched"]:
+                break
+
+            if on_progress and since_progress >= batch_size:
+                on_progress(cursor, False, dict(committed))
+                since_progress = 0
 
-            # Process batch when it reaches the batch size
-            if len(current_batch) >= batch_size:
-                batch_updated, batch_skipped, batch_failed = _process_batch(
-                    bucket_name, current_batch, num_cores, context, timeout_buffer_ms
-                )
-                updated.extend(batch_updated)
-                skipped.extend(batch_skipped)
-                failed.extend(batch_failed)
-                total_processed += len(current_batch)
                 logger.info(
-                    "Processed batch: %d objects (total: %d, updated: %d, skipped: %d, failed: %d)",
-                    len(current_batch),
-                    total_processed,
-                    len(updated),
-                    len(skipped),
-                    len(failed),
+                    "Progress: %d objects (updated: %d, skipped: %d, failed: %d)",
+                    sum(counts.values()),
+                    counts["updated"],
+                    counts["skipped"],
+                    counts["failed"],
                 )
-                current_batch = []
-
-                # Check if we should stop due to timeout
-                if context and context.get_remaining_time_in_millis() < timeout_buffer_ms:
-                    logger.warning("Approaching Lambda timeout, stopping processing.")
-                    should_stop = True
-                    # Add remaining keys from current page to unprocessed
-                    for remaining_obj in page.get("Contents", []):
-                        if remaining_obj["Key"] not in current_batch:
-                            unprocessed.append(remaining_obj["Key"])
-                    break
-
-    # Process any remaining objects in the final batch
-    if current_batch and not should_stop:
-        batch_updated, batch_skipped, batch_failed = _process_batch(
-            bucket_name, current_batch, num_cores, context, timeout_buffer_ms
-        )
-        updated.extend(batch_updated)
-        skipped.extend(batch_skipped)
-        failed.extend(batch_failed)
-        total_processed += len(current_batch)
-        logger.info("Processed final batch of %d objects", len(current_batch))
-    elif current_batch:
-        # Add remaining batch to unprocessed if we stopped early
-        unprocessed.extend(current_batch)
+
+            if deferred:
+                logger.warning("Too little execution time remains to process further objects, stopping processing.")
+                stopped = True
+                break
+
+            if context and context.get_remaining_time_in_millis() < timeout_buffer_ms:
+                logger.warning("Approaching Lambda timeout, stopping processing.")
+                stopped = True
+                break
+    finally:
+        # Queued objects are left for a resumed sweep
+        stop.set()
+
+        # Progress is reported before waiting on objects still being processed, so it is recorded (and the
+        # sweep continued) however long they take
+        if stopped:
+            drain_results()
+
+            if on_progress:
+                on_progress(cursor, False, dict(committed))
+
+            if on_stop:
+                on_stop()
+
+        # Objects already being processed are allowed to finish, within the remaining execution time
+        join_deadline = None
+
+        if context:
+            join_deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - RETURN_RESERVE_SECONDS
+
+        for thread in [producer] + workers:
+            thread.join(timeout=max(join_deadline - time.monotonic(), 0) if join_deadline is not None else None)
+
+        busy_workers = sum(worker.is_alive() for worker in workers)
+
+        if busy_workers:
+            logger.warning("Returning without waiting on %d workers still processing objects", busy_workers)
+
+        drain_results()
+
+        if outcome_file:
+            outcome_file.close()
+
+    if not stopped and on_progress:
+        on_progress(cursor, producer_state["exhausted"] and next_sequence == producer_state["dispatched"], dict(committed))
+
+    summary = {
+        "updated": counts["updated"],
+        "skipped": counts["skipped"],
+        "failed": counts["failed"],
+        "unprocessed": producer_state["inspections"] - inspected,
+    }
 
     logger.info(
         "Processing complete. Total processed: %d (updated: %d, skipped: %d, failed: %d, unprocessed: %d)",
-        total_processed,
-        len(updated),
-        len(skipped),
-        len(failed),
-        len(unprocessed),
+        sum(counts.values()),
+        summary["updated"],
+        summary["skipped"],
+        summary["failed"],
+        summary["unprocessed"],
+    )
+
+    return summary
+
+
+def run_checkpointed_sweep(
+    context,
+    bucket_name,
+    prefix=None,
+    checkpoint_location=None,
+    resume=None,
+    inventory=None,
+    candidate_list=None,
+    shard=None,
+    on_stop=None,
+    **options,
+):
+    """
+    Runs a sweep with update_s3_objects_metadata(), resuming an unfinished
+    sweep of the same location from its checkpoint, and recording progress
+    to the checkpoint as objects complete.
+
+    Parameters
+    ----------
+    context : object, optional
+        Object containing details of the AWS context in which the Lambda was
+        invoked. Used to check remaining execution time.
+    bucket_name : str
+        Name of the S3 bucket.
+    prefix : str, optional
+        S3 key path to start traversal from.
+    checkpoint_location : str, optional
+        Local path or s3:// URI of the checkpoint. If not provided, the sweep
+        resumes from the resume state, and progress is only kept in memory.
+    resume : dict, optional
+        Checkpoint state to resume from, when no checkpoint location is used.
+    inventory : str, optional
+        Local path or s3:// URI of an inventory to draw the objects from.
+    candidate_list : str, optional
+        Local path or s3:// URI of a list of the keys to inspect.
+    shard : dict, optional
+        Key range of the bucket to sweep, as returned by key_range_shards().
+    on_stop : callable, optional
+        Called with the checkpoint when the sweep stops short of completion,
+        once the checkpoint is last recorded, but before waiting on objects
+        still being processed. The checkpoint is not recorded again afterward.
+    **options
+        Further keyword arguments for update_s3_objects_metadata().
+
+    Returns
+    -------
+    summary : dict
+        Counts of the objects processed, as returned by update_s3_objects_metadata().
+    checkpoint : dict
+        The checkpoint of the sweep, recording its cursor, completeness,
+        number of invocations and running totals.
+
+    """
+    source = checkpoint_source(bucket_name, prefix, inventory, candidate_list, shard)
+
+    # Resume from the persisted checkpoint, or from the state passed by the previous invocation
+    checkpoint = read_checkpoint(checkpoint_location) if checkpoint_location else resume
+
+    if checkpoint and (checkpoint.get("source") != source or checkpoint.get("complete")):
+        logger.info("Checkpoint does not continue an unfinished sweep of this location, starting a new sweep")
+        checkpoint = None
+
+    checkpoint = checkpoint or {
+        "source": source,
+        "cursor": None,
+        "complete": False,
+        "invocations": 0,
+        "totals": {"updated": 0, "skipped": 0, "failed": 0},
+    }
+    checkpoint["invocations"] += 1
+
+    prior_totals = dict(checkpoint["totals"])
+
+    def on_progress(cursor, complete, committed):
+        checkpoint["cursor"] = cursor
+        checkpoint["complete"] = complete
+        checkpoint["totals"] = {
+            status: prior_totals[status] + committed.get(status, 0) for status in ("updated", "skipped", "failed")
+        }
+
+        if checkpoint_location:
+            write_checkpoint(checkpoint_location, checkpoint)
+
+    summary = update_s3_objects_metadata(
+        context,
+        bucket_name,
+        prefix,
+        inventory=inventory,
+        candidate_list=candidate_list,
+        start_cursor=checkpoint["cursor"],
+        on_progress=on_progress,
+        shard=shard,
+        on_stop=(lambda: on_stop(checkpoint)) if on_stop else None,
+        **options,
+    )
+
+    return summary, checkpoint
+
+
+def key_range_shards(boundaries):
+    """
+    Splits a keyspace at the provided keys. Each shard covers the keys after
+    its "start_after" key, up to and including its "end_at" key, so every key
+    belongs to exactly one shard. The first and last shards are unbounded.
+    """
+    boundaries = sorted(set(boundaries))
+
+    return [
+        {"start_after": start_after, "end_at": end_at}
+        for start_after, end_at in zip([None] + boundaries, boundaries + [None])
+    ]
+
+
+def discover_shards(bucket_name, prefix=None, delimiter="/"):
+    """
+    Splits the keyspace under a prefix into one shard per top-level prefix,
+    found with a delimiter listing. Each shard ends just before the next
+    top-level prefix, so objects directly under the prefix fall within the
+    neighbouring shards.
+
+    Parameters
+    ----------
+    bucket_name : str
+        Name of the S3 bucket.
+    prefix : str, optional
+        S3 key path whose top-level prefixes are discovered.
+    delimiter : str, optional
+        Delimiter separating the components of a key.
+
+    Returns
+    -------
+    shards : list of dict
+        The key ranges of the shards, as returned by key_range_shards().
+
+    """
+    pagination_params = {"Bucket": bucket_name, "Delimiter": delimiter}
+
+    if prefix:
+        pagination_params["Prefix"] = prefix
+
+    if EXPECTED_BUCKET_OWNER:
+        pagination_params["ExpectedBucketOwner"] = EXPECTED_BUCKET_OWNER
+
+    # A boundary just before each top-level prefix, which sorts before every key within it
+    boundaries = [
+        common_prefix["Prefix"][: -len(delimiter)]
+        for page in paginator.paginate(**pagination_params)
+        for common_prefix in page.get("CommonPrefixes", [])
+    ]
+
+    logger.info("Discovered %d top-level prefixes under %s", len(boundaries), prefix or bucket_name)
+
+    # The first shard runs up to the second prefix, as there is nothing to gain splitting before the first
+    return key_range_shards(sorted(boundaries)[1:])
+
+
+def shard_location(location, index):
+    """Returns the location of the checkpoint (or outcome log) of a shard, derived from that of its sweep"""
+    return f"{location}.shard-{index:04d}" if location else None
+
+
+def read_shard_summary(bucket_name, prefix, shard, checkpoint_location):
+    """Returns the summary of a shard swept by another invocation, as recorded by its checkpoint"""
+    checkpoint = read_checkpoint(checkpoint_location) if checkpoint_location else None
+
+    if not checkpoint or checkpoint.get("source") != checkpoint_source(bucket_name, prefix, None, None, shard):
+        checkpoint = {"complete": False, "totals": {"updated": 0, "skipped": 0, "failed": 0}}
+
+    return {
+        "shard": shard,
+        "updated": 0,
+        "skipped": 0,
+        "failed": 0,
+        "unprocessed": 0,
+        "complete": checkpoint["complete"],
+        "totals": checkpoint["totals"],
+    }
+
+
+def merge_shard_summaries(shard_summaries):
+    """Merges the summaries of each shard of a sweep into the summary of the sweep as a whole"""
+    merged = {
+        status: sum(summary[status] for summary in shard_summaries)
+        for status in ("updated", "skipped", "failed", "unprocessed")
+    }
+
+    merged["totals"] = {
+        status: sum(summary["totals"][status] for summary in shard_summaries)
+        for status in ("updated", "skipped", "failed")
+    }
+    merged["complete"] = all(summary["complete"] for summary in shard_summaries)
+    merged["shards_complete"] = sum(1 for summary in shard_summaries if summary["complete"])
+
+    return merged
+
+
+def sweep_shards(
+    context,
+    bucket_name,
+    prefix,
+    shards,
+    checkpoint_location=None,
+    shard_concurrency=SHARD_CONCURRENCY,
+    num_workers=None,
+    outcome_log=None,
+    timeout_buffer_ms=5000,
+    on_stop=None,
+    **options,
+):
+    """
+    Sweeps the shards of a keyspace concurrently within this process. Each
+    shard is listed by its own thread and processed by its own share of the
+    worker threads, so the sweep is not limited to a single listing cursor.
+
+    Each shard records its progress to its own checkpoint, derived from the
+    provided location, so an unfinished sweep resumes each shard where it
+    stopped, and shards already complete are not swept again.
+
+    Parameters
+    ----------
+    context : object, optional
+        Object containing details of the AWS context in which the Lambda was
+        invoked. Used to check remaining execution time.
+    bucket_name : str
+        Name of the S3 bucket.
+    prefix : str, optional
+        S3 key path to start traversal from.
+    shards : list of dict
+        The key ranges of the shards, as returned by key_range_shards().
+    checkpoint_location : str, optional
+        Local path or s3:// URI from which the checkpoint location of each shard is derived.
+    shard_concurrency : int, optional
+        Number of shards swept at once.
+    num_workers : int, optional
+        Total number of worker threads, divided between the shards swept at
+        once. Defaults to the number of available CPU cores.
+    outcome_log : str, optional
+        Path from which the outcome log of each shard is derived.
+    timeout_buffer_ms : int, optional
+        Buffer time in milliseconds to stop processing before Lambda timeout.
+    on_stop : callable, optional
+        Called once when the sweep stops short of completion, as soon as every
+        shard started has recorded its checkpoint, but before waiting on the
+        objects still being processed. No further shards are started after.
+    **options
+        Further keyword arguments for update_s3_objects_metadata().
+
+    Returns
+    -------
+    summary : dict
+        Counts of the objects processed across every shard, as merged by merge_shard_summaries().
+    shard_summaries : list of dict
+        The counts of the objects processed within each shard, along with
+        the shard, whether it is complete, and its running totals.
+
+    """
+    num_workers = num_workers or max(os.cpu_count(), 1)
+    shard_concurrency = max(1, min(shard_concurrency, len(shards)))
+    workers_per_shard = max(1, num_workers // shard_concurrency)
+
+    logger.info(
+        "Sweeping %d shards, %d at a time with %d workers each", len(shards), shard_concurrency, workers_per_shard
     )
 
-    return updated, skipped, failed, unprocessed
+    # Shards started by this invocation, and those which have since recorded their final checkpoint
+    started = set()
+    settled = set()
+    stop_state = {"stopping": False, "notified": False}
+    lock = threading.Lock()
+
+    def settle(index=None, stopping=False):
+        with lock:
+            if index is not None:
+                settled.add(index)
+
+            stop_state["stopping"] = stop_state["stopping"] or stopping
+            notify = stop_state["stopping"] and not stop_state["notified"] and started <= settled
+            stop_state["notified"] = stop_state["notified"] or notify
+
+        if notify and on_stop:
+            on_stop()
+
+    def sweep_shard(index):
+        shard = shards[index]
+        shard_checkpoint_location = shard_location(checkpoint_location, index)
+        shard_summary = read_shard_summary(bucket_name, prefix, shard, shard_checkpoint_location)
+
+        # Shards already complete, or not reached before the sweep stops, are left as recorded
+        if shard_summary["complete"]:
+            return shard_summary
+
+        out_of_time = context and context.get_remaining_time_in_millis() < timeout_buffer_ms
+
+        with lock:
+            start = not (out_of_time or stop_state["stopping"])
+
+            if start:
+                started.add(index)
+
+        if not start:
+            settle(stopping=True)
+            return shard_summary
+
+        try:
+            summary, checkpoint = run_checkpointed_sweep(
+                context,
+                bucket_name,
+                prefix,
+                checkpoint_location=shard_checkpoint_location,
+                shard=shard,
+                num_workers=workers_per_shard,
+                outcome_log=shard_location(outcome_log, index),
+                timeout_buffer_ms=timeout_buffer_ms,
+                on_stop=lambda _: settle(index, stopping=True),
+                **options,
+            )
+        finally:
+            settle(index)
+
+        return {"shard": shard, **summary, "complete": checkpoint["complete"], "totals": checkpoint["totals"]}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=shard_concurrency) as executor:
+        shard_summaries = list(executor.map(sweep_shard, range(len(shards))))
+
+    return merge_shard_summaries(shard_summaries), shard_summaries
+
+
+def dispatch_shards(event, shards, checkpoint_location=None):
+    """Asynchronously invokes this function once per shard, each sweeping its shard with its own checkpoint"""
+    for index, shard in enumerate(shards):
+        shard_event = {key: value for key, value in event.items() if key not in ("sharding", "shard_mode", "resume")}
+        shard_event["shard"] = shard
+        shard_event["checkpoint"] = shard_location(checkpoint_location, index)
+        shard_event["outcome_log"] = shard_location(event.get("outcome_log"), index)
+
+        invoke_continuation(shard_event)
+
+    logger.info("Dispatched %d shard invocations", len(shards))
+
+
+def _handle_sharded_sweep(event, context, checkpoint_location, options, on_stop=None):
+    """
+    Sweeps the keyspace described by the "sharding" of an event, either in
+    this process or by dispatching an invocation per shard, returning the
+    merged summary and the summaries of each shard.
+
+    The shards of a sweep are recorded in a checkpoint at the provided
+    location as soon as they are discovered, so later invocations for the
+    same event continue (or, for dispatched shards, report on) the same
+    shards, even if this invocation is cut short. When a sweep within this
+    process stops short of completion, on_stop is called with the checkpoint
+    before waiting on the objects still being processed.
+    """
+    bucket_name = event["bucket_name"]
+    prefix = event.get("prefix", None)
+    sharding = event["sharding"]
+    shard_mode = event.get("shard_mode", "in_process")
+
+    if shard_mode not in ("in_process", "invoke"):
+        raise ValueError(f"Unsupported shard mode {shard_mode}")
+
+    # Otherwise every invocation would appear to be the first, and dispatch the shards again
+    if shard_mode == "invoke" and not checkpoint_location:
+        raise ValueError("Dispatching shards requires a checkpoint location, to record the shards dispatched")
+
+    if event.get("inventory") or event.get("candidate_list"):
+        raise ValueError("Sharded sweeps are only supported when listing the bucket")
+
+    source = dict(checkpoint_source(bucket_name, prefix, None, None), sharding=sharding, shard_mode=shard_mode)
+    checkpoint = read_checkpoint(checkpoint_location) if checkpoint_location else None
+
+    if checkpoint and (checkpoint.get("source") != source or checkpoint.get("complete")):
+        logger.info("Checkpoint does not continue an unfinished sharded sweep of this location, starting a new sweep")
+        checkpoint = None
+
+    if not checkpoint:
+        shards = discover_shards(bucket_name, prefix) if sharding == "prefixes" else key_range_shards(sharding)
+
+        # Shard checkpoints are tied to this sweep, so a later sweep never mistakes them for its own
+        sweep_id = uuid.uuid4().hex
+
+        for shard in shards:
+            shard["sweep"] = sweep_id
+
+        checkpoint = {"source": source, "shards": shards, "complete": False, "invocations": 0}
+
+    checkpoint["invocations"] += 1
+    shards = checkpoint["shards"]
+
+    if checkpoint_location:
+        write_checkpoint(checkpoint_location, checkpoint)
+
+    if shard_mode == "invoke":
+        # Shards are dispatched once, later invocations report on their progress
+        if checkpoint["invocations"] == 1:
+            dispatch_shards(event, shards, checkpoint_location)
+
+        shard_summaries = [
+            read_shard_summary(bucket_name, prefix, shard, shard_location(checkpoint_location, index))
+            for index, shard in enumerate(shards)
+        ]
+        summary = merge_shard_summaries(shard_summaries)
+    else:
+        summary, shard_summaries = sweep_shards(
+            context,
+            bucket_name,
+            prefix,
+            shards,
+            checkpoint_location=checkpoint_location,
+            shard_concurrency=int(event.get("shard_concurrency", SHARD_CONCURRENCY)),
+            on_stop=(lambda: on_stop(checkpoint)) if on_stop else None,
+            **options,
+        )
+
+    checkpoint["complete"] = summary["complete"]
+
+    # An unfinished sweep is already recorded as such, and may have been taken up by its continuation since
+    if checkpoint_location and checkpoint["complete"]:
+        write_checkpoint(checkpoint_location, checkpoint)
+
+    return summary, shard_summaries, checkpoint
 
 
 def lambda_handler(event, context):
     """
     Entrypoint for this Lambda function. Derives the S3 bucket name and prefix
     from the event, then iterates over all objects within the location to update
-    their metadata for compliance with rclone-uploaded objects.
+    their metadata for compliance with rclone-uploaded objects. The event may
+    instead provide the location of an "inventory" or "candidate_list" to draw
+    the objects to inspect from.
+
+    Progress is recorded to a "checkpoint" location (local path or s3:// URI)
+    every "batch_size" objects, and an unfinished sweep of the same location
+    resumes from it. Processing stops "timeout_buffer_ms" milliseconds short
+    of the timeout. When "continue" is set, an invocation which stops short
+    of completion invokes this function again to continue the sweep, without
+    waiting on the objects it is still processing, so a sweep of any size
+    completes as a chain of bounded invocations. The status
+    of each object may be appended to a local "outcome_log". Setting
+    "repair_multipart_md5" computes the true MD5 of objects uploaded in parts,
+    while "index_complete_objects" maintains the content index entries of
+    objects an inventory shows need no repair.
+
+    Listings of the bucket may be split into shards swept concurrently by
+    setting "sharding" to "prefixes", for a shard per top-level prefix, or to
+    a list of the keys to split the keyspace at. Shards are swept within this
+    invocation, or with "shard_mode" set to "invoke", by an invocation per
+    shard, which requires a checkpoint, and later invocations for the same
+    event and checkpoint report the merged progress of the shards.
 
     Parameters
     ----------
@@ -377,11 +1776,59 @@ def lambda_handler(event, context):
     """
     bucket_name = event["bucket_name"]
     prefix = event.get("prefix", None)
-    batch_size = int(event.get("batch_size", os.getenv("BATCH_SIZE", "1000")))
+    checkpoint_location = event.get("checkpoint") or CHECKPOINT_LOCATION
+    auto_continue = bool(event.get("continue", False))
+
+    options = {
+        "batch_size": int(event.get("batch_size", os.getenv("BATCH_SIZE", "1000"))),
+        "num_workers": int(event.get("num_workers", os.getenv("NUM_WORKERS", "0"))) or None,
+        "outcome_log": event.get("outcome_log"),
+        "repair_multipart_md5": bool(event.get("repair_multipart_md5", False)),
+        "index_complete_objects": bool(event.get("index_complete_objects", False)),
+        "timeout_buffer_ms": int(event.get("timeout_buffer_ms", os.getenv("TIMEOUT_BUFFER_MS", "5000"))),
+    }
 
-    updated, skipped, failed, unprocessed = update_s3_objects_metadata(
-        context, bucket_name, prefix, batch_size=batch_size
-    )
+    shard_summaries = None
+    continued = False
+
+    def continue_sweep(checkpoint):
+        nonlocal continued
+
+        if checkpoint["invocations"] >= MAX_INVOCATIONS:
+            logger.warning("Sweep reached the limit of %d invocations, not continuing", MAX_INVOCATIONS)
+            return
+
+        continuation = dict(event)
+
+        if not checkpoint_location:
+            continuation["resume"] = checkpoint
+
+        logger.info("Continuing sweep from cursor %s in a new invocation", checkpoint.get("cursor"))
+        invoke_continuation(continuation)
+        continued = True
+
+    if event.get("sharding") and not event.get("shard"):
+        # Dispatched shards continue themselves, and sharded sweeps can only resume from persisted checkpoints
+        can_continue = event.get("shard_mode", "in_process") == "in_process" and bool(checkpoint_location)
+
+        summary, shard_summaries, checkpoint = _handle_sharded_sweep(
+            event, context, checkpoint_location, options, on_stop=continue_sweep if auto_continue and can_continue else None
+        )
+        cursor = None
+    else:
+        summary, checkpoint = run_checkpointed_sweep(
+            context,
+            bucket_name,
+            prefix,
+            checkpoint_location=checkpoint_location,
+            resume=event.get("resume"),
+            inventory=event.get("inventory", None),
+            candidate_list=event.get("candidate_list", None),
+            shard=event.get("shard"),
+            on_stop=continue_sweep if auto_continue else None,
+            **options,
+        )
+        cursor = checkpoint["cursor"]
 
     result = {
         "statusCode": 200,
@@ -389,14 +1836,22 @@ def lambda_handler(event, context):
             "message": "S3 Object Metadata update complete",
             "bucket_name": bucket_name,
             "prefix": prefix,
-            "processed": len(updated) + len(skipped) + len(failed),
-            "unprocessed": len(unprocessed),
-            "updated": len(updated),
-            "skipped": len(skipped),
-            "failed": len(failed),
+            "processed": summary["updated"] + summary["skipped"] + summary["failed"],
+            "unprocessed": summary["unprocessed"],
+            "updated": summary["updated"],
+            "skipped": summary["skipped"],
+            "failed": summary["failed"],
+            "complete": checkpoint["complete"],
+            "cursor": cursor,
+            "invocations": checkpoint["invocations"],
+            "totals": summary.get("totals", checkpoint.get("totals")),
+            "continued": continued,
         },
     }
 
+    if shard_summaries is not None:
+        result["body"]["shards"] = shard_summaries
+
     logger.info("S3 Object Metadata update result:\n%s", result)
 
     return result
@@ -410,9 +1865,71 @@ if __name__ == "__main__":
         "--batch-size",
         type=int,
         default=1000,
-        help="Batch size for processing (default: %(default)d)",
+        help="Number of objects completed between checkpoints (default: %(default)d)",
+    )
+    parser.add_argument(
+        "--inventory",
+        default=None,
+        help="Local path or s3:// URI of an S3 Inventory manifest.json (CSV format), or of a CSV "
+        "inventory with a header row, used in place of listing the bucket",
+    )
+    parser.add_argument(
+        "--candidate-list",
+        default=None,
+        help="Local path or s3:// URI of a list of keys to inspect, one per line",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="Local path or s3:// URI of a checkpoint recording progress, from which an unfinished sweep resumes",
+    )
+    parser.add_argument(
+        "--outcome-log",
+        default=None,
+        help="Path of a JSON Lines file to append the key and status of each completed object to",
+    )
+    parser.add_argument(
+        "--repair-multipart-md5",
+        action="store_true",
+        help="Compute the true MD5 of objects uploaded in parts by reading their content, replacing any md5 "
+        "metadata previously derived from their ETag",
+    )
+    parser.add_argument(
+        "--index-complete-objects",
+        action="store_true",
+        help="Also inspect objects an inventory shows to carry the required metadata, so their content index "
+        "entries are maintained (requires CONTENT_INDEX_BUCKET)",
+    )
+    parser.add_argument(
+        "--shard-by-prefix",
+        action="store_true",
+        help="Sweep each top-level prefix under the prefix as a separate shard, with shards swept concurrently",
+    )
+    parser.add_argument(
+        "--shard-boundaries",
+        nargs="+",
+        default=None,
+        help="Keys at which to split the keyspace into shards swept concurrently",
+    )
+    parser.add_argument(
+        "--shard-concurrency",
+        type=int,
+        default=SHARD_CONCURRENCY,
+        help="Number of shards swept at once (default: %(default)d)",
     )
     args = parser.parse_args()
 
-    event = {"bucket_name": args.bucket, "prefix": args.prefix, "batch_size": args.batch_size}
+    event = {
+        "bucket_name": args.bucket,
+        "prefix": args.prefix,
+        "batch_size": args.batch_size,
+        "inventory": args.inventory,
+        "candidate_list": args.candidate_list,
+        "checkpoint": args.checkpoint,
+        "outcome_log": args.outcome_log,
+        "repair_multipart_md5": args.repair_multipart_md5,
+        "index_complete_objects": args.index_complete_objects,
+        "sharding": "prefixes" if args.shard_by_prefix else args.shard_boundaries,
+        "shard_concurrency": args.shard_concurrency,
+    }
     lambda_handler(event, None)
@@ -0,0 +1,170 @@
+"""
+====================
+bloom_filter_util.py
+====================
+
+Module containing a compact Bloom filter implementation, used by the DUM
+service to publish a summary of the content each node has already ingested,
+and by the DUM client to identify files which are definitely new without
+having to ask the service to check S3 for each of them.
+
+A Bloom filter never reports an added item as missing, but may report a
+missing item as present with a tunable false-positive rate. Files reported
+as present are therefore still confirmed by the service as usual.
+
+"""
+import hashlib
+import math
+import struct
+
+DEFAULT_FALSE_POSITIVE_RATE = 0.01
+"""Default probability that the filter reports a file which was never added as present"""
+
+FILTER_MAGIC = b"DUMB"
+"""Leading bytes of every serialized filter"""
+
+FILTER_VERSION = 2
+"""Version of the serialized filter format, bumped whenever the format or hashing scheme changes"""
+
+FILTER_HEADER = struct.Struct(">4sBQIQ")
+"""Layout of the serialized filter header: magic, version, number of bits, number of hashes and number of items"""
+
+
+def optimal_parameters(capacity, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+    """
+    Returns the number of bits and hash functions which minimize the size of
+    a Bloom filter holding the provided number of items at the requested
+    false-positive rate.
+
+    Parameters
+    ----------
+    capacity : int
+        Expected number of items to add to the filter.
+    false_positive_rate : float, optional
+        Target false-positive rate, between 0 and 1 (exclusive).
+
+    Returns
+    -------
+    num_bits : int
+        Size of the filter in bits, rounded up to a whole number of bytes.
+    num_hashes : int
+        Number of hash functions to apply to each item.
+
+    Raises
+    ------
+    ValueError
+        If the false-positive rate is out of range.
+
+    """
+    if not 0.0 < false_positive_rate < 1.0:
+        raise ValueError(f"False-positive rate must be between 0 and 1, got {false_positive_rate}")
+
+    capacity = max(int(capacity), 1)
+
+    num_bits = math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))
+    num_bits = max(8, math.ceil(num_bits / 8) * 8)
+
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+
+    return num_bits, num_hashes
+
+
+def content_filter_item(trimmed_path, md5_digest, file_size):
+    """Returns the filter item for a file, derived from its node-relative path, MD5 hex digest and size"""
+    return f"{trimmed_path}\0{str(md5_digest).lower()}\0{int(file_size)}"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string items, using enhanced double hashing of
+    a single BLAKE2b digest to derive the bit positions of each item.
+
+    Parameters
+    ----------
+    num_bits : int
+        Size of the filter in bits, must be a multiple of 8.
+    num_hashes : int
+        Number of bit positions set for each item.
+    bits : bytes or bytearray, optional
+        Existing filter contents, such as from a deserialized filter.
+    num_items : int, optional
+        Number of items already added to the provided contents.
+
+    """
+
+    def __init__(self, num_bits, num_hashes, bits=None, num_items=0):
+        if num_bits <= 0 or num_bits % 8:
+            raise ValueError(f"Filter size must be a positive multiple of 8 bits, got {num_bits}")
+
+        if num_hashes <= 0:
+            raise ValueError(f"Filter must use at least one hash, got {num_hashes}")
+
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.num_items = num_items
+        self.bits = bytearray(bits) if bits is not None else bytearray(num_bits // 8)
+
+        if len(self.bits) != num_bits // 8:
+            raise ValueError(f"Expected {num_bits // 8} bytes of filter contents, got {len(self.bits)}")
+
+    @classmethod
+    def for_capacity(cls, capacity, false_positive_rate=DEFAULT_FALSE_POSITIVE_RATE):
+        """Returns an empty filter sized to hold the provided number of items at the requested false-positive rate"""
+        return cls(*optimal_parameters(capacity, false_positive_rate))
+
+    def _positions(self, item):
+        """Yields the bit positions of the provided item"""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+
+        position = int.from_bytes(digest[:8], "little") % self.num_bits
+        step = int.from_bytes(digest[8:], "little") % self.num_bits
+
+        # Enhanced double hashing, plain double hashing cycles through only a
+        # few positions whenever the step shares a factor with the filter size
+        for index in range(self.num_hashes):
+            yield position
+
+            position = (position + step) % self.num_bits
+            step = (step + index + 1) % self.num_bits
+
+    def add(self, item):
+        """Adds the provided item to the filter"""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+        self.num_items += 1
+
+    def __contains__(self, item):
+        """Returns True if the item may have been added to the filter, or False if it definitely was not"""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_false_positive_rate(self):
+        """Returns the expected false-positive rate of the filter, given the number of items added to it"""
+        return (1.0 - math.exp(-self.num_hashes * self.num_items / self.num_bits)) ** self.num_hashes
+
+    def to_bytes(self):
+        """Serializes the filter, for publishing to S3"""
+        header = FILTER_HEADER.pack(FILTER_MAGIC, FILTER_VERSION, self.num_bits, self.num_hashes, self.num_items)
+
+        return header + bytes(self.bits)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Deserializes a filter serialized with to_bytes().
+
+        Raises
+        ------
+        ValueError
+            If the data is not a serialized filter of a supported version.
+
+        """
+        if len(data) < FILTER_HEADER.size:
+            raise ValueError("Truncated content filter")
+
+        magic, version, num_bits, num_hashes, num_items = FILTER_HEADER.unpack_from(data)
+
+        if magic != FILTER_MAGIC or version != FILTER_VERSION:
+            raise ValueError(f"Unsupported content filter format (version {version})")
+
+        return cls(num_bits, num_hashes, bits=data[FILTER_HEADER.size :], num_items=num_items)
@@ -0,0 +1,172 @@
+"""
+=============
+cache_util.py
+=============
+
+Module containing functions and classes used to cache the results of ingress
+batch requests, so that a replayed request can be answered without repeating
+the S3 work required to service it.
+
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+IDEMPOTENCY_KEY_HEADER = "IdempotencyKey"
+"""Name of the HTTP header used to convey the idempotency key of a batch request"""
+
+
+def compute_idempotency_key(node_id, request_batch, **options):
+    """
+    Derives the idempotency key for a batch ingress request. The key is a hash
+    of the requesting node, the contents of the batch and any request options
+    which influence the response, so that identical requests always map to
+    the same key.
+
+    Parameters
+    ----------
+    node_id : str
+        PDS node identifier of the requestor.
+    request_batch : list of dict
+        The batch of ingress requests.
+    options : dict, optional
+        Any additional request options (such as force overwrite) which affect
+        the response returned for the batch.
+
+    Returns
+    -------
+    key : str
+        Hex digest of the SHA-256 hash of the request contents.
+
+    """
+    payload = json.dumps(
+        {"node": node_id.lower(), "batch": request_batch, "options": options}, sort_keys=True, separators=(",", ":")
+    )
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Short-lived cache of ingress batch responses, keyed by idempotency key.
+
+    Entries are first held within the memory of the (warm) Lambda container.
+    If an S3 client and bucket are provided, entries are also written to S3
+    so they can be shared between concurrent Lambda containers. Expired objects
+    within the shared store should be removed with an S3 lifecycle rule.
+    """
+
+    def __init__(self, ttl, max_entries=64, s3_client=None, bucket=None, prefix="response-cache"):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """Returns True if the cache is configured to hold entries"""
+        return self.ttl > 0
+
+    @property
+    def shared(self):
+        """Returns True if the cache is backed by a shared store in S3"""
+        return self.s3_client is not None and bool(self.bucket)
+
+    def _object_key(self, key):
+        """Returns the S3 object key used to store the entry for the provided key"""
+        return f"{self.prefix}/{key}.json"
+
+    def get(self, key):
+        """
+        Returns the cached response for the provided key, or None if there is
+        no unexpired entry for it.
+
+        Parameters
+        ----------
+        key : str
+            The idempotency key to look up.
+
+        Returns
+        -------
+        response : dict or None
+            The cached response, if one exists.
+
+        """
+        if not self.enabled:
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                expires_at, response = entry
+
+                if expires_at > now:
+                    return response
+
+                del self._entries[key]
+
+        if not self.shared:
+            return None
+
+        try:
+            cached_object = self.s3_client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+            entry = json.loads(cached_object["Body"].read())
+        except self.s3_client.exceptions.NoSuchKey:
+            return None
+
+        if entry["expires_at"] <= now:
+            return None
+
+        # Promote the shared entry into memory for any subsequent replays
+        self._store(key, entry["expires_at"], entry["response"])
+
+        return entry["response"]
+
+    def put(self, key, response):
+        """
+        Adds the provided response to the cache under the provided key.
+
+        Parameters
+        ----------
+        key : str
+            The idempotency key of the request the response belongs to.
+        response : dict
+            The JSON-compliant response to cache.
+
+        """
+        if not self.enabled:
+            return
+
+        expires_at = time.time() + self.ttl
+
+        self._store(key, expires_at, response)
+
+        if self.shared:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self._object_key(key),
+                Body=json.dumps({"expires_at": expires_at, "response": response}).encode("utf-8"),
+                ContentType="application/json",
+            )
+
+    def _store(self, key, expires_at, response):
+        """Stores an entry in memory, evicting the oldest entries if over capacity"""
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes all in-memory entries from the cache"""
+        with self._lock:
+            self._entries.clear()
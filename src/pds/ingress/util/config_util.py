@@ -8,6 +8,8 @@ Ingress client and service.
 
 """
 import configparser
+import copy
+import hashlib
 import os
 from fnmatch import fnmatchcase
 from importlib.resources import files
@@ -15,11 +17,12 @@ from os.path import join
 from urllib.parse import urlparse
 
 import boto3
-import yamale
-import yaml
 
 CONFIG = None
 
+BUCKET_MAP_CACHE = {}
+"""Parsed bucket maps keyed by a digest of their contents, so an unchanged map is only validated and parsed once"""
+
 
 def strtobool(val: str) -> bool:
     """
@@ -197,6 +200,10 @@ def validate_bucket_map(bucket_map_path, logger):
 
     bucket_map_schema_path = join(lambda_root, bucket_schema_location, bucket_schema_file)
 
+    # Yamale is comparatively expensive to import, and is only needed the first
+    # time a given bucket map is loaded, so keep it off the import path
+    import yamale
+
     bucket_map_schema = yamale.make_schema(bucket_map_schema_path)
     bucket_map_data = yamale.make_data(bucket_map_path)
 
@@ -261,14 +268,23 @@ def initialize_bucket_map(logger):
     if not os.path.exists(bucket_map_path):
         raise RuntimeError(f"No bucket map found at location {bucket_map_path}")
 
-    validate_bucket_map(bucket_map_path, logger)
+    with open(bucket_map_path, "rb") as infile:
+        bucket_map_contents = infile.read()
+
+    bucket_map_digest = hashlib.sha256(bucket_map_contents).hexdigest()
+
+    if bucket_map_digest not in BUCKET_MAP_CACHE:
+        import yaml
+
+        validate_bucket_map(bucket_map_path, logger)
 
-    with open(bucket_map_path, "r") as infile:
-        bucket_map = yaml.safe_load(infile)
+        BUCKET_MAP_CACHE[bucket_map_digest] = yaml.safe_load(bucket_map_contents)["BUCKET_MAP"]
 
-    bucket_map = bucket_map["BUCKET_MAP"]
+        logger.info("Bucket map %s loaded", bucket_map_path)
+
+    # Hand out a copy so callers cannot modify the cached map
+    bucket_map = copy.deepcopy(BUCKET_MAP_CACHE[bucket_map_digest])
 
-    logger.info("Bucket map %s loaded", bucket_map_path)
     logger.debug(str(bucket_map))
 
     return bucket_map
@@ -325,3 +341,27 @@ def bucket_for_path(node_bucket_map, file_path, logger, bucket_type="staging"):
         bucket = {"name": bucket}
 
     return bucket
+
+
+def buckets_for_node(node_bucket_map):
+    """
+    Returns the names of every bucket configured for a node within the bucket
+    map, including the staging, archive and default buckets, and any buckets
+    assigned to path overrides.
+
+    Parameters
+    ----------
+    node_bucket_map : dict
+        Bucket mapping specific to the node.
+
+    Returns
+    -------
+    bucket_names : list of str
+        The sorted, de-duplicated bucket names.
+
+    """
+    buckets = list(node_bucket_map.get("buckets", {}).values())
+    buckets.append(node_bucket_map.get("default", {}).get("bucket"))
+    buckets.extend(path["bucket"] for path in node_bucket_map.get("paths", []))
+
+    return sorted({bucket["name"] if isinstance(bucket, dict) else bucket for bucket in buckets if bucket})
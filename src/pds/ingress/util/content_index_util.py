@@ -0,0 +1,82 @@
+"""
+=====================
+content_index_util.py
+=====================
+
+Module containing functions used to maintain and query the content index,
+which maps the MD5 and size of each file ingested by a node to the S3
+location it was ingested to. The index allows the ingress service to satisfy
+requests for content that already exists under a different key (such as a
+reorganized bundle) with a server-side copy, rather than a re-upload.
+
+Each index entry is a small "pointer" object, keyed by node, MD5 and size,
+whose body records the bucket and key of the indexed object.
+
+"""
+import json
+import re
+
+MD5_HEX_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+"""Pattern all hex-encoded MD5 digests conform to"""
+
+
+def content_index_key(prefix, node_id, md5_digest, file_size):
+    """
+    Returns the S3 key of the content index entry for the provided content.
+
+    Parameters
+    ----------
+    prefix : str
+        Key prefix all content index entries are stored under.
+    node_id : str
+        PDS node identifier the content belongs to.
+    md5_digest : str
+        Hex-encoded MD5 digest of the content.
+    file_size : int
+        Size of the content in bytes.
+
+    Returns
+    -------
+    key : str
+        The S3 key of the index entry.
+
+    Raises
+    ------
+    ValueError
+        If the provided MD5 digest is malformed, and therefore unsafe to use
+        within a key.
+
+    """
+    md5_digest = str(md5_digest).lower()
+
+    if not MD5_HEX_PATTERN.match(md5_digest):
+        raise ValueError(f"Invalid MD5 digest for content index: {md5_digest[:64]}")
+
+    return "/".join((prefix.strip("/"), node_id.lower(), md5_digest, str(int(file_size))))
+
+
+def encode_content_index_entry(bucket_name, object_key):
+    """Returns the body of a content index entry pointing to the provided S3 location"""
+    return json.dumps({"bucket": bucket_name, "key": object_key}).encode("utf-8")
+
+
+def decode_content_index_entry(body):
+    """
+    Parses the body of a content index entry.
+
+    Parameters
+    ----------
+    body : bytes or str
+        Body of the index entry object.
+
+    Returns
+    -------
+    location : tuple of (str, str) or None
+        The bucket and key the entry points to, or None if the entry is malformed.
+
+    """
+    try:
+        entry = json.loads(body)
+        return entry["bucket"], entry["key"]
+    except (ValueError, TypeError, KeyError):
+        return None
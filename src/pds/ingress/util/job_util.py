@@ -0,0 +1,180 @@
+"""
+===========
+job_util.py
+===========
+
+Module containing functions shared by the DUM client and service to stage,
+process and report the results of asynchronous ingress jobs, where the full
+ingress manifest is uploaded to S3 and processed in chunks by the service.
+
+"""
+import calendar
+import json
+import re
+from datetime import datetime
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+"""Pattern all asynchronous job identifiers conform to"""
+
+JOB_STATE_PENDING = "pending"
+JOB_STATE_SPLITTING = "splitting"
+JOB_STATE_RUNNING = "running"
+JOB_STATE_FAILED = "failed"
+JOB_STATE_COMPLETE = "complete"
+
+
+def is_valid_job_id(job_id):
+    """Returns True if the provided value is a well-formed asynchronous job ID"""
+    return isinstance(job_id, str) and JOB_ID_PATTERN.match(job_id) is not None
+
+
+def job_object_key(prefix, node_id, job_id, name):
+    """
+    Returns the S3 key for an object belonging to an asynchronous job.
+
+    Parameters
+    ----------
+    prefix : str
+        Key prefix all job objects are stored under.
+    node_id : str
+        PDS node identifier of the job owner.
+    job_id : str
+        Identifier of the job.
+    name : str
+        Name of the object relative to the job, such as "manifest.json".
+
+    Returns
+    -------
+    key : str
+        The S3 object key.
+
+    """
+    return "/".join((prefix.strip("/"), node_id.lower(), job_id, name))
+
+
+def chunk_object_name(chunk_index):
+    """Returns the name of the object used to stage the requests for the provided chunk"""
+    return f"chunks/{chunk_index:06d}.json"
+
+
+def result_object_name(chunk_index):
+    """Returns the name of the object used to store the results for the provided chunk"""
+    return f"results/{chunk_index:06d}.jsonl"
+
+
+def status_page_name(page_index):
+    """Returns the name of the object used to store the provided page of the results of a status job"""
+    return f"pages/{page_index:06d}.jsonl.gz"
+
+
+def chunk_index_for_result(result_name):
+    """Returns the chunk index encoded within a result object name (or key)"""
+    return int(result_name.rsplit("/", 1)[-1].split(".", 1)[0])
+
+
+def iter_lines_with_offsets(chunks, offset=0):
+    """
+    Splits a stream of bytes into lines, tracking the byte offset following
+    each line so that reading of the stream may later be resumed from a line
+    boundary.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The byte stream to split, such as StreamingBody.iter_chunks().
+    offset : int, optional
+        Byte offset of the start of the stream within the full object.
+
+    Yields
+    ------
+    line : bytes
+        The next line of the stream, without its line terminator.
+    end_offset : int
+        Byte offset immediately following the line (and its terminator).
+
+    """
+    pending = b""
+
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+
+        for line in lines:
+            offset += len(line) + 1
+            yield line, offset
+
+    if pending:
+        offset += len(pending)
+        yield pending, offset
+
+
+def parse_manifest_line(line):
+    """
+    Parses a single line of a manifest written by write_manifest_file, which
+    places each manifest entry on its own line.
+
+    Parameters
+    ----------
+    line : bytes or str
+        The line to parse.
+
+    Returns
+    -------
+    entry : tuple of (str, dict) or None
+        The trimmed path and manifest entry defined by the line, or None if the
+        line does not define an entry (such as the opening or closing brace).
+
+    Raises
+    ------
+    ValueError
+        If the line cannot be parsed as a manifest entry.
+
+    """
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+
+    line = line.strip().rstrip(",")
+
+    if line in ("", "{", "}"):
+        return None
+
+    try:
+        ((trimmed_path, manifest_entry),) = json.loads("{" + line + "}").items()
+    except (json.JSONDecodeError, ValueError) as err:
+        raise ValueError(f"Unable to parse manifest line: {line[:80]}") from err
+
+    return trimmed_path, manifest_entry
+
+
+def manifest_entry_to_request(trimmed_path, manifest_entry):
+    """
+    Converts a manifest entry into the ingress request format submitted by the
+    client for synchronous requests.
+
+    Parameters
+    ----------
+    trimmed_path : str
+        The trimmed path the manifest entry is keyed by.
+    manifest_entry : dict
+        The manifest entry containing the ingress path, MD5, size and last
+        modified time of the file.
+
+    Returns
+    -------
+    ingress_request : dict
+        The equivalent ingress request.
+
+    """
+    last_modified = manifest_entry.get("last_modified")
+
+    if isinstance(last_modified, str):
+        last_modified = calendar.timegm(datetime.fromisoformat(last_modified).timetuple())
+
+    return {
+        "ingress_path": manifest_entry.get("ingress_path"),
+        "trimmed_path": trimmed_path,
+        "md5": manifest_entry.get("md5"),
+        "size": manifest_entry.get("size"),
+        "last_modified": last_modified,
+    }
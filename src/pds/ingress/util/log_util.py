@@ -9,6 +9,7 @@ with the ingress client.
 """
 import json
 import logging
+import random
 import re
 import sys
 import tempfile
@@ -71,19 +72,6 @@ class Color:
         return f"{Color.GREEN}{Color.BOLD}{text}{Color.RESET}"
 
 
-# When leveraging this module with the Lambda service functions, the backoff
-# and requests modules will not be available within the Python runtime.
-# They should not be needed by those Lambda's, so use MagicMock to bypass any
-# import errors
-try:
-    import backoff
-    import requests
-except ImportError:
-    from unittest.mock import MagicMock
-
-    backoff = MagicMock()
-    requests = MagicMock()
-
 MILLI_PER_SEC = 1000
 
 LOG_LEVELS = {
@@ -107,6 +95,9 @@ CLOUDWATCH_HANDLER = None
 DEFAULT_FORMAT = "%(levelname)s %(threadName)s %(name)s:%(funcName)s %(message)s"
 """Default log format to fall back to if not defined by the INI config."""
 
+PRESIGNED_CREDENTIAL_PATTERN = re.compile(r"((?:X-Amz-Signature|X-Amz-Security-Token|Signature|x-amz-security-token)=)[^&]*")
+"""Pattern matching the query string parameters of a presigned URL which grant access, and must not be logged"""
+
 
 class SingleLogFilter(logging.Filter):
     """Simple log filter to ensure each unique log message is only logged once."""
@@ -130,6 +121,47 @@ SINGLE_LOG_FILTER = SingleLogFilter()
 """Singleton instance for the filter used to ensure duplicate messages are only logged once"""
 
 
+def redact_presigned_url(url):
+    """Returns the provided presigned URL with its signature and session token redacted, so it may be logged"""
+    return PRESIGNED_CREDENTIAL_PATTERN.sub(r"\1REDACTED", url) if url else url
+
+
+def should_log_sample(logger, sample_rate):
+    """
+    Determines whether a high-volume (such as per-file) message should be
+    logged. Such messages are always logged when the logger is enabled for
+    DEBUG, otherwise only the provided fraction of them are logged.
+
+    Parameters
+    ----------
+    logger : logging.Logger
+        The logger the message would be logged to.
+    sample_rate : float
+        Fraction of messages to log when not debugging, between 0.0 and 1.0.
+
+    Returns
+    -------
+    bool
+        True if the message should be logged, False otherwise.
+
+    """
+    return logger.isEnabledFor(logging.DEBUG) or (sample_rate > 0 and random.random() < sample_rate)
+
+
+# The backoff and requests modules are only used by the client-side CloudWatchHandler,
+# and are not available within the Python runtime of the Lambda service functions.
+# They are imported where used, keeping them (and any fallbacks) off the service
+# cold start path, and resolved here for callers accessing them via this module.
+def __getattr__(name):
+    """Lazily resolves the backoff and requests modules on first access"""
+    if name in ("backoff", "requests"):
+        import importlib
+
+        return importlib.import_module(name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_log_level(log_level):
     """Translates name of a log level to the constant used by the logging module"""
     if log_level is not None:
@@ -325,6 +357,8 @@ def setup_cloudwatch_log(logger, config):
 
 def _is_auth_error(exc):
     """Returns True for 401/403 HTTP errors that should not be retried."""
+    import requests
+
     return (
         isinstance(exc, requests.exceptions.HTTPError)
         and exc.response is not None
@@ -401,6 +435,8 @@ class CloudWatchHandler(BufferingHandler):
         # to log to CloudWatch from within this class could cause infinite recursion
         console_logger = get_logger(__name__, cloudwatch=False, file=False)
 
+        import requests
+
         try:
             # Strip ANSI escape codes from log messages before sending to CloudWatch
             ansi_escape = re.compile(r'\x1b\[[0-9;]*m')
@@ -451,11 +487,11 @@ class CloudWatchHandler(BufferingHandler):
         finally:
             self.release()
 
-    @backoff.on_exception(backoff.expo, Exception, max_time=120, logger=__name__, giveup=_is_auth_error)
     def send_log_events_to_cloud_watch(self, log_events):
         """
         Bundles the provided log events into a JSON payload and submits it
-        to the API Gateway endpoint configured for CloudWatch Logs.
+        to the API Gateway endpoint configured for CloudWatch Logs, retrying
+        with exponential backoff on failure.
 
         Parameters
         ----------
@@ -473,6 +509,16 @@ class CloudWatchHandler(BufferingHandler):
             If the submission to API Gateway fails for any reason.
 
         """
+        import backoff
+
+        retry = backoff.on_exception(backoff.expo, Exception, max_time=120, logger=__name__, giveup=_is_auth_error)
+
+        return retry(self._send_log_events_to_cloud_watch)(log_events)
+
+    def _send_log_events_to_cloud_watch(self, log_events):
+        """Performs a single attempt at submitting log events to CloudWatch Logs"""
+        import requests
+
         console_logger = get_logger(__name__, cloudwatch=False, file=False)
 
         if self.bearer_token is None or self.node_id is None:
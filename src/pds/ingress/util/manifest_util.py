@@ -0,0 +1,358 @@
+"""
+================
+manifest_util.py
+================
+
+Module containing functions used to read DUM manifests incrementally, so
+that manifests of millions of files can be processed without holding the
+full manifest (or its parsed form) in memory at once.
+
+Two manifest formats are supported: the JSON object written by the DUM
+client, mapping each trimmed path to its entry, and JSON Lines, where each
+line is an object containing the "trimmed_path" of a file along with the
+fields of its entry.
+
+Either format may be uploaded gzip or zstd compressed, as indicated by the
+".gz" or ".zst" suffix of the manifest name. Compressed manifests are written
+deterministically, so an unchanged manifest always compresses to the same
+bytes (and MD5), allowing the upload of an identical manifest to be skipped.
+Support for zstd requires the optional zstandard package.
+
+"""
+import codecs
+import gzip
+import hashlib
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+READ_SIZE = 1024**2
+"""Number of bytes read from a manifest stream at a time"""
+
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+"""Mapping of each supported manifest compression to the suffix appended to the names of manifests compressed with it"""
+
+ZSTD_LEVEL = 10
+"""Compression level used for zstd compressed manifests"""
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def iter_stream(stream, read_size=READ_SIZE):
+    """Returns an iterator over the chunks of bytes read from a file-like object, such as an S3 StreamingBody"""
+    return iter(lambda: stream.read(read_size), b"")
+
+
+def manifest_compression(name):
+    """Returns the compression ("gzip" or "zstd") denoted by the suffix of a manifest file name (or key), if any"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if name.lower().endswith(suffix):
+            return compression
+
+    return None
+
+
+def is_jsonl_manifest(name):
+    """Returns True if the provided manifest file name (or key) denotes a JSON Lines manifest, compressed or not"""
+    compression = manifest_compression(name)
+
+    if compression:
+        name = name[: -len(COMPRESSION_SUFFIXES[compression])]
+
+    return name.lower().endswith((".jsonl", ".ndjson"))
+
+
+def _require_zstandard():
+    """Raises an informative error if zstd support was requested, but the zstandard package is not installed"""
+    if zstandard is None:
+        raise RuntimeError("zstd compressed manifests require the zstandard package to be installed")
+
+
+def iter_decompressed(chunks, compression=None):
+    """
+    Yields the decompressed contents of a stream of compressed chunks.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The compressed contents, such as returned by iter_stream().
+    compression : str, optional
+        The compression of the stream, "gzip" or "zstd". Chunks are yielded
+        as-is if not provided.
+
+    Yields
+    ------
+    chunk : bytes
+        The next chunk of decompressed content.
+
+    Raises
+    ------
+    ValueError
+        If the compression is not supported, or the stream is malformed.
+
+    """
+    if not compression:
+        yield from chunks
+        return
+
+    if compression == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif compression == "zstd":
+        _require_zstandard()
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+    else:
+        raise ValueError(f"Unsupported manifest compression {compression}")
+
+    try:
+        for chunk in chunks:
+            yield decompressor.decompress(chunk)
+
+        yield decompressor.flush()
+    except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as err:
+        raise ValueError(f"Malformed {compression} manifest: {str(err)}") from err
+
+    if compression == "gzip" and not decompressor.eof:
+        raise ValueError("Malformed gzip manifest: truncated stream")
+
+
+class _HashingWriter:
+    """File-like object which writes to an underlying binary file, while computing the MD5 of the bytes written"""
+
+    def __init__(self, outfile):
+        self.outfile = outfile
+        self.md5 = hashlib.md5()
+
+    def write(self, data):
+        """Writes the provided bytes, updating the running MD5"""
+        self.md5.update(data)
+        return self.outfile.write(data)
+
+    def flush(self):
+        """Flushes the underlying file"""
+        self.outfile.flush()
+
+
+def compress_manifest(manifest_path, outfile, compression="gzip", read_size=READ_SIZE):
+    """
+    Compresses a manifest file into the provided binary file object, in a
+    single streaming pass which also computes the MD5 of the compressed
+    output. The output is deterministic, so an unchanged manifest always
+    produces the same compressed bytes.
+
+    Parameters
+    ----------
+    manifest_path : str
+        Path to the manifest file to compress.
+    outfile : file-like
+        Binary file object to write the compressed manifest to.
+    compression : str, optional
+        The compression to apply, "gzip" or "zstd".
+    read_size : int, optional
+        Number of bytes read from the manifest at a time.
+
+    Returns
+    -------
+    md5 : hashlib._Hash
+        The MD5 hash object of the compressed output.
+
+    Raises
+    ------
+    ValueError
+        If the compression is not supported.
+
+    """
+    writer = _HashingWriter(outfile)
+
+    with open(manifest_path, "rb") as infile:
+        if compression == "gzip":
+            # An empty file name and zeroed modification time keep the header independent of the source file
+            with gzip.GzipFile(filename="", mode="wb", fileobj=writer, mtime=0) as compressor:
+                for chunk in iter_stream(infile, read_size):
+                    compressor.write(chunk)
+        elif compression == "zstd":
+            _require_zstandard()
+
+            compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, write_checksum=True)
+
+            with compressor.stream_writer(writer, closefd=False) as stream_writer:
+                for chunk in iter_stream(infile, read_size):
+                    stream_writer.write(chunk)
+        else:
+            raise ValueError(f"Unsupported manifest compression {compression}")
+
+    return writer.md5
+
+
+class _StreamBuffer:
+    """Text buffer over a stream of UTF-8 encoded chunks, which is refilled on demand"""
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.position = 0
+        self.exhausted = False
+
+    def fill(self):
+        """Reads the next chunk into the buffer, discarding consumed text. Returns False once the stream is exhausted"""
+        if self.exhausted:
+            return False
+
+        self.text = self.text[self.position :]
+        self.position = 0
+
+        chunk = next(self.chunks, None)
+
+        if chunk is None:
+            self.text += self.decoder.decode(b"", final=True)
+            self.exhausted = True
+        else:
+            self.text += self.decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it, or None at the end of the stream"""
+        while True:
+            while self.position < len(self.text) and self.text[self.position] in _WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.text):
+                return self.text[self.position]
+
+            if not self.fill():
+                return None
+
+    def expect(self, character):
+        """Consumes the next non-whitespace character, which must be the one provided"""
+        found = self.peek()
+
+        if found != character:
+            raise ValueError(f"Malformed manifest: expected {character!r}, found {found!r}")
+
+        self.position += 1
+
+    def decode_value(self):
+        """Decodes the next complete JSON value from the buffer, reading more of the stream as needed"""
+        self.peek()
+
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.position)
+            except json.JSONDecodeError as err:
+                if self.fill():
+                    continue
+
+                raise ValueError(f"Malformed manifest: {str(err)}") from err
+
+            # A value running to the end of the buffer (such as a number) may continue in the next chunk
+            if end == len(self.text) and self.fill():
+                continue
+
+            self.position = end
+
+            return value
+
+
+def iter_json_manifest(chunks):
+    """
+    Yields each entry of a manifest in the JSON object format written by the
+    DUM client, decoding one entry at a time regardless of the formatting of
+    the manifest.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The manifest contents, such as returned by iter_stream().
+
+    Yields
+    ------
+    trimmed_path : str
+        The trimmed path of a file within the manifest.
+    manifest_entry : dict
+        The manifest entry of the file.
+
+    Raises
+    ------
+    ValueError
+        If the manifest is malformed.
+
+    """
+    buffer = _StreamBuffer(chunks)
+    buffer.expect("{")
+
+    while buffer.peek() != "}":
+        trimmed_path = buffer.decode_value()
+
+        if not isinstance(trimmed_path, str):
+            raise ValueError(f"Malformed manifest: expected a path, found {trimmed_path!r}")
+
+        buffer.expect(":")
+
+        yield trimmed_path, buffer.decode_value()
+
+        if buffer.peek() != "}":
+            buffer.expect(",")
+
+    buffer.expect("}")
+
+    if buffer.peek() is not None:
+        raise ValueError("Malformed manifest: unexpected content following the manifest")
+
+
+def iter_jsonl_manifest(chunks):
+    """
+    Yields each entry of a JSON Lines manifest.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The manifest contents, such as returned by iter_stream().
+
+    Yields
+    ------
+    trimmed_path : str
+        The trimmed path of a file within the manifest.
+    manifest_entry : dict
+        The manifest entry of the file, without its trimmed path.
+
+    Raises
+    ------
+    ValueError
+        If a line of the manifest is malformed.
+
+    """
+    pending = b""
+
+    for chunk in _with_terminator(chunks):
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+
+        for line in lines:
+            if not line.strip():
+                continue
+
+            try:
+                manifest_entry = json.loads(line)
+                trimmed_path = manifest_entry.pop("trimmed_path")
+            except (ValueError, KeyError, AttributeError, TypeError) as err:
+                raise ValueError(f"Malformed manifest line: {line[:80]!r}") from err
+
+            yield trimmed_path, manifest_entry
+
+
+def _with_terminator(chunks):
+    """Yields the provided chunks followed by a line terminator, so a final unterminated line is not lost"""
+    yield from chunks
+    yield b"\n"
+
+
+def iter_manifest_entries(chunks, jsonl=False):
+    """Yields the (trimmed path, manifest entry) of each file within a manifest of either supported format"""
+    return iter_jsonl_manifest(chunks) if jsonl else iter_json_manifest(chunks)
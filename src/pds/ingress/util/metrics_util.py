@@ -0,0 +1,229 @@
+"""
+===============
+metrics_util.py
+===============
+
+Module containing a lightweight recorder for per-invocation metrics of the
+Lambda service functions, emitted using the CloudWatch Embedded Metric Format
+(EMF), so CloudWatch extracts them from the function logs without the need
+for any additional API calls or log parsing.
+
+"""
+import functools
+import json
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+MAX_VALUES_PER_METRIC = 100
+"""Maximum number of distinct values EMF accepts for a single metric within one document"""
+
+BUCKETS_PER_DECADE = 10
+"""Number of logarithmic buckets per power of ten which timings are aggregated into, each spanning about 26%"""
+
+MIN_BUCKET_EXPONENT = -2
+"""Power of ten (in milliseconds) at which the lowest bucket starts, shorter timings are counted within it"""
+
+UNIT_MILLISECONDS = "Milliseconds"
+UNIT_COUNT = "Count"
+
+
+def timing_bucket(duration_ms):
+    """
+    Returns the value (in milliseconds) representing the bucket the provided
+    duration is aggregated into. Buckets are spaced logarithmically, so their
+    resolution is proportional to the durations they hold, and durations
+    outside the range covered by MAX_VALUES_PER_METRIC buckets are counted
+    within the lowest or highest bucket.
+    """
+    if duration_ms > 0:
+        index = math.floor((math.log10(duration_ms) - MIN_BUCKET_EXPONENT) * BUCKETS_PER_DECADE)
+    else:
+        index = 0
+
+    index = min(max(index, 0), MAX_VALUES_PER_METRIC - 1)
+
+    # The geometric midpoint of the bucket
+    return float(f"{10 ** (MIN_BUCKET_EXPONENT + (index + 0.5) / BUCKETS_PER_DECADE):.4g}")
+
+
+class MetricsRecorder:
+    """
+    Accumulates stage timings and counters over the course of a single Lambda
+    invocation, then emits them as a single EMF document.
+
+    Timings are aggregated as they are recorded, into the counts of each
+    bucket returned by timing_bucket(), along with their exact minimum,
+    maximum, sum and count, so stages timed once per file never grow the
+    recorder, or the document, with the number of files.
+
+    Recording is thread-safe, so stages may be timed from within the thread
+    pools used to process a batch.
+
+    Parameters
+    ----------
+    namespace : str
+        CloudWatch namespace metrics are published to.
+    service_name : str
+        Name of the service function, used as the sole metric dimension.
+    enabled : bool, optional
+        Whether metrics are emitted. Metrics are still recorded when disabled.
+    output : callable, optional
+        Function used to write each serialized EMF document. Defaults to print,
+        as Lambda forwards stdout to CloudWatch Logs.
+
+    """
+
+    def __init__(self, namespace, service_name, enabled=True, output=print):
+        self.namespace = namespace
+        self.service_name = service_name
+        self.enabled = enabled
+        self.output = output
+
+        self._lock = threading.Lock()
+        self._timings = {}
+        self._counters = {}
+        self._properties = {}
+
+    def reset(self):
+        """Discards all recorded metrics, in preparation for a new invocation"""
+        with self._lock:
+            self._timings = {}
+            self._counters = {}
+            self._properties = {}
+
+    def add_timing(self, stage, duration_ms):
+        """Records a single duration (in milliseconds) for the provided stage"""
+        bucket = timing_bucket(duration_ms)
+
+        with self._lock:
+            timing = self._timings.setdefault(
+                f"{stage}Time", {"buckets": Counter(), "min": duration_ms, "max": duration_ms, "sum": 0.0, "count": 0}
+            )
+
+            timing["buckets"][bucket] += 1
+            timing["min"] = min(timing["min"], duration_ms)
+            timing["max"] = max(timing["max"], duration_ms)
+            timing["sum"] += duration_ms
+            timing["count"] += 1
+
+    @contextmanager
+    def timer(self, stage):
+        """Context manager which records the duration of the enclosed block for the provided stage"""
+        start_time = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add_timing(stage, (time.perf_counter() - start_time) * 1000)
+
+    def increment(self, name, value=1):
+        """Increments the named counter by the provided value"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_property(self, name, value):
+        """
+        Sets a property included with the emitted metrics, such as a request ID.
+        Properties are searchable within the logs, but are not metric dimensions.
+        """
+        with self._lock:
+            self._properties[name] = value
+
+    def to_documents(self, timestamp=None):
+        """
+        Serializes the recorded metrics into EMF documents. Each timing is
+        serialized as a histogram, with the "Values" of its buckets and their
+        "Counts", along with its "Min", "Max", "Sum" and "Count".
+
+        Parameters
+        ----------
+        timestamp : int, optional
+            Timestamp of the metrics in milliseconds since the Unix Epoch.
+            Defaults to the current time.
+
+        Returns
+        -------
+        documents : list of dict
+            The EMF document, or an empty list if nothing has been recorded.
+
+        """
+        if timestamp is None:
+            timestamp = int(time.time() * 1000)
+
+        with self._lock:
+            timings = {name: dict(timing, buckets=dict(timing["buckets"])) for name, timing in self._timings.items()}
+            counters = dict(self._counters)
+            properties = dict(self._properties)
+
+        metrics = dict(counters)
+        units = {name: UNIT_COUNT for name in counters}
+
+        for name, timing in timings.items():
+            values = sorted(timing["buckets"])
+
+            metrics[name] = {
+                "Values": values,
+                "Counts": [timing["buckets"][value] for value in values],
+                "Min": round(timing["min"], 3),
+                "Max": round(timing["max"], 3),
+                "Sum": round(timing["sum"], 3),
+                "Count": timing["count"],
+            }
+            units[name] = UNIT_MILLISECONDS
+
+        if not metrics:
+            return []
+
+        document = {
+            "_aws": {
+                "Timestamp": timestamp,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [["Service"]],
+                        "Metrics": [{"Name": name, "Unit": units[name]} for name in metrics],
+                    }
+                ],
+            },
+            "Service": self.service_name,
+        }
+
+        document.update(properties)
+        document.update(metrics)
+
+        return [document]
+
+    def flush(self):
+        """Emits all recorded metrics, then resets the recorder"""
+        if self.enabled:
+            for document in self.to_documents():
+                self.output(json.dumps(document, separators=(",", ":")))
+
+        self.reset()
+
+    def instrument_handler(self, handler):
+        """
+        Decorator for a Lambda handler function which records the duration of
+        each invocation, and emits all metrics recorded during the invocation
+        once it completes (whether successfully or not).
+        """
+
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            self.reset()
+
+            request_id = getattr(context, "aws_request_id", None)
+
+            if request_id:
+                self.set_property("RequestId", request_id)
+
+            try:
+                with self.timer("Invocation"):
+                    return handler(event, context)
+            finally:
+                self.flush()
+
+        return wrapper
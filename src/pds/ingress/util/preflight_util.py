@@ -0,0 +1,102 @@
+"""
+=================
+preflight_util.py
+=================
+
+Module containing functions shared by the DUM client and service to perform
+the pre-flight stage of an ingress request, where files already present in S3
+are identified from their size and modification time, so they can be skipped
+without first computing their MD5 checksums. The comparison is made either by
+the service, against each file's destination objects, or by the client,
+against a listing of the objects already ingested (sync mode).
+
+"""
+PREFLIGHT_UNCHANGED = "unchanged"
+"""An object with the same size and modification time already exists, the file may be skipped"""
+
+PREFLIGHT_NEEDS_HASH = "needs_hash"
+"""An object with the same size exists, so the file must be hashed to determine if it has changed"""
+
+PREFLIGHT_NEW = "new"
+"""No object of the same size exists, so the file will be uploaded"""
+
+
+def preflight_state(file_size, last_modified, object_heads):
+    """
+    Derives the pre-flight state of a file from the objects which may already
+    hold its content.
+
+    Parameters
+    ----------
+    file_size : int
+        Size of the local file in bytes.
+    last_modified : float
+        Last modified time of the local file as a Unix Epoch.
+    object_heads : iterable of dict
+        The head_object() responses of each existing object at the file's
+        destination key (such as within the staging and archive buckets).
+
+    Returns
+    -------
+    state : str
+        One of PREFLIGHT_UNCHANGED, PREFLIGHT_NEEDS_HASH or PREFLIGHT_NEW.
+
+    """
+    state = PREFLIGHT_NEW
+
+    for object_head in object_heads:
+        if int(object_head["ContentLength"]) != int(file_size):
+            continue
+
+        # The mtime recorded at upload is the modification time of the file
+        # which was uploaded, so a match means the file has not been touched since
+        mtime = object_head.get("Metadata", {}).get("mtime")
+
+        try:
+            if mtime is not None and float(mtime) == float(last_modified):
+                return PREFLIGHT_UNCHANGED
+        except ValueError:
+            pass
+
+        state = PREFLIGHT_NEEDS_HASH
+
+    return state
+
+
+def is_unchanged_in_listing(file_size, last_modified, md5_digest, listing_entries):
+    """
+    Determines whether a local file is unchanged with respect to the objects
+    listed at its destination key, for use when syncing against a listing
+    of the objects already ingested.
+
+    Parameters
+    ----------
+    file_size : int
+        Size of the local file in bytes.
+    last_modified : float
+        Last modified time of the local file as a Unix Epoch.
+    md5_digest : str or None
+        MD5 hash digest (hex) of the local file, if already known.
+    listing_entries : iterable of tuple
+        The (size, md5, last_modified) of each object listed at the file's
+        destination key. The MD5 of objects uploaded in parts is None.
+
+    Returns
+    -------
+    bool
+        True if any listed object holds the same content as the local file.
+
+    """
+    for object_size, object_md5, object_last_modified in listing_entries:
+        if int(object_size) != int(file_size):
+            continue
+
+        # Checksums are compared whenever both are known, otherwise an object
+        # written since the file was last modified is assumed to hold it
+        if md5_digest and object_md5:
+            if object_md5 == md5_digest:
+                return True
+        elif float(object_last_modified) >= float(last_modified):
+            return True
+
+    return False
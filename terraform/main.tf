@@ -25,6 +25,8 @@ module "nucleus_dum_ingress_service_lambda" {
   lambda_ingress_localstack_context      = var.localstack_context
   lambda_ingress_service_default_buckets = var.lambda_ingress_service_default_buckets
   expected_bucket_owner                  = var.expected_bucket_owner
+  status_queue_arn                       = module.nucleus_dum_status_queue.nucleus_dum_sqs_arn
+  status_queue_url                       = module.nucleus_dum_status_queue.nucleus_dum_sqs_url
   skip_lambda_layers                     = false # Create Lambda layers for new environment
   tags = {
     tenant    = var.tag_tenant
@@ -50,6 +50,7 @@ resource "aws_api_gateway_rest_api" "nucleus_dum_api" {
       lambdaServiceARN                    = var.lambda_ingress_service_function_arn,
       logResourceMappingTemplate          = jsonencode(file("${path.module}/templates/log-resource-mapping-template.json")),
       statusResourceMappingTemplate       = jsonencode(file("${path.module}/templates/status-resource-mapping-template.json")),
+      statusResponseMappingTemplate       = jsonencode(file("${path.module}/templates/status-response-mapping-template.json")),
 
       # Keep existing input for backward-compatibility (template can still reference it if needed)
       statusQueueARN = var.status_queue_arn
@@ -201,10 +201,20 @@ resource "aws_lambda_function" "lambda_ingress_service" {
       BUCKET_MAP_SCHEMA_FILE     = "bucket-map.schema"
       BUCKET_MAP_SCHEMA_LOCATION = "config"
       LOG_LEVEL                  = "INFO"
+      LOG_SAMPLE_RATE            = "0.01"
       VERSION_LOCATION           = "config"
       VERSION_FILE               = "VERSION.txt"
       ENDPOINT_URL               = var.lambda_ingress_localstack_context ? "http://localhost.localstack.cloud:4566" : ""
       EXPECTED_BUCKET_OWNER      = var.expected_bucket_owner
+      COMPRESS_RESPONSES         = "true"
+      STATUS_JOB_BUCKET          = module.status_job_bucket.bucket_id
+      STATUS_JOB_PREFIX          = var.status_job_prefix
+      ASYNC_JOB_BUCKET           = module.async_job_bucket.bucket_id
+      ASYNC_JOB_PREFIX           = var.async_job_prefix
+      CONTENT_INDEX_BUCKET       = module.content_index_bucket.bucket_id
+      CONTENT_INDEX_PREFIX       = var.content_index_prefix
+      CONTENT_FILTER_BUCKET      = module.content_filter_bucket.bucket_id
+      CONTENT_FILTER_PREFIX      = var.content_filter_prefix
     }
   }
 
@@ -240,6 +250,12 @@ resource "aws_lambda_function" "lambda_status_service" {
       ENDPOINT_URL               = var.lambda_ingress_localstack_context ? "http://localhost.localstack.cloud:4566" : ""
       SMTP_CONFIG_SSM_KEY_PATH   = "/pds/dum/smtp/"
       EXPECTED_BUCKET_OWNER      = var.expected_bucket_owner
+      STATUS_JOB_BUCKET          = module.status_job_bucket.bucket_id
+      STATUS_JOB_PREFIX          = var.status_job_prefix
+      STATUS_QUEUE_URL           = var.status_queue_url
+
+      # Links to offloaded reports never outlive the reports themselves
+      STATUS_REPORT_URL_EXPIRATION = tostring(var.status_job_retention_days * 86400)
     }
   }
 
@@ -262,6 +278,8 @@ resource "aws_lambda_function" "metadata_sync_service" {
     variables = {
       LOG_LEVEL             = "INFO"
       EXPECTED_BUCKET_OWNER = var.expected_bucket_owner
+      CONTENT_INDEX_BUCKET  = module.content_index_bucket.bucket_id
+      CONTENT_INDEX_PREFIX  = var.content_index_prefix
     }
   }
 
@@ -279,6 +297,27 @@ resource "aws_cloudwatch_log_group" "lambda_status_service" {
   retention_in_days = 30
 }
 
+# Rebuild the content filter of every node on a schedule, for clients to skip files already ingested
+resource "aws_cloudwatch_event_rule" "content_filter_schedule" {
+  name                = "nucleus-dum-content-filter-schedule"
+  description         = "Rebuilds the content filters published by the DUM Ingress Service"
+  schedule_expression = var.content_filter_schedule
+}
+
+resource "aws_cloudwatch_event_target" "content_filter_schedule" {
+  rule  = aws_cloudwatch_event_rule.content_filter_schedule.name
+  arn   = aws_lambda_function.lambda_ingress_service.arn
+  input = jsonencode({ content_filter = {} })
+}
+
+resource "aws_lambda_permission" "content_filter_schedule" {
+  statement_id  = "AllowExecutionFromContentFilterSchedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.lambda_ingress_service.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.content_filter_schedule.arn
+}
+
 module "staging_buckets" {
   source        = "git@github.com:NASA-PDS/pds-tf-modules.git//terraform/modules/s3/bucket"
   count         = length(var.lambda_ingress_service_default_buckets)
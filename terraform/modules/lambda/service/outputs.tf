@@ -14,3 +14,7 @@ output "lambda_status_service_function_arn" {
 output "lambda_status_service_function_name" {
   value = aws_lambda_function.lambda_status_service.function_name
 }
+
+output "status_job_bucket_name" {
+  value = module.status_job_bucket.bucket_id
+}
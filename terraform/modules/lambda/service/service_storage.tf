@@ -0,0 +1,284 @@
+# Storage, and the permissions to use it, backing the optional features of the DUM Lambda services
+
+locals {
+  # The service functions share a single role, so each policy below is scoped to the prefixes and queues
+  # read or written by the features it enables
+  service_role_name = regex("[^/]+$", var.lambda_ingress_service_iam_role_arn)
+
+  status_job_bucket_name     = "${var.lambda_status_job_bucket_name}-${var.venue}"
+  async_job_bucket_name      = "${var.lambda_async_job_bucket_name}-${var.venue}"
+  content_index_bucket_name  = "${var.lambda_content_index_bucket_name}-${var.venue}"
+  content_filter_bucket_name = "${var.lambda_content_filter_bucket_name}-${var.venue}"
+}
+
+# Status jobs: manifest chunks fanned out through the status queue, their partial results and merged reports,
+# written by the status service, and the results pages the ingress service presigns for polling clients
+module "status_job_bucket" {
+  source        = "git@github.com:NASA-PDS/pds-tf-modules.git//terraform/modules/s3/bucket"
+  bucket_name   = local.status_job_bucket_name
+  partition     = var.lambda_s3_bucket_partition
+  bucket_policy = templatefile("${path.module}/templates/bucket-policy.json.tftpl", {
+    partition   = var.lambda_s3_bucket_partition
+    account_id  = data.aws_caller_identity.current.account_id
+    bucket_name = local.status_job_bucket_name
+  })
+  enable_blocks = true
+  enable_policy = true
+
+  required_tags = {
+    project = var.project
+    cicd    = var.cicd
+  }
+}
+
+# Status jobs, including the full reports linked from status emails, are only kept for as long as they are linked
+resource "aws_s3_bucket_lifecycle_configuration" "status_job_bucket_lifecycle" {
+  bucket = module.status_job_bucket.bucket_id
+
+  rule {
+    id     = "expire-status-jobs"
+    status = "Enabled"
+
+    filter {
+      prefix = "${var.status_job_prefix}/"
+    }
+
+    expiration {
+      days = var.status_job_retention_days
+    }
+  }
+}
+
+data "aws_iam_policy_document" "status_jobs_policy" {
+  statement {
+    sid    = "StatusJobObjects"
+    effect = "Allow"
+
+    actions = [
+      "s3:GetObject",
+      "s3:PutObject",
+      "s3:DeleteObject"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.status_job_bucket_name}/${var.status_job_prefix}/*"
+    ]
+  }
+
+  statement {
+    sid    = "StatusJobListing"
+    effect = "Allow"
+
+    actions = [
+      "s3:ListBucket"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.status_job_bucket_name}"
+    ]
+
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["${var.status_job_prefix}/*"]
+    }
+  }
+
+  statement {
+    sid    = "StatusQueueFanOut"
+    effect = "Allow"
+
+    actions = [
+      "sqs:SendMessage",
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes"
+    ]
+
+    resources = [
+      var.status_queue_arn
+    ]
+  }
+}
+
+resource "aws_iam_role_policy" "status_jobs_policy" {
+  name   = "nucleus-dum-status-jobs"
+  role   = local.service_role_name
+  policy = data.aws_iam_policy_document.status_jobs_policy.json
+}
+
+# Asynchronous ingress jobs: manifests uploaded by clients, the chunks split from them and their results
+module "async_job_bucket" {
+  source        = "git@github.com:NASA-PDS/pds-tf-modules.git//terraform/modules/s3/bucket"
+  bucket_name   = local.async_job_bucket_name
+  partition     = var.lambda_s3_bucket_partition
+  bucket_policy = templatefile("${path.module}/templates/bucket-policy.json.tftpl", {
+    partition   = var.lambda_s3_bucket_partition
+    account_id  = data.aws_caller_identity.current.account_id
+    bucket_name = local.async_job_bucket_name
+  })
+  enable_blocks = true
+  enable_policy = true
+
+  required_tags = {
+    project = var.project
+    cicd    = var.cicd
+  }
+}
+
+# Results carry upload URLs which expire within the hour, so finished jobs are of no use for long
+resource "aws_s3_bucket_lifecycle_configuration" "async_job_bucket_lifecycle" {
+  bucket = module.async_job_bucket.bucket_id
+
+  rule {
+    id     = "expire-async-jobs"
+    status = "Enabled"
+
+    filter {
+      prefix = "${var.async_job_prefix}/"
+    }
+
+    expiration {
+      days = var.async_job_retention_days
+    }
+  }
+}
+
+data "aws_iam_policy_document" "async_jobs_policy" {
+  statement {
+    sid    = "AsyncJobObjects"
+    effect = "Allow"
+
+    actions = [
+      "s3:GetObject",
+      "s3:PutObject"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.async_job_bucket_name}/${var.async_job_prefix}/*"
+    ]
+  }
+
+  statement {
+    sid    = "AsyncJobListing"
+    effect = "Allow"
+
+    actions = [
+      "s3:ListBucket"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.async_job_bucket_name}"
+    ]
+
+    condition {
+      test     = "StringLike"
+      variable = "s3:prefix"
+      values   = ["${var.async_job_prefix}/*"]
+    }
+  }
+
+  # Each stage of a job is processed by an asynchronous invocation of the ingress service by itself
+  statement {
+    sid    = "AsyncJobStages"
+    effect = "Allow"
+
+    actions = [
+      "lambda:InvokeFunction"
+    ]
+
+    resources = [
+      aws_lambda_function.lambda_ingress_service.arn
+    ]
+  }
+}
+
+resource "aws_iam_role_policy" "async_jobs_policy" {
+  name   = "nucleus-dum-async-jobs"
+  role   = local.service_role_name
+  policy = data.aws_iam_policy_document.async_jobs_policy.json
+}
+
+# Content index: entries mapping the MD5 and size of staged content to an object holding it, maintained by the
+# metadata sync service and read by the ingress service to copy existing content rather than upload it again
+module "content_index_bucket" {
+  source        = "git@github.com:NASA-PDS/pds-tf-modules.git//terraform/modules/s3/bucket"
+  bucket_name   = local.content_index_bucket_name
+  partition     = var.lambda_s3_bucket_partition
+  bucket_policy = templatefile("${path.module}/templates/bucket-policy.json.tftpl", {
+    partition   = var.lambda_s3_bucket_partition
+    account_id  = data.aws_caller_identity.current.account_id
+    bucket_name = local.content_index_bucket_name
+  })
+  enable_blocks = true
+  enable_policy = true
+
+  required_tags = {
+    project = var.project
+    cicd    = var.cicd
+  }
+}
+
+data "aws_iam_policy_document" "content_index_policy" {
+  statement {
+    sid    = "ContentIndexEntries"
+    effect = "Allow"
+
+    actions = [
+      "s3:GetObject",
+      "s3:PutObject"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.content_index_bucket_name}/${var.content_index_prefix}/*"
+    ]
+  }
+}
+
+resource "aws_iam_role_policy" "content_index_policy" {
+  name   = "nucleus-dum-content-index"
+  role   = local.service_role_name
+  policy = data.aws_iam_policy_document.content_index_policy.json
+}
+
+# Content filters: per-node Bloom filters of the staged content, built on a schedule by the ingress service
+# and downloaded by clients through the presigned URLs it issues
+module "content_filter_bucket" {
+  source        = "git@github.com:NASA-PDS/pds-tf-modules.git//terraform/modules/s3/bucket"
+  bucket_name   = local.content_filter_bucket_name
+  partition     = var.lambda_s3_bucket_partition
+  bucket_policy = templatefile("${path.module}/templates/bucket-policy.json.tftpl", {
+    partition   = var.lambda_s3_bucket_partition
+    account_id  = data.aws_caller_identity.current.account_id
+    bucket_name = local.content_filter_bucket_name
+  })
+  enable_blocks = true
+  enable_policy = true
+
+  required_tags = {
+    project = var.project
+    cicd    = var.cicd
+  }
+}
+
+data "aws_iam_policy_document" "content_filter_policy" {
+  statement {
+    sid    = "ContentFilterObjects"
+    effect = "Allow"
+
+    actions = [
+      "s3:GetObject",
+      "s3:PutObject"
+    ]
+
+    resources = [
+      "arn:${var.lambda_s3_bucket_partition}:s3:::${local.content_filter_bucket_name}/${var.content_filter_prefix}/*"
+    ]
+  }
+}
+
+resource "aws_iam_role_policy" "content_filter_policy" {
+  name   = "nucleus-dum-content-filters"
+  role   = local.service_role_name
+  policy = data.aws_iam_policy_document.content_filter_policy.json
+}
@@ -126,6 +126,82 @@ variable "expected_bucket_owner" {
   default     = ""
 }
 
+variable "status_queue_arn" {
+  type        = string
+  description = "ARN of the SQS queue feeding the Status Service, which it also fans large manifests out through"
+}
+
+variable "status_queue_url" {
+  type        = string
+  description = "URL of the SQS queue feeding the Status Service, which it also fans large manifests out through"
+}
+
+variable "lambda_status_job_bucket_name" {
+  type        = string
+  default     = "nucleus-dum-status-jobs"
+  description = "Name of the S3 bucket storing status jobs, appended with the designated venue name to form the final bucket name"
+}
+
+variable "status_job_prefix" {
+  type        = string
+  default     = "status-jobs"
+  description = "Key prefix of the status jobs within the status job bucket"
+}
+
+variable "status_job_retention_days" {
+  type        = number
+  default     = 7
+  description = "Number of days status jobs, including the full reports linked from status emails, are kept for"
+}
+
+variable "lambda_async_job_bucket_name" {
+  type        = string
+  default     = "nucleus-dum-async-jobs"
+  description = "Name of the S3 bucket storing asynchronous ingress jobs, appended with the designated venue name to form the final bucket name"
+}
+
+variable "async_job_prefix" {
+  type        = string
+  default     = "async-jobs"
+  description = "Key prefix of the asynchronous ingress jobs within the async job bucket"
+}
+
+variable "async_job_retention_days" {
+  type        = number
+  default     = 7
+  description = "Number of days asynchronous ingress jobs, including their manifests and results, are kept for"
+}
+
+variable "lambda_content_index_bucket_name" {
+  type        = string
+  default     = "nucleus-dum-content-index"
+  description = "Name of the S3 bucket storing the content index, appended with the designated venue name to form the final bucket name"
+}
+
+variable "content_index_prefix" {
+  type        = string
+  default     = "content-index"
+  description = "Key prefix of the content index entries within the content index bucket"
+}
+
+variable "lambda_content_filter_bucket_name" {
+  type        = string
+  default     = "nucleus-dum-content-filters"
+  description = "Name of the S3 bucket storing the published content filters, appended with the designated venue name to form the final bucket name"
+}
+
+variable "content_filter_prefix" {
+  type        = string
+  default     = "content-filters"
+  description = "Key prefix of the content filters within the content filter bucket"
+}
+
+variable "content_filter_schedule" {
+  type        = string
+  default     = "rate(1 day)"
+  description = "EventBridge schedule expression on which the content filters are rebuilt"
+}
+
 variable "tags" {
   description = "A map of tags to apply to all resources"
   type        = map(string)
@@ -2,3 +2,7 @@
 output "nucleus_dum_sqs_arn" {
   value = aws_sqs_queue.status_queue.arn
 }
+
+output "nucleus_dum_sqs_url" {
+  value = aws_sqs_queue.status_queue.url
+}
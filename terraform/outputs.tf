@@ -25,6 +25,11 @@ output "dum_cognito_auth_client_id" {
   sensitive   = true
 }
 
+output "nucleus_dum_status_job_bucket_name" {
+  description = "S3 bucket storing status jobs fanned out by the DUM status service"
+  value       = module.nucleus_dum_ingress_service_lambda.status_job_bucket_name
+}
+
 output "ingress_client_cloudwatch_log_group_name" {
   description = "CloudWatch log group name used by the DUM ingress client"
   value       = aws_cloudwatch_log_group.ingress_client_cloudwatch_log_group.name
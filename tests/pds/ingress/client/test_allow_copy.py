@@ -0,0 +1,35 @@
+"""
+Tests for opting in to server-side copies of existing content in
+pds_ingress_client.
+"""
+from unittest.mock import patch
+
+import pytest
+from pds.ingress.client.pds_ingress_client import _ingress_request_parameters
+
+
+class TestAllowCopy:
+    """Test suite for the AllowCopy request header."""
+
+    @pytest.fixture
+    def api_gateway_config(self):
+        """Fixture providing mock API Gateway configuration."""
+        return {
+            "url_template": "https://{id}.execute-api.{region}.amazonaws.com/{stage}/{resource}",
+            "id": "test-api-id",
+            "region": "us-west-2",
+            "stage": "dev",
+        }
+
+    def test_copies_not_allowed_by_default(self, api_gateway_config):
+        """Requests should not allow server-side copies unless requested."""
+        _, _, headers = _ingress_request_parameters("eng", False, api_gateway_config)
+
+        assert "AllowCopy" not in headers
+
+    @patch("pds.ingress.client.pds_ingress_client.ALLOW_COPY", True)
+    def test_copies_allowed(self, api_gateway_config):
+        """Requests should allow server-side copies once opted in with --allow-copy."""
+        _, _, headers = _ingress_request_parameters("eng", False, api_gateway_config)
+
+        assert headers["AllowCopy"] == "1"
@@ -0,0 +1,73 @@
+"""
+Tests for per-file retry handling of partially successful ingress batch
+requests in pds_ingress_client.
+"""
+from unittest.mock import patch
+
+from pds.ingress.client.pds_ingress_client import request_batch_with_item_retries
+
+
+def _request(index):
+    return {
+        "ingress_path": f"/data/file_{index}.xml",
+        "trimmed_path": f"file_{index}.xml",
+        "md5": "deadbeef",
+        "size": 1,
+        "last_modified": 0,
+    }
+
+
+def _success(request):
+    return {"result": 200, "trimmed_path": request["trimmed_path"], "ingress_path": request["ingress_path"]}
+
+
+def _throttled(request, index):
+    return {
+        "result": 503,
+        "index": index,
+        "trimmed_path": request["trimmed_path"],
+        "ingress_path": request["ingress_path"],
+        "error_code": "SlowDown",
+        "retryable": True,
+    }
+
+
+class TestBatchRetries:
+    """Test suite for the request_batch_with_item_retries function."""
+
+    @patch("pds.ingress.client.pds_ingress_client.time.sleep")
+    @patch("pds.ingress.client.pds_ingress_client.request_batch_for_ingress")
+    def test_only_failed_items_are_retried(self, mock_request, mock_sleep):
+        """Only the requests reported as retryable should be resubmitted."""
+        request_batch = [_request(index) for index in range(3)]
+
+        mock_request.side_effect = [
+            [_success(request_batch[0]), _throttled(request_batch[1], 1), _success(request_batch[2])],
+            [_success(request_batch[1])],
+        ]
+
+        response_batch = request_batch_with_item_retries(request_batch, 0, "eng", False, {})
+
+        assert mock_request.call_count == 2
+        assert mock_request.call_args_list[1][0][0] == [request_batch[1]]
+        assert sorted(response["trimmed_path"] for response in response_batch) == [
+            "file_0.xml",
+            "file_1.xml",
+            "file_2.xml",
+        ]
+        assert all(response["result"] == 200 for response in response_batch)
+        mock_sleep.assert_called_once()
+
+    @patch("pds.ingress.client.pds_ingress_client.time.sleep")
+    @patch("pds.ingress.client.pds_ingress_client.request_batch_for_ingress")
+    def test_failures_returned_after_max_time(self, mock_request, mock_sleep):
+        """Requests still failing after the retry window are returned as failures."""
+        request_batch = [_request(0)]
+
+        mock_request.return_value = [_throttled(request_batch[0], 0)]
+
+        response_batch = request_batch_with_item_retries(request_batch, 0, "eng", False, {}, max_time=0)
+
+        assert mock_request.call_count == 1
+        assert response_batch == [_throttled(request_batch[0], 0)]
+        mock_sleep.assert_not_called()
@@ -0,0 +1,185 @@
+"""
+Tests for the pre-flight, sync and content filter stages of ingress requests in pds_ingress_client.
+"""
+import os
+import tempfile
+from unittest.mock import patch
+
+import pds.ingress.client.pds_ingress_client as pds_ingress_client
+from pds.ingress.client.pds_ingress_client import _prepare_batch_for_ingress
+from pds.ingress.client.pds_ingress_client import complete_manifest
+from pds.ingress.client.pds_ingress_client import preflight_ingress_paths
+from pds.ingress.client.pds_ingress_client import sync_ingress_paths
+from pds.ingress.util.bloom_filter_util import BloomFilter
+from pds.ingress.util.bloom_filter_util import content_filter_item
+from pds.ingress.util.hash_util import md5_for_path
+from pds.ingress.util.path_util import PathUtil
+from pds.ingress.util.report_util import initialize_summary_table
+from pds.ingress.util.report_util import read_manifest_file
+from pds.ingress.util.report_util import write_manifest_file
+
+PREFIX = {"old": None, "new": ""}
+
+
+class _NullProgressBar:
+    def update(self):
+        pass
+
+
+class TestPreflight:
+    """Test suite for the preflight_ingress_paths function."""
+
+    def setup_method(self):
+        self.working_dir = tempfile.TemporaryDirectory()
+        self.paths = []
+
+        for index in range(5):
+            path = os.path.join(self.working_dir.name, f"file_{index}.xml")
+
+            with open(path, "w") as outfile:
+                outfile.write("x" * index)
+
+            self.paths.append(path)
+
+        pds_ingress_client.SUMMARY_TABLE = initialize_summary_table()
+        pds_ingress_client.PREFLIGHT_STATES.clear()
+        pds_ingress_client.MANIFEST.clear()
+
+    def teardown_method(self):
+        self.working_dir.cleanup()
+        pds_ingress_client.PREFLIGHT_STATES.clear()
+        pds_ingress_client.MANIFEST.clear()
+
+    @patch.object(pds_ingress_client, "PREFLIGHT_CHUNK_SIZE", 2)
+    @patch("pds.ingress.client.pds_ingress_client.md5_for_path")
+    @patch("pds.ingress.client.pds_ingress_client.request_preflight")
+    def test_unchanged_files_skipped_without_hashing(self, mock_preflight, mock_md5):
+        """Unchanged files should be skipped, and only the remaining files hashed."""
+        states = {0: "unchanged", 1: "needs_hash", 2: "new", 3: "unchanged", 4: "new"}
+
+        mock_preflight.side_effect = lambda batch, *args: [
+            states[int(entry["trimmed_path"][-5])] for entry in batch
+        ]
+        mock_md5.return_value.hexdigest.return_value = "deadbeefdeadbeefdeadbeefdeadbeef"
+
+        remaining_paths = preflight_ingress_paths(self.paths, PREFIX, "eng", {})
+
+        assert remaining_paths == [self.paths[1], self.paths[2], self.paths[4]]
+        assert mock_preflight.call_count == 3
+        assert pds_ingress_client.SUMMARY_TABLE["skipped"] == {self.paths[0], self.paths[3]}
+
+        first_request = mock_preflight.call_args_list[0][0][0][0]
+
+        assert first_request["size"] == 0
+        assert "md5" not in first_request
+
+        request_batch = _prepare_batch_for_ingress(remaining_paths, PREFIX, 0, _NullProgressBar())
+
+        assert mock_md5.call_count == 3
+        assert [request.get("preflight") for request in request_batch] == [None, "new", "new"]
+
+    @patch("pds.ingress.client.pds_ingress_client.md5_for_path", wraps=md5_for_path)
+    @patch("pds.ingress.client.pds_ingress_client.request_preflight")
+    def test_manifest_includes_skipped_files(self, mock_preflight, mock_md5):
+        """A manifest written with --manifest-path should describe files skipped by the pre-flight check."""
+        trimmed_paths = [PathUtil.trim_ingress_path(path, PREFIX) for path in self.paths]
+
+        mock_preflight.side_effect = lambda batch, *args: [
+            "unchanged" if entry["trimmed_path"] in trimmed_paths[:2] else "new" for entry in batch
+        ]
+
+        remaining_paths = preflight_ingress_paths(self.paths, PREFIX, "eng", {})
+
+        assert remaining_paths == self.paths[2:]
+
+        _prepare_batch_for_ingress(remaining_paths, PREFIX, 0, _NullProgressBar())
+        complete_manifest(self.paths, PREFIX)
+
+        # Only the skipped files should have been hashed to complete the manifest
+        assert mock_md5.call_count == len(self.paths)
+
+        manifest_path = os.path.join(self.working_dir.name, "manifest.json")
+        write_manifest_file(pds_ingress_client.MANIFEST, manifest_path)
+        manifest = read_manifest_file(manifest_path)
+
+        assert sorted(manifest) == sorted(trimmed_paths)
+        assert manifest[trimmed_paths[0]]["md5"] == md5_for_path(self.paths[0]).hexdigest()
+        assert manifest[trimmed_paths[1]]["size"] == 1
+
+    @patch("pds.ingress.client.pds_ingress_client.request_preflight", return_value=None)
+    def test_unsupported_service(self, mock_preflight):
+        """All files should be returned when the service does not support pre-flight requests."""
+        remaining_paths = preflight_ingress_paths(self.paths, PREFIX, "eng", {})
+
+        assert remaining_paths == self.paths
+        assert mock_preflight.call_count == 1
+        assert pds_ingress_client.SUMMARY_TABLE["skipped"] == set()
+
+
+class TestSync(TestPreflight):
+    """Test suite for the sync_ingress_paths function."""
+
+    @patch("pds.ingress.client.pds_ingress_client.request_listing_page")
+    def test_only_changed_files_returned(self, mock_listing):
+        """Only new or changed files should remain after diffing against the listing."""
+        mtime = int(os.path.getmtime(self.paths[0]))
+        trimmed_paths = [PathUtil.trim_ingress_path(path, PREFIX) for path in self.paths]
+
+        mock_listing.side_effect = [
+            {
+                "entries": [
+                    [trimmed_paths[0], 0, None, mtime],
+                    [trimmed_paths[1], 1, None, mtime - 3600],
+                ],
+                "next_page_token": "token",
+            },
+            {"entries": [[trimmed_paths[2], 3, None, mtime], [trimmed_paths[3], 3, None, mtime]], "next_page_token": None},
+        ]
+
+        remaining_paths = sync_ingress_paths(self.paths, PREFIX, "eng", {})
+
+        # Unchanged (0, 3), modified since the upload (1), resized (2) and new (4)
+        assert remaining_paths == [self.paths[1], self.paths[2], self.paths[4]]
+        assert pds_ingress_client.SUMMARY_TABLE["skipped"] == {self.paths[0], self.paths[3]}
+        assert pds_ingress_client.PREFLIGHT_STATES == {trimmed_paths[4]: "new"}
+        assert mock_listing.call_args_list[1][0][1] == "token"
+
+    @patch("pds.ingress.client.pds_ingress_client.request_listing_page", return_value=None)
+    def test_unsupported_service(self, mock_listing):
+        """No sync should be performed when the service does not support listing requests."""
+        assert sync_ingress_paths(self.paths, PREFIX, "eng", {}) is None
+
+
+class TestContentFilter(TestPreflight):
+    """Test suite for the use of the content filter when preparing batches."""
+
+    def teardown_method(self):
+        super().teardown_method()
+        pds_ingress_client.CONTENT_FILTER = None
+
+    def test_files_absent_from_filter_are_new(self):
+        """Files definitely absent from the content filter should be hinted to the service as new."""
+        # Paths differ between runs, so use an oversized filter with a negligible
+        # false-positive rate to keep the test deterministic
+        content_filter = BloomFilter.for_capacity(1000, false_positive_rate=1e-12)
+
+        for path in self.paths[:2]:
+            content_filter.add(
+                content_filter_item(
+                    PathUtil.trim_ingress_path(path, PREFIX), md5_for_path(path).hexdigest(), os.stat(path).st_size
+                )
+            )
+
+        pds_ingress_client.CONTENT_FILTER = content_filter
+
+        # Pre-flight states take precedence over the filter
+        pds_ingress_client.PREFLIGHT_STATES[PathUtil.trim_ingress_path(self.paths[0], PREFIX)] = "new"
+
+        request_batch = _prepare_batch_for_ingress(self.paths, PREFIX, 0, _NullProgressBar())
+
+        assert [request.get("preflight") for request in request_batch] == ["new", None, "new", "new", "new"]
+
+    @patch("pds.ingress.client.pds_ingress_client.request_content_filter", return_value=None)
+    def test_unavailable_filter(self, mock_request):
+        """No filter should be used when the service has none available."""
+        assert pds_ingress_client.fetch_content_filter("eng", {}) is None
@@ -0,0 +1,34 @@
+"""
+Tests for restoring the fields omitted from slim ingress responses in
+pds_ingress_client.
+"""
+from pds.ingress.client.pds_ingress_client import restore_slim_response
+
+REQUEST_BATCH = [
+    {
+        "ingress_path": f"/data/file_{index}.xml",
+        "trimmed_path": f"file_{index}.xml",
+        "md5": "deadbeefdeadbeefdeadbeefdeadbeef",
+        "size": 1,
+        "last_modified": 0,
+    }
+    for index in range(2)
+]
+
+
+class TestSlimResponses:
+    """Test suite for the restore_slim_response function."""
+
+    def test_fields_restored_by_index(self):
+        response = restore_slim_response({"result": 200, "index": 1, "s3_url": "https://example.com"}, REQUEST_BATCH)
+
+        assert response["ingress_path"] == "/data/file_1.xml"
+        assert response["trimmed_path"] == "file_1.xml"
+        assert response["md5"] == "deadbeefdeadbeefdeadbeefdeadbeef"
+        assert response["base64_md5"] == "3q2+796tvu/erb7v3q2+7w=="
+        assert response["s3_url"] == "https://example.com"
+
+    def test_full_responses_unchanged(self):
+        full_response = {"result": 204, "index": 0, "ingress_path": "/data/file_0.xml", "trimmed_path": "file_0.xml"}
+
+        assert restore_slim_response(full_response, REQUEST_BATCH) is full_response
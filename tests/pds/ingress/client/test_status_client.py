@@ -0,0 +1,202 @@
+"""
+Tests for manifest uploads, and polling and streaming of status job results, in pds_status_client.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+import requests
+from pds.ingress.client.pds_status_client import parse_manifest_ingress_response
+from pds.ingress.client.pds_status_client import prepare_manifest_upload
+from pds.ingress.client.pds_status_client import request_status_result
+from pds.ingress.client.pds_status_client import StatusJobsNotEnabledError
+from pds.ingress.client.pds_status_client import stream_status_results
+from pds.ingress.client.pds_status_client import wait_for_status_job
+
+JOB_ID = "0123456789abcdef0123456789abcdef"
+
+
+def _page_response(lines):
+    """Returns a mock streaming response for a gzip compressed results page"""
+    body = gzip.compress("".join(json.dumps(line) + "\n" for line in lines).encode())
+
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.iter_content.side_effect = lambda chunk_size: (body[index : index + 7] for index in range(0, len(body), 7))
+
+    return response
+
+
+class TestWaitForStatusJob:
+    """Test suite for the wait_for_status_job function."""
+
+    @patch("pds.ingress.client.pds_status_client.time.sleep")
+    @patch("pds.ingress.client.pds_status_client.request_status_result")
+    def test_polls_until_complete(self, mock_request, mock_sleep):
+        """Pending and running jobs should be polled until complete."""
+        complete = {"job_id": JOB_ID, "state": "complete", "num_files": 1, "status": {"Uploaded": 1}, "pages": []}
+
+        mock_request.side_effect = [{"job_id": JOB_ID, "state": "pending"}, {"job_id": JOB_ID, "state": "running"}, complete]
+
+        status = wait_for_status_job(JOB_ID, "eng", "https://api.fake/request", {}, poll_interval=2)
+
+        assert status == complete
+        assert mock_request.call_count == 3
+        assert mock_sleep.call_count == 2
+
+    @patch("pds.ingress.client.pds_status_client.time.sleep")
+    @patch("pds.ingress.client.pds_status_client.request_status_result")
+    def test_times_out(self, mock_request, mock_sleep):
+        """Jobs which do not complete within the timeout should raise an error."""
+        mock_request.return_value = {"job_id": JOB_ID, "state": "running"}
+
+        with pytest.raises(RuntimeError, match="Timed out"):
+            wait_for_status_job(JOB_ID, "eng", "https://api.fake/request", {}, poll_interval=10, timeout=5)
+
+        mock_sleep.assert_not_called()
+
+    @patch("pds.ingress.client.pds_status_client.time.sleep")
+    @patch("pds.ingress.client.pds_status_client.request_status_result")
+    def test_job_failed(self, mock_request, mock_sleep):
+        """Failed jobs should raise an error with the reason, without polling again."""
+        mock_request.side_effect = [
+            {"job_id": JOB_ID, "state": "pending"},
+            {"job_id": JOB_ID, "state": "failed", "message": "Error downloading file"},
+        ]
+
+        with pytest.raises(RuntimeError, match="failed: Error downloading file"):
+            wait_for_status_job(JOB_ID, "eng", "https://api.fake/request", {}, poll_interval=2)
+
+        assert mock_request.call_count == 2
+        assert mock_sleep.call_count == 1
+
+    @patch("pds.ingress.client.pds_status_client.requests.post")
+    def test_status_jobs_not_enabled(self, mock_post):
+        """Deployments without status jobs should be reported as such, rather than as an HTTP error."""
+        mock_post.return_value = MagicMock(status_code=501)
+        mock_post.return_value.raise_for_status.side_effect = requests.HTTPError("501 Not Implemented")
+
+        with pytest.raises(StatusJobsNotEnabledError, match="not enabled on this deployment"):
+            wait_for_status_job(JOB_ID, "eng", "https://api.fake/request", {})
+
+    @patch("pds.ingress.client.pds_status_client.requests.post")
+    def test_request_status_result(self, mock_post):
+        """The parsed state of a job should be returned."""
+        mock_post.return_value = MagicMock(status_code=200)
+        mock_post.return_value.json.return_value = {"job_id": JOB_ID, "state": "running"}
+
+        assert request_status_result(JOB_ID, 0, "eng", "https://api.fake/request", {}) == {
+            "job_id": JOB_ID,
+            "state": "running",
+        }
+
+
+class TestStreamStatusResults:
+    """Test suite for the stream_status_results function."""
+
+    @patch("pds.ingress.client.pds_status_client.request_status_result")
+    @patch("pds.ingress.client.pds_status_client.requests.get")
+    def test_streams_all_pages(self, mock_get, mock_request):
+        """Every page should be decompressed in order, requesting further pages as needed."""
+        pages = [
+            [{"trimmed_path": "a.xml", "status": "Uploaded"}, {"trimmed_path": "b.xml", "status": "Missing"}],
+            [{"trimmed_path": "c.xml", "status": "Modified"}],
+            [{"trimmed_path": "d.xml", "status": "Uploaded"}],
+        ]
+
+        mock_get.side_effect = lambda url, **kwargs: _page_response(pages[int(url[-1])])
+        mock_request.return_value = {
+            "job_id": JOB_ID,
+            "state": "complete",
+            "pages": [{"page": 2, "url": "https://s3.fake/2"}],
+            "next_page": None,
+        }
+
+        status = {
+            "job_id": JOB_ID,
+            "state": "complete",
+            "pages": [{"page": 0, "url": "https://s3.fake/0"}, {"page": 1, "url": "https://s3.fake/1"}],
+            "next_page": 2,
+        }
+
+        outfile = io.BytesIO()
+
+        num_pages = stream_status_results(status, "eng", "https://api.fake/request", {}, outfile)
+
+        assert num_pages == 3
+        mock_request.assert_called_once_with(JOB_ID, 2, "eng", "https://api.fake/request", {})
+
+        lines = [json.loads(line) for line in outfile.getvalue().decode().splitlines()]
+
+        assert lines == [line for page in pages for line in page]
+
+
+class TestPrepareManifestUpload:
+    """Test suite for the prepare_manifest_upload function."""
+
+    def test_compressed_manifest_is_stable(self, tmp_path):
+        """Repeated uploads of an unchanged manifest should have the same name and MD5, so the upload is skipped."""
+        manifest_path = tmp_path / "manifest.json"
+        manifest_path.write_text(json.dumps({"bundle/a.xml": {"md5": "0" * 32, "size": 1}}, indent=4))
+
+        uploads = []
+
+        for index in range(2):
+            working_dir = tmp_path / f"upload_{index}"
+            working_dir.mkdir()
+
+            upload_path, md5 = prepare_manifest_upload(str(manifest_path), "gzip", str(working_dir))
+            uploads.append((os.path.basename(upload_path), md5.hexdigest()))
+
+            with open(upload_path, "rb") as infile:
+                assert json.loads(gzip.decompress(infile.read())) == json.loads(manifest_path.read_text())
+
+        assert uploads[0] == uploads[1]
+        assert uploads[0][0] == "manifest.json.gz"
+
+    def test_uncompressed_manifest(self, tmp_path):
+        """Manifests uploaded uncompressed should be uploaded from their original path."""
+        manifest_path = tmp_path / "manifest.json"
+        manifest_path.write_text("{}")
+
+        upload_path, md5 = prepare_manifest_upload(str(manifest_path), "none", str(tmp_path))
+
+        assert upload_path == str(manifest_path)
+        assert md5.hexdigest() == hashlib.md5(b"{}").hexdigest()
+
+
+class TestParseManifestIngressResponse:
+    """Test suite for the parse_manifest_ingress_response function."""
+
+    @staticmethod
+    def _response(status_code, results):
+        response = MagicMock()
+        response.status_code = status_code
+        response.json.return_value = results
+        return response
+
+    def test_success(self):
+        """The result for the manifest should be returned for a successful request."""
+        result = {"result": 200, "bucket": "bucket", "key": "manifests/manifest.json.gz", "s3_url": "https://s3.fake"}
+
+        assert parse_manifest_ingress_response(self._response(200, [result])) == result
+
+    def test_multi_status_failure(self):
+        """A per-file failure reported with 207 should raise a descriptive error."""
+        result = {"result": 503, "error_code": "SlowDown", "message": "Request failed: SlowDown", "retryable": True}
+
+        with pytest.raises(RuntimeError, match="result 503 .*SlowDown.*try again later"):
+            parse_manifest_ingress_response(self._response(207, [result]))
+
+    def test_request_failure(self):
+        """A failed request should raise the HTTP error of the response."""
+        response = self._response(403, [])
+        response.raise_for_status.side_effect = requests.HTTPError("403 Forbidden")
+
+        with pytest.raises(requests.HTTPError):
+            parse_manifest_ingress_response(response)
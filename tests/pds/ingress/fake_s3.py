@@ -0,0 +1,295 @@
+"""
+In-process stand-in for the subset of the boto3 S3 client API used by the
+DUM services, for use with unit tests that need to exercise S3 interactions
+end-to-end without a network connection.
+"""
+import hashlib
+import io
+import threading
+import time
+import uuid
+from datetime import datetime
+from datetime import timezone
+from urllib.parse import parse_qsl
+
+from botocore.exceptions import ClientError
+
+
+class NoSuchKey(ClientError):
+    """Mirrors the modeled NoSuchKey exception raised by boto3 S3 clients"""
+
+
+class NoSuchBucket(ClientError):
+    """Mirrors the modeled NoSuchBucket exception raised by boto3 S3 clients"""
+
+
+# Object settings accepted by put_object() and create_multipart_upload(), and reported by head_object() once set
+STORED_FIELDS = (
+    "ContentDisposition",
+    "ContentLanguage",
+    "CacheControl",
+    "Expires",
+    "ServerSideEncryption",
+    "SSEKMSKeyId",
+    "ObjectLockMode",
+    "ObjectLockRetainUntilDate",
+    "ObjectLockLegalHoldStatus",
+)
+
+
+def _stored_fields(params):
+    """Returns the object settings, and parsed tags, among the provided request parameters"""
+    fields = {field: params[field] for field in STORED_FIELDS if params.get(field)}
+    fields["Tags"] = dict(parse_qsl(params.get("Tagging", "")))
+    return fields
+
+
+class _Exceptions:
+    NoSuchKey = NoSuchKey
+    NoSuchBucket = NoSuchBucket
+    ClientError = ClientError
+
+
+class FakeS3Client:
+    """
+    Minimal in-memory S3 client. Objects are stored per-bucket as dictionaries.
+
+    A latency (in seconds) may be injected for any operation, by name, to
+    approximate the round-trip time of calls made against the real service.
+    """
+
+    exceptions = _Exceptions
+
+    def __init__(self, buckets=(), latency=None):
+        self.buckets = {bucket: {} for bucket in buckets}
+        self.latency = dict(latency or {})
+        self.calls = {}
+        self.multipart_uploads = {}
+        self._lock = threading.Lock()
+
+    def _record(self, operation):
+        with self._lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+
+        if self.latency.get(operation):
+            time.sleep(self.latency[operation])
+
+    def _bucket(self, bucket, operation):
+        if bucket not in self.buckets:
+            raise NoSuchBucket({"Error": {"Code": "NoSuchBucket", "Message": bucket}}, operation)
+        return self.buckets[bucket]
+
+    def _object(self, bucket, key, operation):
+        objects = self._bucket(bucket, operation)
+        if key not in objects:
+            if operation == "HeadObject":
+                raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+            raise NoSuchKey({"Error": {"Code": "NoSuchKey", "Message": key}}, operation)
+        return objects[key]
+
+    @staticmethod
+    def _check_copy_source(source, copy_source_if_match, operation):
+        if copy_source_if_match and copy_source_if_match != source["ETag"]:
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": "ETag mismatch"}}, operation)
+
+    def create_bucket(self, Bucket, **kwargs):
+        self._record("CreateBucket")
+        self.buckets.setdefault(Bucket, {})
+
+    def head_bucket(self, Bucket, **kwargs):
+        self._record("HeadBucket")
+        if Bucket not in self.buckets:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadBucket")
+        return {}
+
+    def put_object(self, Bucket, Key, Body=b"", Metadata=None, **kwargs):
+        self._record("PutObject")
+        if isinstance(Body, str):
+            Body = Body.encode("utf-8")
+        elif hasattr(Body, "read"):
+            Body = Body.read()
+
+        etag = f'"{hashlib.md5(Body).hexdigest()}"'
+
+        if kwargs.get("IfNoneMatch") == "*" and Key in self._bucket(Bucket, "PutObject"):
+            raise ClientError({"Error": {"Code": "PreconditionFailed", "Message": Key}}, "PutObject")
+
+        self._bucket(Bucket, "PutObject")[Key] = {
+            "Body": Body,
+            "ETag": etag,
+            "LastModified": datetime.now(tz=timezone.utc),
+            "Metadata": dict(Metadata or {}),
+            "ContentType": kwargs.get("ContentType", "binary/octet-stream"),
+            "ContentEncoding": kwargs.get("ContentEncoding"),
+            **_stored_fields(kwargs),
+        }
+        return {"ETag": etag}
+
+    def put_placeholder(self, Bucket, Key, size, Metadata=None):
+        """Stores an object reporting the provided size, without materializing its content (not an S3 API)"""
+        self._bucket(Bucket, "PutObject")[Key] = {
+            "Body": b"",
+            "ContentLength": size,
+            "ETag": f'"{hashlib.md5(Key.encode()).hexdigest()}"',
+            "LastModified": datetime.now(tz=timezone.utc),
+            "Metadata": dict(Metadata or {}),
+            "ContentType": "binary/octet-stream",
+            "ContentEncoding": None,
+        }
+
+    def get_object(self, Bucket, Key, Range=None, **kwargs):
+        self._record("GetObject")
+        obj = self._object(Bucket, Key, "GetObject")
+        body = obj["Body"]
+
+        if Range:
+            start, end = Range.replace("bytes=", "").split("-")
+            body = body[int(start) : int(end) + 1] if end else body[int(start) :]
+
+        return {
+            "Body": io.BytesIO(body),
+            "ContentLength": len(body),
+            "ETag": obj["ETag"],
+            "LastModified": obj["LastModified"],
+            "Metadata": dict(obj["Metadata"]),
+        }
+
+    def head_object(self, Bucket, Key, **kwargs):
+        self._record("HeadObject")
+        obj = self._object(Bucket, Key, "HeadObject")
+        return {
+            "ContentLength": obj.get("ContentLength", len(obj["Body"])),
+            "ETag": obj["ETag"],
+            "LastModified": obj["LastModified"],
+            "Metadata": dict(obj["Metadata"]),
+            "ContentType": obj["ContentType"],
+            **{field: obj[field] for field in STORED_FIELDS if obj.get(field)},
+        }
+
+    def get_object_tagging(self, Bucket, Key, **kwargs):
+        self._record("GetObjectTagging")
+        obj = self._object(Bucket, Key, "GetObjectTagging")
+        return {"TagSet": [{"Key": key, "Value": value} for key, value in obj.get("Tags", {}).items()]}
+
+    def get_object_retention(self, Bucket, Key, **kwargs):
+        self._record("GetObjectRetention")
+        obj = self._object(Bucket, Key, "GetObjectRetention")
+        if not obj.get("ObjectLockMode"):
+            raise ClientError({"Error": {"Code": "NoSuchObjectLockConfiguration", "Message": Key}}, "GetObjectRetention")
+        return {"Retention": {"Mode": obj["ObjectLockMode"], "RetainUntilDate": obj["ObjectLockRetainUntilDate"]}}
+
+    def get_object_legal_hold(self, Bucket, Key, **kwargs):
+        self._record("GetObjectLegalHold")
+        obj = self._object(Bucket, Key, "GetObjectLegalHold")
+        if not obj.get("ObjectLockLegalHoldStatus"):
+            raise ClientError({"Error": {"Code": "NoSuchObjectLockConfiguration", "Message": Key}}, "GetObjectLegalHold")
+        return {"LegalHold": {"Status": obj["ObjectLockLegalHoldStatus"]}}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        self._record("DeleteObject")
+        self._bucket(Bucket, "DeleteObject").pop(Key, None)
+        return {}
+
+    def copy_object(self, Bucket, Key, CopySource, Metadata=None, MetadataDirective="COPY", **kwargs):
+        self._record("CopyObject")
+        source = self._object(CopySource["Bucket"], CopySource["Key"], "CopyObject")
+        self._check_copy_source(source, kwargs.get("CopySourceIfMatch"), "CopyObject")
+        copied = dict(source)
+        copied["LastModified"] = datetime.now(tz=timezone.utc)
+        if MetadataDirective == "REPLACE":
+            copied["Metadata"] = dict(Metadata or {})
+        self._bucket(Bucket, "CopyObject")[Key] = copied
+        return {"CopyObjectResult": {"ETag": copied["ETag"]}}
+
+    def list_objects_v2(self, Bucket, Prefix="", Delimiter=None, StartAfter=None, ContinuationToken=None, MaxKeys=1000, **kwargs):
+        self._record("ListObjectsV2")
+        keys = sorted(key for key in self._bucket(Bucket, "ListObjectsV2") if key.startswith(Prefix))
+
+        start_after = ContinuationToken or StartAfter
+        if start_after:
+            keys = [key for key in keys if key > start_after]
+
+        contents = []
+        common_prefixes = []
+
+        for key in keys:
+            if Delimiter and Delimiter in key[len(Prefix) :]:
+                common_prefix = key[: key.index(Delimiter, len(Prefix)) + len(Delimiter)]
+                if common_prefix not in common_prefixes:
+                    common_prefixes.append(common_prefix)
+                continue
+
+            if len(contents) + len(common_prefixes) >= MaxKeys:
+                break
+
+            obj = self.buckets[Bucket][key]
+            contents.append(
+                {"Key": key, "Size": len(obj["Body"]), "ETag": obj["ETag"], "LastModified": obj["LastModified"]}
+            )
+
+        response = {"KeyCount": len(contents), "IsTruncated": False, "Prefix": Prefix}
+
+        remaining = [key for key in keys if contents and key > contents[-1]["Key"]]
+        if contents and remaining and len(contents) >= MaxKeys:
+            response["IsTruncated"] = True
+            response["NextContinuationToken"] = contents[-1]["Key"]
+
+        if contents:
+            response["Contents"] = contents
+        if common_prefixes:
+            response["CommonPrefixes"] = [{"Prefix": prefix} for prefix in common_prefixes]
+
+        return response
+
+    def create_multipart_upload(self, Bucket, Key, Metadata=None, **kwargs):
+        self._record("CreateMultipartUpload")
+        self._bucket(Bucket, "CreateMultipartUpload")
+        upload_id = uuid.uuid4().hex
+        self.multipart_uploads[upload_id] = {
+            "Bucket": Bucket,
+            "Key": Key,
+            "Metadata": dict(Metadata or {}),
+            "ContentType": kwargs.get("ContentType", "binary/octet-stream"),
+            "ContentEncoding": kwargs.get("ContentEncoding"),
+            "Fields": _stored_fields(kwargs),
+            "Parts": {},
+        }
+        return {"Bucket": Bucket, "Key": Key, "UploadId": upload_id}
+
+    def upload_part_copy(self, Bucket, Key, CopySource, CopySourceRange, PartNumber, UploadId, **kwargs):
+        self._record("UploadPartCopy")
+        source = self._object(CopySource["Bucket"], CopySource["Key"], "UploadPartCopy")
+        self._check_copy_source(source, kwargs.get("CopySourceIfMatch"), "UploadPartCopy")
+        start, end = CopySourceRange.replace("bytes=", "").split("-")
+        body = source["Body"][int(start) : int(end) + 1]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        self.multipart_uploads[UploadId]["Parts"][PartNumber] = (etag, body, int(end) - int(start) + 1)
+        return {"CopyPartResult": {"ETag": etag}}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload, **kwargs):
+        self._record("CompleteMultipartUpload")
+        upload = self.multipart_uploads.pop(UploadId)
+        parts = [upload["Parts"][part["PartNumber"]] for part in MultipartUpload["Parts"]]
+        digest = hashlib.md5(b"".join(bytes.fromhex(etag.strip('"')) for etag, _, _ in parts)).hexdigest()
+        etag = f'"{digest}-{len(parts)}"'
+        self._bucket(Bucket, "CompleteMultipartUpload")[Key] = {
+            "Body": b"".join(body for _, body, _ in parts),
+            "ContentLength": sum(size for _, _, size in parts),
+            "ETag": etag,
+            "LastModified": datetime.now(tz=timezone.utc),
+            "Metadata": upload["Metadata"],
+            "ContentType": upload["ContentType"],
+            "ContentEncoding": upload["ContentEncoding"],
+            **upload["Fields"],
+        }
+        return {"Bucket": Bucket, "Key": Key, "ETag": etag}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId, **kwargs):
+        self._record("AbortMultipartUpload")
+        self.multipart_uploads.pop(UploadId, None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, HttpMethod=None):
+        self._record("GeneratePresignedUrl")
+        Params = Params or {}
+        return f"https://{Params.get('Bucket')}.s3.fake/{Params.get('Key')}?method={ClientMethod}&expires={ExpiresIn}"
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Load-test harness for the ingress service Lambda handler.
+
+Drives pds_ingress_app.lambda_handler with synthetic request batches against
+an in-process S3 stand-in with configurable per-operation latency, and reports
+batch latency percentiles, throughput and the number of S3 calls made per file.
+This allows service-side optimizations to be evaluated offline.
+
+Example usage (from the repository root):
+
+    python -m tests.pds.ingress.service.load_test --batches 20 --batch-size 500 \\
+        --skip-ratio 0.5 --latency HeadObject=0.01 --latency HeadBucket=0.01
+
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from importlib.resources import files
+from unittest.mock import patch
+
+import pds.ingress.service.pds_ingress_app as pds_ingress_app
+from pds.ingress import __version__
+from tests.pds.ingress.fake_s3 import FakeS3Client
+
+STAGING_BUCKET = "pds-sbn-staging-test"
+ARCHIVE_BUCKET = "pds-sbn-archive-test"
+
+DEFAULT_SIZE_MIX = {1024: 0.6, 256 * 1024: 0.3, 8 * 1024**2: 0.099, 6 * 1024**3: 0.001}
+"""Default distribution of synthetic file sizes (in bytes) to the fraction of files of that size"""
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of the provided values"""
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(fraction * len(ordered)) - 1, 0), len(ordered) - 1)]
+
+
+def generate_batch(batch_index, batch_size, size_mix, rng):
+    """Returns a synthetic ingress request batch, with file sizes drawn from the provided mix"""
+    sizes = rng.choices(list(size_mix.keys()), weights=list(size_mix.values()), k=batch_size)
+
+    return [
+        {
+            "ingress_path": f"/data/load_test/batch_{batch_index:05d}/file_{index:05d}.dat",
+            "trimmed_path": f"load_test/batch_{batch_index:05d}/file_{index:05d}.dat",
+            "md5": f"{rng.getrandbits(128):032x}",
+            "size": size,
+            "last_modified": 1704067200,
+        }
+        for index, size in enumerate(sizes)
+    ]
+
+
+def stage_existing_files(s3_client, request_batch, skip_ratio, node_id, rng):
+    """Stores a matching object for a fraction of the batch, so the service skips requesting their upload"""
+    for ingress_request in request_batch:
+        if ingress_request["size"] < pds_ingress_app.MAX_UPLOAD_SIZE and rng.random() < skip_ratio:
+            s3_client.put_placeholder(
+                Bucket=rng.choice((STAGING_BUCKET, ARCHIVE_BUCKET)),
+                Key=f"{node_id}/{ingress_request['trimmed_path']}",
+                size=ingress_request["size"],
+                Metadata={"md5": ingress_request["md5"]},
+            )
+
+
+def run_load_test(
+    num_batches=10, batch_size=100, size_mix=None, skip_ratio=0.0, latency=None, node_id="sbn", seed=0
+):
+    """
+    Runs the load test, invoking the Lambda handler once per batch.
+
+    Parameters
+    ----------
+    num_batches : int, optional
+        Number of batches (invocations) to run.
+    batch_size : int, optional
+        Number of files within each batch.
+    size_mix : dict, optional
+        Mapping of file size (in bytes) to the fraction of files of that size.
+        Defaults to DEFAULT_SIZE_MIX.
+    skip_ratio : float, optional
+        Fraction of files which already exist in S3, and should be skipped.
+    latency : dict, optional
+        Mapping of S3 operation names (such as HeadObject) to the latency in
+        seconds injected into each call.
+    node_id : str, optional
+        PDS node identifier to submit batches as.
+    seed : int, optional
+        Seed for the generation of synthetic batches.
+
+    Returns
+    -------
+    report : dict
+        Summary of the load test results.
+
+    """
+    rng = random.Random(seed)
+    size_mix = size_mix or DEFAULT_SIZE_MIX
+
+    s3_client = FakeS3Client(buckets=(STAGING_BUCKET, ARCHIVE_BUCKET), latency=latency)
+
+    os.environ["LAMBDA_TASK_ROOT"] = str(files("tests.pds.ingress").joinpath("service"))
+    os.environ["BUCKET_MAP_LOCATION"] = "config"
+    os.environ["BUCKET_MAP_SCHEMA_LOCATION"] = "config"
+    os.environ["BUCKET_MAP_FILE"] = "bucket-map.yaml"
+    os.environ["BUCKET_MAP_SCHEMA_FILE"] = "bucket-map.schema"
+    os.environ["VERSION_LOCATION"] = "config"
+    os.environ["VERSION_FILE"] = "VERSION.txt"
+
+    batch_latencies = []
+    status_counts = {}
+    total_calls = {}
+    num_files = 0
+
+    with patch.object(pds_ingress_app, "s3_client", s3_client), patch.object(
+        pds_ingress_app.METRICS, "enabled", False
+    ):
+        for batch_index in range(num_batches):
+            request_batch = generate_batch(batch_index, batch_size, size_mix, rng)
+            stage_existing_files(s3_client, request_batch, skip_ratio, node_id, rng)
+
+            event = {
+                "body": json.dumps(request_batch),
+                "queryStringParameters": {"node": node_id},
+                "headers": {"ClientVersion": __version__, "ForceOverwrite": "0"},
+            }
+
+            # Calls made while staging the synthetic data are not attributed to the service
+            s3_client.calls.clear()
+
+            start_time = time.perf_counter()
+            response = pds_ingress_app.lambda_handler(event, None)
+            batch_latencies.append((time.perf_counter() - start_time) * 1000)
+
+            for result in json.loads(response["body"]):
+                status_counts[result["result"]] = status_counts.get(result["result"], 0) + 1
+
+            num_files += len(request_batch)
+
+            for operation, count in s3_client.calls.items():
+                total_calls[operation] = total_calls.get(operation, 0) + count
+
+    return {
+        "batches": num_batches,
+        "files": num_files,
+        "results": status_counts,
+        "batch_latency_ms": {
+            "p50": percentile(batch_latencies, 0.50),
+            "p90": percentile(batch_latencies, 0.90),
+            "p99": percentile(batch_latencies, 0.99),
+            "max": max(batch_latencies),
+            "mean": sum(batch_latencies) / len(batch_latencies),
+        },
+        "files_per_second": num_files / (sum(batch_latencies) / 1000),
+        "s3_calls_per_file": {operation: count / num_files for operation, count in sorted(total_calls.items())},
+    }
+
+
+def parse_size_mix(value):
+    """Parses a size mix provided as comma-separated size:fraction pairs"""
+    size_mix = {}
+
+    for entry in value.split(","):
+        size, fraction = entry.split(":")
+        size_mix[int(size)] = float(fraction)
+
+    return size_mix
+
+
+def parse_latency(values):
+    """Parses latencies provided as Operation=seconds pairs"""
+    latency = {}
+
+    for value in values or []:
+        operation, seconds = value.split("=")
+        latency[operation] = float(seconds)
+
+    return latency
+
+
+def main():
+    """Command-line entrypoint for the load test"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batches", type=int, default=10, help="Number of batches to submit.")
+    parser.add_argument("--batch-size", type=int, default=100, help="Number of files per batch.")
+    parser.add_argument(
+        "--size-mix",
+        type=parse_size_mix,
+        default=None,
+        help="File size distribution as comma-separated size:fraction pairs, e.g. 1024:0.9,10485760:0.1",
+    )
+    parser.add_argument("--skip-ratio", type=float, default=0.0, help="Fraction of files which already exist in S3.")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        help="Latency in seconds to inject per call to an S3 operation, e.g. HeadObject=0.01. May be repeated.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic batch generation.")
+
+    args = parser.parse_args()
+
+    report = run_load_test(
+        num_batches=args.batches,
+        batch_size=args.batch_size,
+        size_mix=args.size_mix,
+        skip_ratio=args.skip_ratio,
+        latency=parse_latency(args.latency),
+        seed=args.seed,
+    )
+
+    print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
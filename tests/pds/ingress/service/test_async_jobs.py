@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+End-to-end tests for asynchronous ingress jobs, using an in-process S3
+stand-in in place of the buckets used by the ingress service.
+"""
+import json
+import os
+import tempfile
+import unittest
+from collections import deque
+from importlib.resources import files
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from urllib.parse import urlparse
+
+import pds.ingress.client.pds_ingress_client as pds_ingress_client
+import pds.ingress.service.pds_ingress_app as pds_ingress_app
+from pds.ingress import __version__
+from pds.ingress.util.report_util import initialize_summary_table
+from pds.ingress.util.report_util import write_manifest_file
+from tests.pds.ingress.fake_s3 import FakeS3Client
+
+JOB_BUCKET = "pds-async-jobs-test"
+
+
+class FakeLambdaContext:
+    """Mimics the remaining time reported by a Lambda context, counting down on each check"""
+
+    def __init__(self, remaining_checks):
+        self.remaining_checks = remaining_checks
+
+    def get_remaining_time_in_millis(self):
+        self.remaining_checks -= 1
+        return 60000 if self.remaining_checks > 0 else 0
+
+
+class AsyncJobTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.test_dir = str(files("tests.pds.ingress").joinpath("service"))
+
+    def setUp(self) -> None:
+        os.environ["LAMBDA_TASK_ROOT"] = self.test_dir
+        os.environ["BUCKET_MAP_LOCATION"] = "config"
+        os.environ["BUCKET_MAP_SCHEMA_LOCATION"] = "config"
+        os.environ["BUCKET_MAP_FILE"] = "bucket-map.yaml"
+        os.environ["BUCKET_MAP_SCHEMA_FILE"] = "bucket-map.schema"
+        os.environ["VERSION_LOCATION"] = "config"
+        os.environ["VERSION_FILE"] = "VERSION.txt"
+
+        self.s3 = FakeS3Client(buckets=(JOB_BUCKET, "pds-sbn-staging-test", "pds-sbn-archive-test"))
+
+        # Asynchronous invocations are queued, then run to completion by run_pending_jobs
+        self.pending_jobs = deque()
+
+        patches = [
+            patch.object(pds_ingress_app, "s3_client", self.s3),
+            patch.object(pds_ingress_app, "ASYNC_JOB_BUCKET", JOB_BUCKET),
+            patch.object(pds_ingress_app, "ASYNC_CHUNK_SIZE", 2),
+            patch.object(pds_ingress_app, "invoke_async_job", self.pending_jobs.append),
+        ]
+
+        for active_patch in patches:
+            active_patch.start()
+            self.addCleanup(active_patch.stop)
+
+        # The service logger only logs each unique message once, reset it so
+        # messages logged by these tests do not suppress those expected elsewhere
+        for log_filter in pds_ingress_app.logger.filters:
+            self.addCleanup(getattr(log_filter, "logged_messages", set()).clear)
+
+    def run_pending_jobs(self, context=None):
+        while self.pending_jobs:
+            pds_ingress_app.lambda_handler({"async_job": self.pending_jobs.popleft()}, context)
+
+    def api_request(self, action_request, node_id="sbn", force_overwrite=False):
+        event = {
+            "body": json.dumps(action_request),
+            "queryStringParameters": {"node": node_id},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": str(int(force_overwrite))},
+        }
+
+        response = pds_ingress_app.lambda_handler(event, {})
+
+        return response["statusCode"], json.loads(response["body"])
+
+    def upload_to_presigned_url(self, url, data):
+        parsed_url = urlparse(url)
+        self.s3.put_object(Bucket=parsed_url.netloc.split(".")[0], Key=parsed_url.path.lstrip("/"), Body=data)
+
+    def read_presigned_url(self, url):
+        parsed_url = urlparse(url)
+        response = self.s3.get_object(Bucket=parsed_url.netloc.split(".")[0], Key=parsed_url.path.lstrip("/"))
+        return response["Body"].read()
+
+    @staticmethod
+    def create_manifest(num_files):
+        return {
+            f"bundle/file_{index}.xml": {
+                "ingress_path": f"/data/bundle/file_{index}.xml",
+                "md5": f"{index:032x}",
+                "size": index + 1,
+                "last_modified": "2024-01-01T00:00:00+00:00",
+            }
+            for index in range(num_files)
+        }
+
+    def test_async_job(self):
+        """Test the full lifecycle of an asynchronous job, including a split handed off between invocations"""
+        status, job = self.api_request({"action": "create_job"})
+
+        self.assertEqual(status, 200)
+
+        job_id = job["job_id"]
+
+        with tempfile.TemporaryDirectory() as manifest_dir:
+            manifest_path = os.path.join(manifest_dir, "manifest.json")
+
+            write_manifest_file(self.create_manifest(5), manifest_path)
+
+            with open(manifest_path, "rb") as infile:
+                self.upload_to_presigned_url(job["manifest_url"], infile.read())
+
+        status, job_status = self.api_request({"action": "start_job", "job_id": job_id})
+
+        self.assertEqual(status, 202)
+        self.assertEqual(job_status["state"], "splitting")
+
+        # Replaying the start request should not start a second split
+        self.api_request({"action": "start_job", "job_id": job_id})
+        self.assertEqual(len(self.pending_jobs), 1)
+
+        # Run out of time after staging the first chunk, forcing the split to resume from an offset
+        self.run_pending_jobs(FakeLambdaContext(remaining_checks=1))
+
+        status, job_status = self.api_request({"action": "job_status", "job_id": job_id})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(job_status["state"], "running")
+        self.assertEqual(job_status["total_chunks"], 3)
+        self.assertEqual(job_status["total_files"], 5)
+        self.assertListEqual([part["chunk"] for part in job_status["parts"]], [0, 1, 2])
+
+        results = [
+            json.loads(line)
+            for part in job_status["parts"]
+            for line in self.read_presigned_url(part["url"]).decode().splitlines()
+        ]
+
+        self.assertListEqual(
+            sorted(result["trimmed_path"] for result in results), [f"bundle/file_{index}.xml" for index in range(5)]
+        )
+        self.assertTrue(all(result["result"] == 200 and result["s3_url"] for result in results))
+
+        # Only parts beyond the provided watermark should be returned
+        _, job_status = self.api_request({"action": "job_status", "job_id": job_id, "after": 1})
+        self.assertListEqual([part["chunk"] for part in job_status["parts"]], [2])
+
+        # Jobs are scoped to the node which created them
+        status, _ = self.api_request({"action": "job_status", "job_id": job_id}, node_id="eng")
+        self.assertEqual(status, 404)
+
+        status, _ = self.api_request({"action": "job_status", "job_id": "../" + job_id})
+        self.assertEqual(status, 400)
+
+    def test_async_job_invalid_manifest(self):
+        """Test that a manifest that cannot be parsed fails the job"""
+        _, job = self.api_request({"action": "create_job"})
+
+        self.upload_to_presigned_url(job["manifest_url"], b"{\n<not a manifest>\n}")
+
+        self.api_request({"action": "start_job", "job_id": job["job_id"]})
+        self.run_pending_jobs()
+
+        _, job_status = self.api_request({"action": "job_status", "job_id": job["job_id"]})
+
+        self.assertEqual(job_status["state"], "failed")
+        self.assertIn("Failed to read manifest", job_status["message"])
+
+    def test_async_requests_disabled(self):
+        """Test that asynchronous requests are rejected when no job bucket is configured"""
+        with patch.object(pds_ingress_app, "ASYNC_JOB_BUCKET", None):
+            status, _ = self.api_request({"action": "create_job"})
+
+        self.assertEqual(status, 501)
+
+    def test_client_async_ingress(self):
+        """Test the client side of an asynchronous job against the service"""
+        request_batches = [
+            [
+                {
+                    "ingress_path": manifest_entry["ingress_path"],
+                    "trimmed_path": trimmed_path,
+                    "md5": manifest_entry["md5"],
+                    "size": manifest_entry["size"],
+                    "last_modified": 1704067200,
+                }
+                for trimmed_path, manifest_entry in self.create_manifest(3).items()
+            ]
+        ]
+
+        def mock_job_action(action_request, node_id, force_overwrite, api_gateway_config):
+            status, body = self.api_request(action_request, node_id, force_overwrite)
+
+            # Run the job stages the service would have invoked in the background
+            self.run_pending_jobs()
+
+            return body
+
+        def mock_put(url, data):
+            self.upload_to_presigned_url(url, data.read())
+            return MagicMock()
+
+        uploaded = []
+
+        with patch.object(pds_ingress_client, "SUMMARY_TABLE", initialize_summary_table()), patch.object(
+            pds_ingress_client, "request_async_job_action", side_effect=mock_job_action
+        ), patch.object(pds_ingress_client.requests, "put", side_effect=mock_put), patch.object(
+            pds_ingress_client,
+            "download_async_results_part",
+            side_effect=lambda url: [json.loads(line) for line in self.read_presigned_url(url).decode().splitlines()],
+        ), patch.object(
+            pds_ingress_client, "ingress_file_to_s3", side_effect=lambda response, *args: uploaded.append(response)
+        ), patch.object(
+            pds_ingress_client, "get_ingress_total_progress_bar", MagicMock()
+        ), patch.object(
+            pds_ingress_client, "get_available_batch_progress_bar", MagicMock()
+        ), patch.object(
+            pds_ingress_client, "release_batch_progress_bar", MagicMock()
+        ):
+            handled = pds_ingress_client.perform_async_ingress(request_batches, "sbn", False, {}, poll_interval=0)
+
+            self.assertTrue(handled)
+            self.assertEqual(len(pds_ingress_client.SUMMARY_TABLE["failed"]), 0)
+
+        self.assertListEqual(
+            sorted(response["ingress_path"] for response in uploaded),
+            [f"/data/bundle/file_{index}.xml" for index in range(3)],
+        )
+
+        # The uploaded manifest should have been split into two chunks
+        listing = self.s3.list_objects_v2(Bucket=JOB_BUCKET, Prefix="async-jobs/sbn/")
+        self.assertEqual(len([item for item in listing["Contents"] if "/chunks/" in item["Key"]]), 2)
+
+    def test_client_async_ingress_expired_urls(self):
+        """Test that the client requests fresh upload URLs for results whose URLs have expired"""
+        request_batches = [
+            [
+                {
+                    "ingress_path": manifest_entry["ingress_path"],
+                    "trimmed_path": trimmed_path,
+                    "md5": manifest_entry["md5"],
+                    "size": manifest_entry["size"],
+                    "last_modified": 1704067200,
+                }
+                for trimmed_path, manifest_entry in self.create_manifest(3).items()
+            ]
+        ]
+
+        def mock_job_action(action_request, node_id, force_overwrite, api_gateway_config):
+            status, body = self.api_request(action_request, node_id, force_overwrite)
+            self.run_pending_jobs()
+            return body
+
+        def mock_put(url, data):
+            self.upload_to_presigned_url(url, data.read())
+            return MagicMock()
+
+        def mock_download(url):
+            results = [json.loads(line) for line in self.read_presigned_url(url).decode().splitlines()]
+
+            # Every upload result should report when its URL expires
+            self.assertTrue(all("expires_at" in result for result in results))
+
+            # Simulate the client reaching the results of the second chunk
+            # only after their upload URLs have expired
+            if "/results/000001.jsonl" in url:
+                for result in results:
+                    result["expires_at"] = 0
+
+            return results
+
+        uploaded = []
+        renewed = []
+
+        def mock_renew(request_batch, *args, **kwargs):
+            renewed.extend(ingress_request["ingress_path"] for ingress_request in request_batch)
+            return [dict(ingress_request, result=200, s3_url="https://renewed") for ingress_request in request_batch]
+
+        with patch.object(pds_ingress_client, "SUMMARY_TABLE", initialize_summary_table()), patch.object(
+            pds_ingress_client, "request_async_job_action", side_effect=mock_job_action
+        ), patch.object(pds_ingress_client.requests, "put", side_effect=mock_put), patch.object(
+            pds_ingress_client, "download_async_results_part", side_effect=mock_download
+        ), patch.object(
+            pds_ingress_client, "request_batch_with_item_retries", side_effect=mock_renew
+        ), patch.object(
+            pds_ingress_client, "ingress_file_to_s3", side_effect=lambda response, *args: uploaded.append(response)
+        ), patch.object(
+            pds_ingress_client, "get_ingress_total_progress_bar", MagicMock()
+        ), patch.object(
+            pds_ingress_client, "get_available_batch_progress_bar", MagicMock()
+        ), patch.object(
+            pds_ingress_client, "release_batch_progress_bar", MagicMock()
+        ):
+            handled = pds_ingress_client.perform_async_ingress(request_batches, "sbn", False, {}, poll_interval=0)
+
+            self.assertTrue(handled)
+            self.assertEqual(len(pds_ingress_client.SUMMARY_TABLE["failed"]), 0)
+
+        # Only the file in the expired (second) chunk should have been renewed,
+        # and uploaded against its fresh URL rather than the expired one
+        self.assertListEqual(renewed, ["/data/bundle/file_2.xml"])
+        self.assertEqual(len(uploaded), 3)
+        self.assertListEqual(
+            [response["ingress_path"] for response in uploaded if response["s3_url"] == "https://renewed"],
+            ["/data/bundle/file_2.xml"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Cold start import checks for the Lambda service functions, based on the
+modules loaded when each is imported within a fresh interpreter.
+"""
+import json
+import os
+import subprocess
+import sys
+import unittest
+from importlib.resources import files
+
+DEFERRED_MODULES = ("yamale", "yaml", "backoff", "requests", "requests_mock", "unittest.mock", "smtplib", "email.mime")
+"""Modules which should only be imported by the service functions once actually needed by a request"""
+
+
+def service_import_modules(module_name):
+    """Imports a service module in a fresh interpreter, as Lambda would, and returns the names of all loaded modules"""
+    service_dir = str(files("pds.ingress").joinpath("service"))
+
+    env = dict(
+        os.environ,
+        AWS_DEFAULT_REGION="us-west-2",
+        LAMBDA_TASK_ROOT=str(files("tests.pds.ingress").joinpath("service")),
+        PYTHONPATH=service_dir,
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", f"import json, sys, {module_name}; print(json.dumps(sorted(sys.modules)))"],
+        cwd=service_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_service_cold_start_imports(self):
+        """Test that the service functions only import what their handlers need"""
+        for module_name in ("pds_ingress_app", "pds_status_app"):
+            with self.subTest(module_name=module_name):
+                loaded_modules = service_import_modules(module_name)
+
+                self.assertIn(module_name, loaded_modules)
+
+                deferred = [
+                    name
+                    for name in loaded_modules
+                    if any(name == prefix or name.startswith(f"{prefix}.") for prefix in DEFERRED_MODULES)
+                ]
+
+                self.assertListEqual(deferred, [], f"{module_name} eagerly imports {deferred}")
+
+
+if __name__ == "__main__":
+    unittest.main()
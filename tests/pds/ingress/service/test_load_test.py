@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import unittest
+
+import pds.ingress.service.pds_ingress_app as pds_ingress_app
+from tests.pds.ingress.service.load_test import percentile
+from tests.pds.ingress.service.load_test import run_load_test
+
+
+class LoadTestHarnessTest(unittest.TestCase):
+    def setUp(self) -> None:
+        # The service logger only logs each unique message once, reset it so
+        # messages logged by the harness do not suppress those expected elsewhere
+        for log_filter in pds_ingress_app.logger.filters:
+            self.addCleanup(getattr(log_filter, "logged_messages", set()).clear)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_run_load_test(self):
+        """Smoke test of the load-test harness with a small mix of skipped, single and multipart uploads"""
+        report = run_load_test(
+            num_batches=2,
+            batch_size=20,
+            size_mix={1024: 0.8, 6 * 1024**3: 0.2},
+            skip_ratio=0.5,
+            latency={"HeadObject": 0.001},
+        )
+
+        self.assertEqual(report["files"], 40)
+        self.assertEqual(sum(report["results"].values()), 40)
+        self.assertIn(204, report["results"])
+        self.assertIn(200, report["results"])
+
+        latency = report["batch_latency_ms"]
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+
+        self.assertGreater(report["s3_calls_per_file"]["HeadObject"], 0)
+        self.assertGreater(report["s3_calls_per_file"]["CreateMultipartUpload"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
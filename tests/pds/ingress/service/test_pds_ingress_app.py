@@ -1,3 +1,6 @@
+import base64
+import gzip
+import hashlib
 import json
 import os
 import unittest
@@ -11,16 +14,30 @@ os.environ["AWS_DEFAULT_REGION"] = "us-west-2"
 
 import botocore.auth
 import botocore.client
+import botocore.credentials
 import botocore.exceptions
 from importlib.resources import files
 
 from pds.ingress import __version__
+from pds.ingress.client.pds_ingress_client import request_batch_for_ingress
+from pds.ingress.service.pds_ingress_app import RESPONSE_CACHE
 from pds.ingress.service.pds_ingress_app import check_client_version
+from pds.ingress.service.pds_ingress_app import copy_existing_content
+from pds.ingress.service.pds_ingress_app import get_idempotency_key
 from pds.ingress.service.pds_ingress_app import get_dum_version
 from pds.ingress.service.pds_ingress_app import lambda_handler
+from pds.ingress.service.pds_ingress_app import process_multipart_upload
 from pds.ingress.service.pds_ingress_app import logger as service_logger
+from pds.ingress.service.pds_ingress_app import METRICS
 from pds.ingress.service.pds_ingress_app import should_upload_file
 from pds.ingress.service.pds_ingress_app import file_exists_in_bucket
+from pds.ingress.util.bloom_filter_util import BloomFilter
+from pds.ingress.util.bloom_filter_util import content_filter_item
+from pds.ingress.util.cache_util import compute_idempotency_key
+from pds.ingress.util.content_index_util import content_index_key
+from pds.ingress.util.content_index_util import encode_content_index_entry
+from pds.ingress.util.sigv4_util import SigV4Presigner
+from tests.pds.ingress.fake_s3 import FakeS3Client
 
 
 class PDSIngressAppTest(unittest.TestCase):
@@ -228,6 +245,312 @@ class PDSIngressAppTest(unittest.TestCase):
         with self.assertRaises(RuntimeError, msg="No request node ID provided in queryStringParameters"):
             lambda_handler(test_event, context)
 
+    @patch.object(botocore.client.BaseClient, "_make_api_call", mock_make_api_call)
+    def test_lambda_handler_partial_success(self):
+        """Test that per-file failures are reported individually rather than failing the batch"""
+        test_event = {
+            "body": json.dumps(
+                [
+                    {
+                        "ingress_path": f"/home/user/data/gbo.ast.catalina.survey/file_{index}.xml",
+                        "trimmed_path": f"gbo.ast.catalina.survey/file_{index}.xml",
+                        "md5": "deadbeefdeadbeefdeadbeef",
+                        "size": 1,
+                        "last_modified": os.path.getmtime(os.path.abspath(__file__)),
+                    }
+                    for index in range(3)
+                ]
+            ),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": False},
+        }
+
+        throttled = botocore.exceptions.ClientError(
+            error_response={"Error": {"Code": "SlowDown", "Message": "Please reduce your request rate."}},
+            operation_name="HeadObject",
+        )
+
+        def mock_file_exists(bucket_name, object_key, *args):
+            if object_key.endswith("file_1.xml"):
+                raise throttled
+            return False
+
+        emitted_metrics = []
+
+        with patch("pds.ingress.service.pds_ingress_app.file_exists_in_bucket", side_effect=mock_file_exists):
+            with patch.object(botocore.auth.HmacV1QueryAuth, "add_auth", MagicMock), patch.object(
+                METRICS, "output", emitted_metrics.append
+            ), patch("pds.ingress.service.pds_ingress_app.LOG_SAMPLE_RATE", 0.0), self.assertLogs(
+                logger=service_logger, level="INFO"
+            ) as cm:
+                response = lambda_handler(test_event, {})
+
+        self.assertEqual(response["statusCode"], 207)
+
+        # With sampling disabled, per-file outcomes are only reported by the batch summary
+        self.assertFalse(any("Processing request for" in line for line in cm.output))
+        self.assertFalse(any("Generated presigned URL" in line for line in cm.output))
+        self.assertTrue(any("3 file(s), 2 to upload, 0 copied, 0 already present, 1 failed" in line for line in cm.output))
+
+        # Stage metrics for the invocation should be emitted as a single EMF document
+        self.assertEqual(len(emitted_metrics), 1)
+
+        metrics = json.loads(emitted_metrics[0])
+
+        self.assertEqual(metrics["_aws"]["CloudWatchMetrics"][0]["Dimensions"], [["Service"]])
+        self.assertEqual(metrics["Node"], "sbn")
+        self.assertEqual(metrics["Files"], 3)
+        self.assertEqual(metrics["Presigns"], 2)
+        self.assertEqual(metrics["FileErrors"], 1)
+        self.assertEqual(metrics["PresignTime"]["Count"], 2)
+        self.assertEqual(metrics["InvocationTime"]["Count"], 1)
+
+        body = {result["trimmed_path"]: result for result in json.loads(response["body"])}
+
+        self.assertEqual(len(body), 3)
+        self.assertEqual(body["gbo.ast.catalina.survey/file_0.xml"]["result"], 200)
+        self.assertEqual(body["gbo.ast.catalina.survey/file_2.xml"]["result"], 200)
+
+        failed = body["gbo.ast.catalina.survey/file_1.xml"]
+        self.assertEqual(failed["result"], 503)
+        self.assertEqual(failed["index"], 1)
+        self.assertEqual(failed["error_code"], "SlowDown")
+        self.assertTrue(failed["retryable"])
+
+        # Malformed requests are reported as non-retryable
+        malformed_event = dict(test_event, body=json.dumps([{"trimmed_path": "gbo.ast.catalina.survey/file_0.xml"}]))
+
+        response = lambda_handler(malformed_event, {})
+
+        self.assertEqual(response["statusCode"], 207)
+
+        failed = json.loads(response["body"])[0]
+        self.assertEqual(failed["result"], 400)
+        self.assertFalse(failed["retryable"])
+
+        # Bucket access errors still fail the entire batch
+        with patch("pds.ingress.service.pds_ingress_app.check_bucket_access", return_value=False):
+            response = lambda_handler(test_event, {})
+
+        self.assertEqual(response["statusCode"], 500)
+        self.assertIn("error", json.loads(response["body"]))
+
+    @patch.object(botocore.client.BaseClient, "_make_api_call", mock_make_api_call)
+    def test_lambda_handler_idempotent_replay(self):
+        """Test that a replayed request is answered from the response cache"""
+        request_batch = [
+            {
+                "ingress_path": "/home/user/data/gbo.ast.catalina.survey/bundle_gbo.ast.catalina.survey_v1.0.xml",
+                "trimmed_path": "gbo.ast.catalina.survey/bundle_gbo.ast.catalina.survey_v1.0.xml",
+                "md5": "deadbeefdeadbeefdeadbeef",
+                "size": 1,
+                "last_modified": os.path.getmtime(os.path.abspath(__file__)),
+            }
+        ]
+
+        idempotency_key = compute_idempotency_key(
+            "sbn", request_batch, force_overwrite=False, upload_mode="put", response_schema="full"
+        )
+
+        test_event = {
+            "body": json.dumps(request_batch),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": "0", "IdempotencyKey": idempotency_key},
+        }
+
+        RESPONSE_CACHE.clear()
+
+        mock_process = MagicMock(return_value={"result": 204, "trimmed_path": request_batch[0]["trimmed_path"]})
+
+        with patch("pds.ingress.service.pds_ingress_app.process_ingress_request", mock_process):
+            first_response = lambda_handler(test_event, {})
+            second_response = lambda_handler(test_event, {})
+
+        # The replayed request should not have been reprocessed
+        self.assertEqual(mock_process.call_count, 1)
+        self.assertDictEqual(first_response, second_response)
+
+        # A key that does not match the request contents should never be served from cache
+        test_event["headers"]["IdempotencyKey"] = "0" * 64
+
+        with patch("pds.ingress.service.pds_ingress_app.process_ingress_request", mock_process):
+            lambda_handler(test_event, {})
+            lambda_handler(test_event, {})
+
+        self.assertEqual(mock_process.call_count, 3)
+
+        # Batches with failed files are never cached, so retries of them are processed again
+        test_event["headers"]["IdempotencyKey"] = idempotency_key
+
+        RESPONSE_CACHE.clear()
+
+        throttled = botocore.exceptions.ClientError({"Error": {"Code": "SlowDown"}}, "HeadObject")
+        mock_process = MagicMock(side_effect=throttled)
+
+        with patch("pds.ingress.service.pds_ingress_app.process_ingress_request", mock_process):
+            first_response = lambda_handler(test_event, {})
+            lambda_handler(test_event, {})
+
+        self.assertEqual(first_response["statusCode"], 207)
+        self.assertTrue(json.loads(first_response["body"])[0]["retryable"])
+        self.assertEqual(mock_process.call_count, 2)
+
+        RESPONSE_CACHE.clear()
+
+    def test_client_idempotency_key(self):
+        """Test that idempotency keys computed by the client are accepted by the service"""
+        request_batch = [
+            {
+                "ingress_path": "/home/user/data/gbo.ast.catalina.survey/bundle_gbo.ast.catalina.survey_v1.0.xml",
+                "trimmed_path": "gbo.ast.catalina.survey/bundle_gbo.ast.catalina.survey_v1.0.xml",
+                "md5": "deadbeefdeadbeefdeadbeef",
+                "size": 1,
+                "last_modified": os.path.getmtime(os.path.abspath(__file__)),
+            }
+        ]
+
+        api_gateway_config = {
+            "url_template": "https://{id}.execute-api.{region}.amazonaws.com/{stage}/{resource}",
+            "id": "test-api-id",
+            "region": "us-west-2",
+            "stage": "dev",
+        }
+
+        for allow_copy in (False, True):
+            with self.subTest(allow_copy=allow_copy):
+                mock_response = MagicMock(status_code=200)
+                mock_response.json.return_value = []
+
+                with patch("pds.ingress.client.pds_ingress_client.ALLOW_COPY", allow_copy), patch(
+                    "pds.ingress.client.pds_ingress_client.requests.post", return_value=mock_response
+                ) as mock_post:
+                    request_batch_for_ingress(request_batch, 0, "sbn", False, api_gateway_config)
+
+                headers = mock_post.call_args.kwargs["headers"]
+
+                self.assertEqual("AllowCopy" in headers, allow_copy)
+                self.assertEqual(get_idempotency_key(headers, "sbn", request_batch), headers["IdempotencyKey"])
+
+    @patch.object(botocore.client.BaseClient, "_make_api_call", mock_make_api_call)
+    def test_lambda_handler_post_policy(self):
+        """Test that small files share a presigned POST policy when requested"""
+        last_modified = os.path.getmtime(os.path.abspath(__file__))
+
+        request_batch = [
+            {
+                "ingress_path": f"/home/user/data/gbo.ast.catalina.survey/data/file_{index}.xml",
+                "trimmed_path": f"gbo.ast.catalina.survey/data/file_{index}.xml",
+                "md5": "deadbeefdeadbeefdeadbeefdeadbeef",
+                "size": size,
+                "last_modified": last_modified,
+            }
+            for index, size in enumerate((1, 2, 200 * 1024**2))
+        ]
+
+        test_event = {
+            "body": json.dumps(request_batch),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": "0", "UploadMode": "post"},
+        }
+
+        def mock_generate_presigned_post(Bucket, Key, Fields, Conditions, ExpiresIn):
+            return {"url": f"https://{Bucket}.s3.amazonaws.com/", "fields": dict(Fields, key=Key, policy="fake")}
+
+        with patch("pds.ingress.service.pds_ingress_app.file_exists_in_bucket", return_value=False), patch(
+            "pds.ingress.service.pds_ingress_app.s3_client.generate_presigned_post",
+            side_effect=mock_generate_presigned_post,
+        ) as mock_post, patch.object(botocore.auth.HmacV1QueryAuth, "add_auth", MagicMock):
+            response = lambda_handler(test_event, {})
+
+        self.assertEqual(response["statusCode"], 200)
+
+        body = json.loads(response["body"])
+
+        # Both small files live in the same bucket, so should share one policy
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(body["policies"]), 1)
+
+        _, kwargs = mock_post.call_args
+        self.assertTrue(kwargs["Key"].endswith("gbo.ast.catalina.survey/data/file_${filename}"))
+        # Policy size range should be limited to the largest file it covers
+        self.assertIn(["content-length-range", 1, 2], kwargs["Conditions"])
+
+        results = {result["trimmed_path"]: result for result in body["results"]}
+
+        for index in (0, 1):
+            result = results[f"gbo.ast.catalina.survey/data/file_{index}.xml"]
+            self.assertEqual(result["policy"], 0)
+            self.assertNotIn("s3_url", result)
+            self.assertNotIn("_bucket_info", result)
+            self.assertTrue(result["fields"]["key"].endswith(f"gbo.ast.catalina.survey/data/file_{index}.xml"))
+            self.assertEqual(result["fields"]["x-amz-meta-md5"], "deadbeefdeadbeefdeadbeefdeadbeef")
+
+        # Files over the POST size limit still receive a dedicated presigned URL
+        large_result = results["gbo.ast.catalina.survey/data/file_2.xml"]
+        self.assertNotIn("policy", large_result)
+        self.assertIn("s3_url", large_result)
+
+    @patch.object(botocore.client.BaseClient, "_make_api_call", mock_make_api_call)
+    def test_lambda_handler_response_encoding(self):
+        """Test slim, compressed and offloaded batch responses"""
+        request_batch = [
+            {
+                "ingress_path": f"/home/user/data/gbo.ast.catalina.survey/file_{index}.xml",
+                "trimmed_path": f"gbo.ast.catalina.survey/file_{index}.xml",
+                "md5": "deadbeefdeadbeefdeadbeefdeadbeef",
+                "size": 1,
+                "last_modified": os.path.getmtime(os.path.abspath(__file__)),
+            }
+            for index in range(3)
+        ]
+
+        test_event = {
+            "body": json.dumps(request_batch),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {
+                "ClientVersion": __version__,
+                "ForceOverwrite": "0",
+                "ResponseSchema": "slim",
+                "accept": "application/gzip, application/json",
+            },
+        }
+
+        fake_s3 = FakeS3Client(buckets=("pds-offload-test", "pds-sbn-staging-test", "pds-sbn-archive-test"))
+
+        with patch("pds.ingress.service.pds_ingress_app.file_exists_in_bucket", return_value=False), patch.object(
+            botocore.auth.HmacV1QueryAuth, "add_auth", MagicMock
+        ), patch("pds.ingress.service.pds_ingress_app.COMPRESS_RESPONSES", True):
+            response = lambda_handler(test_event, {})
+
+            # Force the same response to be offloaded to S3
+            with patch("pds.ingress.service.pds_ingress_app.RESPONSE_OFFLOAD_THRESHOLD", 0), patch(
+                "pds.ingress.service.pds_ingress_app.RESPONSE_OFFLOAD_BUCKET", "pds-offload-test"
+            ), patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+                offloaded_response = lambda_handler(test_event, {})
+
+        self.assertTrue(response["isBase64Encoded"])
+        self.assertEqual(response["headers"]["Content-Encoding"], "gzip")
+
+        results = json.loads(gzip.decompress(base64.b64decode(response["body"])))
+
+        self.assertListEqual(sorted(result["index"] for result in results), [0, 1, 2])
+
+        for result in results:
+            self.assertEqual(result["result"], 200)
+            self.assertIn("s3_url", result)
+
+            # Fields echoed from the request should be omitted
+            for field in ("ingress_path", "trimmed_path", "md5", "base64_md5", "message"):
+                self.assertNotIn(field, result)
+
+        offload_url = json.loads(offloaded_response["body"])["offloaded_response"]
+        offloaded_key = offload_url.split("?")[0].split("/", 3)[-1]
+
+        offloaded_object = fake_s3.buckets["pds-offload-test"][offloaded_key]
+
+        self.assertEqual(offloaded_object["ContentEncoding"], "gzip")
+        self.assertEqual(len(json.loads(gzip.decompress(offloaded_object["Body"]))), 3)
+
     def test_should_upload_file(self):
         """Test decision logic for whether a file should be uploaded (with staging + archive bucket checks)."""
         staging_bucket = "pds-staging-test"
@@ -349,6 +672,442 @@ class PDSIngressAppTest(unittest.TestCase):
 
         self.assertTrue(exists)
 
+    def test_process_multipart_upload_fast_presign(self):
+        """Test generation of multipart upload URLs with the in-process SigV4 presigner"""
+        presigner = SigV4Presigner(
+            botocore.credentials.Credentials("AKIDEXAMPLE", "secret"), region_name="us-west-2", service_name="s3"
+        )
+
+        with patch("pds.ingress.service.pds_ingress_app.FAST_PRESIGN", True), patch(
+            "pds.ingress.service.pds_ingress_app.fast_presigner", presigner
+        ), patch("pds.ingress.service.pds_ingress_app.BUCKET_BASE_URLS", {}), patch(
+            "pds.ingress.service.pds_ingress_app.EXPECTED_BUCKET_OWNER", "123456789012"
+        ), patch.object(
+            botocore.auth.HmacV1QueryAuth, "add_auth", MagicMock
+        ), patch(
+            "pds.ingress.service.pds_ingress_app.s3_client.create_multipart_upload", return_value={"UploadId": "uid"}
+        ):
+            signed_urls, complete_upload_url, _, num_parts = process_multipart_upload(
+                {"name": "pds-sbn-staging-test"},
+                "sbn/large file.img",
+                file_size=120000000,
+                md5_digest="deadbeef",
+                base64_md5_digest="3q2+7w==",
+                last_modified=1704067200,
+                client_version=__version__,
+                service_version=__version__,
+            )
+
+        self.assertEqual(num_parts, 3)
+        self.assertEqual(len(signed_urls), 3)
+
+        for part_num, signed_url in enumerate(signed_urls, start=1):
+            self.assertTrue(
+                signed_url.startswith(
+                    "https://pds-sbn-staging-test.s3.amazonaws.com/sbn/large%20file.img"
+                    f"?uploadId=uid&partNumber={part_num}&x-amz-expected-bucket-owner=123456789012"
+                    "&X-Amz-Algorithm=AWS4-HMAC-SHA256"
+                )
+            )
+            self.assertIn("X-Amz-Signature=", signed_url)
+
+        self.assertIn("uploadId=uid", complete_upload_url)
+
+    def test_lambda_handler_content_copy(self):
+        """Test that content already ingested under another key is copied server-side, rather than uploaded"""
+        content = b"reorganized bundle content"
+        md5_digest = hashlib.md5(content).hexdigest()
+        moved_md5_digest = hashlib.md5(b"stale").hexdigest()
+
+        fake_s3 = FakeS3Client(buckets=("pds-index-test", "pds-sbn-staging-test", "pds-sbn-archive-test"))
+        fake_s3.put_object(
+            Bucket="pds-sbn-archive-test", Key="sbn/old_collection/file.xml", Body=content, Metadata={"md5": md5_digest}
+        )
+
+        # The first entry points to the archived object, the second to an object which no longer exists
+        fake_s3.put_object(
+            Bucket="pds-index-test",
+            Key=content_index_key("content-index", "sbn", md5_digest, len(content)),
+            Body=encode_content_index_entry("pds-sbn-archive-test", "sbn/old_collection/file.xml"),
+        )
+        fake_s3.put_object(
+            Bucket="pds-index-test",
+            Key=content_index_key("content-index", "sbn", moved_md5_digest, 5),
+            Body=encode_content_index_entry("pds-sbn-archive-test", "sbn/deleted/file.xml"),
+        )
+
+        request_batch = [
+            {
+                "ingress_path": "/home/user/data/new_collection/file.xml",
+                "trimmed_path": "new_collection/file.xml",
+                "md5": md5_digest,
+                "size": len(content),
+                "last_modified": 1704067200,
+            },
+            {
+                "ingress_path": "/home/user/data/new_collection/other.xml",
+                "trimmed_path": "new_collection/other.xml",
+                "md5": moved_md5_digest,
+                "size": 5,
+                "last_modified": 1704067200,
+            },
+        ]
+
+        test_event = {
+            "body": json.dumps(request_batch),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": "0", "AllowCopy": "1"},
+        }
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3), patch(
+            "pds.ingress.service.pds_ingress_app.CONTENT_INDEX_BUCKET", "pds-index-test"
+        ):
+            response = lambda_handler(test_event, {})
+
+        self.assertEqual(response["statusCode"], 200)
+
+        copy_result, upload_result = json.loads(response["body"])
+
+        self.assertEqual(copy_result["result"], 201)
+        self.assertEqual(copy_result["action"], "copy")
+        self.assertEqual(copy_result["copy_source"], "pds-sbn-archive-test/sbn/old_collection/file.xml")
+        self.assertNotIn("s3_url", copy_result)
+
+        copied_object = fake_s3.buckets["pds-sbn-staging-test"]["sbn/new_collection/file.xml"]
+
+        self.assertEqual(copied_object["Body"], content)
+        self.assertEqual(copied_object["Metadata"]["md5"], md5_digest)
+        self.assertEqual(copied_object["Metadata"]["dum_client_version"], __version__)
+
+        # The stale entry results in an upload request, but the index is left
+        # untouched, since it is only updated once the uploaded object exists
+        self.assertEqual(upload_result["result"], 200)
+        self.assertIn("s3_url", upload_result)
+
+        index_entry = fake_s3.buckets["pds-index-test"][content_index_key("content-index", "sbn", moved_md5_digest, 5)]
+
+        self.assertDictEqual(
+            json.loads(index_entry["Body"]), {"bucket": "pds-sbn-archive-test", "key": "sbn/deleted/file.xml"}
+        )
+
+        # Clients which do not accept copies are always asked to upload
+        test_event["headers"].pop("AllowCopy")
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3), patch(
+            "pds.ingress.service.pds_ingress_app.CONTENT_INDEX_BUCKET", "pds-index-test"
+        ), patch("pds.ingress.service.pds_ingress_app.file_exists_in_bucket", return_value=False):
+            response = lambda_handler(test_event, {})
+
+        self.assertListEqual([result["result"] for result in json.loads(response["body"])], [200, 200])
+
+    def test_copy_existing_content_limits(self):
+        """Test that only small, unchanged objects are copied server-side"""
+        content = b"large reorganized content"
+        md5_digest = hashlib.md5(content).hexdigest()
+
+        fake_s3 = FakeS3Client(buckets=("pds-index-test", "pds-sbn-staging-test", "pds-sbn-archive-test"))
+        fake_s3.put_object(
+            Bucket="pds-sbn-archive-test", Key="sbn/old/file.xml", Body=content, Metadata={"md5": md5_digest}
+        )
+        fake_s3.put_object(
+            Bucket="pds-index-test",
+            Key=content_index_key("content-index", "sbn", md5_digest, len(content)),
+            Body=encode_content_index_entry("pds-sbn-archive-test", "sbn/old/file.xml"),
+        )
+
+        test_event = {
+            "body": json.dumps(
+                [
+                    {
+                        "ingress_path": "/home/user/data/new/file.xml",
+                        "trimmed_path": "new/file.xml",
+                        "md5": md5_digest,
+                        "size": len(content),
+                        "last_modified": 1704067200,
+                    }
+                ]
+            ),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": "0", "AllowCopy": "1"},
+        }
+
+        # Objects too large to copy well within the API timeout are uploaded instead
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3), patch(
+            "pds.ingress.service.pds_ingress_app.CONTENT_INDEX_BUCKET", "pds-index-test"
+        ), patch("pds.ingress.service.pds_ingress_app.COPY_MAX_SIZE", len(content) - 1):
+            response = lambda_handler(test_event, {})
+
+        (result,) = json.loads(response["body"])
+
+        self.assertEqual(result["result"], 200)
+        self.assertIn("s3_url", result)
+        self.assertNotIn("CopyObject", fake_s3.calls)
+
+        # Sources which change after they are verified are not copied
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+            with self.assertRaises(botocore.exceptions.ClientError):
+                copy_existing_content(
+                    ("pds-sbn-archive-test", "sbn/old/file.xml", '"stale"'),
+                    {"name": "pds-sbn-staging-test"},
+                    "sbn/new/file.xml",
+                    file_size=len(content),
+                    md5_digest=md5_digest,
+                    base64_md5_digest=base64.b64encode(hashlib.md5(content).digest()).decode(),
+                    last_modified=1704067200,
+                    client_version=__version__,
+                    service_version=__version__,
+                )
+
+        self.assertNotIn("sbn/new/file.xml", fake_s3.buckets["pds-sbn-staging-test"])
+
+    def test_lambda_handler_preflight(self):
+        """Test classification of files by size and modification time, prior to hashing"""
+        fake_s3 = FakeS3Client(buckets=("pds-sbn-staging-test", "pds-sbn-archive-test"))
+        fake_s3.put_object(
+            Bucket="pds-sbn-staging-test",
+            Key="sbn/bundle/unchanged.xml",
+            Body=b"12345",
+            Metadata={"mtime": "1704067200.0"},
+        )
+        fake_s3.put_object(
+            Bucket="pds-sbn-archive-test",
+            Key="sbn/bundle/touched.xml",
+            Body=b"12345",
+            Metadata={"mtime": "1704067100.0"},
+        )
+        fake_s3.put_object(Bucket="pds-sbn-archive-test", Key="sbn/bundle/resized.xml", Body=b"1234")
+
+        preflight_requests = [
+            {"trimmed_path": f"bundle/{name}.xml", "size": 5, "last_modified": 1704067200}
+            for name in ("unchanged", "touched", "resized", "missing")
+        ]
+
+        test_event = {
+            "body": json.dumps({"action": "preflight", "files": preflight_requests + [{"size": 1}]}),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__},
+        }
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+            response = lambda_handler(test_event, {})
+
+        self.assertEqual(response["statusCode"], 200)
+
+        # Malformed entries are conservatively reported as needing a hash
+        self.assertListEqual(
+            json.loads(response["body"])["states"], ["unchanged", "needs_hash", "new", "new", "needs_hash"]
+        )
+
+        # The archive is not checked for files found unchanged in staging
+        self.assertEqual(fake_s3.calls["HeadObject"], 7)
+
+        # Files found to be new are not checked again by the ingress request
+        fake_s3.calls.clear()
+
+        test_event = {
+            "body": json.dumps(
+                [
+                    {
+                        "ingress_path": "/data/bundle/missing.xml",
+                        "trimmed_path": "bundle/missing.xml",
+                        "md5": "deadbeefdeadbeefdeadbeefdeadbeef",
+                        "size": 5,
+                        "last_modified": 1704067200,
+                        "preflight": "new",
+                    }
+                ]
+            ),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__, "ForceOverwrite": "0"},
+        }
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+            response = lambda_handler(test_event, {})
+
+        self.assertEqual(json.loads(response["body"])[0]["result"], 200)
+        self.assertNotIn("HeadObject", fake_s3.calls)
+
+    def test_lambda_handler_list(self):
+        """Test paginated listing of the objects ingested by a node across all of its buckets"""
+        fake_s3 = FakeS3Client(buckets=("pds-sbn-staging-test", "pds-sbn-archive-test"))
+        fake_s3.put_object(Bucket="pds-sbn-archive-test", Key="sbn/bundle/a.xml", Body=b"a")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="sbn/bundle/b.xml", Body=b"bb")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="sbn/bundle/c.img", Body=b"ccc")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="sbn/other/d.xml", Body=b"d")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="eng/bundle/e.xml", Body=b"e")
+
+        # Objects uploaded in parts have no usable MD5
+        fake_s3.buckets["pds-sbn-staging-test"]["sbn/bundle/c.img"]["ETag"] = '"0123456789abcdef-2"'
+
+        entries = []
+        page_token = None
+        num_pages = 0
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3), patch(
+            "pds.ingress.service.pds_ingress_app.LISTING_PAGE_SIZE", 1
+        ):
+            while True:
+                body = {"action": "list", "prefix": "bundle/"}
+
+                if page_token:
+                    body["page_token"] = page_token
+
+                response = lambda_handler(
+                    {
+                        "body": json.dumps(body),
+                        "queryStringParameters": {"node": "sbn"},
+                        "headers": {"ClientVersion": __version__},
+                    },
+                    {},
+                )
+
+                self.assertEqual(response["statusCode"], 200)
+
+                page = json.loads(response["body"])
+                entries.extend(page["entries"])
+                num_pages += 1
+
+                page_token = page["next_page_token"]
+
+                if not page_token:
+                    break
+
+            response = lambda_handler(
+                {
+                    "body": json.dumps({"action": "list", "prefix": "bundle/", "page_token": "bogus"}),
+                    "queryStringParameters": {"node": "sbn"},
+                    "headers": {"ClientVersion": __version__},
+                },
+                {},
+            )
+
+            self.assertEqual(response["statusCode"], 400)
+
+        self.assertEqual(num_pages, 3)
+
+        self.assertListEqual(
+            [entry[:3] for entry in entries],
+            [
+                ["bundle/a.xml", 1, hashlib.md5(b"a").hexdigest()],
+                ["bundle/b.xml", 2, hashlib.md5(b"bb").hexdigest()],
+                ["bundle/c.img", 3, None],
+            ],
+        )
+
+    def test_lambda_handler_content_filter(self):
+        """Test building, publishing and fetching the content filter of a node"""
+        fake_s3 = FakeS3Client(buckets=("pds-sbn-staging-test", "pds-sbn-archive-test", "pds-content-filters"))
+        fake_s3.put_object(Bucket="pds-sbn-archive-test", Key="sbn/bundle/a.xml", Body=b"a")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="sbn/bundle/b.xml", Body=b"bb")
+        fake_s3.put_object(Bucket="pds-sbn-staging-test", Key="eng/bundle/c.xml", Body=b"ccc")
+
+        # The MD5 of objects uploaded in parts is read from their metadata
+        fake_s3.put_object(
+            Bucket="pds-sbn-staging-test",
+            Key="sbn/bundle/d.img",
+            Body=b"dddd",
+            Metadata={"md5": hashlib.md5(b"dddd").hexdigest()},
+        )
+        fake_s3.buckets["pds-sbn-staging-test"]["sbn/bundle/d.img"]["ETag"] = '"0123456789abcdef-2"'
+
+        filter_request = {
+            "body": json.dumps({"action": "filter"}),
+            "queryStringParameters": {"node": "sbn"},
+            "headers": {"ClientVersion": __version__},
+        }
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+            # Filters are disabled until a bucket is configured
+            response = lambda_handler(filter_request, {})
+
+            self.assertEqual(response["statusCode"], 501)
+
+            with patch("pds.ingress.service.pds_ingress_app.CONTENT_FILTER_BUCKET", "pds-content-filters"):
+                # Nothing published yet
+                response = lambda_handler(filter_request, {})
+
+                self.assertEqual(response["statusCode"], 404)
+
+                summaries = lambda_handler({"content_filter": {"nodes": ["sbn"], "false_positive_rate": 0.001}}, None)
+
+                self.assertEqual(len(summaries), 1)
+                self.assertEqual(summaries[0]["num_items"], 3)
+                self.assertLessEqual(summaries[0]["false_positive_rate"], 0.001)
+
+                response = lambda_handler(filter_request, {})
+
+        self.assertEqual(response["statusCode"], 200)
+
+        filter_details = json.loads(response["body"])
+
+        self.assertEqual(filter_details["num_items"], 3)
+        self.assertIn("content-filters/sbn.bloom", filter_details["url"])
+
+        filter_object = fake_s3.buckets["pds-content-filters"]["content-filters/sbn.bloom"]
+        content_filter = BloomFilter.from_bytes(filter_object["Body"])
+
+        self.assertEqual(filter_details["size"], len(content_filter.to_bytes()))
+
+        for trimmed_path, body in (("bundle/a.xml", b"a"), ("bundle/b.xml", b"bb"), ("bundle/d.img", b"dddd")):
+            self.assertIn(content_filter_item(trimmed_path, hashlib.md5(body).hexdigest(), len(body)), content_filter)
+
+        # Content of other nodes, and changed content, is not present
+        self.assertNotIn(content_filter_item("bundle/c.xml", hashlib.md5(b"ccc").hexdigest(), 3), content_filter)
+        self.assertNotIn(content_filter_item("bundle/b.xml", hashlib.md5(b"bb").hexdigest(), 3), content_filter)
+
+    def test_lambda_handler_status_result(self):
+        """Test polling of the state and results pages of a status job"""
+        fake_s3 = FakeS3Client(buckets=("pds-status-jobs",))
+        job_id = "0123456789abcdef0123456789abcdef"
+
+        def status_result_request(body):
+            return {
+                "body": json.dumps(dict(body, action="status_result")),
+                "queryStringParameters": {"node": "sbn"},
+                "headers": {"ClientVersion": __version__},
+            }
+
+        with patch("pds.ingress.service.pds_ingress_app.s3_client", fake_s3):
+            # Polling is disabled until a bucket is configured
+            response = lambda_handler(status_result_request({"job_id": job_id}), {})
+
+            self.assertEqual(response["statusCode"], 501)
+
+            with patch.multiple(
+                "pds.ingress.service.pds_ingress_app", STATUS_JOB_BUCKET="pds-status-jobs", STATUS_RESULT_MAX_PAGES=2
+            ):
+                response = lambda_handler(status_result_request({"job_id": "../other"}), {})
+
+                self.assertEqual(response["statusCode"], 400)
+
+                # Jobs not yet picked up by the status service are pending
+                response = lambda_handler(status_result_request({"job_id": job_id}), {})
+
+                self.assertEqual(response["statusCode"], 200)
+                self.assertDictEqual(json.loads(response["body"]), {"job_id": job_id, "state": "pending"})
+
+                fake_s3.put_object(
+                    Bucket="pds-status-jobs",
+                    Key=f"status-jobs/sbn/{job_id}/status.json",
+                    Body=json.dumps(
+                        {"job_id": job_id, "state": "complete", "num_files": 5, "status": {"Uploaded": 5}, "num_pages": 3}
+                    ),
+                )
+
+                first_response = json.loads(lambda_handler(status_result_request({"job_id": job_id}), {})["body"])
+                last_response = json.loads(
+                    lambda_handler(status_result_request({"job_id": job_id, "page": 2}), {})["body"]
+                )
+
+        self.assertEqual(first_response["state"], "complete")
+        self.assertListEqual([page["page"] for page in first_response["pages"]], [0, 1])
+        self.assertIn(f"status-jobs/sbn/{job_id}/pages/000001.jsonl.gz", first_response["pages"][1]["url"])
+        self.assertEqual(first_response["next_page"], 2)
+
+        self.assertListEqual([page["page"] for page in last_response["pages"]], [2])
+        self.assertIsNone(last_response["next_page"])
+
+
 
 if __name__ == "__main__":
     unittest.main()
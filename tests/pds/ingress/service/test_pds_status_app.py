@@ -1,3 +1,6 @@
+import gzip
+import hashlib
+import io
 import json
 import os
 import unittest
@@ -10,23 +13,33 @@ from unittest.mock import patch
 import botocore.client
 import botocore.exceptions
 import pds.ingress.service.pds_status_app
+from pds.ingress.service.pds_status_app import lambda_handler
 import pds.ingress.util.config_util
+from pds.ingress.service.pds_status_app import close_smtp_session
+from pds.ingress.service.pds_status_app import covering_prefixes
 from pds.ingress.service.pds_status_app import get_ingress_status
 from pds.ingress.service.pds_status_app import parse_manifest
 from pds.ingress.service.pds_status_app import process_manifest
+from pds.ingress.service.pds_status_app import publish_status_report
+from pds.ingress.service.pds_status_app import send_email
+from pds.ingress.service.pds_status_app import status_job_id
+from pds.ingress.service.pds_status_app import summarize_results
+from pds.ingress.client.pds_status_client import wait_for_status_job
+from tests.pds.ingress.fake_s3 import FakeS3Client
 
 
 class MockS3Client:
     """Mock implementation for the boto3 S3 client class"""
 
-    def download_file(self, Bucket: str, Key: str, Filename: str):
-        """Simulate download of the file"""
-        with open(Filename, "w") as outfile:
-            outfile.write(
-                '{"gbo.ast.catalina.survey/calibration/703/2022/22Apr01/mflat.703.20210907.fits.fz": '
-                '{"md5": "186699c0133422ce3eb6129d1fe41e30", "size": 17962560, '  # pragma: allowlist secret
-                '"last_modified": "2024-08-19T20:36:50+00:00"}}'
+    def get_object(self, Bucket: str, Key: str, **kwargs):
+        """Simulate streaming of the file"""
+        return {
+            "Body": io.BytesIO(
+                b'{"gbo.ast.catalina.survey/calibration/703/2022/22Apr01/mflat.703.20210907.fits.fz": '
+                b'{"md5": "186699c0133422ce3eb6129d1fe41e30", "size": 17962560, '  # pragma: allowlist secret
+                b'"last_modified": "2024-08-19T20:36:50+00:00"}}'
             )
+        }
 
 
 class PDSStatusAppTest(unittest.TestCase):
@@ -64,7 +77,7 @@ class PDSStatusAppTest(unittest.TestCase):
 
         self.assertEqual(request_node, "eng")
         self.assertEqual(return_email, "email@email.com")  # pragma: allowlist secret
-        self.assertDictEqual(json.loads(self.test_manifest), parsed_manifest)
+        self.assertDictEqual(json.loads(self.test_manifest), dict(parsed_manifest))
 
         # Test with missing attributes
         test_record = {"body": self.test_manifest, "messageAttributes": {}}
@@ -72,6 +85,28 @@ class PDSStatusAppTest(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             parse_manifest(test_record)
 
+    def test_parse_compressed_manifest(self):
+        """Test streaming decompression of a manifest uploaded compressed"""
+        fake_s3 = FakeS3Client(buckets=("pds-manifests",))
+        fake_s3.put_object(
+            Bucket="pds-manifests",
+            Key="eng/manifests/manifest.json.gz",
+            Body=gzip.compress(self.test_manifest.encode(), mtime=0),
+        )
+
+        test_record = {
+            "body": json.dumps("s3://pds-manifests/eng/manifests/manifest.json.gz"),
+            "messageAttributes": {
+                "email": {"stringValue": '"email@email.com"'},  # pragma: allowlist secret
+                "node": {"stringValue": '"eng"'},
+            },
+        }
+
+        with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3):
+            _, _, parsed_manifest = parse_manifest(test_record)
+
+            self.assertDictEqual(json.loads(self.test_manifest), dict(parsed_manifest))
+
     def test_process_manifest(self):
         """Test processing of a parsed manifest"""
         parsed_manifest = json.loads(self.test_manifest)
@@ -138,3 +173,371 @@ class PDSStatusAppTest(unittest.TestCase):
         with patch.object(botocore.client.BaseClient, "_make_api_call", mock_head_object):
             ingress_status = get_ingress_status("bucket-name", "key/to/mflat.703.20210907.fits.fz", file_info)
             self.assertEqual(ingress_status, "Missing")
+
+    def test_covering_prefixes(self):
+        """Test derivation of the directory prefixes covering a set of paths"""
+        prefixes = covering_prefixes(
+            ["a/b/c/file.xml", "a/b/file.xml", "a-b/file.xml", "a/bc/file.xml", "d/e/file.xml", "d/e/f/file.xml"]
+        )
+
+        self.assertListEqual(prefixes, ["a-b/", "a/b/", "a/bc/", "d/e/"])
+
+        # Files at the root of the node require the whole node to be listed
+        self.assertListEqual(covering_prefixes(["file.xml", "a/file.xml"]), [""])
+
+    def test_process_manifest_from_listings(self):
+        """Test statusing of a manifest from bucket listings, with HEAD requests only where required"""
+        test_bucket_map = {
+            "NODES": {
+                "ENG": {
+                    "buckets": {
+                        "staging": {"name": "pds-eng-staging-test"},
+                        "archive": {"name": "pds-eng-archive-test"},
+                    },
+                    "paths": [{"prefix": "manifests/*", "bucket": {"name": "pds-eng-manifests-test"}}],
+                }
+            }
+        }
+
+        last_modified = "2024-08-19T20:36:50+00:00"
+
+        def manifest_entry(body):
+            return {"md5": hashlib.md5(body).hexdigest(), "size": len(body), "last_modified": last_modified}
+
+        manifest = {
+            "bundle/uploaded.xml": manifest_entry(b"uploaded"),
+            "bundle/resized.xml": manifest_entry(b"resized"),
+            "bundle/missing.xml": manifest_entry(b"missing"),
+            "bundle/external.xml": manifest_entry(b"external"),
+            "bundle/data/multipart.img": manifest_entry(b"multipart"),
+            "bundle/data/changed.img": manifest_entry(b"changed"),
+            "bundle/data/touched.img": manifest_entry(b"touched"),
+            "manifests/manifest.json": manifest_entry(b"{}"),
+            "readme.txt": manifest_entry(b"readme"),
+        }
+
+        def dum_metadata(trimmed_path, **overrides):
+            return dict(
+                {"md5": manifest[trimmed_path]["md5"], "last_modified": last_modified},
+                **overrides,
+            )
+
+        fake_s3 = FakeS3Client(buckets=("pds-eng-staging-test", "pds-eng-manifests-test"))
+
+        for trimmed_path, body, metadata in (
+            ("bundle/uploaded.xml", b"uploaded", dum_metadata("bundle/uploaded.xml")),
+            ("bundle/resized.xml", b"resized!", dum_metadata("bundle/resized.xml")),
+            ("bundle/other.xml", b"other", {}),
+            # Identical content written outside of DUM, without its metadata
+            ("bundle/external.xml", b"external", {}),
+            ("bundle/data/multipart.img", b"multipart", dum_metadata("bundle/data/multipart.img")),
+            (
+                "bundle/data/changed.img",
+                b"CHANGED",
+                dum_metadata("bundle/data/changed.img", md5=hashlib.md5(b"CHANGED").hexdigest()),
+            ),
+            (
+                "bundle/data/touched.img",
+                b"touched",
+                dum_metadata("bundle/data/touched.img", last_modified="2025-01-01T00:00:00+00:00"),
+            ),
+            ("readme.txt", b"readme", dum_metadata("readme.txt")),
+        ):
+            fake_s3.put_object(Bucket="pds-eng-staging-test", Key=f"eng/{trimmed_path}", Body=body, Metadata=metadata)
+
+        fake_s3.buckets["pds-eng-staging-test"]["eng/bundle/data/multipart.img"]["ETag"] = '"0123456789abcdef-2"'
+
+        fake_s3.put_object(
+            Bucket="pds-eng-manifests-test",
+            Key="eng/manifests/manifest.json",
+            Body=b"{}",
+            Metadata=dum_metadata("manifests/manifest.json"),
+        )
+
+        expected_results = {
+            "bundle/uploaded.xml": "Uploaded",
+            "bundle/resized.xml": "Modified",
+            "bundle/missing.xml": "Missing",
+            "bundle/external.xml": "Modified",
+            "bundle/data/multipart.img": "Uploaded",
+            "bundle/data/changed.img": "Modified",
+            "bundle/data/touched.img": "Modified",
+            "manifests/manifest.json": "Uploaded",
+            "readme.txt": "Uploaded",
+        }
+
+        # Statusing from listings must agree with statusing every file by HEAD request
+        for listing_threshold in (1, len(manifest) + 1):
+            with self.subTest(listing_threshold=listing_threshold):
+                fake_s3.calls.clear()
+
+                with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3), patch.object(
+                    pds.ingress.service.pds_status_app, "STATUS_LISTING_THRESHOLD", listing_threshold
+                ):
+                    results = process_manifest("eng", manifest, test_bucket_map)
+
+                self.assertDictEqual(results, expected_results)
+
+        # Missing and resized files need no HEAD request when statused from listings
+        self.assertEqual(fake_s3.calls["HeadObject"], len(manifest))
+
+        fake_s3.calls.clear()
+
+        with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3), patch.object(
+            pds.ingress.service.pds_status_app, "STATUS_LISTING_THRESHOLD", 1
+        ):
+            process_manifest("eng", manifest, test_bucket_map)
+
+        self.assertEqual(fake_s3.calls["HeadObject"], len(manifest) - 2)
+
+    def test_lambda_handler_fan_out(self):
+        """Test splitting of a large manifest into chunks statused by separate invocations, and merging of results"""
+        fake_s3 = FakeS3Client(buckets=("pds-eng-staging-test", "pds-manifests", "pds-status-jobs"))
+        manifest = {}
+
+        for index in range(5):
+            body = f"file {index}".encode()
+            manifest[f"bundle/file_{index}.xml"] = {
+                "md5": hashlib.md5(body).hexdigest(),
+                "size": len(body),
+                "last_modified": "2024-08-19T20:36:50+00:00",
+            }
+
+            # Every other file was uploaded
+            if index % 2 == 0:
+                fake_s3.put_object(
+                    Bucket="pds-eng-staging-test",
+                    Key=f"eng/bundle/file_{index}.xml",
+                    Body=body,
+                    Metadata={"md5": hashlib.md5(body).hexdigest(), "last_modified": "2024-08-19T20:36:50+00:00"},
+                )
+
+        fake_s3.put_object(Bucket="pds-manifests", Key="eng/manifest.json", Body=json.dumps(manifest))
+
+        manifest_record = {
+            "messageId": "manifest-message",
+            "body": json.dumps("s3://pds-manifests/eng/manifest.json"),
+            "messageAttributes": {
+                "email": {"stringValue": '"email@email.com"'},  # pragma: allowlist secret
+                "node": {"stringValue": '"eng"'},
+            },
+        }
+
+        mock_sqs = MagicMock()
+        mock_sqs.send_message_batch.return_value = {"Successful": []}
+        mock_send_email = MagicMock()
+
+        with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3), patch.object(
+            pds.ingress.service.pds_status_app, "sqs_client", mock_sqs
+        ), patch.object(pds.ingress.service.pds_status_app, "send_email", mock_send_email), patch.multiple(
+            pds.ingress.service.pds_status_app,
+            STATUS_CHUNK_SIZE=2,
+            STATUS_JOB_BUCKET="pds-status-jobs",
+            STATUS_QUEUE_URL="https://sqs.fake/status-queue",
+        ):
+            response = lambda_handler({"Records": [manifest_record]}, None)
+
+            self.assertNotIn("batchItemFailures", response)
+            mock_send_email.assert_not_called()
+
+            chunk_records = [
+                {"messageId": f"chunk-message-{entry['Id']}", "body": entry["MessageBody"]}
+                for call in mock_sqs.send_message_batch.call_args_list
+                for entry in call.kwargs["Entries"]
+            ]
+
+            self.assertEqual(len(chunk_records), 3)
+
+            # Failures of individual chunks are reported without failing the others
+            bad_record = {
+                "messageId": "bad-chunk",
+                "body": json.dumps({"status_chunk": {"node": "eng", "job_id": "..", "chunk_index": 0}}),
+            }
+
+            response = lambda_handler({"Records": chunk_records[:2] + [bad_record]}, None)
+
+            self.assertListEqual(response["batchItemFailures"], [{"itemIdentifier": "bad-chunk"}])
+            mock_send_email.assert_not_called()
+
+            # The invocation completing the final chunk sends the merged report, exactly once
+            lambda_handler({"Records": chunk_records[2:]}, None)
+            lambda_handler({"Records": chunk_records[2:]}, None)
+
+        mock_send_email.assert_called_once()
+
+        message_body, return_email = mock_send_email.call_args.args
+
+        self.assertEqual(return_email, "email@email.com")  # pragma: allowlist secret
+
+        # The email carries a summary, listing only the files which were not uploaded
+        self.assertIn("Uploaded: 3", message_body)
+        self.assertIn("Missing: 2", message_body)
+        self.assertIn("bundle/file_1.xml: Missing", message_body)
+        self.assertNotIn("bundle/file_0.xml", message_body)
+
+        # The full report is written compressed alongside the job, and linked from the email
+        job_id = hashlib.md5(b"manifest-message").hexdigest()
+        report_key = f"status-jobs/eng/{job_id}/report.json.gz"
+
+        self.assertIn(report_key, message_body)
+
+        report = fake_s3.get_object(Bucket="pds-status-jobs", Key=report_key)["Body"].read()
+
+        self.assertDictEqual(
+            json.loads(gzip.decompress(report)),
+            {f"bundle/file_{index}.xml": "Uploaded" if index % 2 == 0 else "Missing" for index in range(5)},
+        )
+
+    def test_lambda_handler_failed_job(self):
+        """Test that jobs which cannot succeed are marked failed, so clients waiting on them stop polling"""
+        fake_s3 = FakeS3Client(buckets=("pds-eng-staging-test", "pds-manifests", "pds-status-jobs"))
+
+        manifest_record = {
+            "messageId": "manifest-message",
+            "body": json.dumps("s3://pds-manifests/eng/missing.json"),
+            "messageAttributes": {
+                "email": {"stringValue": '"email@email.com"'},  # pragma: allowlist secret
+                "node": {"stringValue": '"eng"'},
+            },
+        }
+
+        job_id = hashlib.md5(b"manifest-message").hexdigest()
+        chunk_job_id = hashlib.md5(b"chunk-job").hexdigest()
+
+        chunk_record = {
+            "messageId": "chunk-message",
+            "body": json.dumps({"status_chunk": {"node": "eng", "job_id": chunk_job_id, "chunk_index": 0}}),
+            "attributes": {"ApproximateReceiveCount": "1"},
+        }
+
+        def read_state(job_id):
+            key = f"status-jobs/eng/{job_id}/status.json"
+            return json.loads(fake_s3.get_object(Bucket="pds-status-jobs", Key=key)["Body"].read())
+
+        with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3), patch.object(
+            pds.ingress.service.pds_status_app, "STATUS_JOB_BUCKET", "pds-status-jobs"
+        ):
+            response = lambda_handler({"Records": [manifest_record, chunk_record]}, None)
+
+            # A manifest which cannot be downloaded fails the job immediately, while
+            # chunks which fail are retried until their attempts are exhausted
+            self.assertListEqual(response["batchItemFailures"], [{"itemIdentifier": "chunk-message"}])
+
+            state = read_state(job_id)
+
+            self.assertEqual(state["state"], "failed")
+            self.assertIn("Error downloading file", state["message"])
+
+            with self.assertRaises(botocore.exceptions.ClientError):
+                read_state(chunk_job_id)
+
+            chunk_record["attributes"]["ApproximateReceiveCount"] = "5"
+
+            response = lambda_handler({"Records": [chunk_record]}, None)
+
+            self.assertNotIn("batchItemFailures", response)
+            self.assertEqual(read_state(chunk_job_id)["state"], "failed")
+
+            # Clients waiting on the job report its failure, rather than polling until they time out
+            with patch("pds.ingress.client.pds_status_client.request_status_result", lambda *args: read_state(job_id)):
+                with self.assertRaisesRegex(RuntimeError, "Error downloading file"):
+                    wait_for_status_job(job_id, "eng", "https://api.fake/request", {}, poll_interval=0)
+
+    def test_publish_status_report(self):
+        """Test writing of the pages and state polled by clients for the results of a status job"""
+        fake_s3 = FakeS3Client(buckets=("pds-status-jobs",))
+        job_id = "0123456789abcdef0123456789abcdef"
+        results = {f"bundle/file_{index}.xml": "Uploaded" if index != 3 else "Missing" for index in range(5)}
+
+        mock_send_email = MagicMock()
+
+        with patch.object(pds.ingress.service.pds_status_app, "s3_client", fake_s3), patch.object(
+            pds.ingress.service.pds_status_app, "send_email", mock_send_email
+        ), patch.multiple(
+            pds.ingress.service.pds_status_app, STATUS_JOB_BUCKET="pds-status-jobs", STATUS_RESULT_PAGE_SIZE=2
+        ):
+            # Without a return email, results are only published for polling
+            publish_status_report("eng", job_id, results, "")
+
+        mock_send_email.assert_not_called()
+
+        job_objects = fake_s3.buckets["pds-status-jobs"]
+        status = json.loads(job_objects[f"status-jobs/eng/{job_id}/status.json"]["Body"])
+
+        self.assertDictEqual(
+            status,
+            {
+                "job_id": job_id,
+                "state": "complete",
+                "num_files": 5,
+                "status": {"Missing": 1, "Uploaded": 4},
+                "num_pages": 3,
+            },
+        )
+
+        lines = []
+
+        for page_index in range(3):
+            page = job_objects[f"status-jobs/eng/{job_id}/pages/{page_index:06d}.jsonl.gz"]["Body"]
+            lines.extend(gzip.decompress(page).decode().splitlines())
+
+        self.assertListEqual(
+            [json.loads(line) for line in lines],
+            [{"trimmed_path": trimmed_path, "status": results[trimmed_path]} for trimmed_path in sorted(results)],
+        )
+
+    def test_status_job_id(self):
+        """Test use of the job ID assigned by the status endpoint, falling back to one derived from the message"""
+        record = {"messageId": "manifest-message", "messageAttributes": {}}
+
+        self.assertEqual(status_job_id(record), hashlib.md5(b"manifest-message").hexdigest())
+
+        record["messageAttributes"]["job_id"] = {"stringValue": "0123456789abcdef0123456789abcdef"}
+
+        self.assertEqual(status_job_id(record), "0123456789abcdef0123456789abcdef")
+
+        record["messageAttributes"]["job_id"] = {"stringValue": "../../other-node"}
+
+        self.assertEqual(status_job_id(record), hashlib.md5(b"manifest-message").hexdigest())
+
+    def test_summarize_results(self):
+        """Test summarizing of status results for inclusion within an email"""
+        results = {"c": "Missing", "a": "Uploaded", "b": "Modified", "d": "Missing"}
+
+        summary = summarize_results(results, max_entries=2)
+
+        self.assertEqual(summary["total"], 4)
+        self.assertDictEqual(summary["status"], {"Missing": 2, "Modified": 1, "Uploaded": 1})
+        self.assertListEqual(summary["not_uploaded"], [("b", "Modified"), ("c", "Missing")])
+        self.assertEqual(summary["omitted"], 1)
+
+    def test_send_email_reuse(self):
+        """Test reuse of the SMTP configuration across invocations, and of the SMTP session within one"""
+        mock_ssm = MagicMock()
+        mock_ssm.get_parameters_by_path.return_value = {
+            "Parameters": [
+                {"Name": f"/fake/path/to/ssm/{name}", "Value": value}
+                for name, value in (
+                    ("username", "user"),
+                    ("password", "pass"),  # pragma: allowlist secret
+                    ("server", "smtp.fake:587"),
+                    ("sender", "dum@fake"),
+                )
+            ]
+        }
+
+        with patch.object(pds.ingress.service.pds_status_app, "ssm_client", mock_ssm), patch.object(
+            pds.ingress.service.pds_status_app, "SMTP_CONFIG_CACHE", {}
+        ), patch("smtplib.SMTP") as mock_smtp:
+            for _ in range(2):
+                send_email("first", "email@email.com")  # pragma: allowlist secret
+                send_email("second", "email@email.com")  # pragma: allowlist secret
+                close_smtp_session()
+
+        mock_ssm.get_parameters_by_path.assert_called_once()
+
+        # One session per invocation, each used for both emails
+        self.assertEqual(mock_smtp.call_count, 2)
+        mock_smtp.assert_called_with("smtp.fake", 587)
+        self.assertEqual(mock_smtp.return_value.sendmail.call_count, 4)
+        self.assertEqual(mock_smtp.return_value.quit.call_count, 2)
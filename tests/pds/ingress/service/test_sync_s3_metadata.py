@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+Tests for the S3 metadata sync service, using an in-process S3 stand-in.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import patch
+
+import botocore.exceptions
+import pds.ingress.service.sync_s3_metadata as sync_s3_metadata
+from pds.ingress.service.sync_s3_metadata import update_s3_objects_metadata
+from tests.pds.ingress.fake_s3 import FakeS3Client
+
+BUCKET = "pds-sbn-staging-test"
+
+COMPLETE_METADATA = {"md5": "0" * 32, "mtime": "1704067200", "last_modified": "2024-01-01T00:00:00+00:00"}
+
+
+class FakePaginator:
+    """Mimics a list_objects_v2 paginator over the provided fake S3 client"""
+
+    def __init__(self, fake_s3):
+        self.fake_s3 = fake_s3
+
+    def paginate(self, **params):
+        while True:
+            page = self.fake_s3.list_objects_v2(**params)
+            yield page
+
+            if not page.get("IsTruncated"):
+                return
+
+            params["ContinuationToken"] = page["NextContinuationToken"]
+
+
+class FakeLambdaContext:
+    """Mimics the remaining time reported by a Lambda context, running low after the provided number of checks"""
+
+    def __init__(self, remaining_checks, final_remaining_ms=0):
+        self.remaining_checks = remaining_checks
+        self.final_remaining_ms = final_remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        self.remaining_checks -= 1
+        return 60000 if self.remaining_checks >= 0 else self.final_remaining_ms
+
+
+class SyncS3MetadataTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.fake_s3 = FakeS3Client(buckets=(BUCKET, "pds-inventory"))
+
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/bundle/complete.xml", Body=b"a", Metadata=COMPLETE_METADATA)
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/bundle/no metadata.xml", Body=b"bb")
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/bundle/no_md5.xml", Body=b"ccc", Metadata={"mtime": "1"})
+        self.fake_s3.put_object(Bucket=BUCKET, Key="eng/bundle/other_node.xml", Body=b"dddd")
+
+        self.s3_patch = patch.object(sync_s3_metadata, "s3", self.fake_s3)
+        self.s3_patch.start()
+
+        self.working_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.s3_patch.stop()
+        self.working_dir.cleanup()
+
+    def _run_sweep(self, *args, **kwargs):
+        """Runs update_s3_objects_metadata, returning its summary and the keys logged for each status"""
+        outcome_log = os.path.join(self.working_dir.name, "outcomes.jsonl")
+
+        if os.path.exists(outcome_log):
+            os.remove(outcome_log)
+
+        summary = update_s3_objects_metadata(*args, outcome_log=outcome_log, **kwargs)
+        outcomes = {"updated": [], "skipped": [], "failed": []}
+
+        with open(outcome_log) as infile:
+            for line in infile:
+                outcome = json.loads(line)
+                outcomes[outcome["status"]].append(outcome["key"])
+
+        for status in outcomes:
+            self.assertEqual(summary[status], len(outcomes[status]))
+
+        return summary, {status: sorted(keys) for status, keys in outcomes.items()}
+
+    def _assert_repaired(self, *keys):
+        for key in keys:
+            metadata = self.fake_s3.buckets[BUCKET][key]["Metadata"]
+            self.assertTrue(all(metadata.get(field) for field in ("md5", "mtime", "last_modified")), key)
+
+    def test_csv_inventory(self):
+        """Objects the inventory shows to carry the required metadata should be skipped without inspection"""
+        inventory_path = os.path.join(self.working_dir.name, "inventory.csv.gz")
+
+        rows = [
+            "Bucket,Key,Size,UserMetadata",
+            f'{BUCKET},sbn/bundle/complete.xml,1,"{json.dumps(COMPLETE_METADATA).replace(chr(34), chr(34) * 2)}"',
+            f"{BUCKET},sbn/bundle/no metadata.xml,2,",
+            f'{BUCKET},sbn/bundle/no_md5.xml,3,"{{""x-amz-meta-mtime"": ""1""}}"',
+            f"{BUCKET},eng/bundle/other_node.xml,4,",
+            "other-bucket,sbn/bundle/elsewhere.xml,5,",
+        ]
+
+        with gzip.open(inventory_path, "wt") as outfile:
+            outfile.write("\n".join(rows) + "\n")
+
+        summary, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/", inventory=inventory_path)
+
+        self.assertListEqual(outcomes["updated"], ["sbn/bundle/no metadata.xml", "sbn/bundle/no_md5.xml"])
+        self.assertListEqual(outcomes["skipped"], ["sbn/bundle/complete.xml"])
+        self.assertListEqual(outcomes["failed"], [])
+        self.assertEqual(summary["unprocessed"], 0)
+
+        # Only the objects needing repair are inspected, and the bucket is never listed
+        self.assertEqual(self.fake_s3.calls["HeadObject"], 2)
+        self.assertEqual(self.fake_s3.calls["CopyObject"], 2)
+        self.assertNotIn("ListObjectsV2", self.fake_s3.calls)
+
+        self._assert_repaired("sbn/bundle/no metadata.xml", "sbn/bundle/no_md5.xml")
+
+    def test_inventory_content_index(self):
+        """Complete inventory rows should only be indexed when requested, by the workers rather than the reader"""
+        self.fake_s3.create_bucket(Bucket="pds-index")
+
+        inventory_path = os.path.join(self.working_dir.name, "inventory.csv")
+
+        with open(inventory_path, "w") as outfile:
+            outfile.write("Bucket,Key,Size,md5,mtime,last_modified\n")
+            outfile.write(f"{BUCKET},sbn/bundle/complete.xml,1,{','.join(COMPLETE_METADATA.values())}\n")
+            outfile.write(f"{BUCKET},sbn/bundle/no metadata.xml,2,,,\n")
+
+        index_key = f"content-index/sbn/{COMPLETE_METADATA['md5']}/1"
+
+        with patch.object(sync_s3_metadata, "CONTENT_INDEX_BUCKET", "pds-index"):
+            _, outcomes = self._run_sweep(None, BUCKET, inventory=inventory_path)
+
+            self.assertListEqual(outcomes["skipped"], ["sbn/bundle/complete.xml"])
+            self.assertNotIn(index_key, self.fake_s3.buckets["pds-index"])
+            self.assertEqual(self.fake_s3.calls["HeadObject"], 1)
+
+            _, outcomes = self._run_sweep(None, BUCKET, inventory=inventory_path, index_complete_objects=True)
+
+        self.assertIn("sbn/bundle/complete.xml", outcomes["skipped"])
+        self.assertDictEqual(
+            json.loads(self.fake_s3.buckets["pds-index"][index_key]["Body"]),
+            {"bucket": BUCKET, "key": "sbn/bundle/complete.xml"},
+        )
+
+    def test_s3_inventory_report(self):
+        """The data files of an S3 Inventory report should be read via its manifest, decoding object keys"""
+        data_file = "\n".join(
+            [
+                f'"{BUCKET}","sbn/bundle/complete.xml","1"',
+                f'"{BUCKET}","sbn/bundle/no+metadata.xml","2"',
+            ]
+        )
+
+        self.fake_s3.put_object(
+            Bucket="pds-inventory", Key="inventory/data/part-0.csv.gz", Body=gzip.compress(data_file.encode())
+        )
+        self.fake_s3.put_object(
+            Bucket="pds-inventory",
+            Key="inventory/manifest.json",
+            Body=json.dumps(
+                {
+                    "sourceBucket": BUCKET,
+                    "destinationBucket": "arn:aws:s3:::pds-inventory",
+                    "fileFormat": "CSV",
+                    "fileSchema": "Bucket, Key, Size",
+                    "files": [{"key": "inventory/data/part-0.csv.gz"}],
+                }
+            ),
+        )
+
+        _, outcomes = self._run_sweep(None, BUCKET, inventory="s3://pds-inventory/inventory/manifest.json")
+
+        # Without user metadata in the inventory, every listed object is inspected
+        self.assertListEqual(outcomes["updated"], ["sbn/bundle/no metadata.xml"])
+        self.assertListEqual(outcomes["skipped"], ["sbn/bundle/complete.xml"])
+        self.assertListEqual(outcomes["failed"], [])
+        self.assertEqual(self.fake_s3.calls["HeadObject"], 2)
+
+    def test_candidate_list(self):
+        """Only the keys within a candidate list should be inspected"""
+        candidate_path = os.path.join(self.working_dir.name, "candidates.txt")
+
+        with open(candidate_path, "w") as outfile:
+            outfile.write("sbn/bundle/no_md5.xml\n\neng/bundle/other_node.xml\nsbn/bundle/missing.xml\n")
+
+        _, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/", candidate_list=candidate_path)
+
+        self.assertListEqual(outcomes["updated"], ["sbn/bundle/no_md5.xml"])
+        self.assertListEqual(outcomes["skipped"], [])
+        self.assertListEqual(outcomes["failed"], ["sbn/bundle/missing.xml"])
+        self.assertEqual(self.fake_s3.calls["HeadObject"], 2)
+
+        self._assert_repaired("sbn/bundle/no_md5.xml")
+
+    def test_checkpointed_sweep(self):
+        """A sweep stopped short of the timeout should resume from its checkpoint in a continuing invocation"""
+        for index in range(5):
+            self.fake_s3.put_object(Bucket=BUCKET, Key=f"sbn/sweep/file_{index}.xml", Body=b"x")
+
+        checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+        event = {
+            "bucket_name": BUCKET,
+            "prefix": "sbn/sweep/",
+            "batch_size": 1,
+            "num_workers": 1,
+            "checkpoint": checkpoint_path,
+        }
+
+        # Slows each repair, so time runs out well before the sweep completes
+        self.fake_s3.latency["CopyObject"] = 0.05
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+            sync_s3_metadata, "invoke_continuation"
+        ) as mock_invoke:
+            # Leaves enough time to wait on the object being processed once the sweep stops
+            context = FakeLambdaContext(3, final_remaining_ms=2000)
+            result = sync_s3_metadata.lambda_handler(dict(event, **{"continue": True}), context)["body"]
+
+            self.assertFalse(result["complete"])
+            self.assertGreater(result["unprocessed"], 0)
+            self.assertTrue(result["continued"])
+
+            mock_invoke.assert_called_once()
+
+            # The checkpoint covers exactly the objects completed in order before the sweep stopped, while
+            # the object still being processed finishes without being recorded
+            num_committed = result["totals"]["updated"]
+            num_finished = result["updated"]
+
+            self.assertLessEqual(num_finished - num_committed, 1)
+
+            self.assertEqual(result["updated"] + result["unprocessed"], 5)
+            self.assertEqual(result["cursor"], f"sbn/sweep/file_{num_committed - 1}.xml" if num_committed else None)
+
+            with open(checkpoint_path) as infile:
+                self.assertEqual(json.load(infile)["cursor"], result["cursor"])
+
+            # The continuation resumes where the sweep stopped, without re-inspecting processed objects
+            self.fake_s3.calls.clear()
+
+            result = sync_s3_metadata.lambda_handler(mock_invoke.call_args.args[0], FakeLambdaContext(100))["body"]
+
+        self.assertTrue(result["complete"])
+        self.assertEqual(result["updated"], 5 - num_finished)
+        self.assertEqual(result["skipped"], num_finished - num_committed)
+        self.assertEqual(result["invocations"], 2)
+        self.assertDictEqual(
+            result["totals"], {"updated": 5 - (num_finished - num_committed), "skipped": num_finished - num_committed, "failed": 0}
+        )
+        self.assertFalse(result["continued"])
+        self.assertEqual(self.fake_s3.calls["HeadObject"], 5 - num_committed)
+
+        self._assert_repaired(*(f"sbn/sweep/file_{index}.xml" for index in range(5)))
+
+        # A completed checkpoint starts a fresh sweep
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)):
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+        self.assertEqual(result["invocations"], 1)
+        self.assertEqual(result["skipped"], 5)
+
+    def test_stop_without_waiting(self):
+        """A stopping sweep should record its checkpoint and continue without waiting on slow objects"""
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/slow/file.xml", Body=b"x")
+
+        checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+        event = {"bucket_name": BUCKET, "prefix": "sbn/slow/", "checkpoint": checkpoint_path, "continue": True}
+
+        self.fake_s3.latency["CopyObject"] = 3
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+            sync_s3_metadata, "invoke_continuation"
+        ) as mock_invoke:
+            start = time.monotonic()
+            result = sync_s3_metadata.lambda_handler(event, FakeLambdaContext(2, final_remaining_ms=1500))["body"]
+
+            # Only half a second remains to wait on the object once the sweep stops
+            self.assertLess(time.monotonic() - start, 2.5)
+            self.assertTrue(result["continued"])
+            self.assertEqual(result["unprocessed"], 1)
+
+            mock_invoke.assert_called_once()
+
+        with open(checkpoint_path) as infile:
+            checkpoint = json.load(infile)
+
+        self.assertIsNone(checkpoint["cursor"])
+        self.assertFalse(checkpoint["complete"])
+
+    def test_rewrite_time_budget(self):
+        """Objects whose rewrite would outlast the remaining time should be deferred, or failed if they never fit"""
+        with patch.object(sync_s3_metadata, "COPY_BYTES_PER_SECOND", 1):
+            # Rewriting the two byte object is estimated to take two seconds
+            for deadline_seconds, budget_seconds, expected_status in ((1, 10, "deferred"), (1, 1, "failed")):
+                _, status = sync_s3_metadata.process_s3_object(
+                    BUCKET,
+                    "sbn/bundle/no metadata.xml",
+                    deadline=time.monotonic() + deadline_seconds,
+                    budget_seconds=budget_seconds,
+                )
+
+                self.assertEqual(status, expected_status)
+
+            self.assertNotIn("CopyObject", self.fake_s3.calls)
+
+            _, status = sync_s3_metadata.process_s3_object(
+                BUCKET, "sbn/bundle/no metadata.xml", deadline=time.monotonic() + 10, budget_seconds=10
+            )
+
+            self.assertEqual(status, "updated")
+
+            # A sweep with 1.5 seconds to spare defers the second object, which no longer fits once the first is copied
+            for index in range(2):
+                self.fake_s3.put_object(Bucket=BUCKET, Key=f"sbn/budget/file_{index}.xml", Body=b"x")
+
+            self.fake_s3.latency["CopyObject"] = 0.6
+
+            checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+            event = {
+                "bucket_name": BUCKET,
+                "prefix": "sbn/budget/",
+                "num_workers": 1,
+                "checkpoint": checkpoint_path,
+                "continue": True,
+                "timeout_buffer_ms": 58500,
+            }
+
+            with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+                sync_s3_metadata, "invoke_continuation"
+            ) as mock_invoke:
+                result = sync_s3_metadata.lambda_handler(event, FakeLambdaContext(100))["body"]
+
+                self.assertFalse(result["complete"])
+                self.assertEqual(result["updated"], 1)
+                self.assertEqual(result["unprocessed"], 1)
+                self.assertEqual(result["cursor"], "sbn/budget/file_0.xml")
+                self.assertTrue(result["continued"])
+
+                result = sync_s3_metadata.lambda_handler(mock_invoke.call_args.args[0], FakeLambdaContext(100))["body"]
+
+        self.assertTrue(result["complete"])
+        self.assertDictEqual(result["totals"], {"updated": 2, "skipped": 0, "failed": 0})
+        self._assert_repaired("sbn/budget/file_0.xml", "sbn/budget/file_1.xml")
+
+    def test_large_object_rewrite(self):
+        """Objects too large for a single CopyObject should have their metadata rewritten in parts"""
+        retain_until = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        object_settings = {
+            "ContentType": "application/octet-stream",
+            "ContentLanguage": "en",
+            "Expires": retain_until,
+            "ServerSideEncryption": "aws:kms",
+            "SSEKMSKeyId": "arn:aws:kms:us-west-2:123456789012:key/pds",
+            "ObjectLockMode": "GOVERNANCE",
+            "ObjectLockRetainUntilDate": retain_until,
+            "ObjectLockLegalHoldStatus": "ON",
+        }
+
+        self.fake_s3.put_object(
+            Bucket=BUCKET,
+            Key="sbn/large/image.img",
+            Body=b"0123456789",
+            Tagging="node=sbn&archive=true",
+            **object_settings,
+        )
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/large/label.xml", Body=b"abc")
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+            sync_s3_metadata, "MAX_COPY_OBJECT_SIZE", 8
+        ), patch.object(sync_s3_metadata, "COPY_PART_SIZE", 4):
+            _, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/large/")
+
+            self.assertListEqual(outcomes["updated"], ["sbn/large/image.img", "sbn/large/label.xml"])
+            self.assertListEqual(outcomes["failed"], [])
+
+            # Sizes come from the listing, and only the large object is copied in parts
+            self.assertEqual(self.fake_s3.calls["HeadObject"], 2)
+            self.assertEqual(self.fake_s3.calls["CopyObject"], 1)
+            self.assertEqual(self.fake_s3.calls["CreateMultipartUpload"], 1)
+            self.assertEqual(self.fake_s3.calls["UploadPartCopy"], 3)
+
+            self.assertEqual(self.fake_s3.buckets[BUCKET]["sbn/large/image.img"]["Body"], b"0123456789")
+            self._assert_repaired("sbn/large/image.img", "sbn/large/label.xml")
+
+            # The tags, system metadata, encryption and Object Lock settings of the object survive its rewrite
+            self.assertListEqual(
+                self.fake_s3.get_object_tagging(Bucket=BUCKET, Key="sbn/large/image.img")["TagSet"],
+                [{"Key": "node", "Value": "sbn"}, {"Key": "archive", "Value": "true"}],
+            )
+
+            head_metadata = self.fake_s3.head_object(Bucket=BUCKET, Key="sbn/large/image.img")
+
+            for field, value in object_settings.items():
+                self.assertEqual(head_metadata[field], value, field)
+
+            # A failed part aborts the rewrite, leaving the object untouched
+            self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/large/image.img", Body=b"0123456789")
+
+            with patch.object(self.fake_s3, "upload_part_copy", side_effect=RuntimeError("part failed")):
+                _, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/large/image")
+
+        self.assertListEqual(outcomes["failed"], ["sbn/large/image.img"])
+        self.assertEqual(self.fake_s3.calls["AbortMultipartUpload"], 1)
+        self.assertDictEqual(self.fake_s3.multipart_uploads, {})
+        self.assertDictEqual(self.fake_s3.buckets[BUCKET]["sbn/large/image.img"]["Metadata"], {})
+
+        # The abort is made on the expected bucket owner's bucket, and a failure to abort
+        # does not mask the error which caused it
+        head_metadata = dict(self.fake_s3.head_object(Bucket=BUCKET, Key="sbn/large/image.img"), Metadata={"md5": "x"})
+        abort_error = botocore.exceptions.ClientError({"Error": {"Code": "AccessDenied"}}, "AbortMultipartUpload")
+
+        with patch.object(self.fake_s3, "upload_part_copy", side_effect=RuntimeError("part failed")), patch.object(
+            self.fake_s3, "abort_multipart_upload", side_effect=abort_error
+        ) as mock_abort, patch.object(sync_s3_metadata, "EXPECTED_BUCKET_OWNER", "123456789012"), patch.object(
+            sync_s3_metadata, "COPY_PART_SIZE", 4
+        ):
+            with self.assertRaisesRegex(RuntimeError, "part failed"):
+                sync_s3_metadata.copy_object_in_parts(BUCKET, "sbn/large/image.img", 10, head_metadata)
+
+        self.assertEqual(mock_abort.call_args.kwargs["ExpectedBucketOwner"], "123456789012")
+
+    def test_repair_multipart_md5(self):
+        """Objects uploaded in parts should have their true MD5 computed from their content in repair mode"""
+        body = b"multipart content"
+        multipart_etag = f'"{hashlib.md5(b"parts").hexdigest()}-2"'
+
+        for key, metadata in (("sbn/multipart/missing.img", {}), ("sbn/multipart/etag.img", COMPLETE_METADATA)):
+            self.fake_s3.put_object(Bucket=BUCKET, Key=key, Body=body, Metadata=dict(metadata))
+            self.fake_s3.buckets[BUCKET][key]["ETag"] = multipart_etag
+
+        self.fake_s3.buckets[BUCKET]["sbn/multipart/etag.img"]["Metadata"]["md5"] = multipart_etag.strip('"')
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)):
+            # Without the repair mode, an md5 recorded from the ETag is left as is
+            _, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/multipart/")
+
+            self.assertListEqual(outcomes["skipped"], ["sbn/multipart/etag.img"])
+            self.assertNotIn("GetObject", self.fake_s3.calls)
+
+            for key in ("sbn/multipart/missing.img", "sbn/multipart/etag.img"):
+                self.fake_s3.buckets[BUCKET][key]["ETag"] = multipart_etag
+
+            with patch.object(sync_s3_metadata, "HASH_RANGE_SIZE", 4), patch.object(
+                sync_s3_metadata, "HASH_CONCURRENCY", 2
+            ):
+                _, outcomes = self._run_sweep(None, BUCKET, prefix="sbn/multipart/", repair_multipart_md5=True)
+
+        self.assertListEqual(outcomes["updated"], ["sbn/multipart/etag.img", "sbn/multipart/missing.img"])
+
+        # Each object is read in ranges of 4 bytes
+        self.assertEqual(self.fake_s3.calls["GetObject"], 2 * 5)
+
+        for key in ("sbn/multipart/missing.img", "sbn/multipart/etag.img"):
+            metadata = self.fake_s3.buckets[BUCKET][key]["Metadata"]
+
+            self.assertEqual(metadata["md5"], hashlib.md5(body).hexdigest())
+            self.assertEqual(metadata["md5chksum"], base64.b64encode(hashlib.md5(body).digest()).decode())
+
+        self._assert_repaired("sbn/multipart/missing.img", "sbn/multipart/etag.img")
+
+        # An object replaced after it was hashed is left as replaced, rather than given the MD5 of its old content
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/multipart/replaced.img", Body=body)
+        self.fake_s3.buckets[BUCKET]["sbn/multipart/replaced.img"]["ETag"] = multipart_etag
+
+        compute_object_md5 = sync_s3_metadata.compute_object_md5
+
+        def compute_then_replace(*args, **kwargs):
+            md5 = compute_object_md5(*args, **kwargs)
+            self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/multipart/replaced.img", Body=b"new content")
+            return md5
+
+        with patch.object(sync_s3_metadata, "compute_object_md5", side_effect=compute_then_replace):
+            _, status = sync_s3_metadata.process_s3_object(
+                BUCKET, "sbn/multipart/replaced.img", repair_multipart_md5=True
+            )
+
+        self.assertEqual(status, "failed")
+        self.assertEqual(self.fake_s3.buckets[BUCKET]["sbn/multipart/replaced.img"]["Body"], b"new content")
+        self.assertDictEqual(self.fake_s3.buckets[BUCKET]["sbn/multipart/replaced.img"]["Metadata"], {})
+
+    def _put_sharded_objects(self):
+        """Adds objects under several top-level prefixes, and directly under their parent prefix"""
+        keys = ["sbn/a.xml", "sbn/b/1.xml", "sbn/b/2.xml", "sbn/b.xml", "sbn/c/1.xml", "sbn/d/e/1.xml", "sbn/z.xml"]
+
+        for key in keys:
+            self.fake_s3.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+
+        # Existing objects under the prefix, from setUp
+        return sorted(keys + ["sbn/bundle/complete.xml", "sbn/bundle/no metadata.xml", "sbn/bundle/no_md5.xml"])
+
+    def test_discover_shards(self):
+        """Shards discovered from the top-level prefixes should cover every key exactly once"""
+        keys = self._put_sharded_objects()
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)):
+            shards = sync_s3_metadata.discover_shards(BUCKET, "sbn/")
+
+            self.assertEqual(len(shards), 4)
+            self.assertIsNone(shards[0]["start_after"])
+            self.assertIsNone(shards[-1]["end_at"])
+
+            shard_keys = [
+                [key for key, _, _, _ in sync_s3_metadata.iter_listing_entries(BUCKET, "sbn/", shard=shard)]
+                for shard in shards
+            ]
+
+        self.assertListEqual([key for keys_in_shard in shard_keys for key in keys_in_shard], keys)
+        # Objects directly under the prefix fall within the shard of the preceding top-level prefix
+        self.assertIn("sbn/b.xml", shard_keys[0])
+        self.assertListEqual(
+            shard_keys[1], ["sbn/bundle/complete.xml", "sbn/bundle/no metadata.xml", "sbn/bundle/no_md5.xml"]
+        )
+
+    def test_sharded_sweep(self):
+        """Shards swept concurrently within an invocation should merge into a single summary"""
+        keys = self._put_sharded_objects()
+
+        checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+        event = {
+            "bucket_name": BUCKET,
+            "prefix": "sbn/",
+            "sharding": "prefixes",
+            "shard_concurrency": 2,
+            "num_workers": 4,
+            "checkpoint": checkpoint_path,
+        }
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)):
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+            self.assertTrue(result["complete"])
+            self.assertEqual(len(result["shards"]), 4)
+            self.assertEqual(result["updated"], len(keys) - 1)
+            self.assertEqual(result["skipped"], 1)
+            self.assertDictEqual(result["totals"], {"updated": len(keys) - 1, "skipped": 1, "failed": 0})
+            self.assertEqual(sum(shard["updated"] + shard["skipped"] for shard in result["shards"]), len(keys))
+
+            self._assert_repaired(*keys)
+
+            # A completed sharded sweep starts afresh, rather than reusing its shards' checkpoints
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+        self.assertTrue(result["complete"])
+        self.assertEqual(result["skipped"], len(keys))
+
+    def test_sharded_sweep_continuation(self):
+        """A stopping sharded sweep should record its shards and continue without waiting on slow objects"""
+        self.fake_s3.put_object(Bucket=BUCKET, Key="sbn/z/file.xml", Body=b"x")
+
+        checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+        event = {
+            "bucket_name": BUCKET,
+            "prefix": "sbn/",
+            "sharding": ["sbn/m"],
+            "shard_concurrency": 1,
+            "checkpoint": checkpoint_path,
+            "continue": True,
+        }
+
+        self.fake_s3.latency["CopyObject"] = 3
+
+        # Records the sweep as it stands when the continuation is invoked, and how soon it is invoked
+        recorded = []
+
+        def mock_invoke_continuation(continuation):
+            recorded.append(time.monotonic() - start)
+
+            with open(checkpoint_path) as infile:
+                recorded.append(json.load(infile))
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+            sync_s3_metadata, "invoke_continuation", side_effect=mock_invoke_continuation
+        ) as mock_invoke:
+            start = time.monotonic()
+            result = sync_s3_metadata.lambda_handler(event, FakeLambdaContext(3, final_remaining_ms=2500))["body"]
+
+            # The continuation is invoked before waiting up to a second and a half on the object being processed
+            elapsed, checkpoint = recorded
+
+            self.assertLess(elapsed, 1.0)
+            self.assertLess(time.monotonic() - start, 2.5)
+            self.assertFalse(result["complete"])
+            self.assertTrue(result["continued"])
+
+            mock_invoke.assert_called_once()
+
+            self.assertEqual(checkpoint["invocations"], 1)
+            self.assertListEqual(checkpoint["shards"], [shard["shard"] for shard in result["shards"]])
+
+            # The continuation sweeps the same shards, rather than starting a new sweep
+            self.fake_s3.latency.clear()
+
+            result = sync_s3_metadata.lambda_handler(mock_invoke.call_args.args[0], FakeLambdaContext(100))["body"]
+
+        self.assertTrue(result["complete"])
+        self.assertEqual(result["invocations"], 2)
+        self.assertListEqual(checkpoint["shards"], [shard["shard"] for shard in result["shards"]])
+        self.assertEqual(result["totals"]["updated"] + result["totals"]["skipped"], 4)
+
+        self._assert_repaired("sbn/bundle/no metadata.xml", "sbn/bundle/no_md5.xml", "sbn/z/file.xml")
+
+    def test_dispatched_shards(self):
+        """Shards dispatched to separate invocations should report their merged progress to the dispatcher"""
+        keys = self._put_sharded_objects()
+
+        checkpoint_path = os.path.join(self.working_dir.name, "checkpoint.json")
+        event = {
+            "bucket_name": BUCKET,
+            "prefix": "sbn/",
+            "sharding": ["sbn/bundle", "sbn/d"],
+            "shard_mode": "invoke",
+            "checkpoint": checkpoint_path,
+        }
+
+        # Shards can only be dispatched once if the dispatch is recorded
+        with self.assertRaises(ValueError):
+            sync_s3_metadata.lambda_handler(dict(event, checkpoint=None), None)
+
+        # The shards are recorded before they are dispatched, so the record survives an invocation cut short
+        def mock_invoke_continuation(shard_event):
+            with open(checkpoint_path) as infile:
+                self.assertEqual(len(json.load(infile)["shards"]), 3)
+
+        with patch.object(sync_s3_metadata, "paginator", FakePaginator(self.fake_s3)), patch.object(
+            sync_s3_metadata, "invoke_continuation", side_effect=mock_invoke_continuation
+        ) as mock_invoke:
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+            self.assertFalse(result["complete"])
+            self.assertEqual(mock_invoke.call_count, 3)
+            self.assertNotIn("GetObject", self.fake_s3.calls)
+
+            shard_events = [call.args[0] for call in mock_invoke.call_args_list]
+
+            self.assertListEqual(
+                [shard_event["checkpoint"] for shard_event in shard_events],
+                [f"{checkpoint_path}.shard-{index:04d}" for index in range(3)],
+            )
+
+            # Only the first shard has run when progress is next reported
+            sync_s3_metadata.lambda_handler(shard_events[0], None)
+
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+            self.assertFalse(result["complete"])
+            self.assertEqual(result["totals"]["updated"], 4)
+            self.assertEqual(mock_invoke.call_count, 3)
+
+            for shard_event in shard_events[1:]:
+                sync_s3_metadata.lambda_handler(shard_event, None)
+
+            result = sync_s3_metadata.lambda_handler(event, None)["body"]
+
+        self.assertTrue(result["complete"])
+        self.assertDictEqual(result["totals"], {"updated": len(keys) - 1, "skipped": 1, "failed": 0})
+
+        self._assert_repaired(*keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
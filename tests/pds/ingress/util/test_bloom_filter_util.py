@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+import unittest
+
+from pds.ingress.util.bloom_filter_util import BloomFilter
+from pds.ingress.util.bloom_filter_util import content_filter_item
+from pds.ingress.util.bloom_filter_util import optimal_parameters
+
+
+class BloomFilterUtilTest(unittest.TestCase):
+    def test_optimal_parameters(self):
+        """Test sizing of a filter from its capacity and false-positive rate"""
+        self.assertTupleEqual(optimal_parameters(1000, 0.01), (9592, 7))
+
+        # Each factor of 10 reduction in the false-positive rate costs ~4.8 bits per item
+        num_bits, num_hashes = optimal_parameters(1000, 0.001)
+        self.assertEqual(num_bits, 14384)
+        self.assertEqual(num_hashes, 10)
+
+        # Empty filters still hold at least one byte
+        self.assertTupleEqual(optimal_parameters(0, 0.01), (16, 11))
+
+        with self.assertRaises(ValueError):
+            optimal_parameters(1000, 0.0)
+
+        with self.assertRaises(ValueError):
+            optimal_parameters(1000, 1.5)
+
+    def test_false_positive_rate(self):
+        """Test that added items are always found, and the false-positive rate is close to the target"""
+        for false_positive_rate in (0.05, 0.01, 0.001):
+            with self.subTest(false_positive_rate=false_positive_rate):
+                content_filter = BloomFilter.for_capacity(10000, false_positive_rate)
+
+                for index in range(10000):
+                    content_filter.add(content_filter_item(f"bundle/file_{index}.xml", f"{index:032x}", index))
+
+                self.assertTrue(
+                    all(
+                        content_filter_item(f"bundle/file_{index}.xml", f"{index:032x}", index) in content_filter
+                        for index in range(10000)
+                    )
+                )
+
+                false_positives = sum(
+                    content_filter_item(f"bundle/other_{index}.xml", f"{index:032x}", index) in content_filter
+                    for index in range(20000)
+                )
+
+                self.assertLess(false_positives / 20000, false_positive_rate * 2)
+                self.assertAlmostEqual(
+                    content_filter.estimated_false_positive_rate(), false_positive_rate, delta=false_positive_rate * 0.2
+                )
+
+    def test_small_filter_positions(self):
+        """Test that items spread across the bits of small filters, whose size shares factors with many hash steps"""
+        content_filter = BloomFilter.for_capacity(2, 1e-12)
+
+        distinct_positions = min(
+            len(set(content_filter._positions(f"bundle/file_{index}.xml"))) for index in range(1000)
+        )
+
+        self.assertGreater(distinct_positions, content_filter.num_hashes // 2)
+
+    def test_content_filter_item(self):
+        """Test that a change to any of the path, checksum or size of a file changes its filter item"""
+        item = content_filter_item("bundle/file.xml", "D41D8CD98F00B204E9800998ECF8427E", 0)
+
+        self.assertEqual(item, content_filter_item("bundle/file.xml", "d41d8cd98f00b204e9800998ecf8427e", 0))
+        self.assertNotEqual(item, content_filter_item("bundle/file2.xml", "d41d8cd98f00b204e9800998ecf8427e", 0))
+        self.assertNotEqual(item, content_filter_item("bundle/file.xml", "00000000000000000000000000000000", 0))
+        self.assertNotEqual(item, content_filter_item("bundle/file.xml", "d41d8cd98f00b204e9800998ecf8427e", 1))
+
+    def test_serialization(self):
+        """Test round trip serialization of a filter"""
+        content_filter = BloomFilter.for_capacity(100)
+        content_filter.add("bundle/file.xml")
+
+        restored_filter = BloomFilter.from_bytes(content_filter.to_bytes())
+
+        self.assertEqual(restored_filter.num_bits, content_filter.num_bits)
+        self.assertEqual(restored_filter.num_hashes, content_filter.num_hashes)
+        self.assertEqual(restored_filter.num_items, 1)
+        self.assertIn("bundle/file.xml", restored_filter)
+
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(b"DUMB")
+
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(b"NOPE" + content_filter.to_bytes()[4:])
+
+        with self.assertRaises(ValueError):
+            BloomFilter.from_bytes(content_filter.to_bytes()[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
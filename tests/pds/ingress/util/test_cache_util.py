@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+import unittest
+from unittest.mock import patch
+
+from pds.ingress.util.cache_util import compute_idempotency_key
+from pds.ingress.util.cache_util import ResponseCache
+from tests.pds.ingress.fake_s3 import FakeS3Client
+
+
+class CacheUtilTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.request_batch = [
+            {
+                "ingress_path": "/home/user/bundle/file.xml",
+                "trimmed_path": "bundle/file.xml",
+                "md5": "deadbeef",
+                "size": 1,
+                "last_modified": 1700000000,
+            }
+        ]
+        self.response = {"statusCode": 200, "body": "[]"}
+
+    def test_compute_idempotency_key(self):
+        """Test that idempotency keys are stable and sensitive to request contents"""
+        key = compute_idempotency_key("eng", self.request_batch, force_overwrite=False)
+
+        # Node ID is case-insensitive, and key ordering within entries does not matter
+        reordered_batch = [dict(reversed(list(self.request_batch[0].items())))]
+        self.assertEqual(key, compute_idempotency_key("ENG", reordered_batch, force_overwrite=False))
+
+        self.assertNotEqual(key, compute_idempotency_key("sbn", self.request_batch, force_overwrite=False))
+        self.assertNotEqual(key, compute_idempotency_key("eng", self.request_batch, force_overwrite=True))
+        self.assertNotEqual(key, compute_idempotency_key("eng", [], force_overwrite=False))
+
+    def test_memory_cache(self):
+        """Test the in-memory cache, including expiration and eviction of entries"""
+        cache = ResponseCache(ttl=60, max_entries=2)
+
+        self.assertIsNone(cache.get("a"))
+
+        cache.put("a", self.response)
+        self.assertDictEqual(cache.get("a"), self.response)
+
+        # Entries should expire once the TTL has elapsed
+        with patch("pds.ingress.util.cache_util.time.time", return_value=10**12):
+            self.assertIsNone(cache.get("a"))
+
+        # Oldest entries should be evicted once over capacity
+        cache.put("a", self.response)
+        cache.put("b", self.response)
+        cache.put("c", self.response)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+        # A TTL of zero disables the cache entirely
+        disabled_cache = ResponseCache(ttl=0)
+        disabled_cache.put("a", self.response)
+        self.assertIsNone(disabled_cache.get("a"))
+
+    def test_shared_cache(self):
+        """Test that entries are shared between caches backed by the same S3 location"""
+        s3_client = FakeS3Client(buckets=["cache-bucket"])
+
+        first_cache = ResponseCache(ttl=60, s3_client=s3_client, bucket="cache-bucket")
+        second_cache = ResponseCache(ttl=60, s3_client=s3_client, bucket="cache-bucket")
+
+        first_cache.put("a", self.response)
+
+        self.assertIn("response-cache/a.json", s3_client.buckets["cache-bucket"])
+        self.assertDictEqual(second_cache.get("a"), self.response)
+        self.assertIsNone(second_cache.get("b"))
+
+        # Expired entries in the shared store should be ignored
+        second_cache.clear()
+        with patch("pds.ingress.util.cache_util.time.time", return_value=10**12):
+            self.assertIsNone(second_cache.get("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
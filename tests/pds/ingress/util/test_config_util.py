@@ -9,6 +9,7 @@ from unittest.mock import patch
 
 import pds.ingress.util.config_util
 from pds.ingress.util.config_util import bucket_for_path
+from pds.ingress.util.config_util import buckets_for_node
 from pds.ingress.util.config_util import ConfigUtil
 from pds.ingress.util.config_util import initialize_bucket_map
 from pds.ingress.util.config_util import SanitizingConfigParser
@@ -231,6 +232,21 @@ class ConfigUtilTest(unittest.TestCase):
         b = bucket_for_path(mapping, "no/match/here", logger)
         self.assertEqual(b["name"], "default-staging")
 
+    def test_buckets_for_node(self):
+        mapping = {
+            "buckets": {
+                "staging": {"name": "default-staging"},
+                "archive": {"name": "default-archive"},
+            },
+            "paths": [
+                {"prefix": "short/path", "bucket": {"name": "short-match"}},
+                {"prefix": "wild/*", "bucket": {"name": "default-archive"}},
+            ],
+        }
+
+        self.assertListEqual(buckets_for_node(mapping), ["default-archive", "default-staging", "short-match"])
+        self.assertListEqual(buckets_for_node({"default": {"bucket": "fallback"}}), ["fallback"])
+
     # ------------------------------------------------------------------
     # strtobool tests
     # ------------------------------------------------------------------
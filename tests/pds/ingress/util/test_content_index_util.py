@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+import unittest
+
+from pds.ingress.util.content_index_util import content_index_key
+from pds.ingress.util.content_index_util import decode_content_index_entry
+from pds.ingress.util.content_index_util import encode_content_index_entry
+
+
+class ContentIndexUtilTest(unittest.TestCase):
+    def test_content_index_key(self):
+        """Test derivation of content index keys"""
+        key = content_index_key("content-index/", "SBN", "D41D8CD98F00B204E9800998ECF8427E", 1024)
+
+        self.assertEqual(key, "content-index/sbn/d41d8cd98f00b204e9800998ecf8427e/1024")
+
+        # Digests are used within keys, so anything but a hex MD5 is rejected
+        for md5_digest in ("d41d8cd98f00b204e9800998ecf8427e-2", "../../other-node", ""):
+            with self.assertRaises(ValueError):
+                content_index_key("content-index", "sbn", md5_digest, 1024)
+
+    def test_content_index_entry(self):
+        """Test round trip and error handling of content index entries"""
+        body = encode_content_index_entry("pds-sbn-archive", "sbn/bundle/file.xml")
+
+        self.assertTupleEqual(decode_content_index_entry(body), ("pds-sbn-archive", "sbn/bundle/file.xml"))
+
+        for body in (b"not json", b"{}", b"[]", None):
+            self.assertIsNone(decode_content_index_entry(body))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import os
+import tempfile
+import unittest
+
+from pds.ingress.util.job_util import is_valid_job_id
+from pds.ingress.util.job_util import iter_lines_with_offsets
+from pds.ingress.util.job_util import manifest_entry_to_request
+from pds.ingress.util.job_util import parse_manifest_line
+from pds.ingress.util.report_util import write_manifest_file
+
+
+class JobUtilTest(unittest.TestCase):
+    def test_is_valid_job_id(self):
+        """Test validation of job IDs, which are used to derive S3 keys"""
+        self.assertTrue(is_valid_job_id("0123456789abcdef0123456789abcdef"))
+        self.assertFalse(is_valid_job_id("../../other-node/0123456789abcdef"))
+        self.assertFalse(is_valid_job_id(None))
+
+    def test_iter_lines_with_offsets(self):
+        """Test that line offsets are tracked correctly across chunk boundaries"""
+        data = b"first\nsecond line\n\nlast"
+
+        # Split the data into awkwardly sized chunks
+        chunks = [data[index : index + 4] for index in range(0, len(data), 4)]
+
+        lines = list(iter_lines_with_offsets(chunks))
+
+        self.assertListEqual([line for line, _ in lines], [b"first", b"second line", b"", b"last"])
+        self.assertListEqual([offset for _, offset in lines], [6, 18, 19, 23])
+
+        # Resuming from any offset should yield the remaining lines
+        resumed = list(iter_lines_with_offsets([data[18:]], offset=18))
+
+        self.assertListEqual(resumed, lines[2:])
+
+    def test_parse_manifest(self):
+        """Test parsing of a manifest written by write_manifest_file, one line at a time"""
+        manifest = {
+            "bundle/file_b.xml": {
+                "ingress_path": "/data/bundle/file_b.xml",
+                "md5": "deadbeef",
+                "size": 2,
+                "last_modified": "2024-01-01T00:00:00+00:00",
+            },
+            "bundle/file_a.xml": {
+                "ingress_path": "/data/bundle/file_a.xml",
+                "md5": "beefdead",
+                "size": 1,
+                "last_modified": "2024-01-01T00:00:00+00:00",
+            },
+        }
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest_path = os.path.join(temp_dir, "manifest.json")
+            write_manifest_file(manifest, manifest_path)
+
+            with open(manifest_path, "rb") as infile:
+                entries = [parse_manifest_line(line) for line in infile]
+
+        entries = [entry for entry in entries if entry]
+
+        self.assertListEqual([trimmed_path for trimmed_path, _ in entries], sorted(manifest.keys()))
+
+        request = manifest_entry_to_request(*entries[0])
+
+        self.assertDictEqual(
+            request,
+            {
+                "ingress_path": "/data/bundle/file_a.xml",
+                "trimmed_path": "bundle/file_a.xml",
+                "md5": "beefdead",
+                "size": 1,
+                "last_modified": 1704067200,
+            },
+        )
+
+        with self.assertRaises(ValueError):
+            parse_manifest_line('"bundle/file_a.xml": {"md5": ')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import json as json_module
+import logging
 import os
 import unittest
 from http import HTTPStatus
@@ -250,3 +251,36 @@ class LogUtilTest(unittest.TestCase):
         self.assertFalse(log_util._is_auth_error(requests.exceptions.HTTPError(response=other_response)))
         self.assertFalse(log_util._is_auth_error(requests.exceptions.HTTPError(response=None)))
         self.assertFalse(log_util._is_auth_error(ValueError("not an HTTP error")))
+
+    def test_redact_presigned_url(self):
+        """Signatures and session tokens should be redacted from presigned URLs before logging"""
+        sigv4_url = (
+            "https://bucket.s3.amazonaws.com/sbn/file.xml?uploadId=uid&X-Amz-Credential=AKID%2F20240102"
+            "&X-Amz-Security-Token=token&X-Amz-Signature=abc123"
+        )
+
+        self.assertEqual(
+            log_util.redact_presigned_url(sigv4_url),
+            "https://bucket.s3.amazonaws.com/sbn/file.xml?uploadId=uid&X-Amz-Credential=AKID%2F20240102"
+            "&X-Amz-Security-Token=REDACTED&X-Amz-Signature=REDACTED",
+        )
+
+        sigv2_url = "https://bucket.s3.amazonaws.com/file.xml?AWSAccessKeyId=AKID&Signature=abc%2B123&Expires=1"
+
+        self.assertEqual(
+            log_util.redact_presigned_url(sigv2_url),
+            "https://bucket.s3.amazonaws.com/file.xml?AWSAccessKeyId=AKID&Signature=REDACTED&Expires=1",
+        )
+
+        self.assertIsNone(log_util.redact_presigned_url(None))
+
+    def test_should_log_sample(self):
+        """Sampled messages are always logged when debugging, otherwise at the configured rate"""
+        logger = logging.getLogger("test_should_log_sample")
+
+        logger.setLevel(logging.DEBUG)
+        self.assertTrue(log_util.should_log_sample(logger, 0.0))
+
+        logger.setLevel(logging.INFO)
+        self.assertFalse(any(log_util.should_log_sample(logger, 0.0) for _ in range(100)))
+        self.assertTrue(all(log_util.should_log_sample(logger, 1.0) for _ in range(100)))
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import pds.ingress.util.manifest_util
+from pds.ingress.util.manifest_util import compress_manifest
+from pds.ingress.util.manifest_util import is_jsonl_manifest
+from pds.ingress.util.manifest_util import iter_decompressed
+from pds.ingress.util.manifest_util import iter_manifest_entries
+from pds.ingress.util.manifest_util import iter_stream
+from pds.ingress.util.manifest_util import manifest_compression
+from pds.ingress.util.report_util import write_manifest_file
+
+
+class ManifestUtilTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.manifest = {
+            "bundle/data/file_1.fits": {"md5": "0" * 32, "size": 17962560, "last_modified": "2024-08-19T20:36:50+00:00"},
+            "bundle/données/file_2.xml": {"md5": "1" * 32, "size": 0, "last_modified": "2024-08-19T20:36:51+00:00"},
+            "bundle/file_3.xml": {"md5": "2" * 32, "size": 123, "last_modified": "2024-08-19T20:36:52+00:00"},
+        }
+
+    def test_iter_json_manifest(self):
+        """Test incremental parsing of JSON manifests, regardless of how the stream is chunked"""
+        with tempfile.TemporaryDirectory() as working_dir:
+            manifest_path = os.path.join(working_dir, "manifest.json")
+            write_manifest_file(self.manifest, manifest_path)
+
+            with open(manifest_path, "rb") as infile:
+                client_manifest = infile.read()
+
+        for manifest_bytes in (client_manifest, json.dumps(self.manifest, indent=4, ensure_ascii=False).encode("utf-8")):
+            for read_size in (1, 2, 7, 64, 1024**2):
+                with self.subTest(read_size=read_size):
+                    entries = iter_manifest_entries(iter_stream(io.BytesIO(manifest_bytes), read_size))
+                    self.assertDictEqual(dict(entries), self.manifest)
+
+        self.assertListEqual(list(iter_manifest_entries([b" {\n} "])), [])
+
+    def test_iter_jsonl_manifest(self):
+        """Test parsing of JSON Lines manifests"""
+        manifest_bytes = "\n".join(
+            json.dumps(dict(entry, trimmed_path=trimmed_path)) for trimmed_path, entry in self.manifest.items()
+        ).encode("utf-8")
+
+        for read_size in (1, 5, 1024**2):
+            with self.subTest(read_size=read_size):
+                entries = iter_manifest_entries(iter_stream(io.BytesIO(manifest_bytes), read_size), jsonl=True)
+                self.assertDictEqual(dict(entries), self.manifest)
+
+        self.assertTrue(is_jsonl_manifest("manifests/manifest.JSONL"))
+        self.assertFalse(is_jsonl_manifest("manifests/manifest.json"))
+
+    def test_malformed_manifests(self):
+        """Test that malformed manifests raise ValueError"""
+        for manifest_bytes in (b"", b"[]", b'{"a": {}', b'{"a" {}}', b"{1: {}}", b'{"a": {}} trailing,'):
+            with self.subTest(manifest_bytes=manifest_bytes):
+                with self.assertRaises(ValueError):
+                    list(iter_manifest_entries([manifest_bytes]))
+
+        with self.assertRaises(ValueError):
+            list(iter_manifest_entries([b'{"size": 1}\n'], jsonl=True))
+
+    def _check_compressed_round_trip(self, compression):
+        """Compresses a manifest twice, checking the output is identical and streams back to the same entries"""
+        with tempfile.TemporaryDirectory() as working_dir:
+            manifest_path = os.path.join(working_dir, "manifest.json")
+            write_manifest_file(self.manifest, manifest_path)
+
+            outputs = []
+
+            for _ in range(2):
+                outfile = io.BytesIO()
+                md5 = compress_manifest(manifest_path, outfile, compression, read_size=7)
+                outputs.append((outfile.getvalue(), md5.hexdigest()))
+
+                # Touching the manifest must not change the compressed output
+                os.utime(manifest_path, (0, 0))
+
+        self.assertEqual(outputs[0], outputs[1])
+
+        compressed, md5_digest = outputs[0]
+
+        self.assertEqual(md5_digest, hashlib.md5(compressed).hexdigest())
+
+        chunks = iter_decompressed(iter_stream(io.BytesIO(compressed), 5), compression)
+        self.assertDictEqual(dict(iter_manifest_entries(chunks)), self.manifest)
+
+    def test_gzip_manifest(self):
+        """Test deterministic gzip compression of manifests, and streaming decompression"""
+        self._check_compressed_round_trip("gzip")
+
+        self.assertEqual(manifest_compression("manifests/manifest.json.gz"), "gzip")
+        self.assertEqual(manifest_compression("manifests/manifest.jsonl.ZST"), "zstd")
+        self.assertIsNone(manifest_compression("manifests/manifest.json"))
+        self.assertTrue(is_jsonl_manifest("manifests/manifest.jsonl.gz"))
+        self.assertFalse(is_jsonl_manifest("manifests/manifest.json.gz"))
+
+        # Truncated and corrupt streams are rejected
+        compressed = gzip.compress(b'{"a": {}}', mtime=0)
+
+        for malformed in (compressed[:-4], b"not gzip"):
+            with self.subTest(malformed=malformed):
+                with self.assertRaises(ValueError):
+                    list(iter_decompressed([malformed], "gzip"))
+
+    @unittest.skipIf(pds.ingress.util.manifest_util.zstandard is None, "zstandard is not installed")
+    def test_zstd_manifest(self):
+        """Test deterministic zstd compression of manifests, and streaming decompression"""
+        self._check_compressed_round_trip("zstd")
+
+    def test_zstd_unavailable(self):
+        """Test an informative error is raised for zstd manifests when zstandard is not installed"""
+        with patch.object(pds.ingress.util.manifest_util, "zstandard", None):
+            with self.assertRaises(RuntimeError):
+                list(iter_decompressed([b""], "zstd"))
+
+
+if __name__ == "__main__":
+    unittest.main()
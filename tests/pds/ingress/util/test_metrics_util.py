@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+import json
+import unittest
+from types import SimpleNamespace
+
+from pds.ingress.util.metrics_util import MAX_VALUES_PER_METRIC
+from pds.ingress.util.metrics_util import MetricsRecorder
+from pds.ingress.util.metrics_util import timing_bucket
+
+
+class MetricsUtilTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.emitted = []
+        self.recorder = MetricsRecorder("PDS/Test", "test-service", output=self.emitted.append)
+
+    def test_to_documents(self):
+        """Test serialization of recorded metrics into Embedded Metric Format documents"""
+        with self.recorder.timer("HeadObject"):
+            pass
+
+        self.recorder.increment("HeadObjects")
+        self.recorder.increment("HeadObjects", 2)
+        self.recorder.set_property("Node", "sbn")
+
+        (document,) = self.recorder.to_documents(timestamp=1704067200000)
+
+        self.assertDictEqual(
+            document["_aws"],
+            {
+                "Timestamp": 1704067200000,
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": "PDS/Test",
+                        "Dimensions": [["Service"]],
+                        "Metrics": [
+                            {"Name": "HeadObjects", "Unit": "Count"},
+                            {"Name": "HeadObjectTime", "Unit": "Milliseconds"},
+                        ],
+                    }
+                ],
+            },
+        )
+
+        self.assertEqual(document["Service"], "test-service")
+        self.assertEqual(document["Node"], "sbn")
+        self.assertEqual(document["HeadObjects"], 3)
+        self.assertEqual(document["HeadObjectTime"]["Count"], 1)
+        self.assertListEqual(document["HeadObjectTime"]["Counts"], [1])
+
+    def test_timings_aggregated(self):
+        """Test that timings are aggregated into a single document, however many are recorded"""
+        durations = [0.0] + [index / 10 for index in range(1, 50000)] + [10**9]
+
+        for duration in durations:
+            self.recorder.add_timing("Presign", duration)
+
+        self.recorder.increment("Presigns", len(durations))
+
+        (document,) = self.recorder.to_documents()
+
+        timing = document["PresignTime"]
+
+        self.assertLessEqual(len(timing["Values"]), MAX_VALUES_PER_METRIC)
+        self.assertEqual(len(timing["Values"]), len(timing["Counts"]))
+        self.assertEqual(sum(timing["Counts"]), len(durations))
+        self.assertEqual(timing["Count"], len(durations))
+        self.assertEqual(timing["Min"], 0.0)
+        self.assertEqual(timing["Max"], 10**9)
+        self.assertAlmostEqual(timing["Sum"], sum(durations), places=2)
+        self.assertEqual(document["Presigns"], len(durations))
+
+        # Each bucket is within about 13% of the durations it holds
+        for duration in (0.05, 1.0, 12.5, 480.0, 60000.0):
+            self.assertLess(abs(timing_bucket(duration) - duration) / duration, 0.13)
+
+    def test_instrument_handler(self):
+        """Test that metrics are emitted and reset after each invocation, including failed ones"""
+
+        @self.recorder.instrument_handler
+        def handler(event, context):
+            self.recorder.increment("Files", len(event))
+
+            if not event:
+                raise ValueError("Empty event")
+
+            return "done"
+
+        self.assertEqual(handler([1, 2], SimpleNamespace(aws_request_id="request-1")), "done")
+
+        with self.assertRaises(ValueError):
+            handler([], {})
+
+        self.assertEqual(len(self.emitted), 2)
+
+        first, second = (json.loads(document) for document in self.emitted)
+
+        self.assertEqual(first["Files"], 2)
+        self.assertEqual(first["RequestId"], "request-1")
+        self.assertEqual(second["Files"], 0)
+        self.assertNotIn("RequestId", second)
+        self.assertIn("InvocationTime", second)
+
+        # Nothing is emitted when disabled
+        self.recorder.enabled = False
+        handler([1], {})
+
+        self.assertEqual(len(self.emitted), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+import unittest
+
+from pds.ingress.util.preflight_util import is_unchanged_in_listing
+from pds.ingress.util.preflight_util import preflight_state
+from pds.ingress.util.preflight_util import PREFLIGHT_NEEDS_HASH
+from pds.ingress.util.preflight_util import PREFLIGHT_NEW
+from pds.ingress.util.preflight_util import PREFLIGHT_UNCHANGED
+
+
+class PreflightUtilTest(unittest.TestCase):
+    def test_preflight_state(self):
+        """Test derivation of pre-flight states from existing objects"""
+        unchanged = {"ContentLength": 10, "Metadata": {"mtime": "1704067200.0"}}
+        touched = {"ContentLength": 10, "Metadata": {"mtime": "1704067300.0"}}
+        resized = {"ContentLength": 11, "Metadata": {"mtime": "1704067200.0"}}
+        no_mtime = {"ContentLength": 10, "Metadata": {}}
+
+        self.assertEqual(preflight_state(10, 1704067200, []), PREFLIGHT_NEW)
+        self.assertEqual(preflight_state(10, 1704067200, [resized]), PREFLIGHT_NEW)
+        self.assertEqual(preflight_state(10, 1704067200, [touched]), PREFLIGHT_NEEDS_HASH)
+        self.assertEqual(preflight_state(10, 1704067200, [no_mtime]), PREFLIGHT_NEEDS_HASH)
+        self.assertEqual(preflight_state(10, 1704067200, [touched, unchanged]), PREFLIGHT_UNCHANGED)
+        self.assertEqual(preflight_state(10, 1704067200, [resized, unchanged]), PREFLIGHT_UNCHANGED)
+
+    def test_is_unchanged_in_listing(self):
+        """Test comparison of local files against listed objects"""
+        md5_digest = "d41d8cd98f00b204e9800998ecf8427e"
+
+        self.assertFalse(is_unchanged_in_listing(10, 100, None, []))
+        self.assertFalse(is_unchanged_in_listing(10, 100, None, [(11, None, 200)]))
+
+        # Without checksums, objects written after the file was modified are assumed current
+        self.assertTrue(is_unchanged_in_listing(10, 100, None, [(10, md5_digest, 100)]))
+        self.assertFalse(is_unchanged_in_listing(10, 100, None, [(10, md5_digest, 99)]))
+        self.assertTrue(is_unchanged_in_listing(10, 100, md5_digest, [(10, None, 100)]))
+
+        # Otherwise checksums take precedence
+        self.assertTrue(is_unchanged_in_listing(10, 100, md5_digest, [(10, md5_digest, 50)]))
+        self.assertFalse(is_unchanged_in_listing(10, 100, md5_digest, [(10, "0" * 32, 200)]))
+        self.assertTrue(is_unchanged_in_listing(10, 100, md5_digest, [(10, "0" * 32, 200), (10, md5_digest, 50)]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+import unittest
+from datetime import datetime
+from datetime import timezone
+from unittest.mock import patch
+from urllib.parse import urlencode
+
+import boto3
+from botocore.auth import S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+from botocore.credentials import Credentials
+from pds.ingress.util.sigv4_util import encode_object_key
+from pds.ingress.util.sigv4_util import SigV4Presigner
+
+SIGNING_TIME = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+REGION = "us-west-2"
+
+
+class SigV4UtilTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.credentials = Credentials("AKIDEXAMPLE", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY")
+
+        self.s3_client = boto3.client(
+            "s3",
+            region_name=REGION,
+            aws_access_key_id=self.credentials.access_key,
+            aws_secret_access_key=self.credentials.secret_key,
+            config=Config(signature_version="s3v4"),
+        )
+
+        self.presigner = SigV4Presigner(self.credentials, REGION)
+
+    def botocore_presign(self, client_method, params, http_method=None):
+        with patch("botocore.auth.get_current_datetime", return_value=SIGNING_TIME.replace(tzinfo=None)):
+            return self.s3_client.generate_presigned_url(
+                ClientMethod=client_method, Params=params, ExpiresIn=3600, HttpMethod=http_method
+            )
+
+    def object_url(self, bucket, key):
+        base_url = self.botocore_presign("head_bucket", {"Bucket": bucket}).split("?", 1)[0].rstrip("/")
+        return f"{base_url}/{encode_object_key(key)}"
+
+    def test_matches_botocore(self):
+        """Test that presigned URLs match those generated by botocore byte-for-byte"""
+        bucket, key = "my-bucket", "sbn/a b+c/ü.xml"
+
+        url = self.presigner.presign(
+            "PUT",
+            self.object_url(bucket, key),
+            headers={"Content-Length": 1024, "Content-MD5": "1B2M2Y8AsgTpgAmY7PhCfg==", "x-amz-meta-md5": "abc"},
+            timestamp=SIGNING_TIME,
+        )
+
+        expected_url = self.botocore_presign(
+            "put_object",
+            {
+                "Bucket": bucket,
+                "Key": key,
+                "ContentLength": 1024,
+                "ContentMD5": "1B2M2Y8AsgTpgAmY7PhCfg==",
+                "Metadata": {"md5": "abc"},
+            },
+        )
+
+        self.assertEqual(url, expected_url)
+
+        url = self.presigner.presign(
+            "PUT",
+            self.object_url(bucket, key),
+            query_params=[("uploadId", "u/+id"), ("partNumber", 3)],
+            timestamp=SIGNING_TIME,
+        )
+
+        expected_url = self.botocore_presign(
+            "upload_part", {"Bucket": bucket, "Key": key, "UploadId": "u/+id", "PartNumber": 3}
+        )
+
+        self.assertEqual(url, expected_url)
+
+        # Dotted bucket names are addressed path-style
+        url = self.presigner.presign(
+            "POST", self.object_url("my.bucket", key), query_params=[("uploadId", "uid")], timestamp=SIGNING_TIME
+        )
+
+        expected_url = self.botocore_presign(
+            "complete_multipart_upload", {"Bucket": "my.bucket", "Key": key, "UploadId": "uid"}, http_method="POST"
+        )
+
+        self.assertEqual(url, expected_url)
+
+    def test_query_parameters_and_session_token(self):
+        """Test signing of x-amz-* parameters carried in the query string, with temporary credentials"""
+        credentials = Credentials("AKIDEXAMPLE", "secret", token="session/token+value")
+        presigner = SigV4Presigner(credentials, REGION)
+
+        url = "https://my-bucket.s3.amazonaws.com/sbn/file.xml"
+        query_params = [("x-amz-meta-md5", "abc"), ("x-amz-storage-class", "GLACIER_IR")]
+
+        presigned_url = presigner.presign(
+            "PUT", url, query_params=query_params, headers={"Content-MD5": "md5=="}, timestamp=SIGNING_TIME
+        )
+
+        request = AWSRequest(method="PUT", url=f"{url}?{urlencode(query_params)}", headers={"Content-MD5": "md5=="})
+
+        with patch("botocore.auth.get_current_datetime", return_value=SIGNING_TIME.replace(tzinfo=None)):
+            S3SigV4QueryAuth(credentials, "s3", REGION, expires=3600).add_auth(request)
+
+        self.assertEqual(presigned_url, request.url)
+        self.assertIn("X-Amz-Security-Token=session%2Ftoken%2Bvalue", presigned_url)
+
+
+if __name__ == "__main__":
+    unittest.main()